@@ -9,7 +9,9 @@ import time
 import queue
 import json
 import base64
+import itertools
 import re
+import uuid
 from datetime import datetime, date, timedelta
 from flask import Flask, request, render_template, jsonify, flash, redirect, url_for, send_file, Response, stream_with_context, session
 from werkzeug.utils import secure_filename
@@ -22,6 +24,11 @@ from bol_extractor.extractor import BOLExtractor
 from requests_oauthlib import OAuth2Session
 from bol_extractor.config import Config
 from utils.prompt_loader import PromptLoader
+from utils.upload_jobs import upload_jobs, UploadJobWorkers, RETRYABLE_STATUSES
+from utils.google_clients import google_clients
+from utils.inventory_mirror import inventory_mirror, INVENTORY_SHEETS
+from utils.tag_index import tag_index
+from utils.tracking_store import tracking_store
 from drive_utils import DriveUploader
 from email_utils import send_email_with_attachment
 
@@ -39,20 +46,16 @@ def load_config():
         with open("config.json", "r") as f:
             return json.load(f)
     except:
-        return {"max_pages": 100, "enable_backup": True, "processing_timeout": 300, "batch_size": 50}
+        return {"max_pages": 100, "enable_backup": True, "processing_timeout": 300, "batch_size": 50, "job_workers": 2}
 
 def save_config(config):
     """Save system configuration to config.json."""
     with open("config.json", "w") as f:
         json.dump(config, f, indent=2)
 
-# Global log queue for live streaming
-log_queue = queue.Queue()
-
 def live_log(msg):
-    """Send log message to both console and live stream."""
+    """Send log message to the console."""
     print(msg)
-    log_queue.put(msg)
 
 def log_info(msg): 
     live_log(f"INFO: {msg}")
@@ -258,19 +261,46 @@ def upload_file():
     logger.info(f"Request files: {list(request.files.keys())}")
     logger.info(f"Request form: {dict(request.form)}")
     
+    # Job mode callers read JSON, so rejected uploads answer with the reason
+    # instead of a flash message and redirect
+    async_mode = request.form.get('mode') == 'async'
+    
     if 'file' not in request.files:
         logger.info("No file in request.files")
+        if async_mode:
+            return jsonify({'success': False, 'error': 'No file selected'}), 400
         flash('No file selected')
         return redirect(request.url)
     
     file = request.files['file']
     if file.filename == '':
+        if async_mode:
+            return jsonify({'success': False, 'error': 'No file selected'}), 400
         flash('No file selected')
         return redirect(request.url)
     
     if file and allowed_file(file.filename):
         try:
             filename = secure_filename(file.filename or "unknown.pdf")
+            
+            # Job mode: return immediately and stream progress over SSE
+            if async_mode:
+                # Each job keeps its own copy, so a later upload with the same name
+                # cannot replace the PDF of a job that is still queued or retried
+                job_id = uuid.uuid4().hex
+                filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}_{filename}")
+                file.save(filepath)
+                supplier = request.form.get('supplier', 'default') or 'default'
+                upload_jobs.create_job(filename, supplier, filepath, job_id=job_id)
+                start_job_workers()
+                log_info(f"Queued upload job {job_id} for {filename} (supplier: {supplier})")
+                return jsonify({
+                    'success': True,
+                    'job_id': job_id,
+                    'status_url': url_for('upload_job_status', job_id=job_id),
+                    'events_url': url_for('upload_job_events', job_id=job_id)
+                }), 202
+            
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
             file.save(filepath)
             
@@ -292,45 +322,19 @@ def upload_file():
                 extractor = BOLExtractor(config)
                 logger.info("BOL extractor initialized successfully")
                 
-                logger.info(f"Processing PDF at {filepath}")
-                result = extractor.process_bol_pdf(filepath)
+                # The extractor writes every coil to Google Sheets in a single batch
+                supplier = request.form.get('supplier', 'default') or 'default'
+                logger.info(f"Processing PDF at {filepath} (supplier: {supplier})")
+                result = extractor.process_bol_pdf_with_supplier(filepath, supplier)
                 logger.info(f"Processing result: {result}")
                 
                 if result.get('success'):
-                    # Get the coils data from the extraction result
-                    coils_data = result.get('data', {}).get('coils', [])
+                    coils_processed = result.get('coils_processed', 1)
+                    batch_result = result.get('batch_write_result')
+                    coils_written = batch_result.get('rows_added', 0) if batch_result else coils_processed
                     
-                    if coils_data:
-                        # Process each coil individually through the flattener and writer
-                        coils_written = 0
-                        from bol_extractor.json_flattener import JSONFlattener
-                        from bol_extractor.google_sheets_writer import GoogleSheetsWriter
-                        
-                        flattener = JSONFlattener()
-                        sheets_writer = GoogleSheetsWriter(config)
-                        
-                        for i, coil in enumerate(coils_data, 1):
-                            try:
-                                # Flatten individual coil data
-                                flattened_coil = flattener.flatten_bol_data(coil)
-                                
-                                # Write to Google Sheets
-                                sheet_result = sheets_writer.append_bol_data(flattened_coil)
-                                
-                                if sheet_result.get('success'):
-                                    coils_written += 1
-                                    logger.info(f"Coil {i} written to sheet row {sheet_result.get('row_number')}")
-                                else:
-                                    logger.error(f"Failed to write coil {i}: {sheet_result.get('error')}")
-                                    
-                            except Exception as coil_error:
-                                logger.error(f"Error processing coil {i}: {str(coil_error)}")
-                        
-                        flash(f'File {filename} processed successfully! Extracted {len(coils_data)} coils, wrote {coils_written} to sheets.', 'success')
-                        logger.info(f"BOL extraction completed: {len(coils_data)} coils extracted, {coils_written} written")
-                    else:
-                        flash(f'File {filename} processed but no coil data found.', 'warning')
-                        logger.warning(f"No coil data found in extraction result for {filename}")
+                    flash(f'File {filename} processed successfully! Extracted {coils_processed} coils, wrote {coils_written} to sheets.', 'success')
+                    logger.info(f"BOL extraction completed: {coils_processed} coils extracted, {coils_written} written")
                 else:
                     error_msg = result.get('error', 'Unknown processing error')
                     flash(f'File uploaded but processing failed: {error_msg}', 'warning')
@@ -346,12 +350,80 @@ def upload_file():
                 
         except Exception as e:
             logger.error(f"Error processing upload: {str(e)}")
+            if async_mode:
+                return jsonify({'success': False, 'error': f'Error processing file: {str(e)}'}), 500
             flash(f'Error processing file: {str(e)}', 'error')
             return redirect(url_for('bol_extractor'))
     
+    if async_mode:
+        return jsonify({'success': False, 'error': 'Invalid file type. Please upload a PDF file.'}), 400
     flash('Invalid file type. Please upload a PDF file.')
     return redirect(request.url)
 
+# Worker processes for queued upload jobs, started when the app is loaded
+job_workers = None
+
+def start_job_workers():
+    """Start the upload job workers using the worker count and timeout from config.json."""
+    global job_workers
+    if job_workers is None:
+        config = load_config()
+        job_workers = UploadJobWorkers(
+            upload_jobs,
+            workers=int(os.environ.get('JOB_WORKERS', config.get('job_workers', 2))),
+            timeout_seconds=config.get('processing_timeout', 300)
+        )
+    job_workers.start()
+
+@app.route('/upload/jobs')
+@login_required
+def upload_job_list():
+    """List recent upload jobs with their status, attempts and stage timings."""
+    return jsonify({'success': True, 'jobs': upload_jobs.list_jobs()})
+
+@app.route('/upload/jobs/<job_id>')
+@login_required
+def upload_job_status(job_id):
+    """Get the status of an upload job."""
+    job = upload_jobs.get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/upload/jobs/<job_id>/events')
+@login_required
+def upload_job_events(job_id):
+    """Stream page, coil and sheet-write events for an upload job using Server-Sent Events."""
+    return Response(
+        stream_with_context(upload_jobs.stream(job_id)),
+        mimetype="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/upload/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_upload_job(job_id):
+    """Cancel a queued or running upload job."""
+    if not upload_jobs.request_cancel(job_id):
+        return jsonify({'success': False, 'error': 'Job not found or already finished'}), 409
+    log_info(f"[{job_id[:8]}] Cancellation requested")
+    return jsonify({'success': True, 'job': upload_jobs.get_job(job_id)})
+
+@app.route('/upload/jobs/<job_id>/retry', methods=['POST'])
+@login_required
+def retry_upload_job(job_id):
+    """Re-queue a failed, cancelled or timed-out upload job; ?force=true also re-runs jobs that wrote to Sheets."""
+    force = request.args.get('force', '').lower() in ('1', 'true')
+    if not upload_jobs.retry_job(job_id, force=force):
+        job = upload_jobs.get_job(job_id)
+        if job and job['status'] in RETRYABLE_STATUSES and job['sheet_written']:
+            return jsonify({'success': False, 'error': 'Job already wrote coils to Google Sheets; '
+                            'check the sheet, then retry with force=true'}), 409
+        return jsonify({'success': False, 'error': 'Job not found or not retryable'}), 409
+    start_job_workers()
+    log_info(f"[{job_id[:8]}] Upload job re-queued")
+    return jsonify({'success': True, 'job': upload_jobs.get_job(job_id)})
+
 # Additional routes that templates are expecting
 @app.route('/work-order-form')
 @login_required
@@ -398,54 +470,15 @@ def lookup_heat_numbers():
         if not tag_list:
             return jsonify({'heat_numbers': ''})
         
-        # Initialize Google Sheets connection using existing infrastructure
-        import os
-        import json
-        import gspread
-        from google.oauth2.service_account import Credentials
-        
         try:
-            # Set up credentials
-            SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-            credentials = Credentials.from_service_account_info(
-                json.loads(os.environ['GOOGLE_SERVICE_ACCOUNT_KEY_NMP']), scopes=SCOPES
-            )
-            
-            client = gspread.authorize(credentials)
-            spreadsheet = client.open_by_key(os.environ['SPREADSHEET_ID_NMP'])
-            
-            # Access IN_PROCESS worksheet
-            in_process_sheet = spreadsheet.worksheet("IN_PROCESS")
-            
-            # Get all data from IN_PROCESS sheet
-            in_process_data = in_process_sheet.get_all_records()
-            
-            # Find matching heat numbers
-            found_heat_numbers = []
-            
-            for row in in_process_data:
-                # Look for tag number in various possible column names
-                tag_value = None
-                for col_name in ['Tag #', 'Tag Number', 'tag_number', 'Customer Tag', 'customer_tag']:
-                    if col_name in row and row[col_name]:
-                        tag_value = str(row[col_name]).strip().upper()
-                        break
-                
-                if tag_value and tag_value in tag_list:
-                    # Look for heat number in various possible column names
-                    heat_number = None
-                    for heat_col in ['Heat Number', 'Heat', 'heat_number', 'heat']:
-                        if heat_col in row and row[heat_col]:
-                            heat_number = str(row[heat_col]).strip()
-                            break
-                    
-                    if heat_number and heat_number not in found_heat_numbers:
-                        found_heat_numbers.append(heat_number)
+            # Tags are resolved through the local index of the IN_PROCESS mirror
+            found_heat_numbers = tag_index.heat_numbers(tag_list, sheets=('IN_PROCESS',))
             
             return jsonify({'heat_numbers': ', '.join(found_heat_numbers)})
             
         except Exception as e:
             logger.error(f"Error accessing Google Sheets: {str(e)}")
+            google_clients.invalidate()
             return jsonify({'heat_numbers': '', 'error': 'Unable to access inventory data'})
         
     except Exception as e:
@@ -516,12 +549,7 @@ def audit_invoice_integrity():
 def work_orders_json():
     """Serve work orders data as JSON for frontend consumption."""
     try:
-        if os.path.exists('work_orders.json'):
-            with open('work_orders.json', 'r') as f:
-                work_orders = json.load(f)
-            return jsonify(work_orders)
-        else:
-            return jsonify([])
+        return jsonify(tracking_store.work_orders.all(newest_first=True))
     except Exception as e:
         logger.error(f"Error loading work orders: {str(e)}")
         return jsonify([])
@@ -531,12 +559,7 @@ def work_orders_json():
 def get_invoices():
     """Get all invoice records for the dashboard."""
     try:
-        if os.path.exists('invoice_tracking.json'):
-            with open('invoice_tracking.json', 'r') as f:
-                invoices = json.load(f)
-            return jsonify(invoices)
-        else:
-            return jsonify([])
+        return jsonify(tracking_store.invoices.all())
     except Exception as e:
         logger.error(f"Error loading invoices: {str(e)}")
         return jsonify([])
@@ -564,12 +587,7 @@ def history():
 def get_bol_history():
     """Get all BOL history records."""
     try:
-        if os.path.exists('bol_tracking.json'):
-            with open('bol_tracking.json', 'r') as f:
-                bol_history = json.load(f)
-            return jsonify(bol_history)
-        else:
-            return jsonify([])
+        return jsonify(tracking_store.bol_tracking.all())
     except Exception as e:
         logger.error(f"Error loading BOL history: {str(e)}")
         return jsonify([])
@@ -596,20 +614,15 @@ def finished_tags_archive():
     """Display finished tags archive viewer."""
     try:
         # Load finished tags data
-        finished_tags = []
+        finished_tags = tracking_store.finished_tags.all()
         total_weight = 0
-        total_tags = 0
         
-        if os.path.exists('finished_tags.json'):
-            with open('finished_tags.json', 'r') as f:
-                finished_tags = json.load(f)
-            
-            # Calculate totals
-            total_tags = len(finished_tags)
-            for tag in finished_tags:
-                weight = tag.get('total_weight', 0)
-                if isinstance(weight, (int, float)):
-                    total_weight += weight
+        # Calculate totals
+        total_tags = len(finished_tags)
+        for tag in finished_tags:
+            weight = tag.get('total_weight', 0)
+            if isinstance(weight, (int, float)):
+                total_weight += weight
         
         return render_template('finished_tags_archive.html', 
                              finished_tags=finished_tags,
@@ -627,12 +640,7 @@ def finished_tags_archive():
 def get_work_orders():
     """Get available work orders for BOL generation."""
     try:
-        if os.path.exists('work_orders.json'):
-            with open('work_orders.json', 'r') as f:
-                work_orders = json.load(f)
-            return jsonify(work_orders)
-        else:
-            return jsonify([])
+        return jsonify(tracking_store.work_orders.all(newest_first=True))
     except Exception as e:
         logger.error(f"Error loading work orders: {str(e)}")
         return jsonify([])
@@ -669,18 +677,8 @@ def manual_upload():
                 'document_type': request.form.get('document_type', '')
             }
             
-            # Save to tracking file
-            tracking_file = 'manual_uploads.json'
-            if os.path.exists(tracking_file):
-                with open(tracking_file, 'r') as f:
-                    tracking_data = json.load(f)
-            else:
-                tracking_data = []
-            
-            tracking_data.append(upload_record)
-            
-            with open(tracking_file, 'w') as f:
-                json.dump(tracking_data, f, indent=2)
+            # Save to tracking store
+            tracking_store.manual_uploads.add(upload_record)
             
             flash('File uploaded successfully')
             return redirect(url_for('manual_upload'))
@@ -698,14 +696,8 @@ def manual_upload():
 def get_bol_uploads():
     """Get recent BOL upload records."""
     try:
-        if os.path.exists('manual_uploads.json'):
-            with open('manual_uploads.json', 'r') as f:
-                uploads = json.load(f)
-            # Filter for BOL uploads only
-            bol_uploads = [upload for upload in uploads if upload.get('document_type') == 'bol']
-            return jsonify(bol_uploads)
-        else:
-            return jsonify([])
+        # Filter for BOL uploads only
+        return jsonify(tracking_store.manual_uploads.find(document_type='bol'))
     except Exception as e:
         logger.error(f"Error loading BOL uploads: {str(e)}")
         return jsonify([])
@@ -727,12 +719,7 @@ def quotes_form():
 def api_get_quotes():
     """API endpoint to get all quotes with lifecycle status"""
     try:
-        if os.path.exists('quotes.json'):
-            with open('quotes.json', 'r') as f:
-                quotes = json.load(f)
-            return jsonify(quotes)
-        else:
-            return jsonify([])
+        return jsonify(tracking_store.quotes.all())
     except Exception as e:
         logger.error(f"Error loading quotes: {str(e)}")
         return jsonify([])
@@ -748,14 +735,8 @@ def purchase_orders():
 def get_po_uploads():
     """Get recent PO upload records only."""
     try:
-        if os.path.exists('manual_uploads.json'):
-            with open('manual_uploads.json', 'r') as f:
-                uploads = json.load(f)
-            # Filter for PO uploads only
-            po_uploads = [upload for upload in uploads if upload.get('document_type') == 'po']
-            return jsonify(po_uploads)
-        else:
-            return jsonify([])
+        # Filter for PO uploads only
+        return jsonify(tracking_store.manual_uploads.find(document_type='po'))
     except Exception as e:
         logger.error(f"Error loading PO uploads: {str(e)}")
         return jsonify([])
@@ -791,16 +772,7 @@ def upload_signed_bol():
             }
             
             try:
-                if os.path.exists('bol_tracking.json'):
-                    with open('bol_tracking.json', 'r') as f:
-                        tracking_data = json.load(f)
-                else:
-                    tracking_data = []
-                
-                tracking_data.append(upload_record)
-                
-                with open('bol_tracking.json', 'w') as f:
-                    json.dump(tracking_data, f, indent=2)
+                tracking_store.bol_tracking.add(upload_record)
                 
                 flash('Signed BOL uploaded successfully')
                 return redirect(url_for('upload_signed_bol'))
@@ -847,21 +819,33 @@ def health():
     """Health check endpoint - returns JSON for API calls."""
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
+@app.route('/health/google')
+def google_health():
+    """Google Sheets connectivity probe using the shared client registry."""
+    probe = google_clients.health_check()
+    return jsonify(probe), 200 if probe['healthy'] else 503
+
 @app.route('/health-status')
 def health_status_page():
     """Health status page - returns HTML for browser access."""
+    probe = google_clients.health_check()
     health_data = {
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'services': ['Flask App', 'Database', 'File System']
+        'services': ['Flask App', 'Database', 'File System'],
+        'google_sheets': 'connected' if probe['healthy'] else 'disconnected'
     }
     return render_template('health.html', health=health_data)
 
 @app.route('/stream')
 @login_required
 def stream_logs():
-    """Stream live logs using Server-Sent Events."""
-    return "Event stream not yet implemented", 501
+    """Stream live upload job progress from every worker using Server-Sent Events."""
+    return Response(
+        stream_with_context(upload_jobs.stream_activity()),
+        mimetype="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/regenerate-finished-tag/<tag_id>')
 @login_required
@@ -869,6 +853,44 @@ def regenerate_finished_tag_pdf(tag_id):
     """Regenerate and download PDF for a finished tag."""
     return "PDF regeneration not yet implemented", 501
 
+@app.route('/finished-tags/labels')
+@login_required
+def finished_tag_labels():
+    """Download the finished tags of a work order, PO, customer or date range as one 4x6 label PDF."""
+    filters = {
+        'work_order_number': request.args.get('work_order') or None,
+        'customer_po': request.args.get('po') or None,
+        'customer_name': request.args.get('customer') or None,
+        'date_from': request.args.get('date_from') or None,
+        'date_to': request.args.get('date_to') or None
+    }
+    if not any(filters.values()):
+        return jsonify({'error': 'Choose a work order, PO, customer or date range'}), 400
+    
+    try:
+        import tempfile
+        from generate_finished_tag_pdf import find_finished_tags_for_labels, generate_finished_tag_labels_pdf, MAX_LABELS_PER_BATCH
+        
+        tags = find_finished_tags_for_labels(limit=MAX_LABELS_PER_BATCH + 1, **filters)
+        if not tags:
+            return jsonify({'error': 'No finished tags match'}), 404
+        if len(tags) > MAX_LABELS_PER_BATCH:
+            return jsonify({'error': f'More than {MAX_LABELS_PER_BATCH} finished tags match; narrow the selection'}), 400
+        
+        # Render into a spooled buffer that spills to disk for large batches, then stream it out
+        pdf_file = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        generate_finished_tag_labels_pdf(tags, pdf_file)
+        pdf_file.seek(0)
+        
+        name = filters['work_order_number'] or filters['customer_po'] or filters['customer_name'] or filters['date_from'] or filters['date_to']
+        download_name = f"NMP-FINISHED-TAG-LABELS-{secure_filename(name)}-{len(tags)}.pdf"
+        log_info(f"Streaming {len(tags)} finished tag labels as {download_name}")
+        return send_file(pdf_file, mimetype='application/pdf', as_attachment=True, download_name=download_name)
+    
+    except Exception as e:
+        log_error(f"Error generating finished tag labels: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/finished-tags')
 @login_required
 def finished_tags():
@@ -943,44 +965,43 @@ def inventory_dashboard():
     return render_template('inventory_dashboard.html')
 
 def load_inventory_data(sheet_name, customer_name):
-    """Load and filter inventory data from Google Sheets by customer name."""
+    """Load and filter inventory data by customer name from the local inventory mirror."""
     try:
-        from bol_extractor.config import Config
-        import gspread
-        import json
-        from google.oauth2.service_account import Credentials
-        
-        # Initialize configuration
-        config = Config()
-        
-        # Set up Google Sheets credentials
-        SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-        credentials = Credentials.from_service_account_info(
-            json.loads(config.google_service_account_key), scopes=SCOPES
-        )
-        
-        client = gspread.authorize(credentials)
-        sheet = client.open_by_key(config.spreadsheet_id)
-        
-        # Get the specific worksheet
-        worksheet = sheet.worksheet(sheet_name)
-        
-        # Get all records
-        all_records = worksheet.get_all_records()
-        
-        # Filter by customer (case-insensitive)
-        filtered_records = []
-        for record in all_records:
-            customer_field = str(record.get('Customer', '')).strip().lower()
-            if customer_name.lower() in customer_field or customer_field in customer_name.lower():
-                filtered_records.append(record)
-        
-        return filtered_records
+        # The mirror downloads the worksheet only when its copy is older than the TTL
+        return inventory_mirror.get_customer_records(sheet_name, customer_name)
         
     except Exception as e:
         log_error(f"Error loading inventory data from {sheet_name}: {str(e)}")
+        google_clients.invalidate()
         return []
 
+def iter_inventory_data(sheet_name, customer_name):
+    """Iterate a customer's inventory rows from the local inventory mirror without copying them all up front."""
+    try:
+        return inventory_mirror.iter_customer_records(sheet_name, customer_name)
+        
+    except Exception as e:
+        log_error(f"Error loading inventory data from {sheet_name}: {str(e)}")
+        google_clients.invalidate()
+        return iter([])
+
+@app.route('/api/inventory/refresh', methods=['POST'])
+@login_required
+def refresh_inventory_mirror():
+    """Re-download one or all inventory worksheets into the local mirror."""
+    sheet_name = request.args.get('sheet')
+    if sheet_name and sheet_name not in INVENTORY_SHEETS:
+        return jsonify({'success': False, 'error': f'Unknown inventory sheet: {sheet_name}'}), 400
+    
+    refreshed = {}
+    for name in ([sheet_name] if sheet_name else INVENTORY_SHEETS):
+        try:
+            refreshed[name] = len(inventory_mirror.refresh(name)['records'])
+        except Exception as e:
+            log_error(f"Error refreshing inventory mirror for {name}: {str(e)}")
+            refreshed[name] = None
+    return jsonify({'success': True, 'rows': refreshed, 'mirror': inventory_mirror.status()})
+
 @app.route('/inventory-report/unprocessed/<customer_name>')
 @login_required
 def inventory_report_unprocessed(customer_name):
@@ -1044,8 +1065,6 @@ def log_inventory_report_action(customer_name, report_type, action, pdf_file=Non
     try:
         from datetime import datetime
         
-        history_file = 'inventory_report_history.json'
-        
         # Create new entry
         entry = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -1056,23 +1075,8 @@ def log_inventory_report_action(customer_name, report_type, action, pdf_file=Non
             'sent_by': sent_by or get_current_user().get('email', 'system') if get_current_user() else 'system'
         }
         
-        # Load existing history
-        try:
-            with open(history_file, 'r') as f:
-                history = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            history = []
-        
-        # Add new entry
-        history.append(entry)
-        
-        # Auto-truncate to latest 500 records
-        if len(history) > 500:
-            history = history[-500:]
-        
-        # Save updated history
-        with open(history_file, 'w') as f:
-            json.dump(history, f, indent=2)
+        # Add new entry; the history page shows the latest 500
+        tracking_store.inventory_report_history.add(entry)
         
         log_info(f"Logged inventory report action: {action} for {customer_name} ({report_type})")
         
@@ -1080,194 +1084,70 @@ def log_inventory_report_action(customer_name, report_type, action, pdf_file=Non
         log_error(f"Failed to log inventory report action: {str(e)}")
 
 def generate_inventory_pdf(customer_name, status, inventory_data):
-    """Generate PDF from inventory report data using ReportLab."""
+    """Generate PDF from inventory report data using the shared PDF renderer."""
     try:
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.lib import colors
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from datetime import datetime
-        import re
-        
-        # Sanitize customer name for filename
-        safe_customer = re.sub(r'[^a-zA-Z0-9_\-]', '_', customer_name)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"NMP_Inventory_{status.replace(' ', '_')}_{safe_customer}_{timestamp}.pdf"
-        pdf_path = os.path.join('pdf_outputs', filename)
-        
-        # Ensure pdf_outputs directory exists
-        os.makedirs('pdf_outputs', exist_ok=True)
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-        styles = getSampleStyleSheet()
-        elements = []
-        
-        # Title style
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1,  # Center alignment
-            textColor=colors.HexColor('#2c5282')
-        )
-        
-        # Add title
-        title = Paragraph(f"NICAYNE METAL PROCESSING<br/>{status} Inventory Report", title_style)
-        elements.append(title)
-        
-        # Add customer and date info
-        info_style = ParagraphStyle(
-            'InfoStyle',
-            parent=styles['Normal'],
-            fontSize=12,
-            spaceAfter=20,
-            alignment=1
-        )
-        info = Paragraph(f"Customer: <b>{customer_name}</b><br/>Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", info_style)
-        elements.append(info)
-        elements.append(Spacer(1, 12))
+        from generate_inventory_pdf import generate_inventory_pdf as render_inventory_pdf
+        pdf_path = render_inventory_pdf(customer_name, status, inventory_data)
+        log_info(f"PDF generated successfully: {os.path.basename(pdf_path)}")
+        return pdf_path
         
-        if inventory_data:
-            # Prepare table data
-            headers = list(inventory_data[0].keys())
-            # Limit columns for better formatting
-            main_columns = ['Customer', 'Date', 'Material Type', 'Thickness', 'Width', 'Weight', 'Pieces']
-            if 'Status' in headers:
-                main_columns.append('Status')
-            
-            # Filter headers to main columns that exist
-            filtered_headers = [h for h in main_columns if h in headers]
-            
-            table_data = [filtered_headers]
-            
-            for item in inventory_data:
-                row = []
-                for header in filtered_headers:
-                    value = item.get(header, '')
-                    # Convert to string and handle None values
-                    if value is None or value == '':
-                        row.append('-')
-                    else:
-                        row.append(str(value))
-                table_data.append(row)
-            
-            # Create table
-            table = Table(table_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            
-            elements.append(table)
-            elements.append(Spacer(1, 20))
-            
-            # Add summary
-            total_items = len(inventory_data)
-            total_weight = sum(float(item.get('Weight', 0) or 0) for item in inventory_data)
-            total_pieces = sum(int(item.get('Pieces', 0) or 0) for item in inventory_data)
-            
-            summary_style = ParagraphStyle(
-                'SummaryStyle',
-                parent=styles['Normal'],
-                fontSize=11,
-                spaceAfter=10
-            )
-            
-            summary = Paragraph(f"<b>Summary:</b> {total_items} items | {total_weight:.2f} lbs total weight | {total_pieces} total pieces", summary_style)
-            elements.append(summary)
-        else:
-            # No data message
-            no_data = Paragraph(f"No {status.lower()} inventory found for customer {customer_name}.", styles['Normal'])
-            elements.append(no_data)
+    except Exception as e:
+        log_error(f"Error generating PDF: {str(e)}")
+        return None
+
+def stream_inventory_pdf(customer_name, status, inventory_rows, report_type):
+    """Render an inventory report into a spooled buffer and stream it as a download."""
+    try:
+        import tempfile
+        from generate_inventory_pdf import generate_inventory_pdf as render_inventory_pdf, inventory_pdf_filename
         
-        # Build PDF
-        doc.build(elements)
+        # Small reports stay in memory; large ones spill to a temporary file instead of pdf_outputs/
+        pdf_file = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        render_inventory_pdf(customer_name, status, inventory_rows, pdf_file)
+        pdf_file.seek(0)
+        filename = inventory_pdf_filename(customer_name, status)
         log_info(f"PDF generated successfully: {filename}")
-        return pdf_path
         
     except Exception as e:
         log_error(f"Error generating PDF: {str(e)}")
-        return None
+        return jsonify({'error': 'Failed to generate PDF'}), 500
+    
+    # Log the export action; streamed exports keep no copy in pdf_outputs/ to link to
+    log_inventory_report_action(customer_name, report_type, "exported")
+    return send_file(pdf_file, mimetype='application/pdf', as_attachment=True, download_name=filename)
 
 @app.route('/export-pdf/unprocessed/<customer_name>')
 @login_required
 def export_pdf_unprocessed(customer_name):
     """Export unprocessed inventory report as PDF."""
-    inventory_data = load_inventory_data("UNPROCESSED_INVENTORY", customer_name)
-    pdf_path = generate_inventory_pdf(customer_name, "Unprocessed", inventory_data)
-    
-    if pdf_path and os.path.exists(pdf_path):
-        # Log the export action
-        log_inventory_report_action(customer_name, "unprocessed", "exported", pdf_path)
-        return send_file(pdf_path, as_attachment=True, download_name=os.path.basename(pdf_path))
-    else:
-        return jsonify({'error': 'Failed to generate PDF'}), 500
+    inventory_rows = iter_inventory_data("UNPROCESSED_INVENTORY", customer_name)
+    return stream_inventory_pdf(customer_name, "Unprocessed", inventory_rows, "unprocessed")
 
 @app.route('/export-pdf/in-process/<customer_name>')
 @login_required
 def export_pdf_in_process(customer_name):
     """Export in-process inventory report as PDF."""
-    inventory_data = load_inventory_data("IN_PROCESS", customer_name)
-    pdf_path = generate_inventory_pdf(customer_name, "In-Process", inventory_data)
-    
-    if pdf_path and os.path.exists(pdf_path):
-        # Log the export action
-        log_inventory_report_action(customer_name, "in-process", "exported", pdf_path)
-        return send_file(pdf_path, as_attachment=True, download_name=os.path.basename(pdf_path))
-    else:
-        return jsonify({'error': 'Failed to generate PDF'}), 500
+    inventory_rows = iter_inventory_data("IN_PROCESS", customer_name)
+    return stream_inventory_pdf(customer_name, "In-Process", inventory_rows, "in-process")
 
 @app.route('/export-pdf/processed/<customer_name>')
 @login_required
 def export_pdf_processed(customer_name):
     """Export processed inventory report as PDF."""
-    inventory_data = load_inventory_data("PROCESSED", customer_name)
-    pdf_path = generate_inventory_pdf(customer_name, "Processed", inventory_data)
-    
-    if pdf_path and os.path.exists(pdf_path):
-        # Log the export action
-        log_inventory_report_action(customer_name, "processed", "exported", pdf_path)
-        return send_file(pdf_path, as_attachment=True, download_name=os.path.basename(pdf_path))
-    else:
-        return jsonify({'error': 'Failed to generate PDF'}), 500
+    inventory_rows = iter_inventory_data("PROCESSED", customer_name)
+    return stream_inventory_pdf(customer_name, "Processed", inventory_rows, "processed")
 
 @app.route('/export-pdf/all/<customer_name>')
 @login_required
 def export_pdf_all(customer_name):
     """Export unified inventory report as PDF."""
-    unprocessed_data = load_inventory_data("UNPROCESSED_INVENTORY", customer_name)
-    in_process_data = load_inventory_data("IN_PROCESS", customer_name)
-    processed_data = load_inventory_data("PROCESSED", customer_name)
-    
-    # Add status field to each record
-    for record in unprocessed_data:
-        record['Status'] = 'Unprocessed'
-    for record in in_process_data:
-        record['Status'] = 'In-Process'
-    for record in processed_data:
-        record['Status'] = 'Processed'
-    
-    all_inventory_data = unprocessed_data + in_process_data + processed_data
-    pdf_path = generate_inventory_pdf(customer_name, "All Statuses", all_inventory_data)
-    
-    if pdf_path and os.path.exists(pdf_path):
-        # Log the export action
-        log_inventory_report_action(customer_name, "all", "exported", pdf_path)
-        return send_file(pdf_path, as_attachment=True, download_name=os.path.basename(pdf_path))
-    else:
-        return jsonify({'error': 'Failed to generate PDF'}), 500
+    # Add status field to each record as the report reads it
+    all_inventory_rows = itertools.chain(
+        (dict(record, Status='Unprocessed') for record in iter_inventory_data("UNPROCESSED_INVENTORY", customer_name)),
+        (dict(record, Status='In-Process') for record in iter_inventory_data("IN_PROCESS", customer_name)),
+        (dict(record, Status='Processed') for record in iter_inventory_data("PROCESSED", customer_name))
+    )
+    return stream_inventory_pdf(customer_name, "All Statuses", all_inventory_rows, "all")
 
 @app.route('/email-inventory-report/<customer_name>')
 @login_required
@@ -1381,14 +1261,8 @@ This is an automated message from the Nicayne OS platform.
 def report_history():
     """Display inventory report history and audit logs."""
     try:
-        history_file = 'inventory_report_history.json'
-        
-        # Load history
-        try:
-            with open(history_file, 'r') as f:
-                history = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            history = []
+        # Load the latest 500 history entries
+        history = tracking_store.inventory_report_history.all(newest_first=True, limit=500)
         
         # Sort by timestamp descending (newest first)
         history.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -1413,5 +1287,12 @@ def upload_to_po():
     """Handle file uploads to customer PO folders in Google Drive."""
     return jsonify({'success': True, 'message': 'PO upload handler'})
 
+# Start the job supervisor with the app, so queued jobs and jobs left running by a
+# previous server are picked up without waiting for an upload. Worker processes
+# spawned from `python app.py` re-import this module as __mp_main__ and must not
+# start supervisors of their own.
+if __name__ != '__mp_main__':
+    start_job_workers()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
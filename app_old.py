@@ -24,6 +24,11 @@ from bol_extractor.config import Config
 from utils.prompt_loader import PromptLoader
 from drive_utils import DriveUploader
 from email_utils import send_email_with_attachment
+from utils.google_clients import google_clients
+from utils.inventory_transitions import inventory_transitions
+from utils.tracking_store import tracking_store
+from utils.work_order_index import work_order_index, SORT_COLUMNS
+from utils.tracking_log import job_history_log, file_upload_log, manual_upload_log, signed_bol_log, quote_log
 import gspread
 from google.oauth2 import service_account
 
@@ -458,15 +463,7 @@ def upload_file():
                     "backup": None
                 }
                 
-                try:
-                    with open("job_history.json", "r") as f:
-                        history = json.load(f)
-                except:
-                    history = []
-                
-                history.insert(0, history_entry)  # newest first
-                with open("job_history.json", "w") as f:
-                    json.dump(history, f, indent=2)
+                job_history_log.append(history_entry)
                 
                 flash(f'Successfully processed {coils_count} coils from {filename} and added to spreadsheet!')
                 return redirect(url_for('dashboard'))
@@ -715,9 +712,9 @@ def stream_logs():
 def history():
     """Display job history page."""
     try:
-        with open("job_history.json", "r") as f:
-            job_list = json.load(f)
-    except:
+        job_list = job_history_log.read(newest_first=True)
+    except Exception as e:
+        log_error(f"Error reading job history: {str(e)}")
         job_list = []
     return render_template("history.html", jobs=job_list)
 
@@ -849,20 +846,7 @@ def work_order_form():
             folder_path = create_customer_folder_structure(form_data)
             
             # Update master list
-            try:
-                with open("work_orders.json", "r") as f:
-                    work_orders = json.load(f)
-            except:
-                work_orders = []
-            
-            work_orders.insert(0, form_data)  # newest first
-            with open("work_orders.json", "w") as f:
-                json.dump(work_orders, f, indent=2)
-            
-            # Generate PDF
-            logger.info("Starting PDF generation...")
-            pdf_path = generate_work_order_pdf(form_data)
-            logger.info(f"PDF generated at: {pdf_path}")
+            tracking_store.work_orders.add(form_data)
             
             # Process inventory matching and validation first
             logger.info("Processing inventory matching...")
@@ -889,42 +873,30 @@ def work_order_form():
             save_work_order_to_sheet(form_data)
             logger.info("Google Sheets save complete")
             
-            # Upload PDF to Google Drive and get shareable link
-            logger.info("Uploading PDF to Google Drive...")
+            # Generate the PDF once, with a QR link to its reserved Drive file, and upload it once
+            logger.info("Generating PDF and uploading to Google Drive...")
+            pdf_path = None
             drive_url = None
             try:
                 from drive_utils import DriveUploader
                 uploader = DriveUploader()
-                upload_result = uploader.upload_work_order_pdf(pdf_path, form_data['customer_name'], form_data['customer_po'])
-                if upload_result.get('upload_success'):
-                    drive_url = upload_result.get('file_link')
-                    logger.info(f"PDF uploaded to Drive: {upload_result.get('folder_path')}")
+                pdf_path, upload_result, drive_url = uploader.render_and_upload(
+                    lambda url: generate_work_order_pdf(form_data, url),
+                    lambda path, file_id: uploader.upload_work_order_pdf(
+                        path, form_data['customer_name'], form_data['customer_po'], file_id=file_id
+                    )
+                )
+                if drive_url:
+                    logger.info(f"PDF with QR code uploaded to Drive: {upload_result.get('folder_path')}")
                     logger.info(f"Drive share URL: {drive_url}")
                 else:
-                    logger.warning(f"Drive upload failed: {upload_result.get('error')}")
+                    logger.warning(f"Drive upload failed, PDF generated without QR code: {(upload_result or {}).get('error')}")
             except Exception as e:
                 logger.warning(f"Drive upload error: {str(e)}")
             
-            # Regenerate PDF with QR code if Drive URL is available
-            if drive_url:
-                logger.info("Regenerating PDF with QR code...")
-                try:
-                    from generate_work_order_pdf import generate_work_order_pdf_from_form_data
-                    pdf_path_with_qr = generate_work_order_pdf_from_form_data(form_data, drive_url)
-                    
-                    # Replace the original PDF with QR-enabled version
-                    if pdf_path_with_qr and os.path.exists(pdf_path_with_qr):
-                        # Re-upload the QR-enabled PDF to replace the original
-                        upload_result = uploader.upload_work_order_pdf(pdf_path_with_qr, form_data['customer_name'], form_data['customer_po'])
-                        if upload_result.get('upload_success'):
-                            logger.info("PDF with QR code uploaded successfully")
-                            pdf_path = pdf_path_with_qr  # Use the QR-enabled version for local download
-                        else:
-                            logger.warning("Failed to upload QR-enabled PDF, keeping original")
-                except Exception as e:
-                    logger.warning(f"Error generating PDF with QR code: {str(e)}")
-            else:
-                logger.info("No Drive URL available, PDF generated without QR code")
+            if not pdf_path:
+                pdf_path = generate_work_order_pdf(form_data)
+            logger.info(f"PDF generated at: {pdf_path}")
             
             if matched_count > 0:
                 logger.info(f"Matched and processed {matched_count} coils for work order {work_order_number}")
@@ -1025,11 +997,11 @@ def work_order_form():
                          date=date.today().strftime('%Y-%m-%d'),
                          form_data=test_data)
 
-def generate_work_order_pdf(data):
+def generate_work_order_pdf(data, drive_url=None):
     """Generate a PDF work order document using the new professional design."""
     from generate_work_order_pdf import generate_work_order_pdf_from_form_data
     
-    return generate_work_order_pdf_from_form_data(data)
+    return generate_work_order_pdf_from_form_data(data, drive_url)
 
 def save_work_order_to_sheet(data):
     """Save work order to Google Sheets."""
@@ -1041,23 +1013,8 @@ def save_work_order_to_sheet(data):
             logger.warning("No spreadsheet ID configured for work orders")
             return
         
-        import gspread
-        from google.oauth2.service_account import Credentials
-        
-        # Use existing credentials from BOL extractor
-        SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-        credentials = Credentials.from_service_account_info(
-            json.loads(config.google_service_account_key), scopes=SCOPES
-        )
-        
-        client = gspread.authorize(credentials)
-        sheet = client.open_by_key(config.spreadsheet_id)
-        
-        # Try to get work_orders worksheet, create if not exists
-        try:
-            ws = sheet.worksheet("work_orders")
-        except gspread.exceptions.WorksheetNotFound:
-            ws = sheet.add_worksheet(title="work_orders", rows=1000, cols=20)
+        # Get work_orders worksheet from the shared clients, create if not exists
+        ws = google_clients.get_worksheet("work_orders", config.spreadsheet_id, create_rows=1000)
         
         # Flatten data for sheet writing
         flat_data = {
@@ -1126,123 +1083,20 @@ def match_tags_and_move_to_in_processed(form_data):
         
         logger.info(f"Searching for coil tags: {all_tags}")
         
-        # Setup Google Sheets connection
-        from bol_extractor.config import Config
-        config = Config()
-        
-        import gspread
-        from google.oauth2.service_account import Credentials
-        
-        SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-        credentials = Credentials.from_service_account_info(
-            json.loads(config.google_service_account_key), scopes=SCOPES
-        )
-        
-        client = gspread.authorize(credentials)
-        sheet = client.open_by_key(config.spreadsheet_id)
-        
-        # Get unprocessed inventory worksheet
-        unprocessed = sheet.worksheet("UNPROCESSED_INVENTORY")
-        
-        # Get or create in-process worksheet
-        try:
-            in_processed = sheet.worksheet("IN_PROCESS")
-        except gspread.exceptions.WorksheetNotFound:
-            in_processed = sheet.add_worksheet(title="IN_PROCESS", rows=1000, cols=20)
-            # Copy headers from unprocessed to in-processed
-            headers = unprocessed.row_values(1)
-            if headers:
-                in_processed.append_row(headers)
-        
-        # Get all data from unprocessed sheet
-        all_data = unprocessed.get_all_records()
-        headers = unprocessed.row_values(1)
-        
-        if not headers:
-            logger.warning("No headers found in UNPROCESSED_INVENTORY sheet")
-            return 0
-        
-        # Find Customer PO column index
-        try:
-            po_col_index = headers.index("Customer PO") + 1  # gspread uses 1-based indexing
-        except ValueError:
-            # Try alternative column names
-            po_col_names = ["Customer_PO", "CustomerPO", "PO", "PO Number"]
-            po_col_index = None
-            for col_name in po_col_names:
-                try:
-                    po_col_index = headers.index(col_name) + 1
-                    break
-                except ValueError:
-                    continue
-            
-            if po_col_index is None:
-                logger.warning("Could not find Customer PO column in sheet")
-                return 0
-        
-        # Find Coil Tag column
-        try:
-            tag_col_name = None
-            tag_col_names = ["COIL_TAG#", "Coil Tag", "CoilTag", "Coil_Tag", "Tag", "Heat Number"]
-            for col_name in tag_col_names:
-                if col_name in headers:
-                    tag_col_name = col_name
-                    break
-            
-            if not tag_col_name:
-                logger.warning("Could not find Coil Tag column in sheet")
-                return 0
-            
-        except Exception as e:
-            logger.error(f"Error finding tag column: {str(e)}")
-            return 0
-        
-        matched_rows = []
-        matched_tags = []
-        unmatched_tags = []
-        
-        # Check each tag for matches in inventory
-        for tag in all_tags:
-            found = False
-            for idx, row in enumerate(all_data, start=2):  # start=2 to account for header row
-                coil_tag = str(row.get(tag_col_name, "")).upper().strip()
-                
-                if coil_tag == tag:
-                    logger.info(f"Found matching coil tag: {coil_tag}")
-                    found = True
-                    matched_tags.append(tag)
-                    
-                    # Update PO in unprocessed sheet
-                    unprocessed.update_cell(idx, po_col_index, po_number)
-                    
-                    # Prepare row for copying to in-process
-                    row_values = []
-                    for header in headers:
-                        value = row.get(header, "")
-                        # Update the PO value in the row data
-                        if header in ["Customer PO", "Customer_PO", "CustomerPO", "PO", "PO Number", "CUSTOMER_PO"]:
-                            value = po_number
-                        row_values.append(value)
-                    
-                    matched_rows.append(row_values)
-                    break
-            
-            if not found:
-                unmatched_tags.append(tag)
-        
-        # Copy matched rows to in-process sheet
-        for row in matched_rows:
-            in_processed.append_row(row)
+        # One read of UNPROCESSED_INVENTORY, one append to IN_PROCESS, one batch PO update
+        result = inventory_transitions.assign_to_work_order(all_tags, po_number)
+        matched_tags = result['matched_tags']
+        unmatched_tags = result['unmatched_tags']
         
         # Create customer folder structure
-        if matched_rows:
+        if matched_tags:
             create_customer_folder_structure(form_data)
         
-        logger.info(f"Successfully matched {len(matched_rows)} coils and moved to IN_PROCESS")
+        logger.info(f"Successfully matched {len(matched_tags)} coils and moved to IN_PROCESS")
         if unmatched_tags:
             logger.warning(f"Unmatched tags: {unmatched_tags}")
         
-        return len(matched_rows), matched_tags, unmatched_tags
+        return len(matched_tags), matched_tags, unmatched_tags
         
     except Exception as e:
         logger.error(f"Error in inventory matching: {str(e)}")
@@ -1273,6 +1127,12 @@ def create_customer_folder_structure(form_data):
         
         logger.info(f"Work order saved to: {json_path}")
         
+        try:
+            work_order_index.record(json_path, form_data)
+        except Exception as index_error:
+            logger.error(f"Failed to index work order {json_path}: {str(index_error)}")
+            # The JSON file is saved; the index can be rebuilt from it
+        
         # Create Google Drive folder structure
         try:
             from drive_utils import DriveUploader
@@ -1300,69 +1160,30 @@ def create_customer_folder_structure(form_data):
         logger.error(f"Error creating folder structure: {str(e)}")
         return "work_orders"
 
-def get_work_order_history():
-    """Scan work order folders and collect history data"""
+def get_work_order_history(page=1, per_page=50, sort='date', descending=True):
+    """Get one page of work order history from the history index"""
     try:
-        base_path = "work_orders"
-        history = []
-        
-        if not os.path.exists(base_path):
-            return []
+        return work_order_index.query(page=page, per_page=per_page, sort=sort, descending=descending)
         
-        for customer in os.listdir(base_path):
-            customer_path = os.path.join(base_path, customer)
-            if not os.path.isdir(customer_path):
-                continue
-            
-            for po in os.listdir(customer_path):
-                po_path = os.path.join(customer_path, po)
-                if not os.path.isdir(po_path):
-                    continue
-                
-                for file in os.listdir(po_path):
-                    if file.endswith(".json"):
-                        try:
-                            json_path = os.path.join(po_path, file)
-                            with open(json_path, 'r') as f:
-                                data = json.load(f)
-                            
-                            # Count total tags from all jobs
-                            total_tags = 0
-                            for job in data.get('ctl_jobs', []):
-                                tags = job.get('customer_tags', '')
-                                if tags:
-                                    total_tags += len([t.strip() for t in tags.split(',') if t.strip()])
-                            
-                            for job in data.get('slitting_jobs', []):
-                                tags = job.get('customer_tags', '')
-                                if tags:
-                                    total_tags += len([t.strip() for t in tags.split(',') if t.strip()])
-                            
-                            history.append({
-                                "work_order_number": data.get("work_order_number", "Unknown"),
-                                "customer_name": customer,
-                                "po": po,
-                                "date": data.get("date_submitted", ""),
-                                "tag_count": total_tags,
-                                "all_tags": data.get("customer_tags", ""),
-                                "pdf_path": f"/download-work-order/{customer}/{po}/{data.get('work_order_number', 'unknown')}.pdf",
-                                "json_path": f"/download-work-order/{customer}/{po}/{file}"
-                            })
-                        except Exception as e:
-                            logger.error(f"Error reading work order JSON {json_path}: {str(e)}")
-                            continue
-        
-        return sorted(history, key=lambda x: x.get('date', ''), reverse=True)
-        
-    except Exception as e:
-        logger.error(f"Error scanning work order history: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error querying work order history: {str(e)}")
         return []
 
 @app.route("/work-order-history")
 def work_order_history():
     """Display work order history page"""
-    history = get_work_order_history()
-    return render_template("work_order_history.html", history=history)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+    sort = request.args.get('sort', 'date')
+    if sort not in SORT_COLUMNS:
+        sort = 'date'
+    descending = request.args.get('order', 'desc') != 'asc'
+    
+    history = get_work_order_history(page, per_page, sort, descending)
+    total = work_order_index.count()
+    return render_template("work_order_history.html", history=history, total=total, page=page,
+                           pages=max((total + per_page - 1) // per_page, 1), per_page=per_page,
+                           sort=sort, order='desc' if descending else 'asc')
 
 @app.route("/download-work-order/<path:customer>/<path:po>/<path:filename>")
 def download_work_order(customer, po, filename):
@@ -1480,7 +1301,7 @@ def finished_tag():
                 "created_at": datetime.now().isoformat()
             }
             
-            # Save to finished_tags.json
+            # Save to tracking store
             save_finished_tag(tag_data)
             
             # Save to Google Sheets
@@ -1489,60 +1310,40 @@ def finished_tag():
             # Move tagged coils from in-processed to processed
             move_coils_to_processed(form_data)
             
-            # Generate PDF for the finished tag
+            # Generate the finished tag PDF once, with a QR link to its reserved Drive file, and upload it once
             from generate_finished_tag_pdf import generate_finished_tag_pdf
-            pdf_path = generate_finished_tag_pdf(tag_data)
-            logger.info(f"Finished Tag PDF created at: {pdf_path}")
-            
-            # Upload PDF to Google Drive and get shareable link
             upload_success = False
+            pdf_path = None
             drive_url = None
             try:
                 from drive_utils import DriveUploader
                 drive_uploader = DriveUploader()
                 if drive_uploader.service:
-                    upload_result = drive_uploader.upload_finished_tag_pdf(
-                        pdf_path, 
-                        tag_data.get("customer_name", "Unknown"), 
-                        tag_data.get("customer_po", "Unknown")
+                    pdf_path, upload_result, drive_url = drive_uploader.render_and_upload(
+                        lambda url: generate_finished_tag_pdf(tag_data, url),
+                        lambda path, file_id: drive_uploader.upload_finished_tag_pdf(
+                            path, 
+                            tag_data.get("customer_name", "Unknown"), 
+                            tag_data.get("customer_po", "Unknown"),
+                            file_id=file_id
+                        )
                     )
-                    if upload_result and upload_result.get('upload_success'):
+                    if drive_url:
                         upload_success = True
-                        drive_url = upload_result.get('file_link')
-                        logger.info(f"✓ PDF uploaded to Google Drive successfully")
+                        logger.info(f"✓ PDF with QR code uploaded to Google Drive successfully")
                         logger.info(f"  File ID: {upload_result.get('file_id')}")
                         logger.info(f"  Folder: {upload_result.get('folder_path')}")
                         logger.info(f"  Link: {drive_url}")
                     else:
-                        logger.warning(f"✗ Google Drive upload failed: {upload_result.get('error', 'Unknown error')}")
+                        logger.warning(f"✗ Google Drive upload failed: {(upload_result or {}).get('error', 'Unknown error')}")
                 else:
                     logger.warning("Google Drive service not initialized")
             except Exception as e:
                 logger.warning(f"Google Drive upload exception: {str(e)}")
             
-            # Regenerate PDF with QR code if Drive URL is available
-            if drive_url:
-                logger.info("Regenerating finished tag PDF with QR code...")
-                try:
-                    pdf_path_with_qr = generate_finished_tag_pdf(tag_data, drive_url)
-                    
-                    # Replace the original PDF with QR-enabled version
-                    if pdf_path_with_qr and os.path.exists(pdf_path_with_qr):
-                        # Re-upload the QR-enabled PDF to replace the original
-                        upload_result = drive_uploader.upload_finished_tag_pdf(
-                            pdf_path_with_qr, 
-                            tag_data.get("customer_name", "Unknown"), 
-                            tag_data.get("customer_po", "Unknown")
-                        )
-                        if upload_result and upload_result.get('upload_success'):
-                            logger.info("Finished tag PDF with QR code uploaded successfully")
-                            pdf_path = pdf_path_with_qr  # Use the QR-enabled version for local storage
-                        else:
-                            logger.warning("Failed to upload QR-enabled finished tag PDF, keeping original")
-                except Exception as e:
-                    logger.warning(f"Error generating finished tag PDF with QR code: {str(e)}")
-            else:
-                logger.info("No Drive URL available, finished tag PDF generated without QR code")
+            if not pdf_path:
+                pdf_path = generate_finished_tag_pdf(tag_data)
+            logger.info(f"Finished Tag PDF created at: {pdf_path}")
             
             # Optional email sending
             send_email = request.form.get('send_email')
@@ -1600,30 +1401,13 @@ def finished_tag():
                          form_data=form_data)
 
 def save_finished_tag(tag_data):
-    """Save finished tag to JSON file."""
+    """Save finished tag to the tracking store."""
     try:
-        # Create finished_tags directory if it doesn't exist
-        os.makedirs('finished_tags', exist_ok=True)
-        
-        # Load existing tags
-        tags_file = 'finished_tags/finished_tags.json'
-        if os.path.exists(tags_file):
-            with open(tags_file, 'r') as f:
-                tags = json.load(f)
-        else:
-            tags = []
-        
-        # Add new tag
-        tags.append(tag_data)
-        
-        # Save back to file
-        with open(tags_file, 'w') as f:
-            json.dump(tags, f, indent=2)
-            
-        logger.info(f"Finished tag {tag_data['tag_id']} saved to JSON")
+        tracking_store.finished_tags.add(tag_data)
+        logger.info(f"Finished tag {tag_data['tag_id']} saved to tracking store")
         
     except Exception as e:
-        logger.error(f"Error saving finished tag to JSON: {str(e)}")
+        logger.error(f"Error saving finished tag to tracking store: {str(e)}")
         raise
 
 def save_finished_tag_to_sheet(tag_data):
@@ -1684,16 +1468,7 @@ def save_finished_tag_to_sheet(tag_data):
 def get_finished_tag_by_id(tag_id):
     """Get finished tag by ID for duplication."""
     try:
-        tags_file = 'finished_tags/finished_tags.json'
-        if os.path.exists(tags_file):
-            with open(tags_file, 'r') as f:
-                tags = json.load(f)
-            
-            for tag in tags:
-                if tag.get('tag_id') == tag_id:
-                    return tag
-                    
-        return None
+        return tracking_store.finished_tags.get(tag_id)
         
     except Exception as e:
         logger.error(f"Error retrieving finished tag {tag_id}: {str(e)}")
@@ -1704,20 +1479,18 @@ def lookup_work_order_data(work_order=None, customer_po=None):
     try:
         lookup_data = {}
         
-        # Search work orders JSON files
-        if os.path.exists('work_orders.json'):
-            with open('work_orders.json', 'r') as f:
-                work_orders = json.load(f)
-                
-            for wo in work_orders:
-                if (work_order and wo.get('work_order_id') == work_order) or \
-                   (customer_po and wo.get('customer_po') == customer_po):
-                    lookup_data.update({
-                        'work_order_number': wo.get('work_order_id', ''),
-                        'customer_name': wo.get('customer_name', ''),
-                        'customer_po': wo.get('customer_po', '')
-                    })
-                    break
+        # Search stored work orders, newest first as the JSON file was
+        matches = []
+        if work_order:
+            matches += tracking_store.work_orders.find(newest_first=True, limit=1, work_order_id=work_order)
+        if customer_po and not matches:
+            matches += tracking_store.work_orders.find(customer_po=customer_po, newest_first=True, limit=1)
+        for wo in matches:
+            lookup_data.update({
+                'work_order_number': wo.get('work_order_id', ''),
+                'customer_name': wo.get('customer_name', ''),
+                'customer_po': wo.get('customer_po', '')
+            })
         
         # Search work order folders
         work_orders_dir = 'work_orders'
@@ -1797,104 +1570,17 @@ def move_coils_to_processed(form_data):
             
         logger.info(f"Looking for coils with tags: {tag_list}")
         
-        # Initialize Google Sheets connection
-        from bol_extractor.google_sheets_writer import GoogleSheetsWriter
-        from bol_extractor.config import Config
-        config = Config()
-        sheets_writer = GoogleSheetsWriter(config)
-        
-        if not sheets_writer.client:
-            logger.warning("Google Sheets not available - skipping coil movement")
-            return
-            
-        # Get the spreadsheet
-        spreadsheet = sheets_writer.client.open_by_key(sheets_writer.config.spreadsheet_id)
-        
-        # Access IN_PROCESS and PROCESSED worksheets
-        try:
-            in_process_sheet = spreadsheet.worksheet("IN_PROCESS")
-            logger.info("Successfully accessed IN_PROCESS worksheet")
-        except Exception as e:
-            logger.warning(f"IN_PROCESS worksheet not found: {str(e)}")
-            return
-            
-        try:
-            processed_sheet = spreadsheet.worksheet("PROCESSED")
-            logger.info("Successfully accessed PROCESSED worksheet")
-        except Exception as e:
-            logger.warning(f"PROCESSED worksheet not found: {str(e)}")
-            return
-        
-        # Get all data from IN_PROCESS sheet
-        in_process_data = in_process_sheet.get_all_records()
-        logger.info(f"Found {len(in_process_data)} rows in IN_PROCESS sheet")
-        
-        # Find matching rows by tag numbers
-        rows_to_move = []
-        moved_tags = []
-        
-        for i, row in enumerate(in_process_data):
-            # Look for tag number in various possible column names
-            tag_value = None
-            for col_name in ['Tag #', 'Tag Number', 'tag_number', 'Customer Tag', 'customer_tag']:
-                if col_name in row and row[col_name]:
-                    tag_value = str(row[col_name]).strip().upper()
-                    break
-            
-            if tag_value and tag_value in tag_list:
-                rows_to_move.append((i + 2, row))  # +2 because sheets are 1-indexed and have header
-                moved_tags.append(tag_value)
-                logger.info(f"Found matching row for tag {tag_value}")
+        # One read of IN_PROCESS, one append to PROCESSED, one batch status update
+        finished_tag_id = form_data.get('tag_id', 'UNKNOWN')
+        result = inventory_transitions.mark_processed(tag_list, finished_tag_id)
         
-        if not rows_to_move:
+        if not result['matched_tags']:
             logger.warning(f"No matching rows found for tags: {', '.join(tag_list)}")
             return
         
-        # Add timestamp and finished tag ID to rows being moved
-        from datetime import datetime
-        timestamp = datetime.now().isoformat()
-        finished_tag_id = form_data.get('tag_id', 'UNKNOWN')
-        
-        # Copy rows to PROCESSED sheet with additional tracking info
-        for row_index, row_data in rows_to_move:
-            # Add tracking columns
-            row_data['Processed_Date'] = timestamp
-            row_data['Finished_Tag_ID'] = finished_tag_id
-            row_data['Status'] = 'PROCESSED'
-            
-            # Append to PROCESSED sheet
-            processed_values = list(row_data.values())
-            processed_sheet.append_row(processed_values)
-            logger.info(f"Moved tag {row_data.get('Tag #', 'Unknown')} to PROCESSED sheet")
-        
-        # Mark original rows as processed in IN_PROCESS sheet (add "MOVED" status)
-        for row_index, row_data in rows_to_move:
-            # Find the status column or add moved indicator
-            try:
-                # Update status column to "MOVED"
-                status_col = None
-                headers = in_process_sheet.row_values(1)
-                for i, header in enumerate(headers):
-                    if 'status' in header.lower():
-                        status_col = i + 1
-                        break
-                
-                if status_col:
-                    in_process_sheet.update_cell(row_index, status_col, "MOVED")
-                else:
-                    # Add a note in the last column
-                    last_col = len(headers) + 1
-                    in_process_sheet.update_cell(row_index, last_col, f"MOVED-{finished_tag_id}")
-                    
-            except Exception as e:
-                logger.warning(f"Could not mark row as moved: {str(e)}")
-        
-        logger.info(f"Successfully moved {len(moved_tags)} coil(s) to PROCESSED: {', '.join(moved_tags)}")
-        
         # Check for unmatched tags
-        unmatched_tags = [tag for tag in tag_list if tag not in moved_tags]
-        if unmatched_tags:
-            logger.warning(f"Could not find coils for tags: {', '.join(unmatched_tags)}")
+        if result['unmatched_tags']:
+            logger.warning(f"Could not find coils for tags: {', '.join(result['unmatched_tags'])}")
         
     except Exception as e:
         logger.error(f"Error moving coils to processed: {str(e)}")
@@ -1904,13 +1590,8 @@ def move_coils_to_processed(form_data):
 def finished_tags_archive():
     """Display finished tags archive viewer."""
     try:
-        # Load finished tags from JSON file
-        tags_file = 'finished_tags/finished_tags.json'
-        tags = []
-        
-        if os.path.exists(tags_file):
-            with open(tags_file, 'r') as f:
-                tags = json.load(f)
+        # Load finished tags from the tracking store
+        tags = tracking_store.finished_tags.all()
         
         # Sort tags by creation date (newest first)
         tags.sort(key=lambda x: x.get('created_at', ''), reverse=True)
@@ -2060,30 +1741,16 @@ def dashboard():
         # Get recent activity from work orders
         recent_activity = []
         
-        # Scan work order directories for recent activity
-        if os.path.exists('work_orders'):
-            for customer_dir in os.listdir('work_orders'):
-                customer_path = os.path.join('work_orders', customer_dir)
-                if os.path.isdir(customer_path):
-                    for po_dir in os.listdir(customer_path):
-                        po_path = os.path.join(customer_path, po_dir)
-                        if os.path.isdir(po_path):
-                            for file in os.listdir(po_path):
-                                if file.endswith('.json'):
-                                    file_path = os.path.join(po_path, file)
-                                    stat = os.stat(file_path)
-                                    recent_activity.append({
-                                        'date': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M'),
-                                        'customer': customer_dir,
-                                        'po_number': po_dir,
-                                        'document_type': 'Work Order',
-                                        'status': 'completed',
-                                        'link': f'/download-work-order/{customer_dir}/{po_dir}/{file.replace(".json", "")}'
-                                    })
-        
-        # Sort by date (most recent first) and limit to 10
-        recent_activity.sort(key=lambda x: x['date'], reverse=True)
-        recent_activity = recent_activity[:10]
+        # Ten most recently saved work orders from the history index
+        for entry in work_order_index.query(per_page=10, sort='modified'):
+            recent_activity.append({
+                'date': entry['modified'][:16],
+                'customer': entry['customer_name'],
+                'po_number': entry['po'],
+                'document_type': 'Work Order',
+                'status': 'completed',
+                'link': f"/download-work-order/{entry['customer_name']}/{entry['po']}/{entry['filename'].replace('.json', '')}"
+            })
         
         return render_template('dashboard.html', recent_activity=recent_activity)
     except Exception as e:
@@ -2223,20 +1890,8 @@ def upload_to_po():
                     'file_size': os.path.getsize(temp_path)
                 }
                 
-                # Save to upload log file
-                log_file = 'uploads/upload_log.json'
-                os.makedirs('uploads', exist_ok=True)
-                
-                if os.path.exists(log_file):
-                    with open(log_file, 'r') as f:
-                        uploads = json.load(f)
-                else:
-                    uploads = []
-                
-                uploads.append(upload_log)
-                
-                with open(log_file, 'w') as f:
-                    json.dump(uploads, f, indent=2)
+                # Save to upload log
+                file_upload_log.append(upload_log)
                 
                 flash(f'File successfully uploaded to {customer_name} / PO#{po_number}', 'success')
                 log_info(f"File uploaded: {filename} to {customer_name}/PO#{po_number}")
@@ -2344,27 +1999,17 @@ def get_work_orders():
     try:
         work_orders = []
         
-        # Read from work orders JSON file
-        if os.path.exists('work_orders.json'):
-            with open('work_orders.json', 'r') as f:
-                work_orders_data = json.load(f)
-                for wo in work_orders_data:
-                    work_orders.append({
-                        'work_order_number': wo.get('work_order_number', ''),
-                        'customer_name': wo.get('customer_name', ''),
-                        'customer_po': wo.get('customer_po', ''),
-                        'date_created': wo.get('timestamp', '')
-                    })
+        # Read from stored work orders
+        for wo in tracking_store.work_orders.all(newest_first=True):
+            work_orders.append({
+                'work_order_number': wo.get('work_order_number', ''),
+                'customer_name': wo.get('customer_name', ''),
+                'customer_po': wo.get('customer_po', ''),
+                'date_created': wo.get('timestamp', '')
+            })
         
         # Also check finished tags to find work orders that have completed tags
-        finished_work_orders = set()
-        if os.path.exists('finished_tags.json'):
-            with open('finished_tags.json', 'r') as f:
-                finished_tags = json.load(f)
-                for tag in finished_tags:
-                    wo_num = tag.get('work_order_number')
-                    if wo_num:
-                        finished_work_orders.add(wo_num)
+        finished_work_orders = set(tracking_store.finished_tags.distinct('work_order_number'))
         
         # Filter work orders that have finished tags
         eligible_work_orders = [wo for wo in work_orders if wo['work_order_number'] in finished_work_orders]
@@ -2392,60 +2037,32 @@ def generate_bol():
         if not work_order_number:
             return jsonify({'success': False, 'error': 'Work order number is required'}), 400
         
-        # Generate initial BOL PDF without QR code
-        from generate_bol_pdf import generate_bol_pdf
-        bol_metadata = generate_bol_pdf(work_order_number)
-        
-        # Upload to Google Drive and get shareable link
+        # Generate the BOL PDF once, with a QR link to its reserved Drive file, and upload it once
+        from generate_bol_pdf import generate_bol_pdf, generate_bol_number
+        bol_number = generate_bol_number()
+        bol_metadata = None
         drive_url = None
         try:
             from drive_utils import DriveUploader
             drive_uploader = DriveUploader()
-            
-            customer_name = bol_metadata['customer_name']
-            customer_po = bol_metadata['customer_po']
-            
-            # Create folder structure
-            drive_uploader.create_po_folder_structure(customer_name, customer_po)
-            
-            # Upload BOL to Bills of Lading folder
-            bol_file_path = f"pdf_outputs/{bol_metadata['filename']}"
-            if os.path.exists(bol_file_path):
-                upload_result = drive_uploader.upload_signed_bol(
-                    bol_file_path, customer_name, customer_po, bol_metadata['bol_number']
+            bol_metadata, upload_result, drive_url = drive_uploader.render_and_upload(
+                lambda url: generate_bol_pdf(work_order_number, drive_url=url, bol_number=bol_number),
+                lambda metadata, file_id: drive_uploader.upload_signed_bol(
+                    metadata['filepath'], metadata['customer_name'], metadata['customer_po'],
+                    metadata['bol_number'], file_id=file_id
                 )
-                if upload_result and upload_result.get('upload_success'):
-                    drive_url = upload_result.get('file_link')
-                    log_info(f"BOL uploaded to Drive: {upload_result.get('folder_path')}")
-                    log_info(f"Drive share URL: {drive_url}")
-                else:
-                    log_warning(f"BOL Drive upload failed: {upload_result.get('error', 'Unknown error')}")
+            )
+            if drive_url:
+                log_info(f"BOL with QR code uploaded to Drive: {upload_result.get('folder_path')}")
+                log_info(f"Drive share URL: {drive_url}")
+            else:
+                log_warning(f"BOL Drive upload failed, PDF generated without QR code: {(upload_result or {}).get('error', 'Unknown error')}")
             
         except Exception as drive_error:
             log_warning(f"BOL Drive upload exception: {str(drive_error)}")
         
-        # Regenerate BOL PDF with QR code if Drive URL is available
-        if drive_url:
-            log_info("Regenerating BOL PDF with QR code...")
-            try:
-                bol_metadata_with_qr = generate_bol_pdf(work_order_number, drive_url=drive_url)
-                
-                # Replace the original PDF with QR-enabled version
-                bol_file_path_with_qr = f"pdf_outputs/{bol_metadata_with_qr['filename']}"
-                if os.path.exists(bol_file_path_with_qr):
-                    # Re-upload the QR-enabled PDF to replace the original
-                    upload_result = drive_uploader.upload_signed_bol(
-                        bol_file_path_with_qr, customer_name, customer_po, bol_metadata['bol_number']
-                    )
-                    if upload_result and upload_result.get('upload_success'):
-                        log_info("BOL PDF with QR code uploaded successfully")
-                        bol_metadata = bol_metadata_with_qr  # Use the QR-enabled version
-                    else:
-                        log_warning("Failed to upload QR-enabled BOL PDF, keeping original")
-            except Exception as e:
-                log_warning(f"Error generating BOL PDF with QR code: {str(e)}")
-        else:
-            log_info("No Drive URL available, BOL PDF generated without QR code")
+        if not bol_metadata:
+            bol_metadata = generate_bol_pdf(work_order_number, bol_number=bol_number)
         
         # Optional email sending
         send_email = data.get('send_email', False)
@@ -2462,18 +2079,8 @@ def generate_bol():
             elif email_result:
                 log_warning(f"BOL email failed: {email_result.get('error')}")
         
-        # Save BOL metadata to tracking file
-        bol_tracking_file = 'bol_tracking.json'
-        if os.path.exists(bol_tracking_file):
-            with open(bol_tracking_file, 'r') as f:
-                bol_records = json.load(f)
-        else:
-            bol_records = []
-        
-        bol_records.append(bol_metadata)
-        
-        with open(bol_tracking_file, 'w') as f:
-            json.dump(bol_records, f, indent=2)
+        # Save BOL metadata to tracking store
+        tracking_store.bol_tracking.add(bol_metadata)
         
         return jsonify({
             'success': True,
@@ -2493,19 +2100,7 @@ def download_bol(bol_number):
     """Download a generated BOL PDF."""
     try:
         # Find the BOL record
-        bol_tracking_file = 'bol_tracking.json'
-        if not os.path.exists(bol_tracking_file):
-            return "BOL not found", 404
-        
-        with open(bol_tracking_file, 'r') as f:
-            bol_records = json.load(f)
-        
-        bol_record = None
-        for record in bol_records:
-            if record.get('bol_number') == bol_number:
-                bol_record = record
-                break
-        
+        bol_record = tracking_store.bol_tracking.get(bol_number)
         if not bol_record:
             return "BOL not found", 404
         
@@ -2530,26 +2125,20 @@ def get_bol_history():
     try:
         bols = []
         
-        # Read from BOL tracking file
-        bol_tracking_file = 'bol_tracking.json'
-        if os.path.exists(bol_tracking_file):
-            with open(bol_tracking_file, 'r') as f:
-                bol_records = json.load(f)
-                
-            # Convert to frontend format
-            for record in bol_records:
-                bols.append({
-                    'bol_number': record.get('bol_number', ''),
-                    'work_order_number': record.get('work_order_number', ''),
-                    'customer_name': record.get('customer_name', ''),
-                    'customer_po': record.get('customer_po', ''),
-                    'date_generated': record.get('date_generated', ''),
-                    'total_bundles': record.get('total_bundles', 0),
-                    'total_weight': record.get('total_weight', 0),
-                    'finished_tags_count': record.get('finished_tags_count', 0),
-                    'filename': record.get('filename', ''),
-                    'filepath': record.get('filepath', '')
-                })
+        # Read from BOL tracking store and convert to frontend format
+        for record in tracking_store.bol_tracking.all():
+            bols.append({
+                'bol_number': record.get('bol_number', ''),
+                'work_order_number': record.get('work_order_number', ''),
+                'customer_name': record.get('customer_name', ''),
+                'customer_po': record.get('customer_po', ''),
+                'date_generated': record.get('date_generated', ''),
+                'total_bundles': record.get('total_bundles', 0),
+                'total_weight': record.get('total_weight', 0),
+                'finished_tags_count': record.get('finished_tags_count', 0),
+                'filename': record.get('filename', ''),
+                'filepath': record.get('filepath', '')
+            })
         
         # Sort by date (most recent first)
         bols.sort(key=lambda x: x.get('date_generated', ''), reverse=True)
@@ -2740,21 +2329,8 @@ def handle_original_po_upload(customer_name, file, form_data):
 def save_upload_record(upload_record):
     """Save upload record to tracking file."""
     try:
-        upload_log_file = 'manual_uploads_log.json'
-        
-        if os.path.exists(upload_log_file):
-            with open(upload_log_file, 'r') as f:
-                uploads = json.load(f)
-        else:
-            uploads = []
-        
-        uploads.append(upload_record)
-        
-        # Keep only the most recent 100 uploads
-        uploads = uploads[-100:]
-        
-        with open(upload_log_file, 'w') as f:
-            json.dump(uploads, f, indent=2)
+        # The log keeps only the most recent 100 uploads
+        manual_upload_log.append(upload_record)
             
     except Exception as e:
         log_error(f"Error saving upload record: {str(e)}")
@@ -2763,12 +2339,7 @@ def save_upload_record(upload_record):
 def get_manual_uploads():
     """Get recent manual upload records."""
     try:
-        uploads = []
-        upload_log_file = 'manual_uploads_log.json'
-        
-        if os.path.exists(upload_log_file):
-            with open(upload_log_file, 'r') as f:
-                uploads = json.load(f)
+        uploads = manual_upload_log.read()
         
         # Sort by timestamp (most recent first)
         uploads.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -2801,12 +2372,7 @@ def api_get_quotes():
     """API endpoint to get all quotes with lifecycle status"""
     try:
         # Load quotes from tracking file
-        tracking_file = 'quote_tracking.json'
-        quotes = []
-        
-        if os.path.exists(tracking_file):
-            with open(tracking_file, 'r') as f:
-                quotes = json.load(f)
+        quotes = quote_log.read(newest_first=True)
         
         # Update quote statuses based on lifecycle rules
         quotes = update_quote_statuses(quotes)
@@ -2925,15 +2491,8 @@ def quotes_pos():
 def get_po_uploads():
     """Get recent PO upload records only."""
     try:
-        uploads = []
-        upload_log_file = 'manual_uploads_log.json'
-        
-        if os.path.exists(upload_log_file):
-            with open(upload_log_file, 'r') as f:
-                all_uploads = json.load(f)
-            
-            # Filter to only PO uploads
-            uploads = [upload for upload in all_uploads if upload.get('upload_type') == 'original_po']
+        # Filter to only PO uploads
+        uploads = [upload for upload in manual_upload_log.read() if upload.get('upload_type') == 'original_po']
         
         # Sort by timestamp (most recent first)
         uploads.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -2955,15 +2514,8 @@ def get_po_uploads():
 def get_bol_uploads():
     """Get recent BOL upload records only."""
     try:
-        uploads = []
-        upload_log_file = 'manual_uploads_log.json'
-        
-        if os.path.exists(upload_log_file):
-            with open(upload_log_file, 'r') as f:
-                all_uploads = json.load(f)
-            
-            # Filter to only BOL uploads
-            uploads = [upload for upload in all_uploads if upload.get('upload_type') == 'customer_bol']
+        # Filter to only BOL uploads
+        uploads = [upload for upload in manual_upload_log.read() if upload.get('upload_type') == 'customer_bol']
         
         # Sort by timestamp (most recent first)
         uploads.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -3027,15 +2579,9 @@ def generate_invoice():
         # Get BOL number if available
         bol_number = None
         try:
-            bol_tracking_file = 'bol_tracking.json'
-            if os.path.exists(bol_tracking_file):
-                with open(bol_tracking_file, 'r') as f:
-                    bol_records = json.load(f)
-                    # Find BOL for this work order
-                    for record in bol_records:
-                        if record.get('work_order_number') == work_order_number:
-                            bol_number = record.get('bol_number')
-                            break
+            view = tracking_store.work_order_view.get(work_order_number)
+            if view:
+                bol_number = view['bol_number']
         except Exception:
             pass  # BOL number is optional
         
@@ -3051,7 +2597,7 @@ def generate_invoice():
             'finished_tags': finished_tags_data
         }
         
-        # Generate initial invoice PDF without QR code
+        # Generate the invoice PDF once; it carries no QR code, so it is uploaded as rendered
         from generate_invoice_pdf import generate_invoice_pdf
         result = generate_invoice_pdf(invoice_data)
         
@@ -3080,30 +2626,6 @@ def generate_invoice():
         except Exception as drive_error:
             log_warning(f"Local save successful but Google Drive upload failed: {str(drive_error)}")
         
-        # Regenerate invoice PDF with QR code if Drive URL is available
-        if drive_url:
-            log_info("Regenerating invoice PDF with QR code...")
-            try:
-                result_with_qr = generate_invoice_pdf(invoice_data, drive_url)
-                
-                # Replace the original PDF with QR-enabled version
-                if result_with_qr and os.path.exists(result_with_qr['filepath']):
-                    # Re-upload the QR-enabled PDF to replace the original
-                    upload_result = drive_uploader.upload_invoice_pdf(
-                        result_with_qr['filepath'], 
-                        customer_name, 
-                        work_order_data.get('customer_po', '')
-                    )
-                    if upload_result and upload_result.get('upload_success'):
-                        log_info("Invoice PDF with QR code uploaded successfully")
-                        result = result_with_qr  # Use the QR-enabled version
-                    else:
-                        log_warning("Failed to upload QR-enabled invoice PDF, keeping original")
-            except Exception as e:
-                log_warning(f"Error generating invoice PDF with QR code: {str(e)}")
-        else:
-            log_info("No Drive URL available, invoice PDF generated without QR code")
-        
         log_info(f"Invoice generated: {result['filename']} for {customer_name}/WO#{work_order_number}")
         
         return jsonify({
@@ -3135,24 +2657,15 @@ def get_customer_work_orders():
         
         work_orders = []
         
-        # Read from work orders JSON file
-        work_orders_file = 'work_orders.json'
-        if os.path.exists(work_orders_file):
-            with open(work_orders_file, 'r') as f:
-                all_work_orders = json.load(f)
-                
-            # Filter by customer
-            for wo in all_work_orders:
-                if wo.get('customer_name', '').lower() == customer.lower():
-                    work_orders.append({
-                        'work_order_number': wo.get('work_order_number'),
-                        'customer_po': wo.get('customer_po'),
-                        'date_created': wo.get('timestamp', ''),
-                        'status': 'Active'
-                    })
-        
-        # Sort by date (most recent first)
-        work_orders.sort(key=lambda x: x.get('date_created', ''), reverse=True)
+        # Read the customer's work orders, most recent first (customer names match ignoring case)
+        for view in tracking_store.work_order_view.for_customer(customer):
+            work_orders.append({
+                'work_order_number': view['work_order_number'],
+                'customer_po': view['customer_po'],
+                'date_created': view['date_created'],
+                'status': 'Active',
+                'invoice_status': view['invoice_status']
+            })
         
         return jsonify({
             'success': True,
@@ -3178,55 +2691,22 @@ def get_work_order_details():
                 'error': 'Work order number is required'
             }), 400
         
-        # Get work order data
-        work_order_data = None
-        work_orders_file = 'work_orders.json'
-        if os.path.exists(work_orders_file):
-            with open(work_orders_file, 'r') as f:
-                all_work_orders = json.load(f)
-                
-            for wo in all_work_orders:
-                if wo.get('work_order_number') == work_order_number:
-                    work_order_data = wo
-                    break
+        # Work order joined with its finished tags, BOL and invoice
+        view = tracking_store.work_order_view.get(work_order_number)
         
-        if not work_order_data:
+        if not view:
             return jsonify({
                 'success': False,
                 'error': 'Work order not found'
             }), 404
         
-        # Get finished tags for this work order
-        finished_tags = []
-        finished_tags_file = 'finished_tags.json'
-        if os.path.exists(finished_tags_file):
-            with open(finished_tags_file, 'r') as f:
-                all_finished_tags = json.load(f)
-                
-            # Filter by work order number
-            for tag in all_finished_tags:
-                if tag.get('work_order_number') == work_order_number:
-                    finished_tags.append(tag)
-        
-        # Get BOL number if available
-        bol_number = None
-        try:
-            bol_tracking_file = 'bol_tracking.json'
-            if os.path.exists(bol_tracking_file):
-                with open(bol_tracking_file, 'r') as f:
-                    bol_records = json.load(f)
-                    for record in bol_records:
-                        if record.get('work_order_number') == work_order_number:
-                            bol_number = record.get('bol_number')
-                            break
-        except Exception:
-            pass
-        
         return jsonify({
             'success': True,
-            'work_order': work_order_data,
-            'finished_tags': finished_tags,
-            'bol_number': bol_number
+            'work_order': view['work_order'],
+            'finished_tags': view['finished_tags'],
+            'bol_number': view['bol_number'],
+            'invoice_number': view['invoice_number'],
+            'invoice_status': view['invoice_status']
         })
         
     except Exception as e:
@@ -3240,20 +2720,8 @@ def get_work_order_details():
 def download_invoice(invoice_number):
     """Download an invoice PDF by invoice number."""
     try:
-        # Find invoice in tracking file
-        invoice_tracking_file = 'invoice_tracking.json'
-        if not os.path.exists(invoice_tracking_file):
-            return "Invoice not found", 404
-        
-        with open(invoice_tracking_file, 'r') as f:
-            invoices = json.load(f)
-        
-        invoice_record = None
-        for invoice in invoices:
-            if invoice.get('invoice_number') == invoice_number:
-                invoice_record = invoice
-                break
-        
+        # Find invoice in tracking store
+        invoice_record = tracking_store.invoices.get(invoice_number)
         if not invoice_record:
             return "Invoice not found", 404
         
@@ -3276,12 +2744,7 @@ def invoices_dashboard():
 def get_invoices():
     """Get all invoice records for the dashboard."""
     try:
-        invoices = []
-        invoice_tracking_file = 'invoice_tracking.json'
-        
-        if os.path.exists(invoice_tracking_file):
-            with open(invoice_tracking_file, 'r') as f:
-                invoices = json.load(f)
+        invoices = tracking_store.invoices.all()
         
         # Sort by date (most recent first)
         invoices.sort(key=lambda x: x.get('date_generated', ''), reverse=True)
@@ -3405,37 +2868,15 @@ def upload_signed_bol():
 
 def save_signed_bol_record(record):
     """Save signed BOL upload record to tracking file."""
-    tracking_file = 'signed_bol_tracking.json'
-    
-    # Load existing records
-    records = []
-    if os.path.exists(tracking_file):
-        try:
-            with open(tracking_file, 'r') as f:
-                records = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            records = []
-    
-    # Add new record at the beginning (most recent first)
-    records.insert(0, record)
-    
-    # Keep only the last 100 records
-    records = records[:100]
-    
-    # Save updated records
-    with open(tracking_file, 'w') as f:
-        json.dump(records, f, indent=2)
+    # The log keeps only the last 100 records
+    signed_bol_log.append(record)
 
 @app.route('/api/signed-bol-uploads', methods=['GET'])
 def get_signed_bol_uploads():
     """Get recent signed BOL upload records."""
     try:
-        tracking_file = 'signed_bol_tracking.json'
-        records = []
-        
-        if os.path.exists(tracking_file):
-            with open(tracking_file, 'r') as f:
-                records = json.load(f)
+        # Most recent first
+        records = signed_bol_log.read(newest_first=True)
         
         return jsonify({
             'success': True,
@@ -3567,37 +3008,15 @@ def create_quote_unified(data):
 
 def save_quote_record_unified(record):
     """Save quote record to local tracking file."""
-    tracking_file = 'quote_tracking.json'
-    
-    # Load existing records
-    records = []
-    if os.path.exists(tracking_file):
-        try:
-            with open(tracking_file, 'r') as f:
-                records = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            records = []
-    
-    # Add new record at the beginning (most recent first)
-    records.insert(0, record)
-    
-    # Keep only the last 500 records
-    records = records[:500]
-    
-    # Save updated records
-    with open(tracking_file, 'w') as f:
-        json.dump(records, f, indent=2)
+    # The log keeps only the last 500 records
+    quote_log.append(record)
 
 @app.route('/api/quotes', methods=['GET'])
 def get_quotes():
     """Get all quote records."""
     try:
-        tracking_file = 'quote_tracking.json'
-        records = []
-        
-        if os.path.exists(tracking_file):
-            with open(tracking_file, 'r') as f:
-                records = json.load(f)
+        # Most recent first
+        records = quote_log.read(newest_first=True)
         
         return jsonify({
             'success': True,
@@ -3827,15 +3246,15 @@ def extract_quote_from_file():
 def work_orders_json():
     """Serve work orders data as JSON for frontend consumption."""
     try:
-        if os.path.exists('work_orders.json'):
-            with open('work_orders.json', 'r') as f:
-                work_orders = json.load(f)
-            return jsonify(work_orders)
-        else:
-            return jsonify([])
+        return jsonify(tracking_store.work_orders.all(newest_first=True))
     except Exception as e:
         log_error(f"Error serving work orders JSON: {e}")
         return jsonify([])
 
 if __name__ == '__main__':
+    # Finish inventory moves a previous run left half-applied before taking new ones
+    try:
+        inventory_transitions.recover()
+    except Exception as e:
+        logger.error(f"Error recovering inventory moves: {str(e)}")
     app.run(host='0.0.0.0', port=5000, debug=False)
@@ -15,29 +15,21 @@ logger = logging.getLogger(__name__)
 
 class InvoiceIntegrityAuditor:
     def __init__(self):
-        self.invoice_tracking_file = 'invoice_tracking.json'
         self.audit_results = {}
         self.warnings = []
         self.errors = []
     
     def load_invoice_data(self):
-        """Load all invoice records from the tracking file."""
-        logger.info("🔍 Loading invoice data from tracking file...")
-        
-        if not os.path.exists(self.invoice_tracking_file):
-            self.errors.append(f"Invoice tracking file not found: {self.invoice_tracking_file}")
-            return []
+        """Load all invoice records from the tracking store."""
+        logger.info("🔍 Loading invoice data from tracking store...")
         
         try:
-            with open(self.invoice_tracking_file, 'r') as f:
-                invoices = json.load(f)
-                logger.info(f"✓ Loaded {len(invoices)} invoice records")
-                return invoices
-        except json.JSONDecodeError as e:
-            self.errors.append(f"JSON decode error in invoice file: {str(e)}")
-            return []
+            from utils.tracking_store import tracking_store
+            invoices = tracking_store.invoices.all()
+            logger.info(f"✓ Loaded {len(invoices)} invoice records")
+            return invoices
         except Exception as e:
-            self.errors.append(f"Error loading invoice file: {str(e)}")
+            self.errors.append(f"Error loading invoice records: {str(e)}")
             return []
     
     def validate_invoice_structure(self, invoices):
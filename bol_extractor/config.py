@@ -41,6 +41,28 @@ class Config:
         # OCR configuration
         self.tesseract_cmd = os.getenv('TESSERACT_CMD')
         
+        # Page scheduler settings for multi-page documents
+        self.ocr_workers = max(1, int(os.getenv('OCR_WORKERS', str(min(4, os.cpu_count() or 1)))))
+        self.llm_workers = max(1, int(os.getenv('LLM_WORKERS', '4')))
+        
+        # LLM client: retries with jittered backoff, per-provider concurrency and
+        # optional hedging (0 disables starting the fallback before the primary fails)
+        self.llm_max_retries = int(os.getenv('LLM_MAX_RETRIES', '3'))
+        self.llm_backoff_base = float(os.getenv('LLM_BACKOFF_BASE', '1.0'))
+        self.llm_backoff_max = float(os.getenv('LLM_BACKOFF_MAX', '30'))
+        self.llm_provider_concurrency = max(1, int(os.getenv('LLM_PROVIDER_CONCURRENCY', '4')))
+        self.llm_request_timeout = float(os.getenv('LLM_REQUEST_TIMEOUT', '120'))
+        self.llm_hedge_after_seconds = float(os.getenv('LLM_HEDGE_AFTER_SECONDS', '0'))
+        
+        # Consecutive pages are packed into one LLM request up to this many
+        # document-text tokens; completion limits are raised to match
+        self.llm_batch_tokens = max(1, int(os.getenv('LLM_BATCH_TOKENS', '4000')))
+        
+        # Per-page extraction cache
+        self.extraction_cache_enabled = os.getenv('EXTRACTION_CACHE', 'True').lower() == 'true'
+        self.extraction_cache_dir = os.getenv('EXTRACTION_CACHE_DIR', 'extraction_cache')
+        self.extraction_cache_max_mb = int(os.getenv('EXTRACTION_CACHE_MAX_MB', '256'))
+        
         # Application settings
         self.test_mode = os.getenv('TEST_MODE', 'False').lower() == 'true'
         self.debug_mode = os.getenv('DEBUG_MODE', 'False').lower() == 'true'
@@ -126,6 +148,11 @@ BOL Extractor Configuration:
 - DeepSeek API: {'Configured' if self.deepseek_api_key else 'Not configured'}
 - Test Mode: {self.test_mode}
 - Debug Mode: {self.debug_mode}
+- OCR Workers: {self.ocr_workers}
+- LLM Workers: {self.llm_workers}
+- LLM Batch Tokens: {self.llm_batch_tokens}
+- LLM Hedging: {f'after {self.llm_hedge_after_seconds}s' if self.llm_hedge_after_seconds > 0 else 'Disabled'}
+- Extraction Cache: {'Enabled' if self.extraction_cache_enabled else 'Disabled'}
 - Max File Size: {self.max_file_size_mb}MB
 - Upload Folder: {self.upload_folder}
 """
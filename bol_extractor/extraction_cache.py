@@ -0,0 +1,229 @@
+"""
+Content-addressed extraction cache for BOL pages.
+Stores per-page OCR text and raw LLM output on disk so identical pages are not re-processed.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ExtractionCache:
+    """Size-bounded on-disk LRU cache keyed by page content hash."""
+    
+    def __init__(self, cache_dir: str = "extraction_cache", max_size_mb: int = 256, enabled: bool = True):
+        """
+        Initialize the extraction cache.
+        
+        Args:
+            cache_dir: Directory holding cache entries
+            max_size_mb: Maximum total size of cache entries before eviction
+            enabled: Whether the cache is used at all
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._total_size = None  # Computed lazily from a directory scan
+        
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        
+        logger.info(f"Extraction cache initialized: {cache_dir} ({'enabled' if enabled else 'disabled'})")
+    
+    @staticmethod
+    def page_digest(page) -> str:
+        """
+        Compute a SHA-256 digest of a page's content.
+        
+        The digest covers the page's content streams and the raw bytes of every
+        image it references, so the same page in a re-uploaded file hashes identically.
+        
+        Args:
+            page: PyMuPDF page handle
+            
+        Returns:
+            Hex digest of the page content
+        """
+        hasher = hashlib.sha256()
+        hasher.update(f"{page.rect.width}x{page.rect.height}".encode())
+        hasher.update(page.read_contents() or b'')
+        
+        for image in page.get_images(full=True):
+            xref = image[0]
+            hasher.update(page.parent.xref_stream_raw(xref) or b'')
+        
+        return hasher.hexdigest()
+    
+    def get_ocr_text(self, page_digest: str, ocr_engine: str, ocr_settings: Dict[str, Any]) -> Optional[str]:
+        """
+        Look up cached text for a page.
+        
+        Args:
+            page_digest: Page content digest
+            ocr_engine: OCR engine and version the text was produced with
+            ocr_settings: Render DPI and Tesseract settings the text was produced with
+            
+        Returns:
+            Cached page text or None on a miss
+        """
+        entry = self._read(self._make_key('ocr', page_digest, ocr_engine, self._settings_key(ocr_settings)))
+        return entry.get('text') if entry else None
+    
+    def put_ocr_text(self, page_digest: str, ocr_engine: str, ocr_settings: Dict[str, Any], text: str):
+        """
+        Store extracted text for a page.
+        
+        Args:
+            page_digest: Page content digest
+            ocr_engine: OCR engine and version the text was produced with
+            ocr_settings: Render DPI and Tesseract settings the text was produced with
+            text: Extracted page text
+        """
+        self._write(self._make_key('ocr', page_digest, ocr_engine, self._settings_key(ocr_settings)), {'text': text})
+    
+    def get_llm_result(self, page_digest: str, supplier_key: str, prompt_version: str,
+                       model: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the cached LLM output for a page.
+        
+        Args:
+            page_digest: Page content digest
+            supplier_key: Normalized supplier identifier
+            prompt_version: Supplier prompt last-modified timestamp
+            model: LLM model name
+            
+        Returns:
+            Cached raw LLM JSON or None on a miss
+        """
+        entry = self._read(self._make_key('llm', page_digest, supplier_key, prompt_version, model))
+        return entry.get('result') if entry else None
+    
+    def put_llm_result(self, page_digest: str, supplier_key: str, prompt_version: str,
+                       model: str, result: Dict[str, Any]):
+        """
+        Store the LLM output for a page.
+        
+        Args:
+            page_digest: Page content digest
+            supplier_key: Normalized supplier identifier
+            prompt_version: Supplier prompt last-modified timestamp
+            model: LLM model name
+            result: Raw LLM JSON
+        """
+        self._write(self._make_key('llm', page_digest, supplier_key, prompt_version, model), {'result': result})
+    
+    def clear(self):
+        """Remove every cache entry."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        with self._lock:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        continue
+            self._total_size = None
+        logger.info("Extraction cache cleared")
+    
+    def _settings_key(self, settings: Dict[str, Any]) -> str:
+        """Serialize settings the same way whatever their key order."""
+        return json.dumps(settings, sort_keys=True, default=str)
+    
+    def _make_key(self, *parts: str) -> str:
+        """Build a filesystem-safe cache key from its components."""
+        return hashlib.sha256('\x1f'.join(str(p) for p in parts).encode()).hexdigest()
+    
+    def _entry_path(self, key: str) -> str:
+        """Get the file path for a cache key."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read a cache entry and mark it as recently used."""
+        if not self.enabled:
+            return None
+        
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # Access time drives LRU eviction
+            os.utime(path, None)
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+    
+    def _write(self, key: str, entry: Dict[str, Any]):
+        """Atomically write a cache entry and evict old entries if needed."""
+        if not self.enabled:
+            return
+        
+        path = self._entry_path(key)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            
+            new_size = os.path.getsize(temp_path)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write cache entry {key}: {str(e)}")
+            return
+        
+        with self._lock:
+            if self._total_size is not None:
+                self._total_size += new_size - old_size
+        
+        self._evict_if_needed()
+    
+    def _evict_if_needed(self):
+        """Delete least recently used entries until the cache fits its size limit."""
+        with self._lock:
+            if self._total_size is not None and self._total_size <= self.max_size_bytes:
+                return
+            
+            entries = []
+            total_size = 0
+            for filename in os.listdir(self.cache_dir):
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+            
+            self._total_size = total_size
+            if total_size <= self.max_size_bytes:
+                return
+            
+            entries.sort()
+            evicted = 0
+            for _, size, path in entries:
+                if total_size <= self.max_size_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total_size -= size
+                    evicted += 1
+                except OSError:
+                    continue
+            
+            self._total_size = total_size
+            logger.info(f"Evicted {evicted} extraction cache entries")
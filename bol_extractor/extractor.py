@@ -7,13 +7,18 @@ import logging
 import traceback
 import json
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from .pdf_splitter import PDFSplitter
 from .ocr_utils import OCRUtils
+from .ocr_service import get_ocr_service, get_supplier_ocr_settings, ocr_engine_version
 from .llm_refiner import LLMRefiner
 from .json_flattener import JSONFlattener
 from .google_sheets_writer import GoogleSheetsWriter
+from .extraction_cache import ExtractionCache
+from .page_batcher import PageBatcher, format_batch, split_batch_result
 from .config import Config
 
 # Safety configuration constants
@@ -29,9 +34,15 @@ class BOLExtractor:
         self.config = config
         self.pdf_splitter = PDFSplitter()
         self.ocr_utils = OCRUtils()
+        self.ocr_service = get_ocr_service(config.ocr_workers)
         self.llm_refiner = LLMRefiner(config)
         self.json_flattener = JSONFlattener()
         self.google_sheets_writer = GoogleSheetsWriter(config)
+        self.extraction_cache = ExtractionCache(
+            cache_dir=config.extraction_cache_dir,
+            max_size_mb=config.extraction_cache_max_mb,
+            enabled=config.extraction_cache_enabled
+        )
         
         logger.info("BOL Extractor initialized successfully")
     
@@ -121,8 +132,8 @@ class BOLExtractor:
             
             logger.info(f"PDF validation passed: {validation['page_count']} pages, {validation['file_size']} bytes")
             
-            # Check if PDF should be split
-            if self.pdf_splitter.should_split_pdf(pdf_path):
+            # Multi-page documents are processed page by page
+            if validation['page_count'] > 1:
                 return self._process_multi_page_pdf(pdf_path)
             else:
                 return self._process_single_page_pdf(pdf_path)
@@ -203,7 +214,7 @@ class BOLExtractor:
     
     def _process_multi_page_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """
-        Process a multi-page PDF by splitting it and processing each page.
+        Process a multi-page PDF by extracting and combining the text of each page.
         
         Args:
             pdf_path: Path to the PDF file to process
@@ -214,41 +225,27 @@ class BOLExtractor:
         try:
             logger.info("Processing multi-page PDF")
             
-            # Split PDF into individual pages
-            split_files = self.pdf_splitter.split_pdf(pdf_path)
-            
-            if not split_files:
-                return {
-                    'success': False,
-                    'error': 'Failed to split PDF into individual pages'
-                }
-            
-            logger.info(f"Split PDF into {len(split_files)} pages")
-            
             # Extract text from all pages and combine
             all_page_text = []
             total_chars = 0
             
-            for i, page_path in enumerate(split_files):
+            for page_number, page in self.pdf_splitter.iter_pages(pdf_path, max_pages=MAX_PAGES):
                 try:
-                    logger.info(f"Extracting text from page {i + 1}/{len(split_files)}")
-                    page_text = self.ocr_utils.extract_text_from_pdf(page_path)
+                    logger.info(f"Extracting text from page {page_number}")
+                    page_text = self.ocr_utils.extract_text_from_page(page)
                     
                     if page_text:
                         processed_text = self.ocr_utils.preprocess_text(page_text)
-                        all_page_text.append(f"--- PAGE {i + 1} ---\n{processed_text}")
+                        all_page_text.append(f"--- PAGE {page_number} ---\n{processed_text}")
                         total_chars += len(processed_text)
-                        logger.info(f"Extracted {len(processed_text)} characters from page {i + 1}")
+                        logger.info(f"Extracted {len(processed_text)} characters from page {page_number}")
                     else:
-                        logger.warning(f"No text extracted from page {i + 1}")
+                        logger.warning(f"No text extracted from page {page_number}")
                         
                 except Exception as e:
-                    logger.error(f"Error extracting text from page {i + 1}: {str(e)}")
+                    logger.error(f"Error extracting text from page {page_number}: {str(e)}")
                     continue
             
-            # Clean up temporary split files
-            self.pdf_splitter.cleanup_temp_files()
-            
             if not all_page_text:
                 return {
                     'success': False,
@@ -271,28 +268,23 @@ class BOLExtractor:
             
             # Handle multiple coils (array response) or single BOL
             if isinstance(structured_data, list):
-                # Multiple coils - write each one to sheets
-                all_rows = []
+                # Multiple coils - write them to sheets in one batch
+                coils_data = structured_data
                 logger.info(f"Processing {len(coils_data)} coils from BOL")
                 
-                for idx, coil_data in enumerate(coils_data):
-                    logger.info(f"Processing coil {idx + 1}/{len(coils_data)}")
-                    flattened_data = self.json_flattener.flatten_bol_data(coil_data)
-                    
-                    # Write to Google Sheets
-                    sheet_result = self.google_sheets_writer.append_bol_data(flattened_data)
-                    if sheet_result['success']:
-                        all_rows.append(sheet_result.get('row_number'))
-                        logger.info(f"Coil {idx + 1} written to sheet row {sheet_result.get('row_number')}")
-                    else:
-                        logger.error(f"Failed to write coil {idx + 1} to sheets: {sheet_result.get('error')}")
+                flattened_coils = [self.json_flattener.flatten_bol_data(coil_data) for coil_data in coils_data]
+                batch_result = self.google_sheets_writer.append_bol_data_batch(flattened_coils)
+                if batch_result['success']:
+                    logger.info(f"{len(coils_data)} coils written to sheet rows {batch_result.get('row_numbers')}")
+                else:
+                    logger.error(f"Failed to write coils to sheets: {batch_result.get('error')}")
                 
                 logger.info(f"Multi-page processing completed: {len(coils_data)} coils processed")
                 return {
                     'success': True,
                     'data': structured_data,
                     'coils_processed': len(coils_data),
-                    'sheet_rows': all_rows,
+                    'sheet_rows': batch_result.get('row_numbers', []),
                     'raw_text_length': total_chars,
                     'pages_processed': len(all_page_text)
                 }
@@ -322,8 +314,6 @@ class BOLExtractor:
                     }
             
         except Exception as e:
-            # Ensure cleanup even on error
-            self.pdf_splitter.cleanup_temp_files()
             error_msg = f"Error processing multi-page PDF: {str(e)}"
             logger.error(error_msg)
             logger.error(traceback.format_exc())
@@ -332,13 +322,19 @@ class BOLExtractor:
                 'error': error_msg
             }
     
-    def process_bol_pdf_with_supplier(self, pdf_path: str, supplier_name: str = "default") -> Dict[str, Any]:
+    def process_bol_pdf_with_supplier(self, pdf_path: str, supplier_name: str = "default",
+                                      bypass_cache: bool = False,
+                                      progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                                      ) -> Dict[str, Any]:
         """
         Process a BOL PDF with supplier-specific prompt customization.
         
         Args:
             pdf_path: Path to the PDF file to process
             supplier_name: Supplier identifier for custom prompt
+            bypass_cache: Re-run OCR and LLM extraction even for cached pages
+            progress_callback: Optional callable receiving (event, data) for
+                'document', 'page', 'coil', 'writing' and 'write' progress events
             
         Returns:
             Dict containing success status, extracted data, or error information
@@ -357,12 +353,16 @@ class BOLExtractor:
                 }
             
             logger.info(f"PDF validation passed: {validation['page_count']} pages, {validation['file_size']} bytes")
-            
-            # Check if PDF should be split
-            if self.pdf_splitter.should_split_pdf(pdf_path):
-                return self._process_multi_page_pdf_with_supplier(pdf_path, supplier_name)
+            self._report_progress(progress_callback, 'document', page_count=validation['page_count'],
+                                  supplier=supplier_name)
+            
+            # Multi-page documents are processed page by page
+            if validation['page_count'] > 1:
+                return self._process_multi_page_pdf_with_supplier(
+                    pdf_path, validation['page_count'], supplier_name, bypass_cache, progress_callback
+                )
             else:
-                return self._process_single_page_pdf_with_supplier(pdf_path, supplier_name)
+                return self._process_single_page_pdf_with_supplier(pdf_path, supplier_name, progress_callback)
             
         except Exception as e:
             error_msg = f"Error in BOL extraction pipeline: {str(e)}"
@@ -373,13 +373,15 @@ class BOLExtractor:
                 'error': error_msg
             }
     
-    def _process_single_page_pdf_with_supplier(self, pdf_path: str, supplier_name: str) -> Dict[str, Any]:
+    def _process_single_page_pdf_with_supplier(self, pdf_path: str, supplier_name: str,
+                                               progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
         """
         Process a single-page PDF with supplier-specific prompts.
         
         Args:
             pdf_path: Path to the PDF file to process
             supplier_name: Supplier identifier for custom prompt
+            progress_callback: Optional callable receiving (event, data) progress events
             
         Returns:
             Dict containing success status, extracted data, or error information
@@ -387,7 +389,8 @@ class BOLExtractor:
         try:
             # Step 1: Extract raw text from PDF
             logger.info("Step 1: Extracting text from PDF")
-            raw_text = self.ocr_utils.extract_text_from_pdf(pdf_path)
+            page_extractions = self.ocr_utils.extract_pages_from_pdf(pdf_path, get_supplier_ocr_settings(supplier_name))
+            raw_text = '\n'.join(page['text'] for page in page_extractions if page['text'])
             
             if not raw_text or len(raw_text.strip()) < 50:
                 return {
@@ -400,20 +403,31 @@ class BOLExtractor:
             # Step 2: Use LLM to structure the data with supplier-specific prompt
             logger.info(f"Step 2: Processing text with LLM for supplier: {supplier_name}")
             structured_data = self.llm_refiner.extract_bol_data(raw_text, supplier_name)
+            method = page_extractions[0]['method'] if page_extractions else None
             
             if not structured_data:
+                self._report_progress(progress_callback, 'page', page_number=1, page_count=1,
+                                      status='failed', method=method)
                 return {
                     'success': False,
                     'error': 'Failed to extract structured data from text using LLM'
                 }
             
+            self._report_progress(progress_callback, 'page', page_number=1, page_count=1,
+                                  status='extracted', method=method, coils=1)
+            
             # Step 3: Flatten and normalize the JSON data
             logger.info("Step 3: Flattening and normalizing data")
             flattened_data = self.json_flattener.flatten_bol_data(structured_data)
+            self._report_progress(progress_callback, 'coil', page_number=1, coil=flattened_data)
             
             # Step 4: Write to Google Sheets
             logger.info("Step 4: Writing to Google Sheets")
+            self._report_progress(progress_callback, 'writing', expected=1)
             sheet_result = self.google_sheets_writer.append_bol_data(flattened_data)
+            self._report_progress(progress_callback, 'write', success=sheet_result['success'],
+                                  rows_added=1 if sheet_result['success'] else 0, expected=1,
+                                  error=sheet_result.get('error'))
             
             if not sheet_result['success']:
                 return {
@@ -428,6 +442,10 @@ class BOLExtractor:
                 'sheet_row': sheet_result.get('row_number'),
                 'raw_text_length': len(raw_text),
                 'pages_processed': 1,
+                'page_timings': [
+                    {'page_number': page['page_number'], 'method': page['method'], 'extract_seconds': round(page['seconds'], 3)}
+                    for page in page_extractions
+                ],
                 'supplier': supplier_name
             }
             
@@ -440,35 +458,29 @@ class BOLExtractor:
                 'error': error_msg
             }
     
-    def _process_multi_page_pdf_with_supplier(self, pdf_path: str, supplier_name: str) -> Dict[str, Any]:
+    def _process_multi_page_pdf_with_supplier(self, pdf_path: str, page_count: int, supplier_name: str,
+                                              bypass_cache: bool = False,
+                                              progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
         """
         Process a multi-page PDF with supplier-specific prompts.
         
         Args:
             pdf_path: Path to the PDF file to process
+            page_count: Number of pages in the PDF
             supplier_name: Supplier identifier for custom prompt
+            bypass_cache: Re-run OCR and LLM extraction even for cached pages
+            progress_callback: Optional callable receiving (event, data) progress events
             
         Returns:
             Dict containing success status, aggregated data, or error information
         """
         try:
-            logger.info(f"Processing multi-page PDF for supplier: {supplier_name}")
-            
-            # Split PDF into individual pages
-            split_files = self.pdf_splitter.split_pdf(pdf_path)
-            
-            if not split_files:
-                return {
-                    'success': False,
-                    'error': 'Failed to split PDF into individual pages'
-                }
-            
-            logger.info(f"Split PDF into {len(split_files)} pages")
+            logger.info(f"Processing {page_count}-page PDF for supplier: {supplier_name}")
             
             # Max page protection
-            if len(split_files) > MAX_PAGES:
-                logger.warning(f"🚫 PDF has {len(split_files)} pages, which exceeds max allowed ({MAX_PAGES}). Truncating.")
-                split_files = split_files[:MAX_PAGES]
+            if page_count > MAX_PAGES:
+                logger.warning(f"🚫 PDF has {page_count} pages, which exceeds max allowed ({MAX_PAGES}). Truncating.")
+                page_count = MAX_PAGES
                 logger.info(f"Processing first {MAX_PAGES} pages only")
             
             # Process each page individually and collect all coils for batch writing
@@ -478,21 +490,37 @@ class BOLExtractor:
             page_coil_counts = []  # Track coils per page for debugging
             failed_pages = []  # Track pages that failed processing
             
-            for i, page_path in enumerate(split_files):
+            # OCR and LLM work runs concurrently; results come back in page order
+            page_results = self._extract_pages_concurrently(
+                pdf_path, page_count, supplier_name, bypass_cache, progress_callback
+            )
+            cached_pages = sum(1 for page_result in page_results if page_result['cached'])
+            if cached_pages:
+                logger.info(f"Served {cached_pages}/{page_count} pages from the extraction cache")
+            
+            page_timings = [
+                {
+                    'page_number': page_result['page_number'],
+                    'method': page_result['method'],
+                    'extract_seconds': round(page_result['extract_seconds'], 3),
+                    'llm_seconds': round(page_result['llm_seconds'], 3)
+                }
+                for page_result in page_results
+            ]
+            for timing in page_timings:
+                logger.info(f"Page {timing['page_number']} timing: {timing['method']} "
+                            f"{timing['extract_seconds']}s, LLM {timing['llm_seconds']}s")
+            
+            for i, page_result in enumerate(page_results):
                 try:
-                    logger.info(f"Processing page {i + 1}/{len(split_files)} individually")
-                    page_text = self.ocr_utils.extract_text_from_pdf(page_path)
+                    if page_result['error']:
+                        raise page_result['error']
                     
-                    if not page_text:
+                    if not page_result['has_text']:
                         logger.warning(f"No text extracted from page {i + 1}, skipping")
                         continue
-                        
-                    processed_text = self.ocr_utils.preprocess_text(page_text)
-                    logger.info(f"Extracted {len(processed_text)} characters from page {i + 1}")
                     
-                    # Process this page individually with LLM
-                    logger.info(f"Processing page {i + 1} with LLM for supplier: {supplier_name}")
-                    page_structured_data = self.llm_refiner.extract_bol_data(processed_text, supplier_name)
+                    page_structured_data = page_result['structured_data']
                     
                     if not page_structured_data:
                         logger.warning(f"No structured data extracted from page {i + 1}")
@@ -606,15 +634,13 @@ class BOLExtractor:
                         # Collect all valid coils for batch processing
                         all_processed_coils.append(coil_data)
                         all_flattened_coils.append(self.json_flattener.flatten_bol_data(coil_data))
+                        self._report_progress(progress_callback, 'coil', page_number=i + 1, coil=cleaned_row)
                             
                 except Exception as e:
                     logger.error(f"⚠️ Error processing page {i + 1}: {str(e)}")
                     failed_pages.append(i + 1)
                     continue
             
-            # Clean up temporary split files
-            self.pdf_splitter.cleanup_temp_files()
-            
             if total_coils_count == 0:
                 return {
                     'success': False,
@@ -631,6 +657,7 @@ class BOLExtractor:
             
             # Batch write all flattened coils to avoid API rate limits
             logger.info(f"Writing {len(all_flattened_coils)} coils to Google Sheets in batch")
+            self._report_progress(progress_callback, 'writing', expected=len(all_flattened_coils))
             batch_result = self.google_sheets_writer.append_bol_data_batch(all_flattened_coils)
             
             # Validate coil count after batch write
@@ -642,6 +669,9 @@ class BOLExtractor:
                 logger.info(f"Successfully wrote {len(all_flattened_coils)} coils to Google Sheets")
             else:
                 logger.error(f"Batch write failed: {batch_result.get('error', 'Unknown error')}")
+            self._report_progress(progress_callback, 'write', success=batch_result['success'],
+                                  rows_added=actual_count, expected=expected_count,
+                                  error=batch_result.get('error'), failed_pages=failed_pages)
             
             # Create structured_data for response
             structured_data = {"coils": all_processed_coils}
@@ -677,16 +707,16 @@ class BOLExtractor:
                 'data': structured_data,
                 'coils_processed': total_coils_count,
                 'batch_write_result': batch_result,
-                'pages_processed': len(split_files),
+                'pages_processed': page_count,
                 'failed_pages': failed_pages,
+                'cached_pages': cached_pages,
+                'page_timings': page_timings,
                 'backup_created': backup_created,
                 'count_validation': count_validation,
                 'supplier': supplier_name
             }
             
         except Exception as e:
-            # Ensure cleanup even on error
-            self.pdf_splitter.cleanup_temp_files()
             error_msg = f"Error processing multi-page PDF for supplier {supplier_name}: {str(e)}"
             logger.error(error_msg)
             logger.error(traceback.format_exc())
@@ -695,6 +725,216 @@ class BOLExtractor:
                 'error': error_msg
             }
     
+    def _extract_pages_concurrently(self, pdf_path: str, page_count: int, supplier_name: str,
+                                    bypass_cache: bool = False,
+                                    progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
+        """
+        Run OCR and batched LLM extraction for each page using bounded worker pools.
+        
+        The document is opened once. Pages already in the extraction cache are
+        answered from it; image-only pages are rendered in memory at the
+        supplier's DPI and OCR'd by the shared OCR service. As soon as a run of
+        consecutive pages has text, it is packed into LLM requests up to the
+        configured token budget, and each batch's coils are attributed back to
+        their pages. Results are returned in page order.
+        
+        Args:
+            pdf_path: Path to the PDF file to process
+            page_count: Number of pages to process
+            supplier_name: Supplier identifier for custom prompt
+            bypass_cache: Skip cache lookups (results are still stored)
+            progress_callback: Optional callable receiving a 'page' event as each page finishes
+            
+        Returns:
+            List of per-page result dictionaries in page order
+        """
+        page_results = [
+            {
+                'page_number': i + 1, 'has_text': False, 'structured_data': None, 'error': None,
+                'cached': False, 'method': None, 'extract_seconds': 0.0, 'llm_seconds': 0.0
+            }
+            for i in range(page_count)
+        ]
+        
+        # Cache keys: page content hash + supplier + prompt version + model
+        page_digests = {}
+        supplier_key = supplier_name.lower().replace(' ', '_').replace('-', '_')
+        prompt_version = self.llm_refiner.get_prompt_version(supplier_name) if self.extraction_cache.enabled else ''
+        model_name = self.llm_refiner.model_name
+        
+        ocr_settings = get_supplier_ocr_settings(supplier_name)
+        # Cached page text is only reused when it was produced the same way
+        ocr_engine = ocr_engine_version() if self.extraction_cache.enabled else ''
+        llm_workers = min(self.config.llm_workers, page_count) or 1
+        logger.info(
+            f"Scheduling {page_count} pages: {self.ocr_service.workers} OCR workers "
+            f"(dpi={ocr_settings['dpi']}, psm={ocr_settings['psm']}), {llm_workers} LLM workers, "
+            f"{self.config.llm_batch_tokens}-token batches"
+        )
+        
+        # Pages are batched strictly in order, so finished pages wait here
+        # until every earlier page has its text
+        batcher = PageBatcher(self.config.llm_batch_tokens)
+        ready_texts = {}
+        next_page = 0
+        
+        with ThreadPoolExecutor(max_workers=llm_workers) as llm_pool:
+            ocr_futures = {}
+            llm_futures = {}
+            
+            def timed_llm_extract(text: str) -> Tuple[Optional[Dict[str, Any]], float]:
+                started = time.perf_counter()
+                result = self.llm_refiner.extract_bol_data(text, supplier_name)
+                return result, time.perf_counter() - started
+            
+            def submit_batch(batch: Optional[List[Tuple[int, str]]]):
+                if not batch:
+                    return
+                page_numbers = [page_number for page_number, _ in batch]
+                logger.info(f"Processing pages {page_numbers} with LLM for supplier: {supplier_name}")
+                llm_future = llm_pool.submit(timed_llm_extract, format_batch(batch))
+                llm_futures[llm_future] = batch
+                return llm_future
+            
+            def page_done(i: int, status: str):
+                coils = page_results[i]['structured_data']
+                self._report_progress(
+                    progress_callback, 'page', page_number=i + 1, page_count=page_count, status=status,
+                    method=page_results[i]['method'],
+                    coils=len(coils.get('coils', [])) if isinstance(coils, dict) else 0,
+                    error=str(page_results[i]['error']) if page_results[i]['error'] else None
+                )
+            
+            def page_ready(i: int, page_text: Optional[str] = None, from_cache: bool = False):
+                nonlocal next_page
+                if page_text:
+                    if i in page_digests and not from_cache:
+                        self.extraction_cache.put_ocr_text(page_digests[i], ocr_engine, ocr_settings, page_text)
+                    page_text = self.ocr_utils.preprocess_text(page_text)
+                    page_results[i]['has_text'] = True
+                    logger.info(f"Extracted {len(page_text)} characters from page {i + 1}")
+                elif not page_results[i]['cached']:
+                    page_done(i, 'failed' if page_results[i]['error'] else 'empty')
+                ready_texts[i] = page_text
+                
+                while next_page in ready_texts:
+                    text = ready_texts.pop(next_page)
+                    if text:
+                        submit_batch(batcher.add(next_page + 1, text))
+                    next_page += 1
+            
+            for page_number, page in self.pdf_splitter.iter_pages(pdf_path, max_pages=page_count):
+                i = page_number - 1
+                try:
+                    if self.extraction_cache.enabled:
+                        page_digests[i] = ExtractionCache.page_digest(page)
+                    
+                    if i in page_digests and not bypass_cache:
+                        cached_result = self.extraction_cache.get_llm_result(
+                            page_digests[i], supplier_key, prompt_version, model_name
+                        )
+                        if cached_result is not None:
+                            page_results[i].update(has_text=True, structured_data=cached_result, cached=True,
+                                                   method='cache')
+                            page_done(i, 'cached')
+                            page_ready(i)
+                            continue
+                        
+                        cached_text = self.extraction_cache.get_ocr_text(page_digests[i], ocr_engine, ocr_settings)
+                        if cached_text:
+                            page_results[i]['method'] = 'cache'
+                            page_ready(i, cached_text, from_cache=True)
+                            continue
+                    
+                    # Only image-only pages are rasterized and sent to OCR
+                    started = time.perf_counter()
+                    metadata = self.ocr_utils.classify_page(page)
+                    direct_text = self.ocr_utils.extract_direct_page_text(page) if metadata['has_text'] else None
+                    
+                    if metadata['needs_ocr']:
+                        page_results[i]['method'] = 'ocr'
+                        img_data = self.ocr_utils.render_page_image(page, ocr_settings['dpi'])
+                        page_results[i]['extract_seconds'] = time.perf_counter() - started
+                        ocr_future = self.ocr_service.submit(img_data, page_number, ocr_settings)
+                        ocr_futures[ocr_future] = (i, direct_text)
+                    else:
+                        page_results[i]['method'] = 'text'
+                        page_results[i]['extract_seconds'] = time.perf_counter() - started
+                        page_ready(i, direct_text)
+                except Exception as e:
+                    logger.error(f"Text extraction failed for page {page_number}: {str(e)}")
+                    page_results[i]['error'] = e
+                    if i not in ready_texts and i >= next_page:
+                        page_ready(i)
+            
+            for future in as_completed(ocr_futures):
+                i, direct_text = ocr_futures[future]
+                try:
+                    ocr_text, ocr_seconds = future.result()
+                    page_results[i]['extract_seconds'] += ocr_seconds
+                except Exception as e:
+                    logger.error(f"OCR failed for page {i + 1}: {str(e)}")
+                    page_results[i]['error'] = e
+                    page_ready(i)
+                    continue
+                
+                page_ready(i, self.ocr_utils.select_text(direct_text, ocr_text))
+            
+            submit_batch(batcher.flush())
+            
+            pending = set(llm_futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = llm_futures.pop(future)
+                    page_numbers = [page_number for page_number, _ in batch]
+                    try:
+                        structured_data, llm_seconds = future.result()
+                    except Exception as e:
+                        logger.error(f"LLM extraction failed for pages {page_numbers}: {str(e)}")
+                        for page_number in page_numbers:
+                            page_results[page_number - 1]['error'] = e
+                            page_done(page_number - 1, 'failed')
+                        continue
+                    
+                    if not structured_data and len(batch) > 1:
+                        # A cut-off or unparseable answer loses the whole batch; retry it in halves
+                        logger.warning(f"No usable LLM result for pages {page_numbers}, retrying them in two batches")
+                        half = len(batch) // 2
+                        pending.update((submit_batch(batch[:half]), submit_batch(batch[half:])))
+                        continue
+                    
+                    # Coils are attributed to pages through their PAGE field
+                    split_results = split_batch_result(structured_data, page_numbers) if structured_data else {}
+                    for page_number in page_numbers:
+                        i = page_number - 1
+                        page_results[i]['llm_seconds'] = llm_seconds / len(page_numbers)
+                        page_results[i]['structured_data'] = split_results.get(page_number)
+                        if page_results[i]['structured_data'] and i in page_digests:
+                            self.extraction_cache.put_llm_result(
+                                page_digests[i], supplier_key, prompt_version, model_name,
+                                page_results[i]['structured_data']
+                            )
+                        page_done(i, 'extracted' if page_results[i]['structured_data'] else 'failed')
+        
+        return page_results
+    
+    def _report_progress(self, progress_callback: Optional[Callable], event: str, **data):
+        """
+        Send a progress event to the caller without letting it break extraction.
+        
+        Args:
+            progress_callback: Callable receiving (event, data), or None
+            event: Event name ('document', 'page', 'coil', 'writing' or 'write')
+            **data: Event payload
+        """
+        if not progress_callback:
+            return
+        try:
+            progress_callback(event, data)
+        except Exception as e:
+            logger.warning(f"Progress callback failed for {event} event: {str(e)}")
+    
     def validate_extraction(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validate extracted BOL data for completeness and accuracy.
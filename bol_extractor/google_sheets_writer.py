@@ -5,13 +5,31 @@ Handles authentication and data writing to specified spreadsheet.
 
 import json
 import logging
+import re
 from typing import Dict, Any, List
-import gspread
-from google.oauth2.service_account import Credentials
 from .config import Config
 
 logger = logging.getLogger(__name__)
 
+def parse_updated_rows(append_response: Dict[str, Any]) -> List[int]:
+    """
+    Get the row numbers written by a values.append call.
+    
+    Args:
+        append_response: Sheets API append response, e.g. with
+            updates.updatedRange = "'UNPROCESSED_INVENTORY'!A41:N43"
+            
+    Returns:
+        List of 1-indexed row numbers, empty if the range cannot be read
+    """
+    updated_range = (append_response or {}).get('updates', {}).get('updatedRange', '')
+    match = re.search(r'![A-Z]+(\d+)(?::[A-Z]+(\d+))?$', updated_range)
+    if not match:
+        return []
+    first_row = int(match.group(1))
+    last_row = int(match.group(2) or first_row)
+    return list(range(first_row, last_row + 1))
+
 class GoogleSheetsWriter:
     """Google Sheets integration for BOL data output."""
     
@@ -19,36 +37,31 @@ class GoogleSheetsWriter:
         """Initialize Google Sheets writer with configuration."""
         self.config = config
         self.client = None
+        self.google_clients = None
+        self.spreadsheet = None
         self.worksheet = None
+        self.headers = None
         
         # Initialize Google Sheets client
         self._initialize_client()
         logger.info("Google Sheets writer initialized")
     
     def _initialize_client(self):
-        """Initialize the Google Sheets client with service account credentials."""
+        """Get the shared, already-authorized Google Sheets client for the configured service account."""
+        import sys
+        import os
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        
         try:
+            from utils.google_clients import get_google_clients
+            
             # Parse service account credentials from config
             if not self.config.google_service_account_key:
                 raise ValueError("Google service account key not provided")
             
-            # Load credentials from JSON string
-            service_account_info = json.loads(self.config.google_service_account_key)
-            
-            # Define required scopes
-            scopes = [
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            
-            # Create credentials object
-            credentials = Credentials.from_service_account_info(
-                service_account_info, 
-                scopes=scopes
-            )
-            
-            # Initialize gspread client
-            self.client = gspread.authorize(credentials)
+            # Credentials and the gspread session are created once per process
+            self.google_clients = get_google_clients(self.config.google_service_account_key)
+            self.client = self.google_clients.get_sheets_client()
             logger.info("Google Sheets client initialized successfully")
             
         except json.JSONDecodeError as e:
@@ -71,7 +84,7 @@ class GoogleSheetsWriter:
                 return False
             
             # Try to open the target spreadsheet
-            spreadsheet = self.client.open_by_key(self.config.spreadsheet_id)
+            spreadsheet = self.google_clients.open_spreadsheet(self.config.spreadsheet_id)
             logger.info(f"Successfully connected to spreadsheet: {spreadsheet.title}")
             
             # Try to access the first worksheet
@@ -84,53 +97,79 @@ class GoogleSheetsWriter:
             logger.error(f"Google Sheets connection verification failed: {str(e)}")
             return False
     
+    def _get_worksheet(self):
+        """
+        Get the target worksheet, opening the spreadsheet only on first use.
+        
+        Returns:
+            The configured worksheet, or the first worksheet if it does not exist
+        """
+        if self.worksheet is None:
+            self.spreadsheet = self.google_clients.open_spreadsheet(self.config.spreadsheet_id)
+            
+            # Try to access the target worksheet first, fallback to first sheet
+            try:
+                self.worksheet = self.google_clients.get_worksheet(self.config.worksheet_name,
+                                                                   self.config.spreadsheet_id)
+                logger.info(f"Successfully accessed worksheet: {self.config.worksheet_name}")
+            except Exception as e:
+                self.worksheet = self.spreadsheet.sheet1
+                logger.warning(f"{self.config.worksheet_name} worksheet not found, using first worksheet: {str(e)}")
+        
+        return self.worksheet
+    
     def append_bol_data_batch(self, bol_data_list: List[Dict[str, str]]) -> Dict[str, Any]:
         """
         Append multiple BOL data entries to the Google Sheets spreadsheet in batch.
         
+        The spreadsheet, worksheet and header row are looked up once per writer;
+        each batch is then a single append whose response gives the row numbers.
+        
         Args:
             bol_data_list: List of flattened BOL data dictionaries
             
         Returns:
-            Result dictionary with success status and details
+            Result dictionary with success status, rows added and their row numbers
         """
         try:
             if not self.client:
                 return {"success": False, "error": "Google Sheets client not initialized"}
             
-            spreadsheet = self.client.open_by_key(self.config.spreadsheet_id)
-            
-            # Try to access the target worksheet first, fallback to first sheet
-            try:
-                worksheet = spreadsheet.worksheet(self.config.worksheet_name)
-                logger.info(f"Successfully accessed worksheet: {self.config.worksheet_name}")
-            except Exception as e:
-                worksheet = spreadsheet.sheet1
-                logger.warning(f"UNPROCESSED_INVENTORY worksheet not found, using first worksheet: {str(e)}")
-            
             if not bol_data_list:
                 return {"success": False, "error": "No data to write"}
             
+            worksheet = self._get_worksheet()
+            
             # Ensure headers exist
-            self._ensure_headers(worksheet, bol_data_list[0])
+            if self.headers is None:
+                self.headers = self._ensure_headers(worksheet, bol_data_list[0])
             
-            # Prepare rows for batch insert
+            # Prepare rows in the sheet's column order
             rows_to_add = []
             for bol_data in bol_data_list:
-                row_data = [bol_data.get(header, '') for header in self.get_header_row()]
+                row_data = [str(bol_data.get(header, '')) for header in self.headers]
                 rows_to_add.append(row_data)
             
             # Batch append all rows at once
-            worksheet.append_rows(rows_to_add)
+            response = worksheet.append_rows(rows_to_add)
+            row_numbers = parse_updated_rows(response)
+            self._update_inventory_mirror(worksheet.title, rows_to_add, row_numbers)
             
-            logger.info(f"Successfully batch-appended {len(rows_to_add)} BOL records")
+            logger.info(f"Successfully batch-appended {len(rows_to_add)} BOL records (rows {row_numbers})")
             return {
                 "success": True, 
                 "rows_added": len(rows_to_add),
+                "row_numbers": row_numbers,
+                "worksheet_title": worksheet.title,
                 "message": f"Batch wrote {len(rows_to_add)} coils"
             }
             
         except Exception as e:
+            # Drop cached handles so the next call reopens the spreadsheet
+            self.worksheet = None
+            self.headers = None
+            if self.google_clients:
+                self.google_clients.invalidate(self.config.spreadsheet_id)
             error_msg = f"Failed to batch append BOL data to Google Sheets: {str(e)}"
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
@@ -145,66 +184,46 @@ class GoogleSheetsWriter:
         Returns:
             Result dictionary with success status and details
         """
-        try:
-            # Open the target spreadsheet and get UNPROCESSED_INVENTORY worksheet
-            spreadsheet = self.client.open_by_key(self.config.spreadsheet_id)
-            
-            try:
-                worksheet = spreadsheet.worksheet("UNPROCESSED_INVENTORY")
-            except Exception as e:
-                logger.warning(f"UNPROCESSED_INVENTORY worksheet not found, using first worksheet: {str(e)}")
-                worksheet = spreadsheet.sheet1
-            
-            # Check if headers exist, if not create them
-            self._ensure_headers(worksheet, bol_data)
-            
-            # Get headers to ensure correct column order
-            headers = worksheet.row_values(1)
-            
-            # Create row data in correct order
-            row_data = []
-            for header in headers:
-                value = bol_data.get(header, '')
-                row_data.append(str(value))
-            
-            # Append the row
-            worksheet.append_row(row_data)
-            
-            # Get the row number of the added data
-            row_number = len(worksheet.get_all_values())
-            
-            logger.info(f"Successfully appended BOL data to row {row_number}")
-            
-            return {
-                'success': True,
-                'row_number': row_number,
-                'spreadsheet_title': spreadsheet.title,
-                'worksheet_title': worksheet.title
-            }
-            
-        except Exception as e:
-            error_msg = f"Failed to append BOL data to Google Sheets: {str(e)}"
-            logger.error(error_msg)
+        result = self.append_bol_data_batch([bol_data])
+        if not result['success']:
             return {
                 'success': False,
-                'error': error_msg
+                'error': result['error'].replace('batch append', 'append')
             }
+        
+        row_numbers = result['row_numbers']
+        logger.info(f"Successfully appended BOL data to row {row_numbers[0] if row_numbers else 'unknown'}")
+        return {
+            'success': True,
+            'row_number': row_numbers[0] if row_numbers else None,
+            'spreadsheet_title': self.spreadsheet.title,
+            'worksheet_title': result['worksheet_title']
+        }
     
-    def _ensure_headers(self, worksheet, bol_data: Dict[str, str]):
+    def _update_inventory_mirror(self, worksheet_title: str, rows: List[List[str]], row_numbers: List[int]):
+        """Write appended rows through to the local inventory mirror; failures only cost a refresh."""
+        try:
+            from utils.inventory_mirror import inventory_mirror
+            inventory_mirror.append_records(worksheet_title, rows, row_numbers)
+        except Exception as e:
+            logger.warning(f"Could not update inventory mirror: {str(e)}")
+    
+    def _ensure_headers(self, worksheet, bol_data: Dict[str, str]) -> List[str]:
         """
         Ensure the worksheet has proper headers.
         
         Args:
             worksheet: Google Sheets worksheet object
             bol_data: BOL data dictionary to get headers from
+            
+        Returns:
+            The header row now in the sheet
         """
+        expected_headers = list(bol_data.keys())
         try:
             # Get current headers
             existing_headers = worksheet.row_values(1) if worksheet.row_count > 0 else []
             
-            # Define expected headers based on BOL data keys
-            expected_headers = list(bol_data.keys())
-            
             # If no headers exist or headers don't match, set them
             if not existing_headers or set(existing_headers) != set(expected_headers):
                 logger.info("Setting up headers in Google Sheets")
@@ -215,10 +234,14 @@ class GoogleSheetsWriter:
                 
                 worksheet.insert_row(expected_headers, 1)
                 logger.info(f"Headers set: {expected_headers}")
+                return expected_headers
+            
+            return existing_headers
             
         except Exception as e:
             logger.warning(f"Could not ensure headers: {str(e)}")
-            # Continue anyway, let append_row handle it
+            # Continue anyway with the data's own column order
+            return expected_headers
     
     def get_all_bol_data(self) -> List[Dict[str, str]]:
         """
@@ -228,7 +251,7 @@ class GoogleSheetsWriter:
             List of BOL data dictionaries
         """
         try:
-            spreadsheet = self.client.open_by_key(self.config.spreadsheet_id)
+            spreadsheet = self.google_clients.open_spreadsheet(self.config.spreadsheet_id)
             worksheet = spreadsheet.sheet1
             
             # Get all records
@@ -253,7 +276,7 @@ class GoogleSheetsWriter:
             True if update successful, False otherwise
         """
         try:
-            spreadsheet = self.client.open_by_key(self.config.spreadsheet_id)
+            spreadsheet = self.google_clients.open_spreadsheet(self.config.spreadsheet_id)
             worksheet = spreadsheet.sheet1
             
             # Find the VALIDATION_STATUS column
@@ -284,7 +307,7 @@ class GoogleSheetsWriter:
         try:
             from datetime import datetime
             
-            spreadsheet = self.client.open_by_key(self.config.spreadsheet_id)
+            spreadsheet = self.google_clients.open_spreadsheet(self.config.spreadsheet_id)
             
             # Create backup sheet name with timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
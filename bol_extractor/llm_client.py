@@ -0,0 +1,292 @@
+"""
+Asynchronous chat-completion client shared by the LLM providers.
+Pools HTTP connections, retries with jittered backoff and can hedge slow requests.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import random
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Process-wide clients by provider configuration, and the process that created them
+_shared_clients = {}
+_shared_pid = None
+_shared_lock = threading.Lock()
+
+class LLMProvider:
+    """Connection details for one OpenAI-compatible chat-completions endpoint."""
+    
+    def __init__(self, name: str, url: str, api_key: str, model: str, max_tokens: int,
+                 json_mode: bool = False):
+        """
+        Initialize a provider definition.
+        
+        Args:
+            name: Provider name used in logs
+            url: Chat-completions endpoint URL
+            api_key: Bearer token for the endpoint
+            model: Model name sent with every request
+            max_tokens: Completion token limit
+            json_mode: Whether to request a JSON object response format
+        """
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+        self.json_mode = json_mode
+    
+    def config_key(self) -> Tuple:
+        """Everything that identifies this provider's requests, for sharing clients."""
+        return (self.name, self.url, self.api_key, self.model, self.max_tokens, self.json_mode)
+
+class LLMRequestError(Exception):
+    """Raised when a provider request fails after all retries."""
+    pass
+
+class AsyncLLMClient:
+    """Runs chat-completion requests on a background event loop with pooled connections."""
+    
+    def __init__(self, providers: List[LLMProvider], max_retries: int = 3, backoff_base: float = 1.0,
+                 backoff_max: float = 30.0, concurrency: int = 4, request_timeout: float = 120.0,
+                 hedge_after: float = 0.0, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the client.
+        
+        Args:
+            providers: Providers in priority order (first is primary)
+            max_retries: Retries per provider after the first attempt
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Upper bound on a single backoff delay
+            concurrency: Maximum in-flight requests per provider
+            request_timeout: Timeout for a single HTTP request in seconds
+            hedge_after: Seconds to wait on the primary before also starting the
+                fallback provider; 0 disables hedging and falls back sequentially
+            transport: Optional httpx transport (used by tests)
+        """
+        self.providers = providers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.concurrency = max(1, concurrency)
+        self.request_timeout = request_timeout
+        self.hedge_after = hedge_after
+        self.transport = transport
+        
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._semaphores = {}
+    
+    def complete(self, messages: List[Dict[str, str]], parse: Callable[[str], Optional[Any]],
+                 provider_names: Optional[List[str]] = None) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        Send a chat request, falling back (or hedging) across providers.
+        
+        A provider counts as successful only if parse returns a non-None value
+        for its response text.
+        
+        Args:
+            messages: Chat messages to send
+            parse: Converts response text into the caller's result
+            provider_names: Restrict the request to these providers
+            
+        Returns:
+            Tuple of (name of the provider that answered, parsed result), or
+            (None, None) if every provider failed
+        """
+        providers = [p for p in self.providers if provider_names is None or p.name in provider_names]
+        if not providers:
+            return None, None
+        
+        future = asyncio.run_coroutine_threadsafe(self._complete(providers, messages, parse), self._get_loop())
+        return future.result()
+    
+    def close(self):
+        """Close pooled connections and stop the background event loop."""
+        with self._lock:
+            if self._loop is None:
+                return
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        
+        asyncio.run_coroutine_threadsafe(self._close_clients(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='llm-client', daemon=True)
+                self._thread.start()
+            return self._loop
+    
+    def _get_client(self, provider: LLMProvider) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        """Get the pooled HTTP client and concurrency limit for a provider (event loop only)."""
+        if provider.name not in self._clients:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            self._clients[provider.name] = httpx.AsyncClient(
+                timeout=self.request_timeout, limits=limits, transport=self.transport
+            )
+            self._semaphores[provider.name] = asyncio.Semaphore(self.concurrency)
+        return self._clients[provider.name], self._semaphores[provider.name]
+    
+    async def _close_clients(self):
+        """Close every pooled HTTP client."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+        self._semaphores = {}
+    
+    async def _complete(self, providers: List[LLMProvider], messages: List[Dict[str, str]],
+                        parse: Callable[[str], Optional[Any]]) -> Tuple[Optional[str], Optional[Any]]:
+        """Try providers in order, hedging the fallback when a latency budget is set."""
+        if self.hedge_after > 0 and len(providers) > 1:
+            return await self._complete_hedged(providers, messages, parse)
+        
+        for provider in providers:
+            result = await self._attempt(provider, messages, parse)
+            if result is not None:
+                return provider.name, result
+        return None, None
+    
+    async def _complete_hedged(self, providers: List[LLMProvider], messages: List[Dict[str, str]],
+                               parse: Callable[[str], Optional[Any]]) -> Tuple[Optional[str], Optional[Any]]:
+        """Start the next provider whenever the running ones exceed the latency budget or fail."""
+        pending = {}
+        remaining = list(providers)
+        
+        try:
+            while remaining or pending:
+                if remaining:
+                    provider = remaining.pop(0)
+                    if pending:
+                        logger.info(f"Hedging request to {provider.name} after {self.hedge_after:.1f}s")
+                    pending[asyncio.ensure_future(self._attempt(provider, messages, parse))] = provider
+                
+                timeout = self.hedge_after if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    provider = pending.pop(task)
+                    result = task.result()
+                    if result is not None:
+                        return provider.name, result
+            return None, None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _attempt(self, provider: LLMProvider, messages: List[Dict[str, str]],
+                       parse: Callable[[str], Optional[Any]]) -> Optional[Any]:
+        """Run one provider request with retries; failures are logged and return None."""
+        try:
+            content = await self._post_with_retries(provider, messages)
+            result = parse(content)
+            if result is None:
+                logger.warning(f"{provider.name} returned an unusable response")
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"{provider.name} extraction failed: {str(e)}")
+            return None
+    
+    async def _post_with_retries(self, provider: LLMProvider, messages: List[Dict[str, str]]) -> str:
+        """
+        POST a chat request, retrying on rate limits, server errors and network errors.
+        
+        Args:
+            provider: Provider to call
+            messages: Chat messages to send
+            
+        Returns:
+            Message content of the first choice
+        """
+        client, semaphore = self._get_client(provider)
+        payload = {
+            'model': provider.model,
+            'messages': messages,
+            'temperature': 0,
+            'max_tokens': provider.max_tokens
+        }
+        if provider.json_mode:
+            payload['response_format'] = {'type': 'json_object'}
+        headers = {'Authorization': f"Bearer {provider.api_key}"}
+        
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            async with semaphore:
+                try:
+                    response = await client.post(provider.url, json=payload, headers=headers)
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        response.raise_for_status()
+                        choice = response.json()['choices'][0]
+                        if choice.get('finish_reason') == 'length':
+                            # Truncated JSON could still be patched into a parseable, incomplete result
+                            raise LLMRequestError(f"{provider.name} response was cut off at "
+                                                  f"{provider.max_tokens} tokens")
+                        return choice['message']['content']
+                    error = LLMRequestError(f"{provider.name} returned HTTP {response.status_code}")
+                    retry_after = response.headers.get('retry-after')
+                except httpx.TransportError as e:
+                    error = e
+            
+            if attempt == self.max_retries:
+                break
+            
+            delay = self._backoff_delay(attempt, retry_after)
+            logger.warning(f"{provider.name} request failed ({str(error)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        
+        raise LLMRequestError(f"{provider.name} failed after {self.max_retries + 1} attempts: {str(error)}")
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+def get_llm_client(providers: List[LLMProvider], **settings) -> AsyncLLMClient:
+    """
+    Get the process-wide client for a provider configuration, creating it on first use.
+    
+    Extractors built per request share one event loop thread and connection pool
+    instead of each starting their own. A forked process gets fresh clients, since
+    the parent's event loop thread does not exist in it.
+    
+    Args:
+        providers: Providers in priority order (first is primary)
+        **settings: AsyncLLMClient keyword arguments other than transport
+        
+    Returns:
+        Shared AsyncLLMClient instance
+    """
+    global _shared_pid
+    key = (tuple(provider.config_key() for provider in providers), tuple(sorted(settings.items())))
+    with _shared_lock:
+        if _shared_pid != os.getpid():
+            _shared_clients.clear()
+            _shared_pid = os.getpid()
+        client = _shared_clients.get(key)
+        if client is None:
+            client = _shared_clients[key] = AsyncLLMClient(providers, **settings)
+            atexit.register(client.close)
+        return client
@@ -5,24 +5,45 @@ Uses OpenAI GPT-4o with DeepSeek fallback for structuring extracted text.
 
 import json
 import logging
-from typing import Dict, Any, Optional
-from openai import OpenAI
-import requests
+from typing import Dict, Any, List, Optional
+from .llm_client import LLMProvider, get_llm_client
 from .config import Config
 
 logger = logging.getLogger(__name__)
 
+# Completion token limits of the models; each request may use up to its batch's
+# document-text budget in output, since the JSON restates every coil on the pages
+OPENAI_MAX_OUTPUT_TOKENS = 16384
+DEEPSEEK_MAX_OUTPUT_TOKENS = 8192
+
+SYSTEM_PROMPT = (
+    "Extract coil-level data from the following BOL text and return one row per coil. "
+    "Format as JSON with 'coils' array. Only include coils with valid customer tags."
+)
+
 class LLMRefiner:
     """LLM-powered data extraction and refinement for BOL documents."""
     
     def __init__(self, config: Config):
         """Initialize LLM refiner with API configurations."""
         self.config = config
-        self.openai_client = None
+        providers = []
+        batch_tokens = config.llm_batch_tokens
         
-        # Initialize OpenAI client
+        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+        # do not change this unless explicitly requested by the user
+        self.openai_model = "gpt-4o"
+        
+        # OpenAI is the primary provider
         if config.openai_api_key:
-            self.openai_client = OpenAI(api_key=config.openai_api_key)
+            providers.append(LLMProvider(
+                name='openai',
+                url="https://api.openai.com/v1/chat/completions",
+                api_key=config.openai_api_key,
+                model=self.openai_model,
+                max_tokens=min(OPENAI_MAX_OUTPUT_TOKENS, max(3000, batch_tokens)),
+                json_mode=True
+            ))
             logger.info("OpenAI client initialized")
         else:
             logger.warning("OpenAI API key not provided")
@@ -30,14 +51,65 @@ class LLMRefiner:
         # DeepSeek configuration
         self.deepseek_api_key = config.deepseek_api_key
         self.deepseek_base_url = "https://api.deepseek.com/v1/chat/completions"
+        self.deepseek_model = "deepseek-chat"
         
         if self.deepseek_api_key:
+            providers.append(LLMProvider(
+                name='deepseek',
+                url=self.deepseek_base_url,
+                api_key=self.deepseek_api_key,
+                model=self.deepseek_model,
+                max_tokens=min(DEEPSEEK_MAX_OUTPUT_TOKENS, max(1500, batch_tokens))
+            ))
             logger.info("DeepSeek API key configured")
+        
+        # Shared by every refiner with the same configuration in this process
+        self.llm_client = get_llm_client(
+            providers,
+            max_retries=config.llm_max_retries,
+            backoff_base=config.llm_backoff_base,
+            backoff_max=config.llm_backoff_max,
+            concurrency=config.llm_provider_concurrency,
+            request_timeout=config.llm_request_timeout,
+            hedge_after=config.llm_hedge_after_seconds
+        )
+        if config.llm_hedge_after_seconds > 0:
+            logger.info(f"Hedged LLM requests enabled after {config.llm_hedge_after_seconds:.1f}s")
+    
+    @property
+    def model_name(self) -> str:
+        """Name of the primary model used for extraction."""
+        providers = self.llm_client.providers
+        return providers[0].model if providers else self.deepseek_model
+    
+    def get_prompt_version(self, supplier_name: str = "default") -> str:
+        """
+        Get the version stamp of the supplier prompt used for extraction.
+        
+        Args:
+            supplier_name: Supplier identifier for custom prompt
+            
+        Returns:
+            Prompt version string, or empty string if unavailable
+        """
+        import sys
+        import os
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        
+        try:
+            from utils.prompt_loader import prompt_loader
+            return prompt_loader.get_prompt_version(supplier_name)
+        except ImportError:
+            logger.warning("Could not import prompt_loader, prompt version unavailable")
+            return ''
     
     def extract_bol_data(self, text: str, supplier_name: str = "default") -> Optional[Dict[str, Any]]:
         """
         Extract structured BOL data from raw text using LLM with supplier-specific prompts.
         
+        OpenAI is tried first and DeepSeek second; with hedging enabled DeepSeek
+        is also started if OpenAI has not answered within the latency budget.
+        
         Args:
             text: Raw text extracted from PDF
             supplier_name: Supplier identifier for custom prompt
@@ -53,34 +125,18 @@ class LLMRefiner:
                 bol_numbers_in_input.append(pattern)
         logger.info(f"🔍 BOL patterns found in input text: {bol_numbers_in_input}")
         
-        # Try OpenAI first
-        if self.openai_client:
-            try:
-                logger.info(f"Attempting data extraction with OpenAI GPT-4o for supplier: {supplier_name}")
-                result = self._extract_with_openai(text, supplier_name)
-                if result:
-                    logger.info("Successfully extracted data with OpenAI")
-                    return result
-            except Exception as e:
-                logger.warning(f"OpenAI extraction failed: {str(e)}")
-        
-        # Fallback to DeepSeek
-        if self.deepseek_api_key:
-            try:
-                logger.info(f"Falling back to DeepSeek API for supplier: {supplier_name}")
-                result = self._extract_with_deepseek(text, supplier_name)
-                if result:
-                    logger.info("Successfully extracted data with DeepSeek")
-                    return result
-            except Exception as e:
-                logger.error(f"DeepSeek extraction failed: {str(e)}")
+        logger.info(f"Attempting data extraction for supplier: {supplier_name}")
+        provider_name, result = self._extract(text, supplier_name)
+        if result:
+            logger.info(f"Successfully extracted data with {provider_name}")
+            return result
         
         logger.error("All LLM extraction methods failed")
         return None
     
     def _extract_with_openai(self, text: str, supplier_name: str = "default") -> Optional[Dict[str, Any]]:
         """
-        Extract BOL data using OpenAI GPT-4o with supplier-specific prompts.
+        Extract BOL data using OpenAI GPT-4o only.
         
         Args:
             text: Raw text from PDF
@@ -89,66 +145,11 @@ class LLMRefiner:
         Returns:
             Structured data dictionary or None if extraction fails
         """
-        prompt = self._create_extraction_prompt(text, supplier_name)
-        
-        try:
-            # Debug logging for prompt and response
-            logger.info(f"🧾 Prompt preview (first 500 chars): {prompt[:500]}")
-            
-            # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            # do not change this unless explicitly requested by the user
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Extract coil-level data from the following BOL text and return one row per coil. Format as JSON with 'coils' array. Only include coils with valid customer tags."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0,  # Zero temperature for consistent extraction
-                max_tokens=3000,
-                timeout=120
-            )
-            
-            result_text = response.choices[0].message.content
-            logger.info(f"🧠 Raw OpenAI response length: {len(result_text)} chars")
-            logger.info(f"🧠 Response preview: {result_text[:200]}...")
-            
-            # Check for BOL numbers in response
-            if "1641213" in result_text:
-                logger.info("✓ BOL #1641213 found in response")
-            else:
-                logger.warning("⚠️ BOL #1641213 NOT found in response")
-            
-            if not result_text or result_text.strip() == "":
-                logger.error("OpenAI returned empty response")
-                return None
-            
-            # Clean the response text to handle potential formatting issues
-            result_text = result_text.strip()
-            if result_text.startswith('```json'):
-                result_text = result_text[7:]
-            if result_text.endswith('```'):
-                result_text = result_text[:-3]
-            result_text = result_text.strip()
-            
-            return self._safe_json_parse(result_text)
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"OpenAI returned invalid JSON: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"OpenAI API error: {str(e)}")
-            raise
+        return self._extract(text, supplier_name, ['openai'])[1]
     
     def _extract_with_deepseek(self, text: str, supplier_name: str = "default") -> Optional[Dict[str, Any]]:
         """
-        Extract BOL data using DeepSeek API as fallback with supplier-specific prompts.
+        Extract BOL data using DeepSeek only.
         
         Args:
             text: Raw text from PDF
@@ -157,57 +158,63 @@ class LLMRefiner:
         Returns:
             Structured data dictionary or None if extraction fails
         """
+        return self._extract(text, supplier_name, ['deepseek'])[1]
+    
+    def _extract(self, text: str, supplier_name: str = "default", provider_names: Optional[List[str]] = None):
+        """
+        Send an extraction request through the shared async client.
+        
+        Args:
+            text: Raw text from PDF
+            supplier_name: Supplier identifier for custom prompt
+            provider_names: Restrict the request to these providers
+            
+        Returns:
+            Tuple of (provider name, structured data), with None values on failure
+        """
         prompt = self._create_extraction_prompt(text, supplier_name)
         
-        headers = {
-            "Authorization": f"Bearer {self.deepseek_api_key}",
-            "Content-Type": "application/json"
-        }
+        # Debug logging for prompt and response
+        logger.info(f"🧾 Prompt preview (first 500 chars): {prompt[:500]}")
         
-        payload = {
-            "model": "deepseek-chat",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "Extract coil-level data from the following BOL text and return one row per coil. Format as JSON with 'coils' array. Only include coils with valid customer tags."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.0,
-            "max_tokens": 1500
-        }
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        return self.llm_client.complete(messages, self._parse_response, provider_names)
+    
+    def _parse_response(self, result_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse a provider's response text into structured data.
         
-        try:
-            response = requests.post(
-                self.deepseek_base_url,
-                headers=headers,
-                json=payload,
-                timeout=120
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            content = result['choices'][0]['message']['content']
-            
-            # Clean up potential JSON formatting issues
-            content = content.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
-            
-            return json.loads(content)
+        Args:
+            result_text: Message content returned by the provider
             
-        except json.JSONDecodeError as e:
-            logger.error(f"DeepSeek returned invalid JSON: {str(e)}")
+        Returns:
+            Parsed JSON data or None if the response is empty or invalid
+        """
+        if not result_text or result_text.strip() == "":
+            logger.error("LLM returned empty response")
             return None
-        except Exception as e:
-            logger.error(f"DeepSeek API error: {str(e)}")
-            raise
+        
+        logger.info(f"🧠 Raw LLM response length: {len(result_text)} chars")
+        logger.info(f"🧠 Response preview: {result_text[:200]}...")
+        
+        # Check for BOL numbers in response
+        if "1641213" in result_text:
+            logger.info("✓ BOL #1641213 found in response")
+        else:
+            logger.warning("⚠️ BOL #1641213 NOT found in response")
+        
+        # Clean the response text to handle potential formatting issues
+        result_text = result_text.strip()
+        if result_text.startswith('```json'):
+            result_text = result_text[7:]
+        if result_text.endswith('```'):
+            result_text = result_text[:-3]
+        result_text = result_text.strip()
+        
+        return self._safe_json_parse(result_text)
     
     def _create_extraction_prompt(self, text: str, supplier_name: str = "default") -> str:
         """
@@ -308,9 +315,10 @@ EXTRACTION RULES:
 4. For measurements, include units (e.g., "12 inches", "2500 lbs")
 5. Be case-sensitive for codes and numbers
 6. Look for alternative terms (e.g., "Consignee" for customer, "Shipper" for vendor)
+7. The text may contain "--- PAGE n ---" markers; give every coil a "PAGE" field with the number of the page it appears on
 
 DOCUMENT TEXT:
-{text[:4000]}  
+{text}
 
 Return the extracted data in this exact JSON format:
 {{
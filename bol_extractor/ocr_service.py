@@ -0,0 +1,244 @@
+"""
+Long-lived OCR worker pool for BOL page images.
+Keeps Tesseract workers alive between documents and feeds them raw pixmap samples.
+"""
+
+import os
+import sys
+import time
+import atexit
+import logging
+import threading
+from functools import lru_cache
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+# tesserocr keeps a Tesseract engine loaded in-process; pytesseract spawns a
+# tesseract subprocess per call and is used when tesserocr is not installed
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+# 144 DPI matches the 2x zoom the pipeline has always rendered at
+DEFAULT_OCR_SETTINGS = {'dpi': 144, 'psm': 6, 'lang': 'eng'}
+
+# Per-process Tesseract engine, created on first use in each worker
+_engine = None
+
+class _TesseractEngine:
+    """Tesseract wrapper that reuses a loaded engine when tesserocr is available."""
+    
+    def __init__(self):
+        """Initialize the engine and configure the Tesseract binary path."""
+        tesseract_cmd = os.environ.get('TESSERACT_CMD')
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self._apis = {}
+    
+    def recognize(self, image: Image.Image, psm: int, lang: str) -> str:
+        """
+        Run OCR on a PIL image.
+        
+        Args:
+            image: Page image
+            psm: Tesseract page segmentation mode
+            lang: Tesseract language code
+            
+        Returns:
+            Recognized text
+        """
+        if tesserocr is not None:
+            api = self._apis.get(lang)
+            if api is None:
+                api = tesserocr.PyTessBaseAPI(lang=lang)
+                self._apis[lang] = api
+            api.SetPageSegMode(psm)
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        
+        return pytesseract.image_to_string(image, config=f'--psm {psm} -l {lang}')
+
+def render_page(page, dpi: int = DEFAULT_OCR_SETTINGS['dpi']) -> Dict[str, Any]:
+    """
+    Render a page to raw grayscale pixmap samples for OCR.
+    
+    Args:
+        page: PyMuPDF page handle
+        dpi: Render resolution
+        
+    Returns:
+        Dictionary with raw samples, width, height and PIL mode
+    """
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return {'samples': pix.samples, 'width': pix.width, 'height': pix.height, 'mode': 'L'}
+
+def recognize_image(image_data: Dict[str, Any], psm: int = DEFAULT_OCR_SETTINGS['psm'],
+                    lang: str = DEFAULT_OCR_SETTINGS['lang']) -> str:
+    """
+    Run OCR on raw pixmap samples in the current process.
+    
+    Args:
+        image_data: Output of render_page
+        psm: Tesseract page segmentation mode
+        lang: Tesseract language code
+        
+    Returns:
+        Recognized text
+    """
+    global _engine
+    if _engine is None:
+        _engine = _TesseractEngine()
+    
+    image = Image.frombytes(
+        image_data['mode'], (image_data['width'], image_data['height']), image_data['samples']
+    )
+    return _engine.recognize(image, psm, lang)
+
+def _ocr_task(image_data: Dict[str, Any], page_number: int, psm: int, lang: str) -> Tuple[Optional[str], float]:
+    """
+    OCR a single page inside a pool worker.
+    
+    Args:
+        image_data: Output of render_page
+        page_number: Page number used for logging
+        psm: Tesseract page segmentation mode
+        lang: Tesseract language code
+        
+    Returns:
+        Tuple of (OCR text or None, seconds spent in OCR)
+    """
+    started = time.perf_counter()
+    page_text = recognize_image(image_data, psm, lang)
+    elapsed = time.perf_counter() - started
+    
+    if page_text and page_text.strip():
+        logger.info(f"OCR extracted {len(page_text)} characters from page {page_number} in {elapsed:.2f}s")
+        return page_text, elapsed
+    return None, elapsed
+
+@lru_cache(maxsize=1)
+def ocr_engine_version() -> str:
+    """
+    Identify the OCR engine the workers use, including the Tesseract version.
+    
+    Returns:
+        e.g. "tesserocr 5.3.0" or "pytesseract 4.1.1"; just the wrapper name if
+        the version cannot be read
+    """
+    try:
+        if tesserocr is not None:
+            return f"tesserocr {tesserocr.tesseract_version().split()[1]}"
+        tesseract_cmd = os.environ.get('TESSERACT_CMD')
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        return f"pytesseract {pytesseract.get_tesseract_version()}"
+    except Exception as e:
+        logger.warning(f"Could not read the Tesseract version: {str(e)}")
+        return 'tesserocr' if tesserocr is not None else 'pytesseract'
+
+def get_supplier_ocr_settings(supplier_name: str = "default") -> Dict[str, Any]:
+    """
+    Get render DPI and Tesseract settings for a supplier.
+    
+    Settings come from the optional "ocr" object of the supplier's entry in
+    supplier_prompts.json, falling back to the default entry and then to
+    DEFAULT_OCR_SETTINGS.
+    
+    Args:
+        supplier_name: Supplier identifier
+        
+    Returns:
+        Dictionary with 'dpi', 'psm' and 'lang'
+    """
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    
+    try:
+        from utils.prompt_loader import prompt_loader
+        return prompt_loader.get_ocr_settings(supplier_name, DEFAULT_OCR_SETTINGS)
+    except ImportError:
+        logger.warning("Could not import prompt_loader, using default OCR settings")
+        return dict(DEFAULT_OCR_SETTINGS)
+
+class OCRService:
+    """Pool of long-lived OCR workers shared by every document in the process."""
+    
+    def __init__(self, workers: int):
+        """
+        Initialize the OCR service.
+        
+        Args:
+            workers: Number of OCR worker processes
+        """
+        self.workers = max(1, workers)
+        self._executor = None
+        self._lock = threading.Lock()
+        logger.info(f"OCR service initialized with {self.workers} workers")
+    
+    def _get_executor(self):
+        """Create the worker pool on first use."""
+        with self._lock:
+            if self._executor is None:
+                # A single worker does not justify the cost of a separate process
+                if self.workers > 1:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=1)
+            return self._executor
+    
+    def submit(self, image_data: Dict[str, Any], page_number: int,
+               settings: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Queue a rendered page for OCR.
+        
+        Args:
+            image_data: Output of render_page
+            page_number: Page number used for logging
+            settings: OCR settings from get_supplier_ocr_settings
+            
+        Returns:
+            Future resolving to (OCR text or None, seconds spent in OCR)
+        """
+        settings = settings or DEFAULT_OCR_SETTINGS
+        args = (_ocr_task, image_data, page_number, settings['psm'], settings['lang'])
+        
+        try:
+            return self._get_executor().submit(*args)
+        except BrokenProcessPool:
+            # A worker died (e.g. Tesseract crashed); start a fresh pool
+            logger.warning("OCR worker pool was broken, restarting it")
+            self.shutdown(wait=False)
+            return self._get_executor().submit(*args)
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_ocr_service(workers: int) -> OCRService:
+    """
+    Get the process-wide OCR service, creating it on first use.
+    
+    Args:
+        workers: Number of OCR worker processes for a newly created service
+        
+    Returns:
+        Shared OCRService instance
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = OCRService(workers)
+            atexit.register(_service.shutdown)
+        return _service
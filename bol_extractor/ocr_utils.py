@@ -6,16 +6,20 @@ Handles both text-based PDFs and image-based PDFs requiring OCR.
 import logging
 import fitz  # PyMuPDF
 import pytesseract
-from PIL import Image
-import io
 import os
-from typing import Optional
+import time
+from typing import Any, Dict, List, Optional
+from .pdf_splitter import PDFSplitter
+from .ocr_service import DEFAULT_OCR_SETTINGS, recognize_image, render_page
 
 logger = logging.getLogger(__name__)
 
 class OCRUtils:
     """Utilities for extracting text from PDFs using PyMuPDF and OCR fallback."""
     
+    # Pages with less text than this and at least one image are treated as scanned
+    MIN_PAGE_TEXT_CHARS = 100
+    
     def __init__(self):
         """Initialize OCR utilities."""
         # Configure Tesseract path if needed (common on Windows)
@@ -27,7 +31,7 @@ class OCRUtils:
     
     def extract_text_from_pdf(self, pdf_path: str) -> Optional[str]:
         """
-        Extract text from PDF using PyMuPDF with OCR fallback for image-based content.
+        Extract text from PDF using PyMuPDF with OCR fallback for image-based pages.
         
         Args:
             pdf_path: Path to the PDF file
@@ -35,70 +39,197 @@ class OCRUtils:
         Returns:
             Extracted text as string, or None if extraction fails
         """
-        try:
-            # First attempt: Extract text directly from PDF
-            direct_text = self._extract_direct_text(pdf_path)
-            
-            # If we got sufficient text, return it
-            if direct_text and len(direct_text.strip()) > 100:
-                logger.info("Successfully extracted text directly from PDF")
-                return direct_text
+        page_extractions = self.extract_pages_from_pdf(pdf_path)
+        
+        text_content = [page['text'] for page in page_extractions if page['text']]
+        full_text = '\n'.join(text_content)
+        return full_text if full_text.strip() else None
+    
+    def extract_pages_from_pdf(self, pdf_path: str,
+                               ocr_settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Extract text page by page, running OCR only on pages without a usable text layer.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            ocr_settings: Render DPI and Tesseract settings (defaults if None)
             
-            # Fallback: Use OCR on PDF pages
-            logger.info("Direct text extraction insufficient, falling back to OCR")
-            ocr_text = self._extract_text_with_ocr(pdf_path)
+        Returns:
+            List of per-page dictionaries with text, extraction method and timing
+        """
+        page_extractions = []
+        
+        try:
+            for page_number, page in PDFSplitter().iter_pages(pdf_path):
+                page_extractions.append(self.extract_page(page, ocr_settings))
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {str(e)}")
+            return page_extractions
+        
+        ocr_pages = [page['page_number'] for page in page_extractions if page['method'] == 'ocr']
+        total_seconds = sum(page['seconds'] for page in page_extractions)
+        logger.info(
+            f"Extracted text from {len(page_extractions)} pages in {total_seconds:.2f}s "
+            f"(OCR on pages: {ocr_pages or 'none'})"
+        )
+        return page_extractions
+    
+    def extract_text_from_page(self, page) -> Optional[str]:
+        """
+        Extract text from an already-open PyMuPDF page with OCR fallback.
+        
+        Args:
+            page: PyMuPDF page handle
             
-            if ocr_text and len(ocr_text.strip()) > 50:
-                logger.info("Successfully extracted text using OCR")
-                return ocr_text
+        Returns:
+            Extracted text as string, or None if extraction fails
+        """
+        return self.extract_page(page)['text']
+    
+    def extract_page(self, page, ocr_settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Classify a page and extract its text using the text layer or OCR.
+        
+        Args:
+            page: PyMuPDF page handle
+            ocr_settings: Render DPI and Tesseract settings (defaults if None)
             
-            # If OCR also fails, return whatever we got
-            logger.warning("OCR extraction also yielded limited text")
-            return direct_text or ocr_text
+        Returns:
+            Dictionary with page_number, text, method ('text' or 'ocr') and seconds
+        """
+        started = time.perf_counter()
+        page_number = page.number + 1
+        result = {'page_number': page_number, 'text': None, 'method': 'text', 'seconds': 0.0}
+        
+        try:
+            metadata = self.classify_page(page)
+            direct_text = self.extract_direct_page_text(page) if metadata['has_text'] else None
             
+            if metadata['needs_ocr']:
+                result['method'] = 'ocr'
+                settings = ocr_settings or DEFAULT_OCR_SETTINGS
+                ocr_text = self.ocr_image(
+                    self.render_page_image(page, settings['dpi']), page_number, settings['psm'], settings['lang']
+                )
+                result['text'] = self.select_text(direct_text, ocr_text)
+            else:
+                result['text'] = direct_text
+                
         except Exception as e:
-            logger.error(f"Error extracting text from PDF: {str(e)}")
-            return None
+            logger.error(f"Error extracting text from page {page_number}: {str(e)}")
+        
+        result['seconds'] = time.perf_counter() - started
+        logger.info(f"Page {page_number}: {result['method']} extraction in {result['seconds']:.2f}s")
+        return result
     
-    def _extract_direct_text(self, pdf_path: str) -> Optional[str]:
+    def classify_page(self, page) -> Dict[str, Any]:
         """
-        Extract text directly from PDF using PyMuPDF.
+        Decide whether a page needs OCR from its text-layer density.
         
         Args:
-            pdf_path: Path to the PDF file
+            page: PyMuPDF page handle
             
         Returns:
-            Extracted text or None if extraction fails
+            Page metadata from PDFSplitter plus a 'needs_ocr' flag
         """
-        try:
-            doc = fitz.open(pdf_path)
-            text_content = []
+        metadata = PDFSplitter.get_page_metadata(page)
+        metadata['needs_ocr'] = self.page_needs_ocr(metadata)
+        return metadata
+    
+    def page_needs_ocr(self, metadata: Dict[str, Any]) -> bool:
+        """
+        Decide whether a page's text layer is too sparse to use.
+        
+        Args:
+            metadata: Page metadata from PDFSplitter.get_page_metadata
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text = page.get_text()
-                if text.strip():
-                    text_content.append(text)
+        Returns:
+            True if the page should be rasterized and OCR'd
+        """
+        if not metadata['has_text'] or metadata['text_blocks'] == 0:
+            return True
+        
+        # A little text over an image is a stamp or header on a scanned page
+        return metadata['images'] > 0 and metadata['text_chars'] < self.MIN_PAGE_TEXT_CHARS
+    
+    def extract_direct_page_text(self, page) -> Optional[str]:
+        """
+        Extract the embedded text layer from a single page.
+        
+        Args:
+            page: PyMuPDF page handle
             
-            doc.close()
+        Returns:
+            Page text or None if the page has no text layer
+        """
+        text = page.get_text()
+        return text if text.strip() else None
+    
+    def select_text(self, direct_text: Optional[str], ocr_text: Optional[str]) -> Optional[str]:
+        """
+        Choose between direct and OCR text once OCR has been attempted.
+        
+        Args:
+            direct_text: Text extracted from the PDF text layer
+            ocr_text: Text produced by OCR
             
-            full_text = '\n'.join(text_content)
-            logger.info(f"Direct extraction yielded {len(full_text)} characters from {len(doc)} pages")
-            return full_text if full_text.strip() else None
+        Returns:
+            The better of the two texts, or None if both are empty
+        """
+        if ocr_text and len(ocr_text.strip()) > 50:
+            logger.info("Successfully extracted text using OCR")
+            return ocr_text
+        
+        # If OCR also fails, return whatever we got
+        logger.warning("OCR extraction also yielded limited text")
+        return direct_text or ocr_text
+    
+    def render_page_image(self, page, dpi: int = DEFAULT_OCR_SETTINGS['dpi']) -> Dict[str, Any]:
+        """
+        Render a page to raw grayscale samples suitable for OCR.
+        
+        Args:
+            page: PyMuPDF page handle
+            dpi: Render resolution
             
-        except Exception as e:
-            logger.error(f"Error in direct text extraction: {str(e)}")
+        Returns:
+            Raw pixmap samples with width, height and mode
+        """
+        return render_page(page, dpi)
+    
+    def ocr_image(self, img_data: Dict[str, Any], page_number: int = 1,
+                  psm: int = DEFAULT_OCR_SETTINGS['psm'], lang: str = DEFAULT_OCR_SETTINGS['lang']) -> Optional[str]:
+        """
+        Run Tesseract on a rendered page image in the current process.
+        
+        Args:
+            img_data: Raw pixmap samples from render_page_image
+            page_number: Page number used for logging
+            psm: Tesseract page segmentation mode
+            lang: Tesseract language code
+            
+        Returns:
+            OCR text or None if OCR fails or finds nothing
+        """
+        try:
+            page_text = recognize_image(img_data, psm, lang)
+            if page_text.strip():
+                logger.info(f"OCR extracted {len(page_text)} characters from page {page_number}")
+                return page_text
+            return None
+        except Exception as ocr_error:
+            logger.warning(f"OCR failed for page {page_number}: {str(ocr_error)}")
             return None
     
-    def _extract_text_with_ocr(self, pdf_path: str) -> Optional[str]:
+    def _extract_direct_text(self, pdf_path: str) -> Optional[str]:
         """
-        Extract text from PDF using OCR on rendered page images.
+        Extract text directly from PDF using PyMuPDF.
         
         Args:
             pdf_path: Path to the PDF file
             
         Returns:
-            OCR-extracted text or None if extraction fails
+            Extracted text or None if extraction fails
         """
         try:
             doc = fitz.open(pdf_path)
@@ -106,36 +237,19 @@ class OCRUtils:
             
             for page_num in range(len(doc)):
                 page = doc.load_page(page_num)
-                
-                # Render page as image
-                mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better OCR accuracy
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-                # Convert to PIL Image
-                image = Image.open(io.BytesIO(img_data))
-                
-                # Perform OCR
-                try:
-                    page_text = pytesseract.image_to_string(
-                        image, 
-                        config='--psm 6 -l eng'  # Page segmentation mode 6, English language
-                    )
-                    if page_text.strip():
-                        text_content.append(page_text)
-                        logger.info(f"OCR extracted {len(page_text)} characters from page {page_num + 1}")
-                except Exception as ocr_error:
-                    logger.warning(f"OCR failed for page {page_num + 1}: {str(ocr_error)}")
-                    continue
+                text = page.get_text()
+                if text.strip():
+                    text_content.append(text)
             
+            page_count = len(doc)
             doc.close()
             
             full_text = '\n'.join(text_content)
-            logger.info(f"OCR extraction complete: {len(full_text)} total characters")
+            logger.info(f"Direct extraction yielded {len(full_text)} characters from {page_count} pages")
             return full_text if full_text.strip() else None
             
         except Exception as e:
-            logger.error(f"Error in OCR text extraction: {str(e)}")
+            logger.error(f"Error in direct text extraction: {str(e)}")
             return None
     
     def preprocess_text(self, text: str) -> str:
@@ -0,0 +1,170 @@
+"""
+Token-aware batching of BOL pages for LLM extraction.
+Packs consecutive pages into requests up to a token budget while keeping page boundaries.
+"""
+
+import logging
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+# tiktoken gives exact counts for OpenAI models; without it a
+# characters-per-token heuristic is used
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Average characters per token for English BOL text when tiktoken is unavailable
+CHARS_PER_TOKEN = 3.5
+
+PAGE_MARKER = "--- PAGE {page_number} ---"
+
+_encoding = None
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a piece of text.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Token count (exact with tiktoken, otherwise a conservative estimate)
+    """
+    global _encoding
+    if not text:
+        return 0
+    
+    if tiktoken is not None:
+        if _encoding is None:
+            try:
+                _encoding = tiktoken.encoding_for_model("gpt-4o")
+            except Exception:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text, disallowed_special=()))
+    
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def format_page(page_number: int, text: str) -> str:
+    """
+    Prefix page text with its page boundary marker.
+    
+    Args:
+        page_number: 1-based page number
+        text: Page text
+        
+    Returns:
+        Page text labelled with its page number
+    """
+    return f"{PAGE_MARKER.format(page_number=page_number)}\n{text}"
+
+class PageBatcher:
+    """Groups consecutive pages into batches that fit a token budget."""
+    
+    def __init__(self, token_budget: int):
+        """
+        Initialize the batcher.
+        
+        Args:
+            token_budget: Maximum document-text tokens per LLM request
+        """
+        self.token_budget = max(1, token_budget)
+        self.pages = []
+        self.tokens = 0
+    
+    def add(self, page_number: int, text: str) -> Optional[List[Tuple[int, str]]]:
+        """
+        Add the next page, flushing the current batch first if the page would overflow it.
+        
+        A page larger than the whole budget is sent as its own batch; its text
+        is never cut.
+        
+        Args:
+            page_number: 1-based page number
+            text: Page text
+            
+        Returns:
+            The flushed batch of (page_number, text) pairs, or None
+        """
+        page_tokens = estimate_tokens(format_page(page_number, text))
+        flushed = None
+        
+        if self.pages and self.tokens + page_tokens > self.token_budget:
+            flushed = self.flush()
+        
+        if page_tokens > self.token_budget:
+            logger.warning(f"Page {page_number} needs ~{page_tokens} tokens, over the "
+                           f"{self.token_budget}-token batch budget; sending it alone")
+        
+        self.pages.append((page_number, text))
+        self.tokens += page_tokens
+        return flushed
+    
+    def flush(self) -> Optional[List[Tuple[int, str]]]:
+        """
+        Take the current batch.
+        
+        Returns:
+            The batch of (page_number, text) pairs, or None if it is empty
+        """
+        if not self.pages:
+            return None
+        batch = self.pages
+        logger.info(f"Batched pages {[p for p, _ in batch]} (~{self.tokens} tokens)")
+        self.pages = []
+        self.tokens = 0
+        return batch
+
+def format_batch(batch: List[Tuple[int, str]]) -> str:
+    """
+    Join a batch into one document text with page boundary markers.
+    
+    Args:
+        batch: List of (page_number, text) pairs
+        
+    Returns:
+        Combined text for a single LLM request
+    """
+    return '\n\n'.join(format_page(page_number, text) for page_number, text in batch)
+
+def split_batch_result(result: Any, page_numbers: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Attribute the coils of a batched LLM result back to their pages.
+    
+    Coils are assigned by their PAGE field, which is then dropped; coils without
+    a usable PAGE go to the first page of the batch. Document-level fields are
+    copied to every page.
+    
+    Args:
+        result: Raw LLM JSON for the batch
+        page_numbers: Page numbers in the batch, in order
+        
+    Returns:
+        Mapping of page number to that page's {'coils': [...]} result
+    """
+    if isinstance(result, list):
+        document_fields, coils = {}, result
+    elif isinstance(result, dict) and isinstance(result.get('coils'), list):
+        document_fields = {k: v for k, v in result.items() if k != 'coils'}
+        coils = result['coils']
+    else:
+        # A single flat record: treat it as one coil on the first page
+        document_fields, coils = {}, [result] if result else []
+    
+    page_results = {page_number: dict(document_fields, coils=[]) for page_number in page_numbers}
+    
+    for coil in coils:
+        coil_page = None
+        if isinstance(coil, dict):
+            coil = dict(coil)
+            try:
+                coil_page = int(str(coil.pop('PAGE', '')).strip())
+            except ValueError:
+                pass
+        
+        page_number = coil_page if coil_page in page_results else page_numbers[0]
+        page_results[page_number]['coils'].append(coil)
+    
+    return page_results
@@ -6,7 +6,7 @@ Splits multi-page PDFs into individual pages for processing.
 import os
 import logging
 import fitz  # PyMuPDF
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 import tempfile
 from pathlib import Path
 
@@ -24,6 +24,9 @@ class PDFSplitter:
         """
         Split a multi-page PDF into individual page PDFs.
         
+        The extraction pipeline uses iter_pages instead; this is kept for the
+        debugging scripts that need the split files on disk.
+        
         Args:
             pdf_path: Path to the source PDF file
             
@@ -80,6 +83,31 @@ class PDFSplitter:
             logger.error(f"Error splitting PDF: {str(e)}")
             return []
     
+    def iter_pages(self, pdf_path: str, max_pages: Optional[int] = None) -> Iterator[Tuple[int, "fitz.Page"]]:
+        """
+        Iterate over the pages of a PDF without writing per-page files.
+        
+        The document is opened once and closed when iteration finishes, so page
+        handles are only valid inside the consuming loop.
+        
+        Args:
+            pdf_path: Path to the source PDF file
+            max_pages: Optional limit on the number of pages yielded
+            
+        Yields:
+            Tuples of (1-based page number, PyMuPDF page handle)
+        """
+        doc = fitz.open(pdf_path)
+        try:
+            page_count = len(doc)
+            if max_pages is not None:
+                page_count = min(page_count, max_pages)
+            
+            for page_num in range(page_count):
+                yield page_num + 1, doc.load_page(page_num)
+        finally:
+            doc.close()
+    
     def get_pdf_page_count(self, pdf_path: str) -> int:
         """
         Get the number of pages in a PDF without splitting.
@@ -131,46 +159,54 @@ class PDFSplitter:
             List of metadata dictionaries for each page
         """
         try:
-            doc = fitz.open(pdf_path)
             page_metadata = []
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # Get page dimensions
-                rect = page.rect
-                
-                # Count text blocks and images
-                try:
-                    text_dict = page.get_text("dict")
-                    text_blocks = len(text_dict.get("blocks", []))
-                    page_text = page.get_text()
-                    has_text = len(page_text.strip()) > 0
-                except:
-                    text_blocks = 0
-                    has_text = False
-                
-                image_list = page.get_images()
-                
-                metadata = {
-                    'page_number': page_num + 1,
-                    'width': rect.width,
-                    'height': rect.height,
-                    'text_blocks': text_blocks,
-                    'images': len(image_list),
-                    'has_text': has_text
-                }
-                
+            for page_number, page in self.iter_pages(pdf_path):
+                metadata = self.get_page_metadata(page)
                 page_metadata.append(metadata)
-                logger.debug(f"Page {page_num + 1} metadata: {metadata}")
+                logger.debug(f"Page {page_number} metadata: {metadata}")
             
-            doc.close()
             return page_metadata
             
         except Exception as e:
             logger.error(f"Error extracting page metadata: {str(e)}")
             return []
     
+    @staticmethod
+    def get_page_metadata(page) -> dict:
+        """
+        Compute layout metadata for a single open page.
+        
+        Args:
+            page: PyMuPDF page handle
+            
+        Returns:
+            Metadata dictionary with dimensions and text/image signals
+        """
+        # Get page dimensions
+        rect = page.rect
+        
+        # Count text blocks and characters in the text layer
+        try:
+            blocks = page.get_text("blocks")
+            text_blocks = [block for block in blocks if block[6] == 0 and block[4].strip()]
+            text_chars = sum(len(block[4].strip()) for block in text_blocks)
+        except Exception:
+            text_blocks = []
+            text_chars = 0
+        
+        image_list = page.get_images()
+        
+        return {
+            'page_number': page.number + 1,
+            'width': rect.width,
+            'height': rect.height,
+            'text_blocks': len(text_blocks),
+            'text_chars': text_chars,
+            'images': len(image_list),
+            'has_text': text_chars > 0
+        }
+    
     def cleanup_temp_files(self):
         """
         Clean up temporary split files.
@@ -7,20 +7,26 @@ import os
 import sys
 import logging
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import ANY, Mock, patch, MagicMock
+from concurrent.futures import Future
 from typing import Dict, Any
 import tempfile
 import json
+import asyncio
+import httpx
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import Config
-from extractor import BOLExtractor
-from ocr_utils import OCRUtils
-from llm_refiner import LLMRefiner
-from json_flattener import JSONFlattener
-from google_sheets_writer import GoogleSheetsWriter
+from bol_extractor.config import Config
+from bol_extractor.extractor import BOLExtractor
+from bol_extractor.ocr_utils import OCRUtils
+from bol_extractor.llm_refiner import LLMRefiner
+from bol_extractor.json_flattener import JSONFlattener
+from bol_extractor.google_sheets_writer import GoogleSheetsWriter, parse_updated_rows
+from bol_extractor.extraction_cache import ExtractionCache
+from bol_extractor.ocr_service import DEFAULT_OCR_SETTINGS
+from bol_extractor.page_batcher import PageBatcher, estimate_tokens, format_batch, format_page
 
 logger = logging.getLogger(__name__)
 
@@ -63,7 +69,7 @@ class TestOCRUtils(unittest.TestCase):
     def test_direct_text_extraction(self, mock_fitz_open):
         """Test direct text extraction from PDF."""
         # Mock PyMuPDF document
-        mock_doc = Mock()
+        mock_doc = MagicMock()
         mock_page = Mock()
         mock_page.get_text.return_value = "Test BOL content"
         mock_doc.__len__.return_value = 1
@@ -72,6 +78,18 @@ class TestOCRUtils(unittest.TestCase):
         
         result = self.ocr_utils._extract_direct_text("test.pdf")
         self.assertEqual(result, "Test BOL content")
+    
+    def test_page_ocr_classification(self):
+        """Test that only pages without a usable text layer are sent to OCR."""
+        digital_page = {'has_text': True, 'text_blocks': 12, 'text_chars': 1800, 'images': 1}
+        scanned_page = {'has_text': False, 'text_blocks': 0, 'text_chars': 0, 'images': 1}
+        stamped_scan = {'has_text': True, 'text_blocks': 1, 'text_chars': 24, 'images': 1}
+        short_digital_page = {'has_text': True, 'text_blocks': 2, 'text_chars': 40, 'images': 0}
+        
+        self.assertFalse(self.ocr_utils.page_needs_ocr(digital_page))
+        self.assertTrue(self.ocr_utils.page_needs_ocr(scanned_page))
+        self.assertTrue(self.ocr_utils.page_needs_ocr(stamped_scan))
+        self.assertFalse(self.ocr_utils.page_needs_ocr(short_digital_page))
 
 class TestJSONFlattener(unittest.TestCase):
     """Test JSON flattening utilities."""
@@ -146,26 +164,99 @@ class TestLLMRefiner(unittest.TestCase):
         self.mock_config = Mock()
         self.mock_config.openai_api_key = 'test_key'
         self.mock_config.deepseek_api_key = 'test_deepseek_key'
+        self.mock_config.llm_max_retries = 1
+        self.mock_config.llm_backoff_base = 0
+        self.mock_config.llm_backoff_max = 0
+        self.mock_config.llm_provider_concurrency = 2
+        self.mock_config.llm_request_timeout = 5
+        self.mock_config.llm_hedge_after_seconds = 0
+        self.mock_config.llm_batch_tokens = 4000
+    
+    def _create_refiner(self, handler):
+        """Create a refiner whose HTTP requests are answered by handler."""
+        refiner = LLMRefiner(self.mock_config)
+        refiner.llm_client.transport = httpx.MockTransport(handler)
+        self.addCleanup(refiner.llm_client.close)
+        return refiner
+    
+    def _chat_response(self, data):
+        """Build a chat-completions response containing data as JSON."""
+        return httpx.Response(200, json={'choices': [{'message': {'content': json.dumps(data)}}]})
+    
+    def test_refiners_share_client(self):
+        """Test that refiners with the same configuration reuse one client and its event loop."""
+        first = LLMRefiner(self.mock_config)
+        second = LLMRefiner(self.mock_config)
+        self.assertIs(first.llm_client, second.llm_client)
+        
+        self.mock_config.llm_request_timeout = 10
+        self.assertIsNot(LLMRefiner(self.mock_config).llm_client, first.llm_client)
     
-    @patch('bol_extractor.llm_refiner.OpenAI')
-    def test_openai_extraction(self, mock_openai):
+    @patch('bol_extractor.llm_refiner.LLMRefiner._create_extraction_prompt', return_value='prompt')
+    def test_openai_extraction(self, mock_prompt):
         """Test OpenAI data extraction."""
-        # Mock OpenAI response
-        mock_client = Mock()
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps({
-            'BOL_NUMBER': 'TEST-123',
-            'CUSTOMER_NAME': 'Test Customer'
-        })
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai.return_value = mock_client
+        def handler(request):
+            self.assertIn('openai', request.url.host)
+            return self._chat_response({'BOL_NUMBER': 'TEST-123', 'CUSTOMER_NAME': 'Test Customer'})
         
-        refiner = LLMRefiner(self.mock_config)
+        refiner = self._create_refiner(handler)
         result = refiner._extract_with_openai("test text")
         
         self.assertIsInstance(result, dict)
         self.assertEqual(result['BOL_NUMBER'], 'TEST-123')
+    
+    @patch('bol_extractor.llm_refiner.LLMRefiner._create_extraction_prompt', return_value='prompt')
+    def test_retries_then_falls_back(self, mock_prompt):
+        """Test that rate-limited OpenAI calls are retried before falling back to DeepSeek."""
+        calls = []
+        
+        def handler(request):
+            calls.append(request.url.host)
+            if 'openai' in request.url.host:
+                return httpx.Response(429)
+            return self._chat_response({'BOL_NUMBER': 'FALLBACK'})
+        
+        refiner = self._create_refiner(handler)
+        result = refiner.extract_bol_data("test text")
+        
+        self.assertEqual(result['BOL_NUMBER'], 'FALLBACK')
+        self.assertEqual(calls, ['api.openai.com', 'api.openai.com', 'api.deepseek.com'])
+    
+    @patch('bol_extractor.llm_refiner.LLMRefiner._create_extraction_prompt', return_value='prompt')
+    def test_truncated_response_falls_back(self, mock_prompt):
+        """Test that a response cut off at the token limit is not patched up and used."""
+        max_tokens = []
+        
+        def handler(request):
+            max_tokens.append(json.loads(request.content)['max_tokens'])
+            if 'openai' in request.url.host:
+                return httpx.Response(200, json={'choices': [{
+                    'message': {'content': '{"coils": [{"COIL_TAG#": "A"}, {"COIL_'}, 'finish_reason': 'length'
+                }]})
+            return self._chat_response({'coils': [{'COIL_TAG#': 'A'}, {'COIL_TAG#': 'B'}]})
+        
+        refiner = self._create_refiner(handler)
+        result = refiner.extract_bol_data("test text")
+        
+        self.assertEqual(len(result['coils']), 2)
+        # Each provider may answer with as many tokens as the batch holds
+        self.assertEqual(max_tokens, [4000, 4000])
+    
+    @patch('bol_extractor.llm_refiner.LLMRefiner._create_extraction_prompt', return_value='prompt')
+    def test_hedged_request_uses_faster_provider(self, mock_prompt):
+        """Test that hedging starts DeepSeek when OpenAI exceeds the latency budget."""
+        self.mock_config.llm_hedge_after_seconds = 0.05
+        
+        async def handler(request):
+            if 'openai' in request.url.host:
+                await asyncio.sleep(2)
+                return self._chat_response({'BOL_NUMBER': 'SLOW'})
+            return self._chat_response({'BOL_NUMBER': 'FAST'})
+        
+        refiner = self._create_refiner(handler)
+        result = refiner.extract_bol_data("test text")
+        
+        self.assertEqual(result['BOL_NUMBER'], 'FAST')
 
 class TestGoogleSheetsWriter(unittest.TestCase):
     """Test Google Sheets integration."""
@@ -176,9 +267,13 @@ class TestGoogleSheetsWriter(unittest.TestCase):
         self.mock_config = Mock()
         self.mock_config.google_service_account_key = '{"test": "key"}'
         self.mock_config.spreadsheet_id = 'test_sheet_id'
+        
+        # Clients are shared per process; start each test unauthorized
+        from utils.google_clients import reset_google_clients
+        reset_google_clients()
     
     @patch('gspread.authorize')
-    @patch('bol_extractor.google_sheets_writer.Credentials')
+    @patch('utils.google_clients.Credentials')
     def test_client_initialization(self, mock_credentials, mock_gspread):
         """Test Google Sheets client initialization."""
         mock_creds = Mock()
@@ -190,7 +285,121 @@ class TestGoogleSheetsWriter(unittest.TestCase):
         
         self.assertIsNotNone(writer.client)
         mock_credentials.from_service_account_info.assert_called_once()
-        mock_gspread.assert_called_once_with(mock_creds)
+        mock_gspread.assert_called_once_with(mock_creds, http_client=ANY)
+        
+        # A second writer reuses the authorized client
+        second_writer = GoogleSheetsWriter(self.mock_config)
+        self.assertIs(second_writer.client, writer.client)
+        mock_gspread.assert_called_once()
+    
+    @patch('gspread.authorize')
+    @patch('utils.google_clients.Credentials')
+    def test_batch_append_uses_response_rows(self, mock_credentials, mock_gspread):
+        """Test that batch writes open the sheet once and read row numbers from the append response."""
+        worksheet = Mock()
+        worksheet.row_count = 100
+        worksheet.row_values.return_value = ['BOL_NUMBER', 'COIL_TAG#']
+        worksheet.append_rows.side_effect = [
+            {'updates': {'updatedRange': "'UNPROCESSED_INVENTORY'!A41:B42"}},
+            {'updates': {'updatedRange': "'UNPROCESSED_INVENTORY'!A43:B43"}}
+        ]
+        mock_client = Mock()
+        mock_client.open_by_key.return_value.worksheet.return_value = worksheet
+        mock_gspread.return_value = mock_client
+        
+        writer = GoogleSheetsWriter(self.mock_config)
+        first = writer.append_bol_data_batch([
+            {'BOL_NUMBER': 'B1', 'COIL_TAG#': 'T1'},
+            {'BOL_NUMBER': 'B1', 'COIL_TAG#': 'T2'}
+        ])
+        second = writer.append_bol_data({'BOL_NUMBER': 'B2', 'COIL_TAG#': 'T3'})
+        
+        self.assertEqual(first['row_numbers'], [41, 42])
+        self.assertEqual(second['row_number'], 43)
+        worksheet.append_rows.assert_any_call([['B1', 'T1'], ['B1', 'T2']])
+        mock_client.open_by_key.assert_called_once()
+        worksheet.row_values.assert_called_once_with(1)
+        worksheet.get_all_values.assert_not_called()
+    
+    def test_parse_updated_rows(self):
+        """Test row numbers are read from single-cell and multi-row ranges."""
+        self.assertEqual(parse_updated_rows({'updates': {'updatedRange': 'Sheet1!A7:N9'}}), [7, 8, 9])
+        self.assertEqual(parse_updated_rows({'updates': {'updatedRange': 'Sheet1!A5'}}), [5])
+        self.assertEqual(parse_updated_rows({}), [])
+
+class TestPageBatcher(unittest.TestCase):
+    """Test token-aware page batching."""
+    
+    def test_batches_respect_budget_without_cutting_pages(self):
+        """Test that pages are packed up to the budget and oversized pages are kept whole."""
+        batcher = PageBatcher(estimate_tokens(format_page(1, 'x' * 400)) * 2)
+        batches = [
+            batcher.add(1, 'x' * 400),
+            batcher.add(2, 'x' * 400),
+            batcher.add(3, 'y' * 5000),
+            batcher.add(4, 'x' * 400),
+            batcher.flush()
+        ]
+        batches = [[page_number for page_number, _ in batch] for batch in batches if batch]
+        
+        self.assertEqual(batches, [[1, 2], [3], [4]])
+        self.assertIn('y' * 5000, format_batch([(3, 'y' * 5000)]))
+
+class TestExtractionCache(unittest.TestCase):
+    """Test the per-page extraction cache."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.cache_dir = tempfile.mkdtemp(prefix="extraction_cache_test_")
+        self.cache = ExtractionCache(cache_dir=self.cache_dir, max_size_mb=1)
+    
+    def tearDown(self):
+        """Remove the temporary cache directory."""
+        import shutil
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_llm_result_round_trip(self):
+        """Test that LLM results are keyed by supplier, prompt version and model."""
+        result = {'coils': [{'COIL_TAG#': 'TAG-1'}]}
+        self.cache.put_llm_result('digest', 'maksteel', '2024-01-01', 'gpt-4o', result)
+        
+        self.assertEqual(self.cache.get_llm_result('digest', 'maksteel', '2024-01-01', 'gpt-4o'), result)
+        self.assertIsNone(self.cache.get_llm_result('digest', 'maksteel', '2024-02-01', 'gpt-4o'))
+        self.assertIsNone(self.cache.get_llm_result('digest', 'default', '2024-01-01', 'gpt-4o'))
+    
+    def test_ocr_text_keyed_by_engine_and_settings(self):
+        """Test that cached page text is only reused for the same OCR engine and settings."""
+        settings = dict(DEFAULT_OCR_SETTINGS)
+        self.cache.put_ocr_text('digest', 'tesserocr 5.3.0', settings, 'page text')
+        
+        self.assertEqual(self.cache.get_ocr_text('digest', 'tesserocr 5.3.0', dict(reversed(list(settings.items())))),
+                         'page text')
+        self.assertIsNone(self.cache.get_ocr_text('digest', 'pytesseract 5.3.0', settings))
+        self.assertIsNone(self.cache.get_ocr_text('digest', 'tesserocr 5.3.0', dict(settings, dpi=300)))
+        self.assertIsNone(self.cache.get_ocr_text('digest', 'tesserocr 5.3.0', dict(settings, psm=4)))
+    
+    def test_lru_eviction(self):
+        """Test that least recently used entries are evicted over the size limit."""
+        engine, settings = 'tesserocr 5.3.0', DEFAULT_OCR_SETTINGS
+        self.cache.max_size_bytes = 300
+        self.cache.put_ocr_text('first', engine, settings, 'x' * 100)
+        self.cache.put_ocr_text('second', engine, settings, 'y' * 100)
+        
+        # Touch the first entry so the second becomes least recently used
+        second_key = self.cache._make_key('ocr', 'second', engine, self.cache._settings_key(settings))
+        os.utime(self.cache._entry_path(second_key), (0, 0))
+        self.cache.get_ocr_text('first', engine, settings)
+        self.cache.put_ocr_text('third', engine, settings, 'z' * 100)
+        
+        self.assertIsNotNone(self.cache.get_ocr_text('first', engine, settings))
+        self.assertIsNone(self.cache.get_ocr_text('second', engine, settings))
+        self.assertIsNotNone(self.cache.get_ocr_text('third', engine, settings))
+    
+    def test_disabled_cache(self):
+        """Test that a disabled cache never stores or returns entries."""
+        cache = ExtractionCache(cache_dir=self.cache_dir, enabled=False)
+        cache.put_ocr_text('digest', 'tesserocr 5.3.0', DEFAULT_OCR_SETTINGS, 'text')
+        self.assertIsNone(cache.get_ocr_text('digest', 'tesserocr 5.3.0', DEFAULT_OCR_SETTINGS))
 
 class TestBOLExtractor(unittest.TestCase):
     """Test main BOL extractor integration."""
@@ -202,15 +411,26 @@ class TestBOLExtractor(unittest.TestCase):
         self.mock_config.openai_api_key = 'test_key'
         self.mock_config.google_service_account_key = '{"test": "key"}'
         self.mock_config.spreadsheet_id = 'test_sheet_id'
+        self.mock_config.extraction_cache_enabled = False
+        self.mock_config.extraction_cache_dir = 'extraction_cache'
+        self.mock_config.extraction_cache_max_mb = 1
+        self.mock_config.ocr_workers = 1
+        self.mock_config.llm_workers = 1
+        self.mock_config.llm_batch_tokens = 4000
     
+    @patch('bol_extractor.extractor.PDFSplitter')
     @patch('bol_extractor.extractor.GoogleSheetsWriter')
     @patch('bol_extractor.extractor.LLMRefiner')
     @patch('bol_extractor.extractor.OCRUtils')
-    def test_successful_extraction_pipeline(self, mock_ocr, mock_llm, mock_sheets):
+    def test_successful_extraction_pipeline(self, mock_ocr, mock_llm, mock_sheets, mock_splitter):
         """Test successful end-to-end extraction pipeline."""
         # Mock components
+        mock_splitter.return_value.validate_pdf.return_value = {
+            'is_valid': True, 'page_count': 1, 'file_size': 1024
+        }
+        
         mock_ocr_instance = Mock()
-        mock_ocr_instance.extract_text_from_pdf.return_value = "Sample BOL text content"
+        mock_ocr_instance.extract_text_from_pdf.return_value = "Sample BOL text content with enough characters to process"
         mock_ocr.return_value = mock_ocr_instance
         
         mock_llm_instance = Mock()
@@ -235,6 +455,119 @@ class TestBOLExtractor(unittest.TestCase):
         self.assertIn('data', result)
         self.assertEqual(result['sheet_row'], 5)
 
+    @patch('bol_extractor.extractor.get_supplier_ocr_settings')
+    @patch('bol_extractor.extractor.get_ocr_service')
+    @patch('bol_extractor.extractor.GoogleSheetsWriter')
+    @patch('bol_extractor.extractor.LLMRefiner')
+    def test_concurrent_pages_keep_page_order(self, mock_llm, mock_sheets, mock_get_ocr_service, mock_ocr_settings):
+        """Test that concurrently extracted pages are returned in page order."""
+        self.mock_config.ocr_workers = 1
+        self.mock_config.llm_workers = 3
+        self.mock_config.llm_batch_tokens = 1  # One page per LLM request
+
+        mock_llm_instance = Mock()
+        mock_llm_instance.extract_bol_data.side_effect = lambda text, supplier: {'coils': [{'SOURCE': text}]}
+        mock_llm.return_value = mock_llm_instance
+
+        # Page 2 is image-only and OCR finds nothing on it
+        ocr_future = Future()
+        ocr_future.set_result((None, 0.1))
+        mock_get_ocr_service.return_value.submit.return_value = ocr_future
+        mock_ocr_settings.return_value = dict(DEFAULT_OCR_SETTINGS)
+        page_texts = {1: 'Text for page 1', 2: None, 3: 'Text for page 3'}
+
+        extractor = BOLExtractor(self.mock_config)
+        extractor.pdf_splitter = Mock()
+        extractor.pdf_splitter.iter_pages.return_value = [(n, n) for n in page_texts]
+        extractor.ocr_utils = Mock()
+        extractor.ocr_utils.extract_direct_page_text.side_effect = lambda page: page_texts[page]
+        extractor.ocr_utils.classify_page.side_effect = lambda page: {
+            'has_text': bool(page_texts[page]), 'needs_ocr': not page_texts[page]
+        }
+        extractor.ocr_utils.select_text.side_effect = lambda direct, ocr: ocr or direct
+        extractor.ocr_utils.preprocess_text.side_effect = lambda text: text
+
+        results = extractor._extract_pages_concurrently('test.pdf', 3, 'default')
+
+        self.assertEqual([r['page_number'] for r in results], [1, 2, 3])
+        self.assertIn('Text for page 1', results[0]['structured_data']['coils'][0]['SOURCE'])
+        self.assertFalse(results[1]['has_text'])
+        self.assertIsNone(results[1]['structured_data'])
+        self.assertIn('Text for page 3', results[2]['structured_data']['coils'][0]['SOURCE'])
+        self.assertEqual([r['method'] for r in results], ['text', 'ocr', 'text'])
+        mock_get_ocr_service.return_value.submit.assert_called_once()
+    
+    @patch('bol_extractor.extractor.get_supplier_ocr_settings')
+    @patch('bol_extractor.extractor.get_ocr_service')
+    @patch('bol_extractor.extractor.GoogleSheetsWriter')
+    @patch('bol_extractor.extractor.LLMRefiner')
+    def test_pages_are_batched_and_attributed(self, mock_llm, mock_sheets, mock_get_ocr_service, mock_ocr_settings):
+        """Test that consecutive pages share one LLM call and coils return to their pages."""
+        self.mock_config.llm_workers = 2
+        self.mock_config.llm_batch_tokens = 10000
+        mock_ocr_settings.return_value = dict(DEFAULT_OCR_SETTINGS)
+        
+        mock_llm_instance = Mock()
+        mock_llm_instance.extract_bol_data.return_value = {
+            'BOL_NUMBER': 'B-1',
+            'coils': [{'COIL_TAG#': 'A', 'PAGE': 2}, {'COIL_TAG#': 'B', 'PAGE': '1'}, {'COIL_TAG#': 'C'}]
+        }
+        mock_llm.return_value = mock_llm_instance
+        
+        extractor = BOLExtractor(self.mock_config)
+        extractor.pdf_splitter = Mock()
+        extractor.pdf_splitter.iter_pages.return_value = [(1, 1), (2, 2)]
+        extractor.ocr_utils = Mock()
+        extractor.ocr_utils.extract_direct_page_text.side_effect = lambda page: f'Text for page {page}'
+        extractor.ocr_utils.classify_page.return_value = {'has_text': True, 'needs_ocr': False}
+        extractor.ocr_utils.preprocess_text.side_effect = lambda text: text
+        
+        results = extractor._extract_pages_concurrently('test.pdf', 2, 'default')
+        
+        mock_llm_instance.extract_bol_data.assert_called_once()
+        batch_text = mock_llm_instance.extract_bol_data.call_args[0][0]
+        self.assertIn('--- PAGE 1 ---\nText for page 1', batch_text)
+        self.assertIn('--- PAGE 2 ---\nText for page 2', batch_text)
+        self.assertEqual([c['COIL_TAG#'] for c in results[0]['structured_data']['coils']], ['B', 'C'])
+        self.assertEqual([c['COIL_TAG#'] for c in results[1]['structured_data']['coils']], ['A'])
+        self.assertEqual(results[1]['structured_data']['BOL_NUMBER'], 'B-1')
+        self.assertFalse(any('PAGE' in c for r in results for c in r['structured_data']['coils']))
+    
+    @patch('bol_extractor.extractor.get_supplier_ocr_settings')
+    @patch('bol_extractor.extractor.get_ocr_service')
+    @patch('bol_extractor.extractor.GoogleSheetsWriter')
+    @patch('bol_extractor.extractor.LLMRefiner')
+    def test_failed_batch_is_retried_in_halves(self, mock_llm, mock_sheets, mock_get_ocr_service, mock_ocr_settings):
+        """Test that a batch without a usable LLM result is split instead of losing every page."""
+        self.mock_config.llm_workers = 2
+        self.mock_config.llm_batch_tokens = 10000
+        mock_ocr_settings.return_value = dict(DEFAULT_OCR_SETTINGS)
+        
+        def extract(text, supplier):
+            pages = [n for n in (1, 2, 3) if f'--- PAGE {n} ---' in text]
+            if len(pages) > 1:
+                return None  # e.g. the answer was cut off at the token limit
+            return {'coils': [{'COIL_TAG#': f'T{pages[0]}', 'PAGE': pages[0]}]}
+        
+        mock_llm_instance = Mock()
+        mock_llm_instance.extract_bol_data.side_effect = extract
+        mock_llm.return_value = mock_llm_instance
+        
+        extractor = BOLExtractor(self.mock_config)
+        extractor.pdf_splitter = Mock()
+        extractor.pdf_splitter.iter_pages.return_value = [(1, 1), (2, 2), (3, 3)]
+        extractor.ocr_utils = Mock()
+        extractor.ocr_utils.extract_direct_page_text.side_effect = lambda page: f'Text for page {page}'
+        extractor.ocr_utils.classify_page.return_value = {'has_text': True, 'needs_ocr': False}
+        extractor.ocr_utils.preprocess_text.side_effect = lambda text: text
+        
+        results = extractor._extract_pages_concurrently('test.pdf', 3, 'default')
+        
+        # [1, 2, 3] fails, then [1] succeeds and [2, 3] fails, then [2] and [3] succeed
+        self.assertEqual(mock_llm_instance.extract_bol_data.call_count, 5)
+        self.assertEqual([r['structured_data']['coils'] for r in results],
+                         [[{'COIL_TAG#': 'T1'}], [{'COIL_TAG#': 'T2'}], [{'COIL_TAG#': 'T3'}]])
+
 def create_sample_pdf():
     """Create a sample PDF for testing (requires reportlab)."""
     try:
@@ -40,6 +40,7 @@ def create_full_backup():
         "generate_finished_tag_pdf.py", 
         "generate_bol_pdf.py",
         "generate_invoice_pdf.py",
+        "generate_inventory_pdf.py",
         
         # Utility modules
         "drive_utils.py",
@@ -63,6 +64,7 @@ def create_full_backup():
         "pdf_outputs/",
         "work_orders/",
         "finished_tags/",
+        "tracking_logs/",
         "test_docs/",
     ]
     
@@ -84,6 +86,14 @@ def create_full_backup():
         else:
             print(f"⚠ Missing: {item}")
     
+    # Tracking database, copied through SQLite so in-flight writes cannot tear it
+    try:
+        from utils.tracking_store import tracking_store
+        tracking_store.backup(os.path.join(backup_dir, "tracking.db"))
+        print("✓ Backed up database: tracking.db")
+    except Exception as e:
+        print(f"⚠ Could not back up tracking.db: {e}")
+    
     # Create the zip file
     shutil.make_archive(f"backups/{backup_name}", 'zip', backup_dir)
     
@@ -2,10 +2,8 @@
 Google Drive utilities for uploading finished tag PDFs
 """
 import os
-import json
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
-from google.oauth2.service_account import Credentials
+from utils.google_clients import google_clients
 
 def get_folder_id(secret_name):
     """Extract folder ID from URL or return direct ID."""
@@ -18,25 +16,8 @@ class DriveUploader:
     def __init__(self):
         """Initialize Google Drive service using existing service account credentials."""
         try:
-            # Use the same service account key as the sheets integration
-            service_account_key = os.environ.get('GOOGLE_SERVICE_ACCOUNT_KEY_NMP')
-            if not service_account_key:
-                raise ValueError("Google service account key not found")
-                
-            # Parse the service account credentials - same as sheets integration
-            creds_info = json.loads(service_account_key)
-            
-            # Use same scopes as the working sheets integration
-            scopes = [
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            
-            # Create credentials exactly like the sheets integration
-            credentials = Credentials.from_service_account_info(creds_info, scopes=scopes)
-            
-            # Build the Drive service
-            self.service = build('drive', 'v3', credentials=credentials)
+            # Shared credentials; the Drive service is built once per thread
+            self.service = google_clients.get_drive_service()
             print("Google Drive service initialized successfully")
             
         except Exception as e:
@@ -64,6 +45,49 @@ class DriveUploader:
             print(f"Warning: Could not make file public: {str(e)}")
             return False
 
+    def reserve_file_link(self):
+        """Reserve a Drive file ID so a document can carry a link to itself before it is uploaded."""
+        if not self.service:
+            return None
+        
+        try:
+            file_id = self.service.files().generateIds(count=1, space='drive').execute()['ids'][0]
+            return {
+                'file_id': file_id,
+                'file_link': f"https://drive.google.com/file/d/{file_id}/view?usp=drivesdk"
+            }
+        
+        except Exception as e:
+            print(f"Warning: Could not reserve Drive file ID: {str(e)}")
+            return None
+    
+    def render_and_upload(self, render, upload):
+        """
+        Render a document once with a QR link to its Drive file, then upload it once.
+        
+        render(drive_url) renders the document, with drive_url None for no QR code.
+        upload(rendered, file_id) uploads it to the reserved file ID and returns the upload result.
+        If the upload fails, the document is rendered again without the dead link.
+        
+        Returns:
+            (rendered document, upload result or None, Drive URL or None)
+        """
+        reserved = self.reserve_file_link()
+        rendered = render(reserved['file_link'] if reserved else None)
+        
+        upload_result = None
+        try:
+            upload_result = upload(rendered, reserved['file_id'] if reserved else None)
+        except Exception as e:
+            print(f"✗ Google Drive upload failed: {str(e)}")
+        
+        if upload_result and upload_result.get('upload_success'):
+            return rendered, upload_result, upload_result.get('file_link')
+        
+        if reserved:
+            rendered = render(None)
+        return rendered, upload_result, None
+    
     def create_or_get_folder(self, name, parent_id=None):
         """Create a folder or get existing folder ID."""
         if not self.service:
@@ -98,7 +122,7 @@ class DriveUploader:
             print(f"Error creating/getting folder '{name}': {str(e)}")
             return None
 
-    def upload_finished_tag_pdf(self, pdf_path, customer_name, po_number):
+    def upload_finished_tag_pdf(self, pdf_path, customer_name, po_number, file_id=None):
         """Upload finished tag PDF to organized Drive structure."""
         if not self.service or not os.path.exists(pdf_path):
             print(f"Upload failed: Service unavailable or file not found: {pdf_path}")
@@ -149,6 +173,8 @@ class DriveUploader:
                 'name': file_name,
                 'parents': [po_folder]
             }
+            if file_id:
+                file_metadata['id'] = file_id
             
             print(f"Uploading PDF: {file_name}")
             media = MediaFileUpload(pdf_path, mimetype='application/pdf')
@@ -180,7 +206,7 @@ class DriveUploader:
                 'error': str(e)
             }
     
-    def upload_work_order_pdf(self, pdf_path, customer_name, po_number):
+    def upload_work_order_pdf(self, pdf_path, customer_name, po_number, file_id=None):
         """Upload work order PDF to organized Drive structure."""
         if not self.service:
             print("Google Drive service not available")
@@ -202,6 +228,8 @@ class DriveUploader:
                 'name': file_name,
                 'parents': [po_folder_id]
             }
+            if file_id:
+                file_metadata['id'] = file_id
             
             print(f"Uploading work order PDF: {file_name}")
             media = MediaFileUpload(pdf_path, mimetype='application/pdf')
@@ -302,7 +330,7 @@ class DriveUploader:
             print(f"Error creating PO folder structure: {str(e)}")
             return None
 
-    def upload_invoice_pdf(self, pdf_path, customer_name, po_number):
+    def upload_invoice_pdf(self, pdf_path, customer_name, po_number, file_id=None):
         """Upload invoice PDF to organized Drive structure."""
         if not self.service:
             print("Google Drive service not available")
@@ -331,6 +359,8 @@ class DriveUploader:
                 'name': 'Invoice.pdf',
                 'parents': [po_folder_id]
             }
+            if file_id:
+                file_metadata['id'] = file_id
             
             print(f"Uploading invoice PDF as Invoice.pdf to PO#{po_number}")
             media = MediaFileUpload(pdf_path, mimetype='application/pdf')
@@ -365,7 +395,7 @@ class DriveUploader:
                 'error': str(e)
             }
 
-    def upload_signed_bol(self, file_path, customer_name, po_number, bol_number):
+    def upload_signed_bol(self, file_path, customer_name, po_number, bol_number, file_id=None):
         """Upload signed BOL to organized Drive structure."""
         if not self.service:
             print("Google Drive service not available")
@@ -398,6 +428,8 @@ class DriveUploader:
                 'name': filename,
                 'parents': [po_folder_id]
             }
+            if file_id:
+                file_metadata['id'] = file_id
             
             print(f"Uploading signed BOL as {filename} to PO#{po_number}")
             
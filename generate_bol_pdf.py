@@ -4,50 +4,17 @@ Consistent formatting across all document types with unified design system
 """
 
 import os
-import json
 from datetime import datetime
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
 import random
-import qrcode
-import io
-
-# Standardized Design System Colors
-NICAYNE_BLUE = colors.HexColor('#0056A4')
-SECTION_BACKGROUND = colors.HexColor('#f0f4f8')
-BORDER_GRAY = colors.HexColor('#c8c8c8')
-TEXT_DARK = colors.black
-HEADER_TEXT = colors.white
-
-def generate_qr_code_for_bol(url):
-    """Generate QR code image from URL for BOL"""
-    if not url:
-        return None
-    
-    try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(url)
-        qr.make(fit=True)
-        
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-        
-        img_buffer = io.BytesIO()
-        qr_img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-        
-        return Image(img_buffer, width=1*inch, height=1*inch)
-    except Exception as e:
-        print(f"Error generating QR code for BOL: {e}")
-        return None
+from utils.pdf_design_system import get_sample_styles
+from utils.pdf_renderer import PDFTemplate, pdf_renderer
+from utils.qr_codes import qr_code_flowable
 
 def generate_bol_number():
     """Generate a unique BOL number in format BL######"""
@@ -61,19 +28,12 @@ def get_finished_tags_for_work_order(work_order_number):
     """Retrieve all finished tags associated with a work order"""
     finished_tags = []
     
-    # Check if finished tags JSON file exists
-    if os.path.exists('finished_tags.json'):
-        try:
-            with open('finished_tags.json', 'r') as f:
-                all_tags = json.load(f)
-                
-            # Filter tags by work order number
-            for tag in all_tags:
-                if tag.get('work_order_number') == work_order_number:
-                    finished_tags.append(tag)
-                    
-        except Exception as e:
-            print(f"Error reading finished tags: {e}")
+    # Indexed lookup in the tracking store
+    try:
+        from utils.tracking_store import tracking_store
+        finished_tags = tracking_store.finished_tags.find(work_order_number=work_order_number)
+    except Exception as e:
+        print(f"Error reading finished tags: {e}")
     
     return finished_tags
 
@@ -91,8 +51,184 @@ def calculate_totals(finished_tags):
     
     return total_bundles, total_weight
 
-def generate_bol_pdf(work_order_number, customer_name=None, customer_po=None, drive_url=None):
-    """Generate a complete Bill of Lading PDF for a work order"""
+class BOLTemplate(PDFTemplate):
+    """
+    Letter bill of lading. Data: 'bol_number', 'work_order_number', 'customer_name',
+    'customer_po', 'finished_tags', 'total_bundles', 'total_weight' and optional 'drive_url'.
+    """
+    
+    page_settings = {
+        'pagesize': letter,
+        'rightMargin': 0.75*inch,
+        'leftMargin': 0.75*inch,
+        'topMargin': 1*inch,
+        'bottomMargin': 1*inch
+    }
+    
+    def build_styles(self):
+        """Build the BOL's paragraph and table styles once."""
+        styles = get_sample_styles()
+        return {
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=20,
+                spaceAfter=30,
+                alignment=TA_CENTER,
+                fontName='Helvetica-Bold'
+            ),
+            'qr_text': ParagraphStyle('QRText', fontSize=8, alignment=TA_CENTER),
+            'header_table': TableStyle([
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),  # First column bold
+                ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),  # Third column bold
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('TOPPADDING', (0, 0), (-1, -1), 6),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ]),
+            'line_items_table': TableStyle([
+                # Header row styling
+                ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.0, 0.357, 0.667)),  # NMP Blue
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 9),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                
+                # Data rows styling
+                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 1), (-1, -1), 8),
+                ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                
+                # Grid
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('TOPPADDING', (0, 0), (-1, -1), 4),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+                
+                # Alternating row colors
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)])
+            ]),
+            'totals_table': TableStyle([
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 12),
+                ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+                ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+                ('TOPPADDING', (0, 0), (-1, -1), 8),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ]),
+            'signature_table': TableStyle([
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 0), (-1, -1), 11),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('VALIGN', (0, 0), (-1, -1), 'BOTTOM'),
+                ('TOPPADDING', (0, 0), (-1, -1), 15),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ]),
+            'qr_table': TableStyle([
+                ('ALIGN', (2, 0), (2, 1), 'CENTER'),
+                ('VALIGN', (2, 0), (2, 1), 'MIDDLE'),
+            ])
+        }
+    
+    def build_story(self, data, styles):
+        """Build the BOL's flowables."""
+        content = []
+        
+        # Title
+        content.append(Paragraph("BILL OF LADING", styles['title']))
+        
+        # Header information table
+        header_data = [
+            ['BOL Number:', data['bol_number'], 'Date Generated:', datetime.now().strftime('%m/%d/%Y')],
+            ['Work Order:', data['work_order_number'], '', ''],
+            ['Customer Name:', data['customer_name'], '', ''],
+            ['Customer PO#:', data['customer_po'], '', '']
+        ]
+        
+        header_table = Table(header_data, colWidths=[1.2*inch, 2*inch, 1.2*inch, 1.5*inch])
+        header_table.setStyle(styles['header_table'])
+        content.append(header_table)
+        content.append(Spacer(1, 0.3*inch))
+        
+        # Line items table
+        table_data = [
+            ['Finished Tag #', 'Incoming Tag #', 'Material Grade', 'Material Description', 
+             'Heat #', 'Thickness', 'Width', 'Length', 'Pieces/Coils', 'Finished Weight']
+        ]
+        
+        # Add finished tag data
+        for tag in data['finished_tags']:
+            length = tag.get('length', '')
+            
+            # For slitting jobs, length should be "coil"
+            job_type = tag.get('job_type', '')
+            if 'slit' in job_type.lower():
+                length = 'coil'
+            
+            table_data.append([
+                tag.get('finished_tag_number', ''),
+                tag.get('incoming_tag_number', ''),
+                tag.get('material_grade', ''),
+                tag.get('material_description', ''),
+                tag.get('heat_number', ''),
+                str(tag.get('thickness', '')),
+                str(tag.get('width', '')),
+                str(length),
+                str(tag.get('pieces', '')),
+                str(tag.get('finished_weight', ''))
+            ])
+        
+        line_items_table = Table(table_data, colWidths=[
+            0.8*inch, 0.8*inch, 0.7*inch, 1.5*inch, 0.7*inch,
+            0.6*inch, 0.6*inch, 0.6*inch, 0.6*inch, 0.8*inch
+        ])
+        line_items_table.setStyle(styles['line_items_table'])
+        content.append(line_items_table)
+        content.append(Spacer(1, 0.3*inch))
+        
+        # Totals section
+        totals_data = [
+            ['Total # of Bundles:', str(data['total_bundles'])],
+            ['Total Weight:', f"{data['total_weight']:.2f} lbs"]
+        ]
+        
+        totals_table = Table(totals_data, colWidths=[2*inch, 1.5*inch])
+        totals_table.setStyle(styles['totals_table'])
+        content.append(totals_table)
+        content.append(Spacer(1, 0.4*inch))
+        
+        # Signature section
+        signature_data = [
+            ['Driver Signature:', '_' * 40, 'Date:', '_' * 20],
+            ['', '', '', ''],
+            ['Shipper/Receiver Signature:', '_' * 40, 'Date:', '_' * 20]
+        ]
+        
+        signature_table = Table(signature_data, colWidths=[2*inch, 2.5*inch, 0.8*inch, 1.5*inch])
+        signature_table.setStyle(styles['signature_table'])
+        content.append(signature_table)
+        
+        # Add QR code if Drive URL is available
+        if data.get('drive_url'):
+            qr_code = qr_code_flowable(data['drive_url'], 1*inch)
+            if qr_code:
+                content.append(Spacer(1, 12))
+                # Create QR code table positioned at bottom right
+                qr_table = Table([
+                    ['', '', qr_code],
+                    ['', '', Paragraph('<font size="8">Scan for digital copy</font>', styles['qr_text'])]
+                ], colWidths=[5*inch, 1*inch, 1*inch])
+                qr_table.setStyle(styles['qr_table'])
+                content.append(qr_table)
+        
+        return content
+
+pdf_renderer.register('bol', BOLTemplate())
+
+def generate_bol_pdf(work_order_number, customer_name=None, customer_po=None, drive_url=None, bol_number=None):
+    """Generate a complete Bill of Lading PDF for a work order, optionally under an already-issued BOL number"""
     
     # Get finished tags for this work order
     finished_tags = get_finished_tags_for_work_order(work_order_number)
@@ -107,7 +243,7 @@ def generate_bol_pdf(work_order_number, customer_name=None, customer_po=None, dr
         customer_po = finished_tags[0].get('customer_po', 'Unknown PO')
     
     # Generate BOL number and filename
-    bol_number = generate_bol_number()
+    bol_number = bol_number or generate_bol_number()
     date_str = datetime.now().strftime('%Y-%m-%d')
     filename = f"NMP-BOL-{date_str}-{bol_number}.pdf"
     filepath = os.path.join('pdf_outputs', filename)
@@ -115,198 +251,17 @@ def generate_bol_pdf(work_order_number, customer_name=None, customer_po=None, dr
     # Ensure output directory exists
     os.makedirs('pdf_outputs', exist_ok=True)
     
-    # Create PDF document
-    doc = SimpleDocTemplate(filepath, pagesize=letter,
-                          rightMargin=0.75*inch, leftMargin=0.75*inch,
-                          topMargin=1*inch, bottomMargin=1*inch)
-    
-    # Build content
-    content = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Normal'],
-        fontSize=12,
-        fontName='Helvetica-Bold',
-        alignment=TA_LEFT
-    )
-    
-    normal_style = ParagraphStyle(
-        'NormalStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        fontName='Helvetica'
-    )
-    
-    # Title
-    title = Paragraph("BILL OF LADING", title_style)
-    content.append(title)
-    
-    # Header information table
-    header_data = [
-        ['BOL Number:', bol_number, 'Date Generated:', datetime.now().strftime('%m/%d/%Y')],
-        ['Work Order:', work_order_number, '', ''],
-        ['Customer Name:', customer_name, '', ''],
-        ['Customer PO#:', customer_po, '', '']
-    ]
-    
-    header_table = Table(header_data, colWidths=[1.2*inch, 2*inch, 1.2*inch, 1.5*inch])
-    header_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),  # First column bold
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),  # Third column bold
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    
-    content.append(header_table)
-    content.append(Spacer(1, 0.3*inch))
-    
-    # Line items table
-    table_data = [
-        ['Finished Tag #', 'Incoming Tag #', 'Material Grade', 'Material Description', 
-         'Heat #', 'Thickness', 'Width', 'Length', 'Pieces/Coils', 'Finished Weight']
-    ]
-    
-    # Add finished tag data
-    for tag in finished_tags:
-        # Extract material info from description if available
-        material_desc = tag.get('material_description', '')
-        thickness = tag.get('thickness', '')
-        width = tag.get('width', '')
-        length = tag.get('length', '')
-        
-        # For slitting jobs, length should be "coil"
-        job_type = tag.get('job_type', '')
-        if 'slit' in job_type.lower():
-            length = 'coil'
-        
-        row = [
-            tag.get('finished_tag_number', ''),
-            tag.get('incoming_tag_number', ''),
-            tag.get('material_grade', ''),
-            material_desc,
-            tag.get('heat_number', ''),
-            str(thickness),
-            str(width),
-            str(length),
-            str(tag.get('pieces', '')),
-            str(tag.get('finished_weight', ''))
-        ]
-        table_data.append(row)
-    
-    # Create the table
-    line_items_table = Table(table_data, colWidths=[
-        0.8*inch, 0.8*inch, 0.7*inch, 1.5*inch, 0.7*inch,
-        0.6*inch, 0.6*inch, 0.6*inch, 0.6*inch, 0.8*inch
-    ])
-    
-    line_items_table.setStyle(TableStyle([
-        # Header row styling
-        ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.0, 0.357, 0.667)),  # NMP Blue
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        
-        # Data rows styling
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        
-        # Grid
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        
-        # Alternating row colors
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)])
-    ]))
-    
-    content.append(line_items_table)
-    content.append(Spacer(1, 0.3*inch))
-    
-    # Totals section
     total_bundles, total_weight = calculate_totals(finished_tags)
-    totals_data = [
-        ['Total # of Bundles:', str(total_bundles)],
-        ['Total Weight:', f"{total_weight:.2f} lbs"]
-    ]
-    
-    totals_table = Table(totals_data, colWidths=[2*inch, 1.5*inch])
-    totals_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
-    
-    content.append(totals_table)
-    content.append(Spacer(1, 0.4*inch))
-    
-    # Signature section
-    signature_style = ParagraphStyle(
-        'SignatureStyle',
-        parent=styles['Normal'],
-        fontSize=11,
-        fontName='Helvetica',
-        spaceAfter=30
-    )
-    
-    signature_data = [
-        ['Driver Signature:', '_' * 40, 'Date:', '_' * 20],
-        ['', '', '', ''],
-        ['Shipper/Receiver Signature:', '_' * 40, 'Date:', '_' * 20]
-    ]
-    
-    signature_table = Table(signature_data, colWidths=[2*inch, 2.5*inch, 0.8*inch, 1.5*inch])
-    signature_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'BOTTOM'),
-        ('TOPPADDING', (0, 0), (-1, -1), 15),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
-    
-    content.append(signature_table)
-    
-    # Add QR code if Drive URL is available
-    if drive_url:
-        qr_code = generate_qr_code_for_bol(drive_url)
-        if qr_code:
-            content.append(Spacer(1, 12))
-            # Create QR code table positioned at bottom right
-            qr_table = Table([
-                ['', '', qr_code],
-                ['', '', Paragraph('<font size="8">Scan for digital copy</font>', 
-                                 ParagraphStyle('QRText', fontSize=8, alignment=TA_CENTER))]
-            ], colWidths=[5*inch, 1*inch, 1*inch])
-            qr_table.setStyle(TableStyle([
-                ('ALIGN', (2, 0), (2, 1), 'CENTER'),
-                ('VALIGN', (2, 0), (2, 1), 'MIDDLE'),
-            ]))
-            content.append(qr_table)
-    
-    # Build PDF
-    doc.build(content)
+    pdf_renderer.render('bol', {
+        'bol_number': bol_number,
+        'work_order_number': work_order_number,
+        'customer_name': customer_name,
+        'customer_po': customer_po,
+        'finished_tags': finished_tags,
+        'total_bundles': total_bundles,
+        'total_weight': total_weight,
+        'drive_url': drive_url
+    }, filepath)
     
     # Return BOL metadata
     bol_metadata = {
@@ -2,53 +2,163 @@
 Standardized Finished Tag PDF Generator - Nicayne OS Platform
 Consistent formatting across all document types with unified design system
 """
-from reportlab.lib.pagesizes import landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Image, Spacer
+from reportlab.platypus import Table, TableStyle, Paragraph
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 from datetime import datetime
+import logging
 import os
-import qrcode
-import io
 import sys
+import time
 sys.path.append('.')
-from utils.pdf_design_system import (
-    create_standardized_header, 
-    create_standardized_footer, 
-    get_standardized_styles,
-    create_document_title,
-    create_section_table,
-    NICAYNE_BLUE,
-    SECTION_BACKGROUND,
-    BORDER_GRAY
-)
+from utils.pdf_renderer import PDFTemplate, pdf_renderer
+from utils.qr_codes import qr_code_flowable
 
-def generate_qr_code_for_tag(url):
-    """Generate QR code image from URL for finished tag"""
-    if not url:
-        return None
+logger = logging.getLogger(__name__)
+
+# Most labels one batch may render, and the label rate below which a batch is logged as slow
+MAX_LABELS_PER_BATCH = 500
+LABEL_PAGES_PER_SECOND_TARGET = 100
+
+class FinishedTagTemplate(PDFTemplate):
+    """4x6" finished tag label. Data: 'tag' (finished tag form data) and optional 'drive_url'."""
+    
+    # 4x6 inch label size (landscape orientation)
+    page_settings = {
+        'pagesize': (6 * inch, 4 * inch),
+        'leftMargin': 0.15*inch,
+        'rightMargin': 0.15*inch,
+        'topMargin': 0.15*inch,
+        'bottomMargin': 0.15*inch
+    }
+    
+    def build_styles(self):
+        """Build the label's paragraph and table styles once."""
+        boxed_rows = [
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]
+        
+        return {
+            # Custom styles for clean label layout
+            'header': ParagraphStyle(
+                'HeaderStyle',
+                fontSize=12,
+                fontName='Helvetica-Bold',
+                alignment=1,  # Center
+                spaceAfter=4
+            ),
+            'tag_id': ParagraphStyle(
+                'TagIDStyle',
+                fontSize=10,
+                fontName='Helvetica-Bold',
+                alignment=2,  # Right align
+            ),
+            'date': ParagraphStyle(
+                'DateStyle',
+                fontSize=9,
+                fontName='Helvetica',
+                alignment=0,  # Left align
+            ),
+            'qr_text': ParagraphStyle('QRText', fontSize=6, alignment=1),
+            'header_table': TableStyle([
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+                ('TOPPADDING', (0, 0), (-1, -1), 4),
+                ('GRID', (0, 0), (-1, -1), 1.5, colors.black),
+                ('BACKGROUND', (1, 0), (1, 0), colors.lightgrey),
+            ]),
+            # Label/value pairs with labels in the first and third columns
+            'pair_table': TableStyle([
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+            ] + boxed_rows),
+            'heat_table': TableStyle([
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ] + boxed_rows),
+            'processing_table': TableStyle([
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 8),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+                ('TOPPADDING', (0, 0), (-1, -1), 4),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('BACKGROUND', (3, 0), (3, 0), colors.lightgrey),  # Highlight operator box
+                ('FONTNAME', (3, 0), (3, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (3, 0), (3, 0), 10),
+                ('ALIGN', (3, 0), (3, 0), 'CENTER'),
+            ]),
+            'qr_table': TableStyle([
+                ('ALIGN', (2, 0), (2, 1), 'CENTER'),
+                ('VALIGN', (2, 0), (2, 1), 'MIDDLE'),
+            ])
+        }
     
-    try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=8,
-            border=2,
-        )
-        qr.add_data(url)
-        qr.make(fit=True)
+    def build_story(self, context, styles):
+        """Build the label's flowables."""
+        data = context['tag']
+        story = []
         
-        qr_img = qr.make_image(fill_color="black", back_color="white")
+        # HEADER SECTION - Company name, date, and tag ID
+        header_table = Table([
+            [
+                Paragraph(f"Date: {data.get('date', '')}", styles['date']),
+                Paragraph("NICAYNE METAL PROCESSING", styles['header']),
+                Paragraph(f"TAG: {data.get('tag_id', '')}", styles['tag_id'])
+            ]
+        ], colWidths=[1.3*inch, 2.4*inch, 1.3*inch])
+        header_table.setStyle(styles['header_table'])
+        story.append(header_table)
         
-        img_buffer = io.BytesIO()
-        qr_img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
+        # JOB INFO SECTION
+        job_table = Table([
+            ['Work Order:', data.get('work_order_number', ''), 'Customer:', data.get('customer_name', '')],
+            ['Customer PO:', data.get('customer_po', ''), '', '']
+        ], colWidths=[1.0*inch, 1.5*inch, 0.8*inch, 1.7*inch])
+        job_table.setStyle(styles['pair_table'])
+        story.append(job_table)
         
-        return Image(img_buffer, width=0.8*inch, height=0.8*inch)
-    except Exception as e:
-        print(f"Error generating QR code for tag: {e}")
-        return None
+        # MATERIAL INFO SECTION
+        material_table = Table([
+            ['Material Grade:', data.get('material_grade', ''), 'Pieces:', data.get('pieces_or_coils', '')],
+            ['Description:', data.get('material_description', ''), 'Weight:', data.get('finished_weight', '') + ' lbs'],
+        ], colWidths=[1.0*inch, 2.0*inch, 0.7*inch, 1.3*inch])
+        material_table.setStyle(styles['pair_table'])
+        story.append(material_table)
+        
+        # HEAT NUMBERS SECTION (full width)
+        heat_table = Table([
+            ['Heat Number(s):', data.get('heat_numbers', '')]
+        ], colWidths=[1.2*inch, 3.8*inch])
+        heat_table.setStyle(styles['heat_table'])
+        story.append(heat_table)
+        
+        # PROCESSING INFO & OPERATOR SECTION
+        processing_table = Table([
+            ['Incoming Tags:', data.get('incoming_tags', ''), 'Operator:', data.get('operator_initials', '')]
+        ], colWidths=[1.0*inch, 2.5*inch, 0.7*inch, 0.8*inch])
+        processing_table.setStyle(styles['processing_table'])
+        story.append(processing_table)
+        
+        # Add QR code if Drive URL is available (positioned in bottom right corner)
+        if context.get('drive_url'):
+            qr_code = qr_code_flowable(context['drive_url'], 0.8*inch, border=2)
+            if qr_code:
+                qr_table = Table([
+                    ['', '', qr_code],
+                    ['', '', Paragraph('<font size="6">Digital Copy</font>', styles['qr_text'])]
+                ], colWidths=[4*inch, 1.2*inch, 0.8*inch])
+                qr_table.setStyle(styles['qr_table'])
+                story.append(qr_table)
+        
+        return story
+
+pdf_renderer.register('finished_tag', FinishedTagTemplate())
 
 def generate_finished_tag_pdf(data, drive_url=None):
     """Generate a professional 4x6" finished tag PDF optimized for label printing."""
@@ -60,163 +170,46 @@ def generate_finished_tag_pdf(data, drive_url=None):
     
     filename = f"NMP-FINISHED-TAG-{date_str}-{work_order}-{pieces}pcs.pdf"
     pdf_path = f"pdf_outputs/{filename}"
-
+    
     # Create output directory
     os.makedirs("pdf_outputs", exist_ok=True)
     
-    # Create 4x6 inch label size (landscape orientation)
-    page_width = 6 * inch
-    page_height = 4 * inch
-    
-    # Create the PDF document with custom page size
-    doc = SimpleDocTemplate(
-        pdf_path, 
-        pagesize=(page_width, page_height),
-        leftMargin=0.15*inch,
-        rightMargin=0.15*inch,
-        topMargin=0.15*inch,
-        bottomMargin=0.15*inch
-    )
-    
-    story = []
-    
-    # Custom styles for clean label layout
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        fontSize=12,
-        fontName='Helvetica-Bold',
-        alignment=1,  # Center
-        spaceAfter=4
-    )
-    
-    tag_id_style = ParagraphStyle(
-        'TagIDStyle',
-        fontSize=10,
-        fontName='Helvetica-Bold',
-        alignment=2,  # Right align
-    )
-    
-    date_style = ParagraphStyle(
-        'DateStyle',
-        fontSize=9,
-        fontName='Helvetica',
-        alignment=0,  # Left align
+    return pdf_renderer.render('finished_tag', {'tag': data, 'drive_url': drive_url}, pdf_path)
+
+def find_finished_tags_for_labels(work_order_number=None, customer_po=None, customer_name=None,
+                                  date_from=None, date_to=None, limit=MAX_LABELS_PER_BATCH):
+    """Select finished tags for a label batch by work order, PO, customer and/or date range (YYYY-MM-DD)"""
+    from utils.tracking_store import tracking_store
+    
+    # Tag dates may carry a time, so a bare end date covers the whole day
+    if date_to and len(date_to) == 10:
+        date_to = f"{date_to}T23:59:59.999999"
+    
+    return tracking_store.finished_tags.find(
+        work_order_number=work_order_number,
+        customer_po=customer_po,
+        customer_name=customer_name,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit
     )
-    
-    # HEADER SECTION - Company name, date, and tag ID
-    header_table_data = [
-        [
-            Paragraph(f"Date: {data.get('date', '')}", date_style),
-            Paragraph("NICAYNE METAL PROCESSING", header_style),
-            Paragraph(f"TAG: {data.get('tag_id', '')}", tag_id_style)
-        ]
-    ]
-    
-    header_table = Table(header_table_data, colWidths=[1.3*inch, 2.4*inch, 1.3*inch])
-    header_table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('GRID', (0, 0), (-1, -1), 1.5, colors.black),
-        ('BACKGROUND', (1, 0), (1, 0), colors.lightgrey),
-    ]))
-    
-    story.append(header_table)
-    
-    # JOB INFO SECTION
-    job_data = [
-        ['Work Order:', data.get('work_order_number', ''), 'Customer:', data.get('customer_name', '')],
-        ['Customer PO:', data.get('customer_po', ''), '', '']
-    ]
-    
-    job_table = Table(job_data, colWidths=[1.0*inch, 1.5*inch, 0.8*inch, 1.7*inch])
-    job_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    story.append(job_table)
-    
-    # MATERIAL INFO SECTION
-    material_data = [
-        ['Material Grade:', data.get('material_grade', ''), 'Pieces:', data.get('pieces_or_coils', '')],
-        ['Description:', data.get('material_description', ''), 'Weight:', data.get('finished_weight', '') + ' lbs'],
-    ]
-    
-    material_table = Table(material_data, colWidths=[1.0*inch, 2.0*inch, 0.7*inch, 1.3*inch])
-    material_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    story.append(material_table)
-    
-    # HEAT NUMBERS SECTION (full width)
-    heat_data = [
-        ['Heat Number(s):', data.get('heat_numbers', '')]
-    ]
-    
-    heat_table = Table(heat_data, colWidths=[1.2*inch, 3.8*inch])
-    heat_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    story.append(heat_table)
-    
-    # PROCESSING INFO & OPERATOR SECTION
-    processing_data = [
-        ['Incoming Tags:', data.get('incoming_tags', ''), 'Operator:', data.get('operator_initials', '')]
-    ]
-    
-    processing_table = Table(processing_data, colWidths=[1.0*inch, 2.5*inch, 0.7*inch, 0.8*inch])
-    processing_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (3, 0), (3, 0), colors.lightgrey),  # Highlight operator box
-        ('FONTNAME', (3, 0), (3, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (3, 0), (3, 0), 10),
-        ('ALIGN', (3, 0), (3, 0), 'CENTER'),
-    ]))
-    
-    story.append(processing_table)
-    
-    # Add QR code if Drive URL is available (positioned in bottom right corner)
-    if drive_url:
-        qr_code = generate_qr_code_for_tag(drive_url)
-        if qr_code:
-            # Create QR code table positioned at bottom right of 4x6 label
-            qr_table = Table([
-                ['', '', qr_code],
-                ['', '', Paragraph('<font size="6">Digital Copy</font>', 
-                                 ParagraphStyle('QRText', fontSize=6, alignment=1))]
-            ], colWidths=[4*inch, 1.2*inch, 0.8*inch])
-            qr_table.setStyle(TableStyle([
-                ('ALIGN', (2, 0), (2, 1), 'CENTER'),
-                ('VALIGN', (2, 0), (2, 1), 'MIDDLE'),
-            ]))
-            story.append(qr_table)
-    
-    # Build the PDF
-    doc.build(story)
-    
-    return pdf_path
\ No newline at end of file
+
+def generate_finished_tag_labels_pdf(tags, output=None):
+    """Render many 4x6" finished tags as one multi-page label PDF in a single document build.
+    
+    output is a file path or binary file object; omit it to get the PDF bytes.
+    """
+    if len(tags) > MAX_LABELS_PER_BATCH:
+        raise ValueError(f"Cannot print more than {MAX_LABELS_PER_BATCH} labels in one batch")
+    
+    started = time.perf_counter()
+    result = pdf_renderer.render_many('finished_tag', ({'tag': tag} for tag in tags), output)
+    elapsed = time.perf_counter() - started
+    
+    rate = len(tags) / elapsed if elapsed else float('inf')
+    message = f"Rendered {len(tags)} finished tag labels in {elapsed:.2f}s ({rate:.0f} labels/s)"
+    if rate < LABEL_PAGES_PER_SECOND_TARGET:
+        logger.warning(f"{message}, below the {LABEL_PAGES_PER_SECOND_TARGET} labels/s target")
+    else:
+        logger.info(message)
+    return result
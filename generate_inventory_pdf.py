@@ -0,0 +1,229 @@
+"""
+Inventory Report PDF Generator - Nicayne OS Platform
+Renders unprocessed, in-process, processed and combined inventory reports
+Rows are read once from any iterable: each is reduced to its printed cells while the
+summary totals and column widths accumulate. The table is then laid out one page at a
+time, each page a LongTable that repeats the header, so layout time grows with the
+row count instead of re-splitting every remaining row on each page.
+"""
+
+import itertools
+import os
+import re
+from datetime import datetime
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable, LongTable, TableStyle, Paragraph, Spacer
+from utils.pdf_design_system import get_sample_styles
+from utils.pdf_renderer import PDFTemplate, pdf_renderer
+
+# Report columns, in order, when present in the inventory data
+MAIN_COLUMNS = ['Customer', 'Date', 'Material Type', 'Thickness', 'Width', 'Weight', 'Pieces']
+
+# Table fonts as (name, size), and the default left plus right cell padding
+HEADER_FONT = ('Helvetica-Bold', 10)
+BODY_FONT = ('Helvetica', 8)
+CELL_PADDING = 12
+
+def parse_quantity(value):
+    """Read a weight or piece count as a float, ignoring thousands separators; 0 if blank or not a number"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value or 0).replace(',', '').strip() or 0)
+    except ValueError:
+        return 0.0
+
+class InventoryRowsTable(Flowable):
+    """Inventory table that builds a LongTable for just the rows that fit on each page."""
+    
+    def __init__(self, header, rows, col_widths, style, start=0, row_heights=None):
+        """header: column titles; rows: lists of cell text; rows before start are already drawn"""
+        Flowable.__init__(self)
+        self.hAlign = 'CENTER'
+        self.header = header
+        self.rows = rows
+        self.col_widths = col_widths
+        self.style = style
+        self.start = start
+        self._table = None
+        
+        if row_heights is None:
+            # Header and single-line row heights; taller multi-line rows only make fewer rows fit
+            probe = self._page_table([['-'] * len(header)])
+            probe.wrap(sum(col_widths), 1e6)
+            row_heights = probe._rowHeights[0], probe._rowHeights[1]
+        self.row_heights = row_heights
+    
+    def _page_table(self, rows):
+        """Build a LongTable of the header and the given rows."""
+        table = LongTable([self.header] + rows, colWidths=self.col_widths, repeatRows=1)
+        table.setStyle(self.style)
+        return table
+    
+    def _fitting_table(self, availHeight):
+        """Build a table of the next rows, with at least one more than can fit in availHeight."""
+        header_height, row_height = self.row_heights
+        count = max(int((availHeight - header_height) / row_height), 0) + 1
+        return self._page_table(self.rows[self.start:self.start + count])
+    
+    def wrap(self, availWidth, availHeight):
+        """Measure the next page's worth of rows; report overflow if rows remain after it."""
+        self._table = self._fitting_table(availHeight)
+        self.width, self.height = self._table.wrap(availWidth, availHeight)
+        if self.start + len(self._table._cellvalues) - 1 < len(self.rows):
+            self.height = max(self.height, availHeight + 1)
+        return self.width, self.height
+    
+    def split(self, availWidth, availHeight):
+        """Split into this page's table and a flowable holding the remaining rows."""
+        parts = self._fitting_table(availHeight).split(availWidth, availHeight)
+        if not parts:
+            return []
+        page = parts[0]
+        rest = InventoryRowsTable(self.header, self.rows, self.col_widths, self.style,
+                                  start=self.start + len(page._cellvalues) - 1, row_heights=self.row_heights)
+        return [page, rest]
+    
+    def draw(self):
+        """Draw the remaining rows, which all fit."""
+        self._table.drawOn(self.canv, 0, 0)
+
+class InventoryReportTemplate(PDFTemplate):
+    """A4 inventory report. Data: 'customer_name', 'status' and 'inventory' (any iterable of row dicts)."""
+    
+    page_settings = {'pagesize': A4}
+    
+    def build_styles(self):
+        """Build the report's paragraph and table styles once."""
+        styles = get_sample_styles()
+        return {
+            'normal': styles['Normal'],
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=16,
+                spaceAfter=30,
+                alignment=1,  # Center alignment
+                textColor=colors.HexColor('#2c5282')
+            ),
+            'info': ParagraphStyle(
+                'InfoStyle',
+                parent=styles['Normal'],
+                fontSize=12,
+                spaceAfter=20,
+                alignment=1
+            ),
+            'summary': ParagraphStyle(
+                'SummaryStyle',
+                parent=styles['Normal'],
+                fontSize=11,
+                spaceAfter=10
+            ),
+            'table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), HEADER_FONT[0]),
+                ('FONTSIZE', (0, 0), (-1, 0), HEADER_FONT[1]),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('FONTNAME', (0, 1), (-1, -1), BODY_FONT[0]),
+                ('FONTSIZE', (0, 1), (-1, -1), BODY_FONT[1]),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ])
+        }
+    
+    def build_story(self, data, styles):
+        """Build the report's flowables in a single pass over the inventory rows."""
+        customer_name = data['customer_name']
+        status = data['status']
+        rows = iter(data['inventory'])
+        elements = []
+        
+        # Add title
+        elements.append(Paragraph(f"NICAYNE METAL PROCESSING<br/>{status} Inventory Report", styles['title']))
+        
+        # Add customer and date info
+        info = Paragraph(f"Customer: <b>{customer_name}</b><br/>Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles['info'])
+        elements.append(info)
+        elements.append(Spacer(1, 12))
+        
+        first = next(rows, None)
+        if first is not None:
+            # Limit columns for better formatting
+            headers = list(first.keys())
+            main_columns = MAIN_COLUMNS + (['Status'] if 'Status' in headers else [])
+            
+            # Filter headers to main columns that exist
+            filtered_headers = [h for h in main_columns if h in headers]
+            
+            table_rows = []
+            col_widths = [stringWidth(h, *HEADER_FONT) for h in filtered_headers]
+            total_items = 0
+            total_weight = 0.0
+            total_pieces = 0
+            
+            for item in itertools.chain([first], rows):
+                row = []
+                for col, header in enumerate(filtered_headers):
+                    value = item.get(header, '')
+                    # Convert to string and handle None values
+                    text = '-' if value is None or value == '' else str(value)
+                    row.append(text)
+                    width = max(stringWidth(line, *BODY_FONT) for line in text.split('\n'))
+                    if width > col_widths[col]:
+                        col_widths[col] = width
+                table_rows.append(row)
+                
+                # Summary totals
+                total_items += 1
+                total_weight += parse_quantity(item.get('Weight'))
+                total_pieces += int(parse_quantity(item.get('Pieces')))
+            
+            # Widths are already known, so layout skips its own measuring pass
+            elements.append(InventoryRowsTable(filtered_headers, table_rows,
+                                               [w + CELL_PADDING for w in col_widths], styles['table']))
+            elements.append(Spacer(1, 20))
+            
+            # Add summary
+            summary = Paragraph(f"<b>Summary:</b> {total_items} items | {total_weight:.2f} lbs total weight | {total_pieces} total pieces", styles['summary'])
+            elements.append(summary)
+        else:
+            # No data message
+            no_data = Paragraph(f"No {status.lower()} inventory found for customer {customer_name}.", styles['normal'])
+            elements.append(no_data)
+        
+        return elements
+
+pdf_renderer.register('inventory_report', InventoryReportTemplate())
+
+def inventory_pdf_filename(customer_name, status):
+    """Build the timestamped file name for an inventory report"""
+    
+    # Sanitize customer name for filename
+    safe_customer = re.sub(r'[^a-zA-Z0-9_\-]', '_', customer_name)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"NMP_Inventory_{status.replace(' ', '_')}_{safe_customer}_{timestamp}.pdf"
+
+def generate_inventory_pdf(customer_name, status, inventory_data, output=None):
+    """Generate an inventory report PDF from any iterable of rows.
+    
+    Writes to output (a binary file object) when given and returns it; otherwise saves
+    the report under pdf_outputs/ and returns its path.
+    """
+    data = {
+        'customer_name': customer_name,
+        'status': status,
+        'inventory': inventory_data
+    }
+    if output is not None:
+        return pdf_renderer.render('inventory_report', data, output)
+    
+    # Ensure pdf_outputs directory exists
+    os.makedirs('pdf_outputs', exist_ok=True)
+    
+    return pdf_renderer.render('inventory_report', data, os.path.join('pdf_outputs', inventory_pdf_filename(customer_name, status)))
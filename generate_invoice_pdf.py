@@ -4,23 +4,15 @@ Consistent formatting across all document types with unified design system
 """
 
 import os
-import json
 from datetime import datetime
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
-import qrcode
-import io
-
-# Standardized Design System Colors
-NICAYNE_BLUE = colors.HexColor('#0056A4')
-SECTION_BACKGROUND = colors.HexColor('#f0f4f8')
-BORDER_GRAY = colors.HexColor('#c8c8c8')
-TEXT_DARK = colors.black
-HEADER_TEXT = colors.white
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.enums import TA_CENTER
+from utils.pdf_design_system import get_sample_styles
+from utils.pdf_renderer import PDFTemplate, pdf_renderer
 
 def generate_invoice_number():
     """Generate a unique invoice number in format INV######"""
@@ -90,6 +82,181 @@ def calculate_pricing(material_groups, pricing_method, rate_or_amount):
     
     return line_items, subtotal
 
+class InvoiceTemplate(PDFTemplate):
+    """
+    Letter invoice. Data: 'invoice_number', 'invoice' (invoice data), 'line_items' and 'subtotal'.
+    """
+    
+    page_settings = {'pagesize': letter, 'topMargin': 0.5*inch}
+    
+    def build_styles(self):
+        """Build the invoice's paragraph and table styles once."""
+        styles = get_sample_styles()
+        return {
+            'normal': styles['Normal'],
+            'header': ParagraphStyle(
+                'CustomHeader',
+                parent=styles['Heading1'],
+                fontSize=18,
+                textColor=colors.Color(0, 0.36, 0.66),  # NMP Blue
+                alignment=TA_CENTER,
+                spaceAfter=20
+            ),
+            'company': ParagraphStyle(
+                'CompanyStyle',
+                parent=styles['Normal'],
+                fontSize=14,
+                textColor=colors.Color(0, 0.36, 0.66),
+                alignment=TA_CENTER,
+                spaceAfter=10
+            ),
+            'title': ParagraphStyle(
+                'TitleStyle',
+                parent=styles['Heading2'],
+                fontSize=16,
+                textColor=colors.Color(0, 0.36, 0.66),
+                alignment=TA_CENTER,
+                spaceAfter=20
+            ),
+            'footer': ParagraphStyle(
+                'FooterStyle',
+                parent=styles['Normal'],
+                fontSize=10,
+                textColor=colors.Color(0.3, 0.3, 0.3),
+                alignment=TA_CENTER
+            ),
+            'info_table': TableStyle([
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+                ('TOPPADDING', (0, 0), (-1, -1), 5),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+            ]),
+            'bill_to_table': TableStyle([
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+                ('FONTNAME', (0, 1), (0, 1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 12),
+                ('TOPPADDING', (0, 0), (-1, -1), 5),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+            ]),
+            'pricing_table': TableStyle([
+                # Header row
+                ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0, 0.36, 0.66)),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                
+                # Data rows
+                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 1), (-1, -1), 9),
+                ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+                ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+                
+                # Grid
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                
+                # Alternating row colors
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)]),
+            ]),
+            'totals_table': TableStyle([
+                ('FONTNAME', (4, 0), (4, 1), 'Helvetica-Bold'),
+                ('FONTNAME', (4, 2), (-1, 2), 'Helvetica-Bold'),
+                ('FONTSIZE', (4, 0), (-1, -1), 11),
+                ('ALIGN', (4, 0), (-1, -1), 'RIGHT'),
+                ('LINEABOVE', (4, 2), (-1, 2), 1, colors.black),
+                ('BACKGROUND', (4, 2), (-1, 2), colors.Color(0.9, 0.9, 0.9)),
+            ])
+        }
+    
+    def build_story(self, data, styles):
+        """Build the invoice's flowables."""
+        invoice_data = data['invoice']
+        subtotal = data['subtotal']
+        story = []
+        
+        # Header
+        story.append(Paragraph("NICAYNE METAL PROCESSING LTD.", styles['header']))
+        story.append(Paragraph("Professional Metal Processing Services", styles['company']))
+        story.append(Spacer(1, 20))
+        
+        # Invoice title and details
+        story.append(Paragraph("INVOICE", styles['title']))
+        
+        # Invoice info table
+        invoice_info = [
+            ['Invoice Number:', data['invoice_number'], 'Date:', datetime.now().strftime('%B %d, %Y')],
+            ['Work Order #:', invoice_data['work_order_number'], 'Customer PO:', invoice_data['customer_po']],
+            ['BOL Number:', invoice_data.get('bol_number', 'N/A'), '', '']
+        ]
+        
+        info_table = Table(invoice_info, colWidths=[1.5*inch, 1.5*inch, 1*inch, 1.5*inch])
+        info_table.setStyle(styles['info_table'])
+        story.append(info_table)
+        story.append(Spacer(1, 20))
+        
+        # Bill to section
+        bill_to_data = [
+            ['Bill To:', ''],
+            [invoice_data['customer_name'].upper(), '']
+        ]
+        
+        bill_to_table = Table(bill_to_data, colWidths=[1*inch, 5*inch])
+        bill_to_table.setStyle(styles['bill_to_table'])
+        story.append(bill_to_table)
+        story.append(Spacer(1, 20))
+        
+        # Materials and pricing table
+        table_data = [['Material Description', 'Pieces', 'Weight (lbs)', 'Rate Type', 'Rate', 'Subtotal']]
+        
+        # Add line items
+        for item in data['line_items']:
+            table_data.append([
+                item['description'],
+                str(item['pieces']),
+                f"{item['weight']:.2f}",
+                item['rate_type'],
+                item['rate'],
+                f"${item['subtotal']:.2f}"
+            ])
+        
+        pricing_table = Table(table_data, colWidths=[2.5*inch, 0.8*inch, 1*inch, 0.8*inch, 1*inch, 1*inch])
+        pricing_table.setStyle(styles['pricing_table'])
+        story.append(pricing_table)
+        story.append(Spacer(1, 20))
+        
+        # Totals section
+        totals_data = [
+            ['', '', '', '', 'Subtotal:', f"${subtotal:.2f}"],
+            ['', '', '', '', 'Tax:', 'N/A'],
+            ['', '', '', '', 'TOTAL:', f"${subtotal:.2f}"]
+        ]
+        
+        totals_table = Table(totals_data, colWidths=[2.5*inch, 0.8*inch, 1*inch, 0.8*inch, 1*inch, 1*inch])
+        totals_table.setStyle(styles['totals_table'])
+        story.append(totals_table)
+        story.append(Spacer(1, 30))
+        
+        # Notes section
+        if invoice_data.get('notes'):
+            story.append(Paragraph("<b>Notes:</b>", styles['normal']))
+            story.append(Paragraph(invoice_data['notes'], styles['normal']))
+            story.append(Spacer(1, 20))
+        
+        # Footer
+        story.append(Spacer(1, 30))
+        story.append(Paragraph("Thank you for your business!", styles['footer']))
+        story.append(Paragraph("Payment Terms: Net 30 Days", styles['footer']))
+        story.append(Paragraph("For questions regarding this invoice, please contact our accounting department.", styles['footer']))
+        
+        return story
+
+pdf_renderer.register('invoice', InvoiceTemplate())
+
 def generate_invoice_pdf(invoice_data, drive_url=None):
     """Generate a professional invoice PDF"""
     
@@ -105,88 +272,7 @@ def generate_invoice_pdf(invoice_data, drive_url=None):
     # Ensure output directory exists
     os.makedirs('pdf_outputs', exist_ok=True)
     
-    # Create document
-    doc = SimpleDocTemplate(filepath, pagesize=letter, topMargin=0.5*inch)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Custom styles
-    header_style = ParagraphStyle(
-        'CustomHeader',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.Color(0, 0.36, 0.66),  # NMP Blue
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    
-    company_style = ParagraphStyle(
-        'CompanyStyle',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=colors.Color(0, 0.36, 0.66),
-        alignment=TA_CENTER,
-        spaceAfter=10
-    )
-    
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.Color(0, 0.36, 0.66),
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    
-    # Header
-    story.append(Paragraph("NICAYNE METAL PROCESSING LTD.", header_style))
-    story.append(Paragraph("Professional Metal Processing Services", company_style))
-    story.append(Spacer(1, 20))
-    
-    # Invoice title and details
-    story.append(Paragraph("INVOICE", title_style))
-    
-    # Invoice info table
-    invoice_info = [
-        ['Invoice Number:', invoice_number, 'Date:', datetime.now().strftime('%B %d, %Y')],
-        ['Work Order #:', work_order, 'Customer PO:', customer_po],
-        ['BOL Number:', invoice_data.get('bol_number', 'N/A'), '', '']
-    ]
-    
-    info_table = Table(invoice_info, colWidths=[1.5*inch, 1.5*inch, 1*inch, 1.5*inch])
-    info_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
-    
-    story.append(info_table)
-    story.append(Spacer(1, 20))
-    
-    # Bill to section
-    bill_to_data = [
-        ['Bill To:', ''],
-        [invoice_data['customer_name'].upper(), '']
-    ]
-    
-    bill_to_table = Table(bill_to_data, colWidths=[1*inch, 5*inch])
-    bill_to_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (0, 1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
-    
-    story.append(bill_to_table)
-    story.append(Spacer(1, 20))
-    
-    # Materials and pricing table
+    # Materials and pricing
     material_groups = group_materials_by_size(invoice_data['finished_tags'])
     line_items, subtotal = calculate_pricing(
         material_groups,
@@ -194,89 +280,12 @@ def generate_invoice_pdf(invoice_data, drive_url=None):
         invoice_data['rate_or_amount']
     )
     
-    # Table headers
-    table_data = [['Material Description', 'Pieces', 'Weight (lbs)', 'Rate Type', 'Rate', 'Subtotal']]
-    
-    # Add line items
-    for item in line_items:
-        table_data.append([
-            item['description'],
-            str(item['pieces']),
-            f"{item['weight']:.2f}",
-            item['rate_type'],
-            item['rate'],
-            f"${item['subtotal']:.2f}"
-        ])
-    
-    # Create pricing table
-    pricing_table = Table(table_data, colWidths=[2.5*inch, 0.8*inch, 1*inch, 0.8*inch, 1*inch, 1*inch])
-    pricing_table.setStyle(TableStyle([
-        # Header row
-        ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0, 0.36, 0.66)),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        
-        # Data rows
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-        
-        # Grid
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        
-        # Alternating row colors
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)]),
-    ]))
-    
-    story.append(pricing_table)
-    story.append(Spacer(1, 20))
-    
-    # Totals section
-    totals_data = [
-        ['', '', '', '', 'Subtotal:', f"${subtotal:.2f}"],
-        ['', '', '', '', 'Tax:', 'N/A'],
-        ['', '', '', '', 'TOTAL:', f"${subtotal:.2f}"]
-    ]
-    
-    totals_table = Table(totals_data, colWidths=[2.5*inch, 0.8*inch, 1*inch, 0.8*inch, 1*inch, 1*inch])
-    totals_table.setStyle(TableStyle([
-        ('FONTNAME', (4, 0), (4, 1), 'Helvetica-Bold'),
-        ('FONTNAME', (4, 2), (-1, 2), 'Helvetica-Bold'),
-        ('FONTSIZE', (4, 0), (-1, -1), 11),
-        ('ALIGN', (4, 0), (-1, -1), 'RIGHT'),
-        ('LINEABOVE', (4, 2), (-1, 2), 1, colors.black),
-        ('BACKGROUND', (4, 2), (-1, 2), colors.Color(0.9, 0.9, 0.9)),
-    ]))
-    
-    story.append(totals_table)
-    story.append(Spacer(1, 30))
-    
-    # Notes section
-    if invoice_data.get('notes'):
-        story.append(Paragraph("<b>Notes:</b>", styles['Normal']))
-        story.append(Paragraph(invoice_data['notes'], styles['Normal']))
-        story.append(Spacer(1, 20))
-    
-    # Footer
-    footer_style = ParagraphStyle(
-        'FooterStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.Color(0.3, 0.3, 0.3),
-        alignment=TA_CENTER
-    )
-    
-    story.append(Spacer(1, 30))
-    story.append(Paragraph("Thank you for your business!", footer_style))
-    story.append(Paragraph("Payment Terms: Net 30 Days", footer_style))
-    story.append(Paragraph("For questions regarding this invoice, please contact our accounting department.", footer_style))
-    
-    # Build PDF
-    doc.build(story)
+    pdf_renderer.render('invoice', {
+        'invoice_number': invoice_number,
+        'invoice': invoice_data,
+        'line_items': line_items,
+        'subtotal': subtotal
+    }, filepath)
     
     # Save invoice record
     invoice_record = {
@@ -309,24 +318,11 @@ def generate_invoice_pdf(invoice_data, drive_url=None):
     }
 
 def save_invoice_record(invoice_record):
-    """Save invoice record to tracking file"""
+    """Save invoice record to the tracking store"""
     try:
-        invoice_log_file = 'invoice_tracking.json'
-        
-        if os.path.exists(invoice_log_file):
-            with open(invoice_log_file, 'r') as f:
-                invoices = json.load(f)
-        else:
-            invoices = []
-        
-        invoices.append(invoice_record)
-        
-        # Keep only the most recent 200 invoices
-        invoices = invoices[-200:]
-        
-        with open(invoice_log_file, 'w') as f:
-            json.dump(invoices, f, indent=2)
-            
+        from utils.tracking_store import tracking_store
+        tracking_store.invoices.add(invoice_record)
+    
     except Exception as e:
         print(f"Error saving invoice record: {str(e)}")
 
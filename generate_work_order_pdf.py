@@ -5,271 +5,171 @@ Consistent formatting across all document types with unified design system
 
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.enums import TA_CENTER
 import os
 from datetime import datetime
-import json
-import qrcode
-import io
-from PIL import Image as PILImage
 import sys
 sys.path.append('.')
 from utils.pdf_design_system import (
     create_standardized_header, 
-    create_standardized_footer, 
-    get_standardized_styles,
-    create_document_title,
-    create_section_table,
-    NICAYNE_BLUE,
-    SECTION_BACKGROUND,
-    BORDER_GRAY,
-    TEXT_DARK,
-    HEADER_TEXT
+    create_document_title
 )
+from utils.pdf_renderer import PDFTemplate, pdf_renderer
+from utils.qr_codes import qr_code_flowable
 
-def generate_qr_code(url):
-    """Generate QR code image from URL and return as ReportLab Image object"""
-    if not url:
-        return None
+class WorkOrderTemplate(PDFTemplate):
+    """Letter work order. Data: 'work_order' (work order data) and optional 'drive_url'."""
+    
+    page_settings = {
+        'pagesize': letter,
+        'rightMargin': 0.5*inch,
+        'leftMargin': 0.5*inch,
+        'topMargin': 0.5*inch,
+        'bottomMargin': 0.5*inch
+    }
     
-    try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(url)
-        qr.make(fit=True)
+    def build_styles(self):
+        """Build the work order's paragraph and table styles once."""
+        styles = super().build_styles()
+        grid = [
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]
+        styles.update({
+            'notes': ParagraphStyle('Notes', fontSize=10, spaceAfter=12),
+            'operator_notes': ParagraphStyle('OperatorNotes', fontSize=12, spaceAfter=24),
+            'qr_text': ParagraphStyle('QRText', fontSize=8, alignment=TA_CENTER),
+            'general_info_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
+                ('BACKGROUND', (0, 2), (-1, 2), colors.HexColor('#f0f0f0')),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ] + grid + [
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold')
+            ]),
+            'packaging_table': TableStyle([
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ] + grid + [
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold')
+            ]),
+            'tolerance_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ] + grid + [
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER')
+            ]),
+            'job_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ] + grid + [
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold')
+            ]),
+            'signature_table': TableStyle([
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP')
+            ]),
+            'qr_table': TableStyle([
+                ('ALIGN', (2, 0), (2, 1), 'CENTER'),
+                ('VALIGN', (2, 0), (2, 1), 'MIDDLE'),
+            ])
+        })
+        return styles
+    
+    def build_story(self, context, styles):
+        """Build the work order's flowables."""
+        work_order_data = context['work_order']
+        work_order_number = work_order_data.get('work_order_number', 'UNKNOWN')
+        section_header_style = styles['section_header']
+        story = []
         
-        # Create QR code image
-        qr_img = qr.make_image(fill_color="black", back_color="white")
+        # Standardized Header
+        story.append(create_standardized_header())
+        story.append(Spacer(1, 20))
         
-        # Convert to ReportLab Image
-        img_buffer = io.BytesIO()
-        qr_img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
+        # Work Order Title using standardized design
+        story.append(create_document_title("WORK ORDER", work_order_number))
+        story.append(Spacer(1, 16))
         
-        return Image(img_buffer, width=1*inch, height=1*inch)
-    except Exception as e:
-        print(f"Error generating QR code: {e}")
-        return None
-
-def create_standardized_header():
-    """Create standardized header for all Nicayne OS documents"""
-    header_data = [
-        ["NICAYNE METAL PROCESSING", "Powered by Chaos Operating System"],
-    ]
-    
-    header_table = Table(header_data, colWidths=[4.5*inch, 3*inch])
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), NICAYNE_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), HEADER_TEXT),
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, 0), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (0, 0), 18),
-        ('FONTSIZE', (1, 0), (1, 0), 10),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-    ]))
-    
-    return header_table
-
-def create_standardized_footer(doc_type, timestamp, qr_code=None):
-    """Create standardized footer for all documents"""
-    footer_content = []
-    
-    if qr_code:
-        footer_data = [
-            [f"Generated: {timestamp}", "", qr_code],
-            ["Nicayne Metal Processing OS", "", "Scan for Digital Access"]
+        # General Information Section
+        story.append(Paragraph("<b>General Information</b>", section_header_style))
+        
+        general_info_data = [
+            ["Quote Number", "Customer", "Date Created"],
+            [work_order_data.get('quote_number', ''), 
+             work_order_data.get('customer_name', ''), 
+             datetime.now().strftime('%Y-%m-%d')],
+            ["Date Required", "Customer PO #", ""],
+            [work_order_data.get('date_required', ''), 
+             work_order_data.get('customer_po', ''), 
+             ""]
         ]
-        footer_table = Table(footer_data, colWidths=[3*inch, 2*inch, 2.5*inch])
-        footer_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (1, 1), 9),
-            ('FONTSIZE', (2, 1), (2, 1), 8),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (2, 0), (2, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.gray),
-        ]))
-    else:
-        footer_data = [
-            [f"Generated: {timestamp}"],
-            ["Nicayne Metal Processing OS"]
+        
+        general_info_table = Table(general_info_data, colWidths=[2.3*inch, 2.3*inch, 2.3*inch])
+        general_info_table.setStyle(styles['general_info_table'])
+        story.append(general_info_table)
+        story.append(Spacer(1, 12))
+        
+        # Packaging Instructions Section
+        story.append(Paragraph("<b>Packaging Instructions</b>", section_header_style))
+        
+        packaging_data = [
+            ["Max Bundle/Skid Weight", f"{work_order_data.get('max_bundle_weight', '')} lbs", 
+             "Requested Pieces per Bundle", work_order_data.get('pieces_per_bundle', '')],
+            ["Max OD", f"{work_order_data.get('max_od', '')} in", 
+             "Wood Spacers", work_order_data.get('wood_spacers', '')],
+            ["Paper Wrap", work_order_data.get('paper_wrap', ''), 
+             "Coil Direction on Skid", work_order_data.get('coil_direction', '')],
+            ["Edge Protectors", work_order_data.get('edge_protectors', ''), 
+             "Split Coil", work_order_data.get('split_coil', '')]
         ]
-        footer_table = Table(footer_data, colWidths=[7.5*inch])
-        footer_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.gray),
-        ]))
-    
-    return footer_table
-
-def generate_work_order_pdf(work_order_data, drive_url=None):
-    """Generate a standardized work order PDF with unified design system"""
-    
-    # Create filename
-    work_order_number = work_order_data.get('work_order_number', 'UNKNOWN')
-    customer_name = work_order_data.get('customer_name', 'UNKNOWN').replace(' ', '_')
-    filename = f"WO-{work_order_number}-{customer_name}.pdf"
-    
-    # Create work_orders directory if it doesn't exist
-    os.makedirs('work_orders', exist_ok=True)
-    filepath = os.path.join('work_orders', filename)
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(filepath, pagesize=letter,
-                          rightMargin=0.5*inch, leftMargin=0.5*inch,
-                          topMargin=0.5*inch, bottomMargin=0.5*inch)
-    
-    # Build the story (content)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Standardized document styles
-    section_header_style = ParagraphStyle(
-        'SectionHeader',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=8,
-        spaceBefore=12,
-        textColor=NICAYNE_BLUE,
-        fontName='Helvetica-Bold'
-    )
-    
-    field_label_style = ParagraphStyle(
-        'FieldLabel',
-        parent=styles['Normal'],
-        fontSize=11,
-        fontName='Helvetica-Bold',
-        textColor=TEXT_DARK
-    )
-    
-    field_value_style = ParagraphStyle(
-        'FieldValue',
-        parent=styles['Normal'],
-        fontSize=11,
-        fontName='Helvetica',
-        textColor=TEXT_DARK
-    )
-    
-    # Standardized Header
-    story.append(create_standardized_header())
-    story.append(Spacer(1, 20))
-    
-    # Work Order Title using standardized design
-    story.append(create_document_title("WORK ORDER", work_order_number))
-    story.append(Spacer(1, 16))
-    
-    # General Information Section
-    story.append(Paragraph("<b>General Information</b>", section_header_style))
-    
-    general_info_data = [
-        ["Quote Number", "Customer", "Date Created"],
-        [work_order_data.get('quote_number', ''), 
-         work_order_data.get('customer_name', ''), 
-         datetime.now().strftime('%Y-%m-%d')],
-        ["Date Required", "Customer PO #", ""],
-        [work_order_data.get('date_required', ''), 
-         work_order_data.get('customer_po', ''), 
-         ""]
-    ]
-    
-    general_info_table = Table(general_info_data, colWidths=[2.3*inch, 2.3*inch, 2.3*inch])
-    general_info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
-        ('BACKGROUND', (0, 2), (-1, 2), colors.HexColor('#f0f0f0')),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold')
-    ]))
-    story.append(general_info_table)
-    story.append(Spacer(1, 12))
-    
-    # Packaging Instructions Section
-    story.append(Paragraph("<b>Packaging Instructions</b>", section_header_style))
-    
-    packaging_data = [
-        ["Max Bundle/Skid Weight", f"{work_order_data.get('max_bundle_weight', '')} lbs", 
-         "Requested Pieces per Bundle", work_order_data.get('pieces_per_bundle', '')],
-        ["Max OD", f"{work_order_data.get('max_od', '')} in", 
-         "Wood Spacers", work_order_data.get('wood_spacers', '')],
-        ["Paper Wrap", work_order_data.get('paper_wrap', ''), 
-         "Coil Direction on Skid", work_order_data.get('coil_direction', '')],
-        ["Edge Protectors", work_order_data.get('edge_protectors', ''), 
-         "Split Coil", work_order_data.get('split_coil', '')]
-    ]
-    
-    packaging_table = Table(packaging_data, colWidths=[1.7*inch, 1.7*inch, 1.7*inch, 1.7*inch])
-    packaging_table.setStyle(TableStyle([
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold')
-    ]))
-    story.append(packaging_table)
-    story.append(Spacer(1, 12))
-    
-    # Tolerances Section
-    story.append(Paragraph("<b>Tolerances</b>", section_header_style))
-    
-    # Process tolerances - handle multiple tolerance groups
-    tolerance_thickness = work_order_data.get('tolerance_thickness', [])
-    tolerance_width = work_order_data.get('tolerance_width', [])
-    tolerance_length = work_order_data.get('tolerance_length', [])
-    
-    # Ensure all lists are the same length
-    max_tolerance_groups = max(len(tolerance_thickness), len(tolerance_width), len(tolerance_length))
-    
-    tolerance_data = [["Thickness", "Width", "Length"]]
-    
-    for i in range(max_tolerance_groups):
-        thickness = tolerance_thickness[i] if i < len(tolerance_thickness) else "–"
-        width = tolerance_width[i] if i < len(tolerance_width) else "–"
-        length = tolerance_length[i] if i < len(tolerance_length) else "–"
-        tolerance_data.append([thickness, width, length])
-    
-    # If no tolerances, add empty row
-    if max_tolerance_groups == 0:
-        tolerance_data.append(["–", "–", "–"])
-    
-    tolerance_table = Table(tolerance_data, colWidths=[2.3*inch, 2.3*inch, 2.3*inch])
-    tolerance_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER')
-    ]))
-    story.append(tolerance_table)
-    story.append(Spacer(1, 12))
-    
-    # Customer Notes
-    if work_order_data.get('packaging_instructions'):
-        story.append(Paragraph(f"<b>Customer Notes:</b> {work_order_data.get('packaging_instructions', '')}", 
-                              ParagraphStyle('Notes', fontSize=10, spaceAfter=12)))
-    
-    # Job Process Section
-    jobs = work_order_data.get('jobs', [])
-    
-    if jobs:
-        for job_index, job in enumerate(jobs):
+        
+        packaging_table = Table(packaging_data, colWidths=[1.7*inch, 1.7*inch, 1.7*inch, 1.7*inch])
+        packaging_table.setStyle(styles['packaging_table'])
+        story.append(packaging_table)
+        story.append(Spacer(1, 12))
+        
+        # Tolerances Section
+        story.append(Paragraph("<b>Tolerances</b>", section_header_style))
+        
+        # Process tolerances - handle multiple tolerance groups
+        tolerance_thickness = work_order_data.get('tolerance_thickness', [])
+        tolerance_width = work_order_data.get('tolerance_width', [])
+        tolerance_length = work_order_data.get('tolerance_length', [])
+        
+        # Ensure all lists are the same length
+        max_tolerance_groups = max(len(tolerance_thickness), len(tolerance_width), len(tolerance_length))
+        
+        tolerance_data = [["Thickness", "Width", "Length"]]
+        
+        for i in range(max_tolerance_groups):
+            thickness = tolerance_thickness[i] if i < len(tolerance_thickness) else "–"
+            width = tolerance_width[i] if i < len(tolerance_width) else "–"
+            length = tolerance_length[i] if i < len(tolerance_length) else "–"
+            tolerance_data.append([thickness, width, length])
+        
+        # If no tolerances, add empty row
+        if max_tolerance_groups == 0:
+            tolerance_data.append(["–", "–", "–"])
+        
+        tolerance_table = Table(tolerance_data, colWidths=[2.3*inch, 2.3*inch, 2.3*inch])
+        tolerance_table.setStyle(styles['tolerance_table'])
+        story.append(tolerance_table)
+        story.append(Spacer(1, 12))
+        
+        # Customer Notes
+        if work_order_data.get('packaging_instructions'):
+            story.append(Paragraph(f"<b>Customer Notes:</b> {work_order_data.get('packaging_instructions', '')}", 
+                                  styles['notes']))
+        
+        # Job Process Section
+        jobs = work_order_data.get('jobs', [])
+        
+        for job in jobs:
             job_type = job.get('job_type', '').lower()
             
             if job_type == 'slitting':
@@ -288,7 +188,7 @@ def generate_work_order_pdf(work_order_data, drive_url=None):
                 finished_weight = f"{job.get('finished_weight', '')} lbs/" if job.get('finished_weight') else "–"
                 
                 slitting_data.append([material_grade, coil_desc, incoming_weight, od_size, finished_weight])
-                
+            
             elif job_type == 'cut_to_length':
                 story.append(Paragraph(f"<b>Process Type: Cut-to-Length &nbsp;&nbsp;&nbsp;&nbsp; Cut-to-Length Jobs</b>", section_header_style))
                 
@@ -309,56 +209,56 @@ def generate_work_order_pdf(work_order_data, drive_url=None):
             
             # Create job table
             job_table = Table(slitting_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch])
-            job_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold')
-            ]))
+            job_table.setStyle(styles['job_table'])
             story.append(job_table)
             story.append(Spacer(1, 12))
+        
+        # Bottom section - Operator Notes
+        story.append(Spacer(1, 24))
+        story.append(Paragraph("<b>Operator Notes:</b>", styles['operator_notes']))
+        story.append(Spacer(1, 48))
+        
+        # Signature lines
+        signature_data = [
+            ["Operator Signature: _________________________", "Date: _______________"],
+            ["", ""],
+            ["Supervisor Signature: _________________________", "Date: _______________"]
+        ]
+        
+        signature_table = Table(signature_data, colWidths=[4*inch, 2.5*inch])
+        signature_table.setStyle(styles['signature_table'])
+        story.append(signature_table)
+        
+        # Add QR code if Drive URL is available
+        if context.get('drive_url'):
+            qr_code = qr_code_flowable(context['drive_url'], 1*inch)
+            if qr_code:
+                story.append(Spacer(1, 12))
+                # Create QR code table positioned at bottom right
+                qr_table = Table([
+                    ['', '', qr_code],
+                    ['', '', Paragraph('<font size="8">Scan for digital copy</font>', styles['qr_text'])]
+                ], colWidths=[5*inch, 1*inch, 1*inch])
+                qr_table.setStyle(styles['qr_table'])
+                story.append(qr_table)
+        
+        return story
+
+pdf_renderer.register('work_order', WorkOrderTemplate())
+
+def generate_work_order_pdf(work_order_data, drive_url=None):
+    """Generate a standardized work order PDF with unified design system"""
     
-    # Bottom section - Operator Notes
-    story.append(Spacer(1, 24))
-    story.append(Paragraph("<b>Operator Notes:</b>", ParagraphStyle('OperatorNotes', fontSize=12, spaceAfter=24)))
-    story.append(Spacer(1, 48))
-    
-    # Signature lines
-    signature_data = [
-        ["Operator Signature: _________________________", "Date: _______________"],
-        ["", ""],
-        ["Supervisor Signature: _________________________", "Date: _______________"]
-    ]
-    
-    signature_table = Table(signature_data, colWidths=[4*inch, 2.5*inch])
-    signature_table.setStyle(TableStyle([
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP')
-    ]))
-    story.append(signature_table)
-    
-    # Add QR code if Drive URL is available
-    if drive_url:
-        qr_code = generate_qr_code(drive_url)
-        if qr_code:
-            story.append(Spacer(1, 12))
-            # Create QR code table positioned at bottom right
-            qr_table = Table([
-                ['', '', qr_code],
-                ['', '', Paragraph('<font size="8">Scan for digital copy</font>', 
-                                 ParagraphStyle('QRText', fontSize=8, alignment=TA_CENTER))]
-            ], colWidths=[5*inch, 1*inch, 1*inch])
-            qr_table.setStyle(TableStyle([
-                ('ALIGN', (2, 0), (2, 1), 'CENTER'),
-                ('VALIGN', (2, 0), (2, 1), 'MIDDLE'),
-            ]))
-            story.append(qr_table)
+    # Create filename
+    work_order_number = work_order_data.get('work_order_number', 'UNKNOWN')
+    customer_name = work_order_data.get('customer_name', 'UNKNOWN').replace(' ', '_')
+    filename = f"WO-{work_order_number}-{customer_name}.pdf"
     
-    # Build PDF
-    doc.build(story)
+    # Create work_orders directory if it doesn't exist
+    os.makedirs('work_orders', exist_ok=True)
+    filepath = os.path.join('work_orders', filename)
     
-    return filepath
+    return pdf_renderer.render('work_order', {'work_order': work_order_data, 'drive_url': drive_url}, filepath)
 
 def generate_work_order_pdf_from_form_data(form_data, drive_url=None):
     """Generate work order PDF from form submission data"""
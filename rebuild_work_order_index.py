@@ -0,0 +1,21 @@
+"""
+Rebuild the work order history index from the files under work_orders/.
+
+Usage:
+    python rebuild_work_order_index.py
+"""
+from utils.work_order_index import work_order_index
+
+def rebuild_work_order_index():
+    """Regenerate the history index from disk and print how many work orders it holds"""
+    try:
+        count = work_order_index.rebuild()
+        print(f"Indexed {count} work order(s) from {work_order_index.base_path}/")
+        return count
+    
+    except Exception as e:
+        print(f"Error rebuilding work order index: {str(e)}")
+        return 0
+
+if __name__ == "__main__":
+    rebuild_work_order_index()
@@ -0,0 +1,51 @@
+"""
+Recover inventory moves that were interrupted between appending coils to the
+destination sheet and marking them in the source sheet.
+
+Usage:
+    python recover_inventory_moves.py             # replay incomplete moves
+    python recover_inventory_moves.py --rollback  # undo incomplete moves instead
+    python recover_inventory_moves.py --list      # show recent moves without changing anything
+"""
+import argparse
+from utils.inventory_transitions import inventory_transitions
+from utils.move_journal import move_journal
+
+def recover_inventory_moves(rollback=False):
+    """Replay or roll back incomplete inventory moves and print the outcome of each"""
+    try:
+        incomplete = move_journal.incomplete_moves()
+        if not incomplete:
+            print("No incomplete inventory moves")
+            return []
+        
+        print(f"{'Rolling back' if rollback else 'Replaying'} {len(incomplete)} incomplete inventory move(s)...")
+        outcomes = inventory_transitions.recover(rollback=rollback)
+        for outcome in outcomes:
+            line = f"  {outcome['move_id']} {outcome['kind']}: {outcome['status']}"
+            if outcome['error']:
+                line += f" - {outcome['error']}"
+            print(line)
+        
+        return outcomes
+    
+    except Exception as e:
+        print(f"Error recovering inventory moves: {str(e)}")
+        return []
+
+def list_inventory_moves(limit=20):
+    """Print the most recent inventory moves"""
+    for move in move_journal.list_moves(limit):
+        print(f"  {move['created']} {move['id']} {move['kind']} {move['source']} -> {move['destination']}: "
+              f"{move['status']} ({len(move['rows'])} rows)" + (f" - {move['error']}" if move['error'] else ""))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recover interrupted inventory moves")
+    parser.add_argument("--rollback", action="store_true", help="undo incomplete moves instead of replaying them")
+    parser.add_argument("--list", action="store_true", help="list recent moves and exit")
+    args = parser.parse_args()
+    
+    if args.list:
+        list_inventory_moves()
+    else:
+        recover_inventory_moves(rollback=args.rollback)
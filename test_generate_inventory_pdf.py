@@ -0,0 +1,62 @@
+"""
+Tests for the inventory report PDF generator.
+"""
+
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_inventory_pdf import InventoryReportTemplate, generate_inventory_pdf, parse_quantity
+
+class TestInventoryReportTotals(unittest.TestCase):
+    """Test the summary totals of inventory reports."""
+    
+    def setUp(self):
+        self.template = InventoryReportTemplate()
+        self.styles = self.template.build_styles()
+    
+    def summary_text(self, inventory):
+        """Build a report story and return the text of its summary line."""
+        story = self.template.build_story(
+            {'customer_name': 'Acme', 'status': 'Unprocessed', 'inventory': inventory}, self.styles
+        )
+        return story[-1].getPlainText()
+    
+    def test_parse_quantity(self):
+        """Test weights and piece counts as Sheets and the mirror return them."""
+        self.assertEqual(parse_quantity(12345), 12345.0)
+        self.assertEqual(parse_quantity(2.5), 2.5)
+        self.assertEqual(parse_quantity('12,345'), 12345.0)
+        self.assertEqual(parse_quantity(' 1,234.5 '), 1234.5)
+        self.assertEqual(parse_quantity('3.0'), 3.0)
+        self.assertEqual(parse_quantity(''), 0.0)
+        self.assertEqual(parse_quantity(None), 0.0)
+        self.assertEqual(parse_quantity('N/A'), 0.0)
+    
+    def test_totals_from_formatted_values(self):
+        """Test totals over numbers, formatted strings and blanks."""
+        inventory = [
+            {'Customer': 'Acme', 'Weight': '12,345', 'Pieces': '3.0'},
+            {'Customer': 'Acme', 'Weight': 1000, 'Pieces': 2},
+            {'Customer': 'Acme', 'Weight': '', 'Pieces': ''},
+            {'Customer': 'Acme', 'Weight': '250.5', 'Pieces': '1,000'},
+        ]
+        
+        summary = self.summary_text(iter(inventory))
+        
+        self.assertIn('4 items', summary)
+        self.assertIn('13595.50 lbs total weight', summary)
+        self.assertIn('1005 total pieces', summary)
+    
+    def test_report_renders_formatted_values(self):
+        """Test a full render does not fail on formatted quantities."""
+        output = io.BytesIO()
+        generate_inventory_pdf('Acme', 'Unprocessed', [{'Customer': 'Acme', 'Weight': '12,345', 'Pieces': '3.0'}], output)
+        
+        self.assertTrue(output.getvalue().startswith(b'%PDF'))
+
+if __name__ == '__main__':
+    unittest.main()
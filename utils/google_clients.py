@@ -0,0 +1,239 @@
+"""
+Shared Google API clients for Sheets and Drive.
+Authorizes the service account once per process and caches spreadsheet and worksheet handles.
+Sheets requests are throttled by the shared SheetsRequestScheduler.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import gspread
+from google.oauth2.service_account import Credentials
+from googleapiclient.discovery import build
+
+from utils.sheets_scheduler import SheetsRequestScheduler, sheets_scheduler
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+class GoogleClientRegistry:
+    """Process-wide, thread-safe cache of authorized Sheets and Drive clients."""
+    
+    def __init__(self, service_account_key: Optional[str] = None, handle_ttl: float = 600,
+                 scheduler: Optional[SheetsRequestScheduler] = None):
+        """
+        Initialize the registry. Nothing is authorized until first use.
+        
+        Args:
+            service_account_key: Service account JSON; defaults to the
+                GOOGLE_SERVICE_ACCOUNT_KEY_NMP environment variable
+            handle_ttl: Seconds a cached spreadsheet handle is reused before it is reopened
+            scheduler: Rate limiter for Sheets requests; defaults to the shared one
+        """
+        self.service_account_key = service_account_key
+        self.handle_ttl = handle_ttl
+        self.scheduler = scheduler or sheets_scheduler
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._credentials = None
+        self._sheets_client = None
+        self._spreadsheets = {}
+        self._worksheets = {}
+    
+    def get_credentials(self) -> Credentials:
+        """
+        Get the service account credentials, parsing the key only once.
+        
+        Returns:
+            Credentials scoped for Sheets and Drive
+        """
+        with self._lock:
+            if self._credentials is None:
+                service_account_key = self.service_account_key or (
+                    os.getenv('GOOGLE_SERVICE_ACCOUNT_KEY_NMP') or
+                    os.getenv('GOOGLE_SERVICE_ACCOUNT_KEY_CAIOS_NMP')
+                )
+                if not service_account_key:
+                    raise ValueError("Google service account key not provided")
+                
+                self._credentials = Credentials.from_service_account_info(
+                    json.loads(service_account_key), scopes=SCOPES
+                )
+            return self._credentials
+    
+    def get_sheets_client(self) -> gspread.Client:
+        """
+        Get the shared gspread client.
+        
+        The client's authorized session refreshes the access token when it
+        expires and keeps connections to the Sheets API alive between calls.
+        Its requests go through the scheduler, which enforces the read and
+        write quotas and retries rate-limited requests.
+        
+        Returns:
+            Authorized gspread client
+        """
+        with self._lock:
+            if self._sheets_client is None:
+                self._sheets_client = gspread.authorize(
+                    self.get_credentials(), http_client=self.scheduler.http_client
+                )
+                logger.info("Google Sheets client authorized")
+            return self._sheets_client
+    
+    def get_drive_service(self):
+        """
+        Get a Drive v3 service for the calling thread.
+        
+        Drive service objects are not thread-safe, so each thread builds its
+        own once and reuses it; the credentials are shared.
+        
+        Returns:
+            Google Drive API service resource
+        """
+        service = getattr(self._local, 'drive_service', None)
+        if service is None:
+            service = build('drive', 'v3', credentials=self.get_credentials(), cache_discovery=False)
+            self._local.drive_service = service
+            logger.info(f"Google Drive service built for thread {threading.current_thread().name}")
+        return service
+    
+    def open_spreadsheet(self, spreadsheet_id: Optional[str] = None) -> gspread.Spreadsheet:
+        """
+        Get a cached spreadsheet handle, opening it if missing or stale.
+        
+        Args:
+            spreadsheet_id: Spreadsheet key; defaults to SPREADSHEET_ID_NMP
+            
+        Returns:
+            gspread Spreadsheet
+        """
+        spreadsheet_id = spreadsheet_id or os.getenv('SPREADSHEET_ID_NMP')
+        with self._lock:
+            cached = self._spreadsheets.get(spreadsheet_id)
+            if cached and time.monotonic() - cached[1] < self.handle_ttl:
+                return cached[0]
+            
+            spreadsheet = self.get_sheets_client().open_by_key(spreadsheet_id)
+            self._spreadsheets[spreadsheet_id] = (spreadsheet, time.monotonic())
+            # Worksheet handles belong to the spreadsheet they came from
+            self._worksheets = {key: ws for key, ws in self._worksheets.items() if key[0] != spreadsheet_id}
+            return spreadsheet
+    
+    def get_worksheet(self, title: str, spreadsheet_id: Optional[str] = None,
+                      create_rows: int = 0, create_cols: int = 20) -> gspread.Worksheet:
+        """
+        Get a cached worksheet handle.
+        
+        Args:
+            title: Worksheet title
+            spreadsheet_id: Spreadsheet key; defaults to SPREADSHEET_ID_NMP
+            create_rows: Create the worksheet with this many rows if it does not
+                exist; 0 raises WorksheetNotFound instead
+            create_cols: Column count used when creating the worksheet
+            
+        Returns:
+            gspread Worksheet
+        """
+        spreadsheet_id = spreadsheet_id or os.getenv('SPREADSHEET_ID_NMP')
+        with self._lock:
+            spreadsheet = self.open_spreadsheet(spreadsheet_id)
+            key = (spreadsheet_id, title)
+            if key not in self._worksheets:
+                try:
+                    self._worksheets[key] = spreadsheet.worksheet(title)
+                except gspread.exceptions.WorksheetNotFound:
+                    if not create_rows:
+                        raise
+                    logger.info(f"Creating worksheet {title}")
+                    self._worksheets[key] = spreadsheet.add_worksheet(title=title, rows=create_rows, cols=create_cols)
+            return self._worksheets[key]
+    
+    def invalidate(self, spreadsheet_id: Optional[str] = None):
+        """
+        Drop cached spreadsheet and worksheet handles, e.g. after an API error.
+        
+        Args:
+            spreadsheet_id: Only drop handles for this spreadsheet; None drops all
+        """
+        with self._lock:
+            if spreadsheet_id is None:
+                self._spreadsheets = {}
+                self._worksheets = {}
+            else:
+                self._spreadsheets.pop(spreadsheet_id, None)
+                self._worksheets = {key: ws for key, ws in self._worksheets.items() if key[0] != spreadsheet_id}
+    
+    def reset(self):
+        """Forget all clients, credentials and handles so the next call re-authorizes."""
+        with self._lock:
+            self._credentials = None
+            self._sheets_client = None
+            self._spreadsheets = {}
+            self._worksheets = {}
+            self._local = threading.local()
+    
+    def health_check(self, spreadsheet_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Probe the Sheets API with a metadata read of the spreadsheet.
+        
+        Args:
+            spreadsheet_id: Spreadsheet key; defaults to SPREADSHEET_ID_NMP
+            
+        Returns:
+            Dictionary with healthy flag, latency, cache state and request scheduler metrics
+        """
+        started = time.perf_counter()
+        try:
+            self.open_spreadsheet(spreadsheet_id).fetch_sheet_metadata()
+            healthy, error = True, None
+        except Exception as e:
+            # A failed probe may mean a stale handle; reopen next time
+            self.invalidate(spreadsheet_id)
+            healthy, error = False, str(e)
+            logger.warning(f"Google Sheets health check failed: {error}")
+        
+        with self._lock:
+            return {
+                'healthy': healthy,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+                'error': error,
+                'sheets_authorized': self._sheets_client is not None,
+                'cached_spreadsheets': len(self._spreadsheets),
+                'cached_worksheets': len(self._worksheets),
+                'scheduler': self.scheduler.metrics()
+            }
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_google_clients(service_account_key: Optional[str] = None) -> GoogleClientRegistry:
+    """
+    Get the process-wide registry for a service account.
+    
+    Args:
+        service_account_key: Service account JSON; None uses the environment key
+        
+    Returns:
+        Shared GoogleClientRegistry
+    """
+    with _registries_lock:
+        if service_account_key not in _registries:
+            _registries[service_account_key] = GoogleClientRegistry(service_account_key)
+        return _registries[service_account_key]
+
+def reset_google_clients():
+    """Drop every registry, e.g. after credentials change or between tests."""
+    with _registries_lock:
+        _registries.clear()
+
+# Global instance for easy access
+google_clients = get_google_clients()
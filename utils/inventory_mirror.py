@@ -0,0 +1,452 @@
+"""
+Local mirror of the inventory worksheets.
+Keeps UNPROCESSED_INVENTORY, IN_PROCESS and PROCESSED in memory and in SQLite so
+reports do not download whole worksheets on every request.
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_SHEETS = ('UNPROCESSED_INVENTORY', 'IN_PROCESS', 'PROCESSED')
+
+# Row number logged in mirror_changes when a whole sheet was reloaded or invalidated
+FULL_RELOAD = 0
+
+def customer_key(value: Any) -> str:
+    """Normalize a customer name the way report filtering compares it."""
+    return str(value or '').strip().lower()
+
+def numericise(value: Any) -> Any:
+    """
+    Convert a cell to int or float where it reads as a number, as gspread's
+    get_all_records does, so mirrored records match what the reports were written for.
+    
+    Thousands separators are ignored ('12,345' -> 12345); values with underscores,
+    blanks, text and words like 'NaN' or 'Inf' are returned unchanged.
+    """
+    if not isinstance(value, str) or '_' in value:
+        return value
+    cleaned = value.replace(',', '')
+    try:
+        return int(cleaned)
+    except ValueError:
+        pass
+    try:
+        number = float(cleaned)
+    except ValueError:
+        return value
+    return number if math.isfinite(number) else value
+
+def numericise_record(headers: List[str], row: List[Any]) -> Dict[str, Any]:
+    """Build a record from a row of cell values, numericising each cell."""
+    return dict(zip(headers, [numericise(value) for value in row]))
+
+class InventoryMirror:
+    """Read-through cache of the inventory worksheets, indexed by customer."""
+    
+    def __init__(self, db_path: str = "inventory_mirror.db", ttl_seconds: float = 300, clients=None):
+        """
+        Initialize the mirror.
+        
+        Args:
+            db_path: Path to the SQLite database holding the persisted mirror
+            ttl_seconds: Age after which a worksheet is downloaded again
+            clients: GoogleClientRegistry used for refreshes; defaults to the shared one
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._clients = clients
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sheet_locks = {name: threading.Lock() for name in INVENTORY_SHEETS}
+        self._sheets = {}
+        self._init_db()
+    
+    @property
+    def clients(self):
+        """Google client registry, imported lazily so the mirror can be used offline."""
+        if self._clients is None:
+            from utils.google_clients import google_clients
+            self._clients = google_clients
+        return self._clients
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, reopening it in a new process."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _init_db(self):
+        """Create the mirror tables if they do not exist."""
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS mirror_sheets (
+                name TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                refreshed_at REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS mirror_rows (
+                sheet TEXT NOT NULL,
+                row_number INTEGER NOT NULL,
+                customer_key TEXT NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (sheet, row_number)
+            );
+            CREATE INDEX IF NOT EXISTS idx_mirror_rows_customer ON mirror_rows (sheet, customer_key);
+            CREATE TABLE IF NOT EXISTS mirror_changes (
+                sheet TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                row_number INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_mirror_changes_version ON mirror_changes (sheet, version);
+        """)
+    
+    def get_records(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """
+        Get every record of an inventory worksheet.
+        
+        Args:
+            sheet_name: Worksheet title
+            
+        Returns:
+            List of row dictionaries keyed by header, in sheet order
+        """
+        return [dict(record) for record in self._get_sheet(sheet_name)['records']]
+    
+    def get_customer_records(self, sheet_name: str, customer_name: str) -> List[Dict[str, Any]]:
+        """
+        Get the records of a worksheet that belong to a customer.
+        
+        Matching is case-insensitive and succeeds when either name contains
+        the other, as the reports have always done; only the distinct
+        customer names are compared, not every row.
+        
+        Args:
+            sheet_name: Worksheet title
+            customer_name: Customer to filter by
+            
+        Returns:
+            Matching row dictionaries in sheet order
+        """
+        return list(self.iter_customer_records(sheet_name, customer_name))
+    
+    def iter_customer_records(self, sheet_name: str, customer_name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the records of a worksheet that belong to a customer, copying each
+        one only as it is consumed.
+        
+        Args:
+            sheet_name: Worksheet title
+            customer_name: Customer to filter by, matched as in get_customer_records
+            
+        Yields:
+            Matching row dictionaries in sheet order
+        """
+        # Look the sheet up now, so a failed download surfaces here rather than mid-iteration
+        sheet = self._get_sheet(sheet_name)
+        wanted = customer_key(customer_name)
+        positions = []
+        for key, indexes in sheet['by_customer'].items():
+            if wanted in key or key in wanted:
+                positions.extend(indexes)
+        
+        def rows():
+            for i in sorted(positions):
+                yield dict(sheet['records'][i])
+        return rows()
+    
+    def get_snapshot(self, sheet_name: str) -> Dict[str, Any]:
+        """
+        Get the current mirrored copy of a worksheet without copying it.
+        
+        The snapshot is replaced, never modified, when the sheet changes, so
+        callers can cache data derived from it against its version.
+        
+        Args:
+            sheet_name: Worksheet title
+            
+        Returns:
+            Dictionary with headers, row_numbers, records and version
+        """
+        return self._get_sheet(sheet_name)
+    
+    def get_changes(self, sheet_name: str, since_version: int) -> Optional[Dict[int, Dict[str, Any]]]:
+        """
+        Get the rows written through to a sheet after one of its versions.
+        
+        Lets callers that derived data from an older snapshot patch it instead of
+        recomputing it. Rows changed after the current snapshot may be included too.
+        
+        Args:
+            sheet_name: Worksheet title
+            since_version: Snapshot version the caller's data was derived from
+            
+        Returns:
+            Mapping of row number to its current record, or None if the sheet has been
+            downloaded again or invalidated since, so every row may have changed
+        """
+        conn = self._connect()
+        row_numbers = {
+            row[0] for row in conn.execute(
+                "SELECT row_number FROM mirror_changes WHERE sheet = ? AND version > ?", (sheet_name, since_version)
+            )
+        }
+        if FULL_RELOAD in row_numbers:
+            return None
+        
+        changes = {}
+        row_numbers = sorted(row_numbers)
+        for start in range(0, len(row_numbers), 500):
+            chunk = row_numbers[start:start + 500]
+            for row in conn.execute(
+                f"SELECT row_number, record FROM mirror_rows WHERE sheet = ? AND row_number IN ({','.join('?' * len(chunk))})",
+                [sheet_name] + chunk
+            ):
+                changes[row['row_number']] = json.loads(row['record'])
+        return changes
+    
+    def refresh(self, sheet_name: str) -> Dict[str, Any]:
+        """
+        Download a worksheet and replace its mirrored copy.
+        
+        Args:
+            sheet_name: Worksheet title
+            
+        Returns:
+            The refreshed in-memory sheet
+        """
+        started = time.perf_counter()
+        worksheet = self.clients.get_worksheet(sheet_name)
+        values = worksheet.get_all_values()
+        headers = values[0] if values else []
+        rows = [
+            (row_number, numericise_record(headers, row))
+            for row_number, row in enumerate(values[1:], start=2)
+            if any(str(cell).strip() for cell in row)
+        ]
+        
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM mirror_rows WHERE sheet = ?", (sheet_name,))
+            conn.executemany(
+                "INSERT INTO mirror_rows (sheet, row_number, customer_key, record) VALUES (?, ?, ?, ?)",
+                [(sheet_name, row_number, customer_key(record.get('Customer')), json.dumps(record, default=str))
+                 for row_number, record in rows]
+            )
+            version = self._bump_version(conn, sheet_name, headers, time.time())
+            self._record_changes(conn, sheet_name, version, [FULL_RELOAD])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        logger.info(f"Mirrored {len(rows)} rows of {sheet_name} in {time.perf_counter() - started:.2f}s")
+        return self._store_in_memory(sheet_name, headers, rows, time.time(), version)
+    
+    def append_records(self, sheet_name: str, rows: List[List[Any]], row_numbers: List[int]):
+        """
+        Write through rows we have just appended to a worksheet.
+        
+        Sheets that have not been mirrored yet are left alone; they will be
+        downloaded in full on first read.
+        
+        Args:
+            sheet_name: Worksheet title
+            rows: Appended row values in the sheet's column order
+            row_numbers: Sheet row number of each appended row
+        """
+        if sheet_name not in INVENTORY_SHEETS or not rows:
+            return
+        if len(rows) != len(row_numbers):
+            # Without row numbers the mirror cannot be patched reliably
+            self.invalidate(sheet_name)
+            return
+        
+        def apply(conn, headers):
+            records = [numericise_record(headers, [str(value) for value in row]) for row in rows]
+            conn.executemany(
+                "INSERT OR REPLACE INTO mirror_rows (sheet, row_number, customer_key, record) VALUES (?, ?, ?, ?)",
+                [(sheet_name, row_number, customer_key(record.get('Customer')), json.dumps(record, default=str))
+                 for row_number, record in zip(row_numbers, records)]
+            )
+            return row_numbers
+        
+        self._write_through(sheet_name, apply)
+    
+    def update_records(self, sheet_name: str, changes: Dict[int, Dict[str, Any]]):
+        """
+        Write through cell updates we have just made to a worksheet.
+        
+        Args:
+            sheet_name: Worksheet title
+            changes: Mapping of row number to {header: new value}
+        """
+        def apply(conn, headers):
+            changed = []
+            for row_number, values in changes.items():
+                row = conn.execute(
+                    "SELECT record FROM mirror_rows WHERE sheet = ? AND row_number = ?", (sheet_name, row_number)
+                ).fetchone()
+                if not row:
+                    continue
+                record = json.loads(row['record'])
+                record.update((header, numericise(value)) for header, value in values.items())
+                conn.execute(
+                    "UPDATE mirror_rows SET customer_key = ?, record = ? WHERE sheet = ? AND row_number = ?",
+                    (customer_key(record.get('Customer')), json.dumps(record, default=str), sheet_name, row_number)
+                )
+                changed.append(row_number)
+            return changed
+        
+        self._write_through(sheet_name, apply)
+    
+    def invalidate(self, sheet_name: Optional[str] = None):
+        """
+        Mark one or all worksheets stale so the next read downloads them again.
+        
+        Args:
+            sheet_name: Worksheet title; None invalidates every inventory sheet
+        """
+        names = [sheet_name] if sheet_name else list(INVENTORY_SHEETS)
+        conn = self._connect()
+        for name in names:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("UPDATE mirror_sheets SET refreshed_at = 0, version = version + 1 WHERE name = ?", (name,))
+                state = conn.execute("SELECT version FROM mirror_sheets WHERE name = ?", (name,)).fetchone()
+                if state is not None:
+                    self._record_changes(conn, name, state['version'], [FULL_RELOAD])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            with self._lock:
+                self._sheets.pop(name, None)
+    
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Get row counts and ages of the mirrored worksheets."""
+        rows = self._connect().execute(
+            "SELECT s.name, s.refreshed_at, s.version, COUNT(r.row_number) AS row_count "
+            "FROM mirror_sheets s LEFT JOIN mirror_rows r ON r.sheet = s.name GROUP BY s.name"
+        ).fetchall()
+        return {
+            row['name']: {
+                'rows': row['row_count'],
+                'version': row['version'],
+                'age_seconds': round(time.time() - row['refreshed_at'], 1) if row['refreshed_at'] else None
+            }
+            for row in rows
+        }
+    
+    def _get_sheet(self, sheet_name: str) -> Dict[str, Any]:
+        """Get a sheet from memory, SQLite or Sheets, whichever is the first still fresh."""
+        state = self._connect().execute(
+            "SELECT headers, refreshed_at, version FROM mirror_sheets WHERE name = ?", (sheet_name,)
+        ).fetchone()
+        fresh = state is not None and time.time() - state['refreshed_at'] < self.ttl_seconds
+        
+        with self._lock:
+            cached = self._sheets.get(sheet_name)
+        if fresh and cached and cached['version'] == state['version']:
+            return cached
+        
+        # One download per sheet at a time; concurrent readers wait for it
+        with self._sheet_locks.setdefault(sheet_name, threading.Lock()):
+            with self._lock:
+                cached = self._sheets.get(sheet_name)
+            if fresh and cached and cached['version'] == state['version']:
+                return cached
+            if fresh:
+                return self._load_from_db(sheet_name, state)
+            return self.refresh(sheet_name)
+    
+    def _load_from_db(self, sheet_name: str, state: sqlite3.Row) -> Dict[str, Any]:
+        """Load a fresh persisted sheet into memory, e.g. after a restart or another process's write."""
+        rows = self._connect().execute(
+            "SELECT row_number, record FROM mirror_rows WHERE sheet = ? ORDER BY row_number", (sheet_name,)
+        ).fetchall()
+        return self._store_in_memory(sheet_name, json.loads(state['headers']),
+                                     [(row['row_number'], json.loads(row['record'])) for row in rows],
+                                     state['refreshed_at'], state['version'])
+    
+    def _store_in_memory(self, sheet_name: str, headers: List[str], rows: List[Tuple[int, Dict[str, Any]]],
+                         refreshed_at: float, version: int) -> Dict[str, Any]:
+        """Build the customer index for a sheet and keep it in memory."""
+        by_customer = {}
+        for position, (_, record) in enumerate(rows):
+            by_customer.setdefault(customer_key(record.get('Customer')), []).append(position)
+        
+        sheet = {
+            'headers': headers,
+            'row_numbers': [row_number for row_number, _ in rows],
+            'records': [record for _, record in rows],
+            'by_customer': by_customer,
+            'refreshed_at': refreshed_at,
+            'version': version
+        }
+        with self._lock:
+            self._sheets[sheet_name] = sheet
+        return sheet
+    
+    def _write_through(self, sheet_name: str, apply):
+        """Apply a change to a mirrored sheet in SQLite, bump its version and log the changed rows."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = conn.execute("SELECT headers, refreshed_at FROM mirror_sheets WHERE name = ?",
+                                 (sheet_name,)).fetchone()
+            if state is None or not state['refreshed_at']:
+                conn.execute("ROLLBACK")
+                return
+            headers = json.loads(state['headers'])
+            changed = apply(conn, headers)
+            version = self._bump_version(conn, sheet_name, headers, state['refreshed_at'])
+            self._record_changes(conn, sheet_name, version, changed)
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logger.warning(f"Inventory mirror write-through for {sheet_name} failed, invalidating: {str(e)}")
+            self.invalidate(sheet_name)
+            return
+        
+        # Readers in this and other processes reload from SQLite on the new version
+        with self._lock:
+            self._sheets.pop(sheet_name, None)
+    
+    def _bump_version(self, conn: sqlite3.Connection, sheet_name: str, headers: List[str],
+                      refreshed_at: float) -> int:
+        """Record a new version of a sheet's mirror and return it."""
+        conn.execute(
+            "INSERT INTO mirror_sheets (name, headers, refreshed_at, version) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET headers = excluded.headers, refreshed_at = excluded.refreshed_at, "
+            "version = mirror_sheets.version + 1",
+            (sheet_name, json.dumps(headers), refreshed_at)
+        )
+        return conn.execute("SELECT version FROM mirror_sheets WHERE name = ?", (sheet_name,)).fetchone()[0]
+    
+    def _record_changes(self, conn: sqlite3.Connection, sheet_name: str, version: int, row_numbers: List[int]):
+        """Log the rows changed by a version; a full reload also drops the entries it supersedes."""
+        if FULL_RELOAD in row_numbers:
+            conn.execute("DELETE FROM mirror_changes WHERE sheet = ?", (sheet_name,))
+        conn.executemany("INSERT INTO mirror_changes (sheet, version, row_number) VALUES (?, ?, ?)",
+                         [(sheet_name, version, row_number) for row_number in row_numbers])
+
+# Global instance for easy access
+inventory_mirror = InventoryMirror(
+    os.getenv('INVENTORY_MIRROR_DB', 'inventory_mirror.db'),
+    ttl_seconds=float(os.getenv('INVENTORY_CACHE_TTL', '300'))
+)
@@ -0,0 +1,377 @@
+"""
+Batched inventory state transitions.
+Moves coils UNPROCESSED_INVENTORY → IN_PROCESS → PROCESSED with one read of the
+source sheet, one append to the destination and one batch update of the source.
+Every move is journaled first so an interrupted one can be replayed or rolled back.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+import gspread
+from gspread.utils import numericise_all, rowcol_to_a1
+
+from utils.inventory_mirror import inventory_mirror
+from utils.move_journal import move_journal
+from utils.tag_index import normalize_tag
+
+logger = logging.getLogger(__name__)
+
+# Columns searched for the coil tag when assigning coils to a work order
+UNPROCESSED_TAG_COLUMNS = ["COIL_TAG#", "Coil Tag", "CoilTag", "Coil_Tag", "Tag", "Heat Number"]
+
+# Columns searched for the tag when finishing coils, first non-empty value wins
+IN_PROCESS_TAG_COLUMNS = ['Tag #', 'Tag Number', 'tag_number', 'Customer Tag', 'customer_tag']
+
+# Columns that hold the customer PO, first match is updated in the source sheet
+PO_COLUMNS = ["Customer PO", "Customer_PO", "CustomerPO", "PO", "PO Number"]
+
+# Columns whose values are replaced by the PO in rows copied to IN_PROCESS
+COPIED_PO_COLUMNS = PO_COLUMNS + ["CUSTOMER_PO"]
+
+def build_tag_index(headers: List[str], rows: List[List[Any]], tag_columns: List[str],
+                    first_non_empty: bool = False) -> Dict[str, List[int]]:
+    """
+    Map normalized tags to the positions of the rows that hold them.
+    
+    Args:
+        headers: Header row
+        rows: Data rows (without the header)
+        tag_columns: Candidate tag columns in order of preference
+        first_non_empty: Use each row's first non-empty candidate column; otherwise
+            use the first candidate column present in the headers for every row
+            
+    Returns:
+        Mapping of tag to row positions in sheet order
+    """
+    columns = [headers.index(name) for name in tag_columns if name in headers]
+    if not first_non_empty:
+        columns = columns[:1]
+    
+    index = {}
+    for position, row in enumerate(rows):
+        for column in columns:
+            value = row[column] if column < len(row) else ''
+            if value:
+                index.setdefault(normalize_tag(value), []).append(position)
+                break
+    return index
+
+def rows_match(actual: List[Any], expected: List[Any]) -> bool:
+    """
+    Compare a row read back from a sheet with the values that were written.
+    
+    Trailing blanks are ignored and numbers compare by value, since the sheet
+    may display 0.50 written as a number as 0.5.
+    """
+    def trimmed(row):
+        row = [str(value).strip() for value in row]
+        while row and not row[-1]:
+            row.pop()
+        return row
+    
+    actual, expected = trimmed(actual), trimmed(expected)
+    if len(actual) != len(expected):
+        return False
+    for a, b in zip(actual, expected):
+        if a == b:
+            continue
+        try:
+            if float(a.replace(',', '')) != float(b.replace(',', '')):
+                return False
+        except ValueError:
+            return False
+    return True
+
+class InventoryTransitionEngine:
+    """Computes inventory moves in memory and applies each one in a few batched API calls."""
+    
+    def __init__(self, clients=None, mirror=None, journal=None):
+        """
+        Initialize the engine.
+        
+        Args:
+            clients: GoogleClientRegistry; defaults to the shared one
+            mirror: InventoryMirror kept in step with the moves; defaults to the shared one
+            journal: MoveJournal recording each move; defaults to the shared one
+        """
+        self._clients = clients
+        self.mirror = mirror or inventory_mirror
+        self.journal = journal or move_journal
+    
+    @property
+    def clients(self):
+        """Google client registry, imported lazily."""
+        if self._clients is None:
+            from utils.google_clients import google_clients
+            self._clients = google_clients
+        return self._clients
+    
+    def assign_to_work_order(self, tags: Iterable[str], po_number: str) -> Dict[str, Any]:
+        """
+        Set the PO on unprocessed coils and copy them to IN_PROCESS.
+        
+        Each tag matches the first UNPROCESSED_INVENTORY row holding it.
+        
+        Args:
+            tags: Customer coil tags from the work order
+            po_number: Customer PO to record on the coils
+            
+        Returns:
+            Dictionary with matched_count, matched_tags and unmatched_tags
+        """
+        tags = self._unique_tags(tags)
+        unprocessed, headers, rows = self._read("UNPROCESSED_INVENTORY")
+        if not headers:
+            logger.warning("No headers found in UNPROCESSED_INVENTORY sheet")
+            return self._result([], tags)
+        
+        po_column = next((headers.index(name) for name in PO_COLUMNS if name in headers), None)
+        if po_column is None:
+            logger.warning("Could not find Customer PO column in sheet")
+            return self._result([], tags)
+        if not any(name in headers for name in UNPROCESSED_TAG_COLUMNS):
+            logger.warning("Could not find Coil Tag column in sheet")
+            return self._result([], tags)
+        
+        in_process = self._destination("IN_PROCESS", headers)
+        index = build_tag_index(headers, rows, UNPROCESSED_TAG_COLUMNS)
+        
+        matches = [(tag, index[tag][0]) for tag in tags if tag in index]
+        copied_rows = []
+        cell_updates = []
+        for tag, position in matches:
+            row = self._pad(rows[position], headers)
+            copied_rows.append([
+                po_number if header in COPIED_PO_COLUMNS else value for header, value in zip(headers, row)
+            ])
+            cell_updates.append((position + 2, po_column + 1, po_number))
+        
+        source_rows = {position + 2: rows[position] for _, position in matches}
+        self._apply('assign_to_work_order', unprocessed, cell_updates, in_process, copied_rows, source_rows)
+        self.mirror.update_records("UNPROCESSED_INVENTORY", {
+            row_number: {headers[column - 1]: value} for row_number, column, value in cell_updates
+        })
+        
+        logger.info(f"Assigned {len(matches)} coils to PO {po_number} and moved them to IN_PROCESS")
+        return self._result([tag for tag, _ in matches], tags)
+    
+    def mark_processed(self, tags: Iterable[str], finished_tag_id: str) -> Dict[str, Any]:
+        """
+        Copy finished coils from IN_PROCESS to PROCESSED and mark the originals as moved.
+        
+        Every IN_PROCESS row holding one of the tags is moved.
+        
+        Args:
+            tags: Incoming coil tags from the finished tag
+            finished_tag_id: Finished tag the coils were processed into
+            
+        Returns:
+            Dictionary with matched_count, matched_tags and unmatched_tags
+        """
+        tags = self._unique_tags(tags)
+        in_process, headers, rows = self._read("IN_PROCESS")
+        processed = self.clients.get_worksheet("PROCESSED")
+        index = build_tag_index(headers, rows, IN_PROCESS_TAG_COLUMNS, first_non_empty=True)
+        
+        positions = sorted(position for tag in tags for position in index.get(tag, []))
+        timestamp = datetime.now().isoformat()
+        
+        # The status mark goes in the first status column, or after the last header
+        status_column = next((i + 1 for i, header in enumerate(headers) if 'status' in header.lower()), None)
+        mark_column = status_column or len(headers) + 1
+        mark_value = "MOVED" if status_column else f"MOVED-{finished_tag_id}"
+        
+        copied_rows = []
+        cell_updates = []
+        for position in positions:
+            record = dict(zip(headers, self._pad(rows[position], headers)))
+            record['Processed_Date'] = timestamp
+            record['Finished_Tag_ID'] = finished_tag_id
+            record['Status'] = 'PROCESSED'
+            copied_rows.append(list(record.values()))
+            cell_updates.append((position + 2, mark_column, mark_value))
+        
+        source_rows = {position + 2: rows[position] for position in positions}
+        self._apply('mark_processed', in_process, cell_updates, processed, copied_rows, source_rows)
+        if status_column:
+            self.mirror.update_records("IN_PROCESS", {
+                row_number: {headers[status_column - 1]: mark_value} for row_number, _, _ in cell_updates
+            })
+        elif cell_updates:
+            self.mirror.invalidate("IN_PROCESS")
+        
+        moved_tags = [tag for tag in tags if tag in index]
+        logger.info(f"Moved {len(positions)} coil(s) to PROCESSED: {', '.join(moved_tags)}")
+        return self._result(moved_tags, tags)
+    
+    def _read(self, sheet_name: str) -> Tuple[gspread.Worksheet, List[str], List[List[Any]]]:
+        """Read a whole worksheet in one call and split off its header row."""
+        worksheet = self.clients.get_worksheet(sheet_name)
+        values = worksheet.get_all_values()
+        headers = values[0] if values else []
+        return worksheet, headers, values[1:]
+    
+    def _destination(self, sheet_name: str, headers: List[str]) -> gspread.Worksheet:
+        """Get a destination worksheet, creating it with the source headers if missing."""
+        try:
+            return self.clients.get_worksheet(sheet_name)
+        except gspread.exceptions.WorksheetNotFound:
+            worksheet = self.clients.get_worksheet(sheet_name, create_rows=1000)
+            worksheet.append_row(headers)
+            return worksheet
+    
+    def recover(self, rollback: bool = False) -> List[Dict[str, Any]]:
+        """
+        Finish or undo moves that were interrupted before completing.
+        
+        A move whose rows reached the destination is replayed by reapplying its
+        source cell changes, or with rollback=True undone by deleting the appended
+        rows and restoring the source cells. A move whose rows never reached the
+        destination changed nothing and is marked rolled back. Moves whose rows
+        were edited since are marked needs_review and left alone.
+        
+        Args:
+            rollback: Undo appended moves instead of replaying them
+            
+        Returns:
+            List of {'move_id', 'kind', 'status', 'error'} outcomes
+        """
+        outcomes = []
+        for move in self.journal.incomplete_moves():
+            try:
+                status, error = self._recover_move(move, rollback)
+                self.journal.resolve(move['id'], status, error)
+            except Exception as e:
+                status, error = move['status'], str(e)
+                self.journal.fail(move['id'], error)
+            
+            logger.info(f"Recovered {move['kind']} move {move['id']}: {status}" + (f" ({error})" if error else ""))
+            outcomes.append({'move_id': move['id'], 'kind': move['kind'], 'status': status, 'error': error})
+        return outcomes
+    
+    def _recover_move(self, move: Dict[str, Any], rollback: bool) -> Tuple[str, Any]:
+        """Recover one interrupted move and return its new status and any error."""
+        destination = self.clients.get_worksheet(move['destination'])
+        destination_values = destination.get_all_values()
+        row_numbers = move['appended_rows']
+        if not row_numbers:
+            # The append may have succeeded without its rows being recorded
+            row_numbers = self._find_appended_rows(destination_values, move['rows'])
+            if not row_numbers:
+                return 'rolled_back', None
+            self.journal.record_append(move['id'], row_numbers)
+        
+        source = self.clients.get_worksheet(move['source'])
+        state = self._source_state(source.get_all_values(), move)
+        if state == 'changed':
+            return 'needs_review', "Source rows changed since the move"
+        
+        if rollback:
+            if not all(row <= len(destination_values) and rows_match(destination_values[row - 1], values)
+                       for row, values in zip(row_numbers, move['rows'])):
+                return 'needs_review', "Appended rows changed since the move"
+            if state == 'applied':
+                # Put back the source cells the move overwrote
+                self._write_cells(source, [
+                    (row, column, self._pad(move['source_rows'][row], [''] * column)[column - 1])
+                    for row, column, _ in move['cell_updates']
+                ])
+            destination.delete_rows(row_numbers[0], row_numbers[-1])
+            status = 'rolled_back'
+        else:
+            if state == 'original':
+                self._write_cells(source, move['cell_updates'])
+            status = 'completed'
+        
+        self.mirror.invalidate(move['source'])
+        self.mirror.invalidate(move['destination'])
+        return status, None
+    
+    def _find_appended_rows(self, values: List[List[Any]], rows: List[List[Any]]) -> List[int]:
+        """Find the newest run of destination rows equal to the rows a move appends."""
+        for start in range(len(values) - len(rows), 0, -1):
+            if all(rows_match(values[start + i], row) for i, row in enumerate(rows)):
+                return list(range(start + 1, start + len(rows) + 1))
+        return []
+    
+    def _source_state(self, values: List[List[Any]], move: Dict[str, Any]) -> str:
+        """Tell whether a move's source rows are 'original', 'applied' or 'changed'."""
+        applied = {row: list(original) for row, original in move['source_rows'].items()}
+        for row, column, value in move['cell_updates']:
+            applied[row] = self._pad(applied[row], [''] * column)
+            applied[row][column - 1] = value
+        
+        current = {row: values[row - 1] if row <= len(values) else [] for row in applied}
+        if all(rows_match(current[row], move['source_rows'][row]) for row in applied):
+            return 'original'
+        if all(rows_match(current[row], applied[row]) for row in applied):
+            return 'applied'
+        return 'changed'
+    
+    def _apply(self, kind: str, source: gspread.Worksheet, cell_updates: List[Tuple[int, int, Any]],
+               destination: gspread.Worksheet, rows: List[List[Any]], source_rows: Dict[int, List[Any]]):
+        """
+        Append the moved rows in one call, then write all source cell changes in one call.
+        
+        The move is journaled before the append, after it and once complete; if a
+        call fails it stays incomplete in the journal for recover().
+        
+        Args:
+            kind: Transition name recorded in the journal
+            source: Worksheet the coils are moving from
+            cell_updates: (row, column, value) changes for the source worksheet
+            destination: Worksheet the coils are moving to
+            rows: Row values to append to the destination
+            source_rows: Source row values as read, by row number
+        """
+        if not rows:
+            return
+        
+        from bol_extractor.google_sheets_writer import parse_updated_rows
+        move_id = self.journal.begin(kind, source.title, destination.title, rows,
+                                     [list(update) for update in cell_updates], source_rows)
+        try:
+            # Numeric strings go back as numbers, as get_all_records() would have read them
+            response = destination.append_rows([numericise_all(row) for row in rows])
+            row_numbers = parse_updated_rows(response)
+            self.journal.record_append(move_id, row_numbers)
+            self.mirror.append_records(destination.title, rows, row_numbers)
+            
+            self._write_cells(source, cell_updates)
+            self.journal.complete(move_id)
+        except Exception as e:
+            self.journal.fail(move_id, str(e))
+            raise
+    
+    def _write_cells(self, worksheet: gspread.Worksheet, cell_updates: List[Tuple[int, int, Any]]):
+        """Write (row, column, value) changes to a worksheet in one batch update."""
+        worksheet.batch_update([
+            {'range': rowcol_to_a1(row, column), 'values': [[value]]}
+            for row, column, value in cell_updates
+        ], value_input_option='USER_ENTERED')
+    
+    def _pad(self, row: List[Any], headers: List[str]) -> List[Any]:
+        """Pad a row read from the sheet to the header width."""
+        return list(row) + [''] * (len(headers) - len(row))
+    
+    def _unique_tags(self, tags: Iterable[str]) -> List[str]:
+        """Normalize tags, dropping blanks and duplicates but keeping their order."""
+        unique = []
+        for tag in tags:
+            tag = normalize_tag(tag)
+            if tag and tag not in unique:
+                unique.append(tag)
+        return unique
+    
+    def _result(self, matched_tags: List[str], tags: List[str]) -> Dict[str, Any]:
+        """Summarize which tags were moved."""
+        return {
+            'matched_count': len(matched_tags),
+            'matched_tags': matched_tags,
+            'unmatched_tags': [tag for tag in tags if tag not in matched_tags]
+        }
+
+# Global instance for easy access
+inventory_transitions = InventoryTransitionEngine()
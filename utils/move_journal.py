@@ -0,0 +1,189 @@
+"""
+Write-ahead journal for inventory moves between worksheets.
+Records each move's intent before any Sheets call, then the rows the append wrote and
+completion, so a move interrupted between append and mark can be replayed or rolled back.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statuses of moves that were interrupted and need recovery
+INCOMPLETE_STATUSES = ('pending', 'appended')
+
+class MoveJournal:
+    """SQLite-backed log of inventory moves and how far each one got."""
+    
+    def __init__(self, db_path: str = "inventory_moves.db"):
+        """
+        Initialize the journal.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, reopening it in a new process."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            # Synchronous commits so a recorded step survives a crash right after it
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _init_db(self):
+        """Create the moves table if it does not exist."""
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS moves (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                source TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                status TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                appended_rows TEXT,
+                error TEXT,
+                created TEXT NOT NULL,
+                updated TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_moves_status ON moves (status, created);
+        """)
+    
+    def begin(self, kind: str, source: str, destination: str, rows: List[List[Any]],
+              cell_updates: List[List[Any]], source_rows: Dict[int, List[Any]]) -> str:
+        """
+        Record a move before any of it is written to Sheets.
+        
+        Args:
+            kind: Transition name, e.g. 'assign_to_work_order' or 'mark_processed'
+            source: Worksheet the coils are moving from
+            destination: Worksheet the coils are moving to
+            rows: Row values to append to the destination
+            cell_updates: [row, column, value] changes for the source worksheet
+            source_rows: Source row values as read, by row number, to detect later edits
+            
+        Returns:
+            New move id
+        """
+        move_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        intent = {'rows': rows, 'cell_updates': cell_updates,
+                  'source_rows': {str(row): values for row, values in source_rows.items()}}
+        self._connect().execute(
+            "INSERT INTO moves (id, kind, source, destination, status, intent, created, updated) "
+            "VALUES (?, ?, ?, ?, 'pending', ?, ?, ?)",
+            (move_id, kind, source, destination, json.dumps(intent, default=str), now, now)
+        )
+        return move_id
+    
+    def record_append(self, move_id: str, row_numbers: List[int]):
+        """
+        Record the destination rows written by a move's append.
+        
+        Args:
+            move_id: Move identifier
+            row_numbers: 1-indexed rows from the append response
+        """
+        self._update(move_id, status='appended', appended_rows=json.dumps(row_numbers))
+    
+    def complete(self, move_id: str):
+        """Mark a move as fully applied."""
+        self._update(move_id, status='completed', error=None)
+    
+    def fail(self, move_id: str, error: str):
+        """
+        Record an error without changing the move's status, so recovery picks it up.
+        
+        Args:
+            move_id: Move identifier
+            error: Error message
+        """
+        self._update(move_id, error=error)
+    
+    def resolve(self, move_id: str, status: str, error: Optional[str] = None):
+        """
+        Set a move's outcome after recovery.
+        
+        Args:
+            move_id: Move identifier
+            status: 'completed', 'rolled_back' or 'needs_review'
+            error: Reason the move needs review, if any
+        """
+        self._update(move_id, status=status, error=error)
+    
+    def get_move(self, move_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a move with its intent and appended rows.
+        
+        Args:
+            move_id: Move identifier
+            
+        Returns:
+            Move dictionary or None if the move is unknown
+        """
+        row = self._connect().execute("SELECT * FROM moves WHERE id = ?", (move_id,)).fetchone()
+        return self._row_to_move(row) if row else None
+    
+    def incomplete_moves(self) -> List[Dict[str, Any]]:
+        """
+        Get moves that were interrupted before completing, oldest first.
+        
+        Returns:
+            List of move dictionaries
+        """
+        placeholders = ', '.join('?' for _ in INCOMPLETE_STATUSES)
+        rows = self._connect().execute(
+            f"SELECT * FROM moves WHERE status IN ({placeholders}) ORDER BY created",
+            INCOMPLETE_STATUSES
+        ).fetchall()
+        return [self._row_to_move(row) for row in rows]
+    
+    def list_moves(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get the most recent moves, newest first.
+        
+        Args:
+            limit: Maximum number of moves to return
+            
+        Returns:
+            List of move dictionaries
+        """
+        rows = self._connect().execute(
+            "SELECT * FROM moves ORDER BY created DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._row_to_move(row) for row in rows]
+    
+    def _update(self, move_id: str, **fields):
+        """Update a move's columns and its updated timestamp."""
+        fields['updated'] = datetime.now().isoformat()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        self._connect().execute(
+            f"UPDATE moves SET {assignments} WHERE id = ?", (*fields.values(), move_id)
+        )
+    
+    def _row_to_move(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a moves row to a dictionary with decoded JSON fields."""
+        move = dict(row)
+        intent = json.loads(move.pop('intent'))
+        move['rows'] = intent['rows']
+        move['cell_updates'] = intent['cell_updates']
+        move['source_rows'] = {int(row): values for row, values in intent['source_rows'].items()}
+        move['appended_rows'] = json.loads(move['appended_rows']) if move['appended_rows'] else None
+        return move
+
+# Global instance for easy access
+move_journal = MoveJournal(os.getenv('INVENTORY_MOVES_DB', 'inventory_moves.db'))
@@ -1,8 +1,10 @@
 """
 Standardized PDF Design System for Nicayne OS Platform
-Provides consistent formatting, colors, and layout components across all document types
+Provides consistent formatting, colors, and layout components across all document types.
+Styles are built once per process and shared, so callers must not modify them.
 """
 
+from functools import lru_cache
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -16,6 +18,69 @@ BORDER_GRAY = colors.HexColor('#c8c8c8')
 TEXT_DARK = colors.black
 HEADER_TEXT = colors.white
 
+HEADER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), NICAYNE_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, -1), HEADER_TEXT),
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+    ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+    ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, 0), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (0, 0), 18),
+    ('FONTSIZE', (1, 0), (1, 0), 10),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('LEFTPADDING', (0, 0), (-1, -1), 12),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+])
+
+FOOTER_QR_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (1, 1), 9),
+    ('FONTSIZE', (2, 1), (2, 1), 8),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (2, 0), (2, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.gray),
+])
+
+FOOTER_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.gray),
+])
+
+TITLE_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (0, 0), 20),
+    ('FONTSIZE', (1, 0), (1, 0), 16),
+    ('TEXTCOLOR', (0, 0), (-1, -1), NICAYNE_BLUE),
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+    ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+SECTION_TABLE_COMMANDS = [
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, BORDER_GRAY),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+]
+
+SECTION_TABLE_STYLE = TableStyle(SECTION_TABLE_COMMANDS)
+
+SECTION_TABLE_HEADER_STYLE = TableStyle(SECTION_TABLE_COMMANDS + [
+    ('BACKGROUND', (0, 0), (-1, 0), SECTION_BACKGROUND),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('TEXTCOLOR', (0, 0), (-1, 0), NICAYNE_BLUE),
+])
+
 def create_standardized_header():
     """Create standardized header for all Nicayne OS documents"""
     header_data = [
@@ -23,22 +88,7 @@ def create_standardized_header():
     ]
     
     header_table = Table(header_data, colWidths=[4.5*inch, 3*inch])
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), NICAYNE_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), HEADER_TEXT),
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, 0), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (0, 0), 18),
-        ('FONTSIZE', (1, 0), (1, 0), 10),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-    ]))
-    
+    header_table.setStyle(HEADER_TABLE_STYLE)
     return header_table
 
 def create_standardized_footer(doc_type, timestamp, qr_code=None):
@@ -49,33 +99,26 @@ def create_standardized_footer(doc_type, timestamp, qr_code=None):
             ["Nicayne Metal Processing OS", "", "Scan for Digital Access"]
         ]
         footer_table = Table(footer_data, colWidths=[3*inch, 2*inch, 2.5*inch])
-        footer_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (1, 1), 9),
-            ('FONTSIZE', (2, 1), (2, 1), 8),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (2, 0), (2, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.gray),
-        ]))
+        footer_table.setStyle(FOOTER_QR_TABLE_STYLE)
     else:
         footer_data = [
             [f"Generated: {timestamp}"],
             ["Nicayne Metal Processing OS"]
         ]
         footer_table = Table(footer_data, colWidths=[7.5*inch])
-        footer_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.gray),
-        ]))
+        footer_table.setStyle(FOOTER_TABLE_STYLE)
     
     return footer_table
 
+@lru_cache(maxsize=None)
+def get_sample_styles():
+    """Get ReportLab's sample stylesheet, built once per process"""
+    return getSampleStyleSheet()
+
+@lru_cache(maxsize=None)
 def get_standardized_styles():
-    """Get standardized paragraph styles for all documents"""
-    styles = getSampleStyleSheet()
+    """Get standardized paragraph styles for all documents, built once per process"""
+    styles = get_sample_styles()
     
     # Document title style
     title_style = ParagraphStyle(
@@ -138,47 +181,17 @@ def get_standardized_styles():
 def create_section_table(data, col_widths, header_background=True):
     """Create a standardized table with consistent styling"""
     table = Table(data, colWidths=col_widths)
-    
-    style_commands = [
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 1, BORDER_GRAY),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('LEFTPADDING', (0, 0), (-1, -1), 8),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-    ]
-    
-    if header_background and len(data) > 1:
-        style_commands.extend([
-            ('BACKGROUND', (0, 0), (-1, 0), SECTION_BACKGROUND),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('TEXTCOLOR', (0, 0), (-1, 0), NICAYNE_BLUE),
-        ])
-    
-    table.setStyle(TableStyle(style_commands))
+    table.setStyle(SECTION_TABLE_HEADER_STYLE if header_background and len(data) > 1 else SECTION_TABLE_STYLE)
     return table
 
 def create_document_title(title_text, doc_number=None):
     """Create a standardized document title section"""
-    styles = get_standardized_styles()
-    
     if doc_number:
         title_data = [
             [title_text, f"#{doc_number}"]
         ]
         title_table = Table(title_data, colWidths=[5*inch, 2.5*inch])
-        title_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (0, 0), 20),
-            ('FONTSIZE', (1, 0), (1, 0), 16),
-            ('TEXTCOLOR', (0, 0), (-1, -1), NICAYNE_BLUE),
-            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        title_table.setStyle(TITLE_TABLE_STYLE)
         return title_table
     else:
-        return Paragraph(title_text, styles['title'])
\ No newline at end of file
+        return Paragraph(title_text, get_standardized_styles()['title'])
@@ -0,0 +1,166 @@
+"""
+PDF rendering service for Nicayne OS documents.
+Each document type registers a template once. The paragraph and table styles a
+template needs are built on first use and shared by every later render, so
+generating many documents only builds the per-document story.
+"""
+
+import io
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Union
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import Flowable, PageBreak, SimpleDocTemplate
+
+from utils.pdf_design_system import get_standardized_styles
+
+logger = logging.getLogger(__name__)
+
+class PDFTemplate(ABC):
+    """Layout for one document type: page setup, static styles and a story built from data."""
+
+    # SimpleDocTemplate page settings, e.g. pagesize and margins
+    page_settings: Dict[str, Any] = {'pagesize': letter}
+
+    def build_styles(self) -> Dict[str, Any]:
+        """
+        Build the paragraph and table styles the template reuses for every document.
+
+        Returns:
+            Dictionary of style name to ParagraphStyle or TableStyle
+        """
+        return dict(get_standardized_styles())
+
+    @abstractmethod
+    def build_story(self, data: Dict[str, Any], styles: Dict[str, Any]) -> List[Flowable]:
+        """
+        Build the flowables for one document.
+
+        Args:
+            data: Document data
+            styles: Styles from build_styles(), shared between renders and not to be modified
+
+        Returns:
+            List of flowables
+        """
+
+class PDFRenderer:
+    """Registry of document templates that renders documents from data."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._templates: Dict[str, PDFTemplate] = {}
+        self._styles: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, doc_type: str, template: PDFTemplate):
+        """
+        Register the template for a document type.
+
+        Args:
+            doc_type: Document type name, e.g. 'bol' or 'finished_tag'
+            template: Template instance
+        """
+        with self._lock:
+            self._templates[doc_type] = template
+            self._styles.pop(doc_type, None)
+
+    def template(self, doc_type: str) -> PDFTemplate:
+        """
+        Get a registered template.
+
+        Args:
+            doc_type: Document type name
+
+        Returns:
+            PDFTemplate
+        """
+        if doc_type not in self._templates:
+            raise KeyError(f"No PDF template registered for {doc_type}")
+        return self._templates[doc_type]
+
+    def document_types(self) -> List[str]:
+        """Get the registered document type names."""
+        return sorted(self._templates)
+
+    def styles(self, doc_type: str) -> Dict[str, Any]:
+        """
+        Get a template's styles, building them on first use.
+
+        Args:
+            doc_type: Document type name
+
+        Returns:
+            Dictionary of style name to style
+        """
+        styles = self._styles.get(doc_type)
+        if styles is None:
+            with self._lock:
+                styles = self._styles.get(doc_type)
+                if styles is None:
+                    styles = self.template(doc_type).build_styles()
+                    self._styles[doc_type] = styles
+                    logger.debug(f"Built PDF styles for {doc_type}")
+        return styles
+
+    def story(self, doc_type: str, data: Dict[str, Any]) -> List[Flowable]:
+        """
+        Build one document's flowables without rendering them.
+
+        Args:
+            doc_type: Document type name
+            data: Document data
+
+        Returns:
+            List of flowables
+        """
+        return self.template(doc_type).build_story(data, self.styles(doc_type))
+
+    def render(self, doc_type: str, data: Dict[str, Any],
+               output: Optional[Union[str, BinaryIO]] = None) -> Union[str, BinaryIO, bytes]:
+        """
+        Render a document.
+
+        Args:
+            doc_type: Document type name
+            data: Document data
+            output: File path or binary file object to write to; omit to get the PDF bytes
+
+        Returns:
+            The output path or file object, or the PDF bytes if no output was given
+        """
+        target = output if output is not None else io.BytesIO()
+        doc = SimpleDocTemplate(target, **self.template(doc_type).page_settings)
+        doc.build(self.story(doc_type, data))
+        return target.getvalue() if output is None else output
+
+    def render_many(self, doc_type: str, items: Iterable[Dict[str, Any]],
+                    output: Optional[Union[str, BinaryIO]] = None) -> Union[str, BinaryIO, bytes]:
+        """
+        Render several documents of one type into a single PDF, each starting on a new page.
+
+        Args:
+            doc_type: Document type name
+            items: Data for each document, in page order
+            output: File path or binary file object to write to; omit to get the PDF bytes
+
+        Returns:
+            The output path or file object, or the PDF bytes if no output was given
+        """
+        story = []
+        for data in items:
+            if story:
+                story.append(PageBreak())
+            story.extend(self.story(doc_type, data))
+        if not story:
+            raise ValueError(f"No {doc_type} documents to render")
+
+        target = output if output is not None else io.BytesIO()
+        doc = SimpleDocTemplate(target, **self.template(doc_type).page_settings)
+        doc.build(story)
+        return target.getvalue() if output is None else output
+
+# Global instance for easy access
+pdf_renderer = PDFRenderer()
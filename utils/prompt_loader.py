@@ -78,6 +78,54 @@ class PromptLoader:
             logger.warning(f"No prompt found for supplier: {supplier_name}, using fallback")
             return "Extract BOL data with standard field mapping. Focus on accuracy and completeness."
     
+    def get_prompt_version(self, supplier_name: str) -> str:
+        """
+        Get the version stamp of the prompt that would be used for a supplier.
+        
+        Args:
+            supplier_name: Name/ID of the supplier
+            
+        Returns:
+            The prompt's last_modified (or created) timestamp, or empty string
+        """
+        self.load_prompts()
+        
+        supplier_key = supplier_name.lower().replace(' ', '_').replace('-', '_')
+        
+        if supplier_key in self.prompts and self.prompts[supplier_key].get('active', True):
+            entry = self.prompts[supplier_key]
+        elif 'default' in self.prompts:
+            entry = self.prompts['default']
+        else:
+            return ''
+        
+        return entry.get('last_modified') or entry.get('created', '')
+    
+    def get_ocr_settings(self, supplier_name: str, defaults: Dict) -> Dict:
+        """
+        Get OCR render settings for a supplier.
+        
+        Values from the supplier's optional "ocr" object override the default
+        entry's "ocr" object, which overrides the given defaults.
+        
+        Args:
+            supplier_name: Name/ID of the supplier
+            defaults: Baseline settings (dpi, psm, lang)
+            
+        Returns:
+            Merged OCR settings dictionary
+        """
+        self.load_prompts()
+        
+        supplier_key = supplier_name.lower().replace(' ', '_').replace('-', '_')
+        
+        settings = dict(defaults)
+        settings.update(self.prompts.get('default', {}).get('ocr', {}))
+        if supplier_key in self.prompts and self.prompts[supplier_key].get('active', True):
+            settings.update(self.prompts[supplier_key].get('ocr', {}))
+        
+        return settings
+    
     def get_supplier_info(self, supplier_name: str) -> Optional[Dict]:
         """
         Get full supplier information including prompt and metadata.
@@ -266,9 +314,10 @@ EXTRACTION RULES:
 5. For measurements, include units (e.g., "12 inches", "2500 lbs")
 6. Be case-sensitive for codes and numbers
 7. Look for alternative terms (e.g., "Consignee" for customer, "Shipper" for vendor)
+8. The text may contain "--- PAGE n ---" markers; give every coil a "PAGE" field with the number of the page it appears on
 
 DOCUMENT TEXT:
-{base_text[:4000]}  
+{base_text}
 
 Return the extracted data in this exact JSON format:
 {{
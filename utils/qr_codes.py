@@ -0,0 +1,107 @@
+"""
+QR codes for Nicayne OS documents.
+Codes are drawn as vector rectangles straight onto the ReportLab canvas, so no PNG
+is encoded or embedded per document. Encoded module layouts are cached by URL, so
+a batch of documents linking to the same file encodes it only once.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import qrcode
+from reportlab.lib import colors
+from reportlab.platypus import Flowable
+
+logger = logging.getLogger(__name__)
+
+# Dark module runs as (row, first column, length), top row first
+ModuleRuns = Tuple[Tuple[int, int, int], ...]
+
+@lru_cache(maxsize=512)
+def qr_module_runs(url: str, border: int = 4) -> Tuple[int, ModuleRuns]:
+    """
+    Encode a URL and collapse each row's dark modules into horizontal runs.
+    
+    Args:
+        url: Data to encode
+        border: Quiet-zone width in modules
+        
+    Returns:
+        Modules per side including the border, and the dark module runs
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=border,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    
+    runs = []
+    for row, modules in enumerate(matrix):
+        col = 0
+        while col < len(modules):
+            if modules[col]:
+                start = col
+                while col < len(modules) and modules[col]:
+                    col += 1
+                runs.append((row, start, col - start))
+            else:
+                col += 1
+    return len(matrix), tuple(runs)
+
+class QRCodeFlowable(Flowable):
+    """Square vector QR code of a fixed size, quiet zone included."""
+    
+    def __init__(self, url: str, size: float, border: int = 4):
+        """
+        Initialize the flowable, encoding the URL if it is not cached yet.
+        
+        Args:
+            url: Data to encode
+            size: Width and height in points
+            border: Quiet-zone width in modules
+        """
+        super().__init__()
+        self.width = self.height = size
+        self.modules, self.runs = qr_module_runs(url, border)
+    
+    def wrap(self, availWidth, availHeight):
+        """Report the fixed size."""
+        return self.width, self.height
+    
+    def draw(self):
+        """Draw the white background and one rectangle per run of dark modules."""
+        canvas = self.canv
+        module = self.width / self.modules
+        canvas.saveState()
+        canvas.setFillColor(colors.white)
+        canvas.rect(0, 0, self.width, self.height, stroke=0, fill=1)
+        canvas.setFillColor(colors.black)
+        for row, col, length in self.runs:
+            canvas.rect(col * module, self.height - (row + 1) * module, length * module, module,
+                        stroke=0, fill=1)
+        canvas.restoreState()
+
+def qr_code_flowable(url: Optional[str], size: float, border: int = 4) -> Optional[QRCodeFlowable]:
+    """
+    Build a QR code flowable for a URL.
+    
+    Args:
+        url: Data to encode; no code is built if empty
+        size: Width and height in points
+        border: Quiet-zone width in modules
+        
+    Returns:
+        QRCodeFlowable, or None if there is no URL or it could not be encoded
+    """
+    if not url:
+        return None
+    
+    try:
+        return QRCodeFlowable(url, size, border)
+    except Exception as e:
+        logger.warning(f"Error generating QR code: {e}")
+        return None
@@ -0,0 +1,399 @@
+"""
+Rate-limit-aware scheduler for Google Sheets API requests.
+Every gspread request passes through per-minute read and write token buckets, backs off
+on HTTP 429 and merges appends and value batch updates that queue for the same target.
+"""
+
+import functools
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Token bucket handing out reservations in arrival order."""
+    
+    def __init__(self, per_minute: float, burst: int):
+        """
+        Initialize the bucket full.
+        
+        Args:
+            per_minute: Tokens added per minute; 0 disables the limit
+            burst: Maximum tokens that can accumulate while idle
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """
+        Take a token, borrowing against future refills if none is left.
+        
+        Returns:
+            Seconds the caller must wait before using the token
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.rate <= 0:
+                return max(0.0, self.paused_until - now)
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate, self.paused_until - now)
+    
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while, e.g. after the API returned 429."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0.0)
+
+class CoalescedResponse:
+    """Response given to one caller of a merged write, holding that caller's share of the result."""
+    
+    def __init__(self, response, body: Dict[str, Any]):
+        """
+        Initialize the response.
+        
+        Args:
+            response: HTTP response of the merged request
+            body: This caller's part of the response JSON
+        """
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.ok = True
+        self._body = body
+    
+    def json(self) -> Dict[str, Any]:
+        """Get this caller's part of the response JSON."""
+        return self._body
+
+class _WriteBatch:
+    """Writes waiting on the same coalescing key, sent as one request by the first of them."""
+    
+    def __init__(self):
+        self.bodies = []
+        self.results = []
+        self.done = threading.Event()
+    
+    def add(self, body: Dict[str, Any]) -> int:
+        """Add a request body and return its position in the batch."""
+        self.bodies.append(body)
+        self.results.append(None)
+        return len(self.bodies) - 1
+    
+    def result(self, index: int):
+        """Wait for the batch to be sent and return or raise the result at a position."""
+        self.done.wait()
+        result = self.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+class SheetsRequestScheduler:
+    """Process-wide throttle, backoff and write coalescing for Sheets API requests."""
+    
+    def __init__(self, read_per_minute: float = 60, write_per_minute: float = 60, burst: int = 10,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 64.0):
+        """
+        Initialize the scheduler.
+        
+        The Sheets API allows 60 read and 60 write requests per minute per user,
+        so the defaults suit one process; lower them when several processes
+        share the service account.
+        
+        Args:
+            read_per_minute: Read (GET) requests allowed per minute; 0 disables the limit
+            write_per_minute: Write requests allowed per minute; 0 disables the limit
+            burst: Requests of each kind that may be sent back to back after idling
+            max_retries: Retries of a request that got HTTP 429
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Upper bound on a single backoff delay
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.buckets = {
+            'read': TokenBucket(read_per_minute, burst),
+            'write': TokenBucket(write_per_minute, burst)
+        }
+        self.quotas = {'read': read_per_minute, 'write': write_per_minute}
+        self._lock = threading.Lock()
+        self._batches = {}
+        self._stats = {kind: {
+            'calls': 0, 'requests': 0, 'queue_depth': 0, 'max_queue_depth': 0,
+            'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'throttled': 0, 'coalesced': 0
+        } for kind in self.buckets}
+    
+    @property
+    def http_client(self) -> Callable[..., HTTPClient]:
+        """HTTP client factory to pass to gspread.authorize()."""
+        return functools.partial(ThrottledHTTPClient, scheduler=self)
+    
+    def run(self, kind: str, send: Callable[[], Any]) -> Any:
+        """
+        Send one request once the quota allows, retrying with backoff on HTTP 429.
+        
+        Args:
+            kind: 'read' or 'write'
+            send: Function performing the HTTP request
+            
+        Returns:
+            The request's response
+        """
+        self._count(kind, 'calls')
+        return self._send(kind, send)
+    
+    def run_coalesced(self, key: Tuple, body: Dict[str, Any], send: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Send a write, merged with any other writes for the same key that queue behind it.
+        
+        The first caller waits for a write token while later callers join its
+        batch; it then sends one request for all of them and hands each caller
+        its share of the response.
+        
+        Args:
+            key: Coalescing key from coalesce_key()
+            body: JSON body of this caller's request
+            send: Function performing the HTTP request for a given body
+            
+        Returns:
+            Response for this caller's part of the write
+        """
+        self._count('write', 'calls')
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._batches[key] = _WriteBatch()
+            index = batch.add(body)
+        
+        if not leader:
+            self._count('write', 'coalesced')
+            return batch.result(index)
+        
+        try:
+            try:
+                self._acquire('write')
+            finally:
+                # Writes arriving from now on start a new batch
+                with self._lock:
+                    del self._batches[key]
+            
+            if len(batch.bodies) == 1:
+                batch.results[0] = self._send('write', lambda: send(body), acquired=True)
+            else:
+                self._send_merged(key[0], batch, send)
+        except Exception as e:
+            batch.results = [e if result is None else result for result in batch.results]
+        finally:
+            batch.done.set()
+        return batch.result(index)
+    
+    def _send_merged(self, operation: str, batch: _WriteBatch, send: Callable[[Dict[str, Any]], Any]):
+        """Send a batch as one request and split the response, or one by one if that fails."""
+        logger.info(f"Coalescing {len(batch.bodies)} Sheets {operation} requests into one")
+        try:
+            response = self._send('write', lambda: send(merge_bodies(operation, batch.bodies)), acquired=True)
+            for index, part in enumerate(split_response(operation, response.json(), batch.bodies)):
+                batch.results[index] = CoalescedResponse(response, part)
+        except APIError as e:
+            # One caller's bad data should not fail the others
+            logger.warning(f"Coalesced Sheets {operation} failed ({str(e)}), sending requests separately")
+            for index, body in enumerate(batch.bodies):
+                try:
+                    batch.results[index] = self._send('write', functools.partial(send, body))
+                except Exception as error:
+                    batch.results[index] = error
+    
+    def _send(self, kind: str, send: Callable[[], Any], acquired: bool = False) -> Any:
+        """Send a request, waiting for a token first unless the caller already holds one."""
+        for attempt in range(self.max_retries + 1):
+            if attempt or not acquired:
+                self._acquire(kind)
+            self._count(kind, 'requests')
+            try:
+                return send()
+            except APIError as e:
+                if e.response.status_code != 429 or attempt == self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, e.response.headers.get('Retry-After'))
+                self._count(kind, 'throttled')
+                logger.warning(f"Sheets API rate limited the {kind} request, retrying in {delay:.1f}s")
+                # Hold back every caller, not just this one
+                self.buckets[kind].pause(delay)
+    
+    def _acquire(self, kind: str):
+        """Wait for a token of the given kind, recording queue depth and wait time."""
+        wait = self.buckets[kind].reserve()
+        if wait <= 0:
+            return
+        stats = self._stats[kind]
+        with self._lock:
+            stats['queue_depth'] += 1
+            stats['max_queue_depth'] = max(stats['max_queue_depth'], stats['queue_depth'])
+        try:
+            time.sleep(wait)
+        finally:
+            with self._lock:
+                stats['queue_depth'] -= 1
+                stats['wait_seconds'] += wait
+                stats['max_wait_seconds'] = max(stats['max_wait_seconds'], wait)
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _count(self, kind: str, name: str):
+        """Increment a statistic."""
+        with self._lock:
+            self._stats[kind][name] += 1
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get quota, queue and wait statistics for reads and writes.
+        
+        Returns:
+            Dictionary keyed by 'read' and 'write'
+        """
+        with self._lock:
+            metrics = {}
+            for kind, stats in self._stats.items():
+                metrics[kind] = dict(stats)
+                metrics[kind]['quota_per_minute'] = self.quotas[kind]
+                metrics[kind]['avg_wait_ms'] = round(stats['wait_seconds'] * 1000 / stats['calls'], 1) if stats['calls'] else 0.0
+                metrics[kind]['wait_seconds'] = round(stats['wait_seconds'], 3)
+                metrics[kind]['max_wait_seconds'] = round(stats['max_wait_seconds'], 3)
+            return metrics
+
+class ThrottledHTTPClient(HTTPClient):
+    """gspread HTTP client that sends every request through a SheetsRequestScheduler."""
+    
+    def __init__(self, auth, session=None, scheduler: Optional[SheetsRequestScheduler] = None):
+        """
+        Initialize the client.
+        
+        Args:
+            auth: Google credentials
+            session: Optional requests session
+            scheduler: Scheduler to send requests through; defaults to the shared one
+        """
+        super().__init__(auth, session)
+        self.scheduler = scheduler or sheets_scheduler
+    
+    def request(self, method, endpoint, params=None, data=None, json=None, files=None, headers=None):
+        """Send a Sheets API request once the scheduler allows it."""
+        send = functools.partial(super().request, method, endpoint, params=params, data=data,
+                                 files=files, headers=headers)
+        key = coalesce_key(method, endpoint, params, json)
+        if key is not None:
+            return self.scheduler.run_coalesced(key, json, lambda body: send(json=body))
+        
+        kind = 'read' if method.lower() == 'get' else 'write'
+        return self.scheduler.run(kind, lambda: send(json=json))
+
+def coalesce_key(method: str, endpoint: str, params: Optional[Dict[str, Any]],
+                 body: Optional[Dict[str, Any]]) -> Optional[Tuple]:
+    """
+    Get the key under which a request may be merged with others, if it may.
+    
+    Row appends to the same range with the same options and value batch updates
+    to the same spreadsheet with the same options can be merged, as long as the
+    response need not echo back the written values.
+    
+    Returns:
+        Hashable key, or None if the request must be sent on its own
+    """
+    if method.lower() != 'post' or not isinstance(body, dict):
+        return None
+    params = params or {}
+    options = tuple(sorted((name, str(value)) for name, value in params.items()))
+    
+    if endpoint.endswith(':append'):
+        if params.get('includeValuesInResponse') or not body.get('values'):
+            return None
+        if set(body) - {'values', 'majorDimension', 'range'} or body.get('majorDimension', 'ROWS') != 'ROWS':
+            return None
+        return ('append', endpoint, options, body.get('range'))
+    
+    if endpoint.endswith('/values:batchUpdate'):
+        if body.get('includeValuesInResponse') or not body.get('data'):
+            return None
+        settings = tuple(sorted((name, str(value)) for name, value in body.items() if name != 'data'))
+        return ('batch_update', endpoint, options, settings)
+    
+    return None
+
+def merge_bodies(operation: str, bodies: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the JSON bodies of coalesced requests into one, preserving their order."""
+    field = 'values' if operation == 'append' else 'data'
+    merged = dict(bodies[0])
+    merged[field] = [item for body in bodies for item in body[field]]
+    return merged
+
+def split_response(operation: str, response: Dict[str, Any], bodies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Divide a merged request's response between the requests it was merged from.
+    
+    Args:
+        operation: 'append' or 'batch_update'
+        response: JSON response of the merged request
+        bodies: Original request bodies in merge order
+        
+    Returns:
+        One response dictionary per original request
+    """
+    if operation == 'batch_update':
+        parts = []
+        start = 0
+        for body in bodies:
+            responses = response.get('responses', [])[start:start + len(body['data'])]
+            start += len(body['data'])
+            parts.append(dict(
+                response,
+                responses=responses,
+                totalUpdatedRows=sum(part.get('updatedRows', 0) for part in responses),
+                totalUpdatedCells=sum(part.get('updatedCells', 0) for part in responses)
+            ))
+        return parts
+    
+    # Appended rows are contiguous, so each request gets the next slice of the range
+    updates = response.get('updates', {})
+    match = re.match(r'^(.*!)?([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?$', updates.get('updatedRange', ''))
+    if not match:
+        return [response for _ in bodies]
+    prefix, first_column, first_row = match.group(1) or '', match.group(2), int(match.group(3))
+    last_column = match.group(4) or first_column
+    
+    parts = []
+    row = first_row
+    for body in bodies:
+        count = len(body['values'])
+        part_updates = dict(updates, updatedRows=count,
+                            updatedRange=f"{prefix}{first_column}{row}:{last_column}{row + count - 1}")
+        part_updates.pop('updatedCells', None)
+        parts.append(dict(response, updates=part_updates))
+        row += count
+    return parts
+
+# Global instance for easy access
+sheets_scheduler = SheetsRequestScheduler(
+    read_per_minute=float(os.getenv('SHEETS_READ_QUOTA_PER_MINUTE', '60')),
+    write_per_minute=float(os.getenv('SHEETS_WRITE_QUOTA_PER_MINUTE', '60')),
+    burst=int(os.getenv('SHEETS_QUOTA_BURST', '10'))
+)
@@ -0,0 +1,153 @@
+"""
+Tag-number index over the inventory worksheets.
+Maps normalized coil tag numbers to their sheet rows and heat numbers for fast lookups.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.inventory_mirror import INVENTORY_SHEETS, inventory_mirror
+
+logger = logging.getLogger(__name__)
+
+# Column names that may hold the tag and heat number, in order of preference
+TAG_COLUMNS = ['Tag #', 'Tag Number', 'tag_number', 'Customer Tag', 'customer_tag', 'COIL_TAG#']
+HEAT_COLUMNS = ['Heat Number', 'Heat', 'heat_number', 'heat', 'HEAT_NUMBER']
+
+def normalize_tag(value: Any) -> str:
+    """Normalize a tag number for comparison."""
+    return str(value or '').strip().upper()
+
+class TagIndex:
+    """Per-sheet tag → (row, heat number) index kept in step with the inventory mirror."""
+    
+    def __init__(self, mirror=None):
+        """
+        Initialize the index.
+        
+        Args:
+            mirror: InventoryMirror to index; defaults to the shared one
+        """
+        self.mirror = mirror or inventory_mirror
+        self._lock = threading.Lock()
+        self._sheets = {}
+    
+    def lookup(self, tags: Iterable[str], sheets: Iterable[str] = INVENTORY_SHEETS) -> List[Dict[str, Any]]:
+        """
+        Find the rows holding the given tags.
+        
+        Args:
+            tags: Tag numbers in any case or spacing
+            sheets: Worksheets to search
+            
+        Returns:
+            List of {'tag', 'sheet', 'row_number', 'heat_number'} matches in
+            sheet order, then row order
+        """
+        wanted = {normalize_tag(tag) for tag in tags if normalize_tag(tag)}
+        matches = []
+        for sheet_name in sheets:
+            index = self._get_index(sheet_name)
+            for tag in wanted:
+                for row_number, heat_number in index.get(tag, []):
+                    matches.append({'tag': tag, 'sheet': sheet_name, 'row_number': row_number,
+                                    'heat_number': heat_number})
+        matches.sort(key=lambda match: (list(sheets).index(match['sheet']), match['row_number']))
+        return matches
+    
+    def heat_numbers(self, tags: Iterable[str], sheets: Iterable[str] = ('IN_PROCESS',)) -> List[str]:
+        """
+        Get the distinct heat numbers of the given tags.
+        
+        Args:
+            tags: Tag numbers in any case or spacing
+            sheets: Worksheets to search
+            
+        Returns:
+            Non-empty heat numbers in sheet and row order, without duplicates
+        """
+        heat_numbers = []
+        for match in self.lookup(tags, sheets):
+            if match['heat_number'] and match['heat_number'] not in heat_numbers:
+                heat_numbers.append(match['heat_number'])
+        return heat_numbers
+    
+    def _get_index(self, sheet_name: str) -> Dict[str, List[Tuple[int, str]]]:
+        """Get a sheet's index, patching in rows written through since it was built."""
+        snapshot = self.mirror.get_snapshot(sheet_name)
+        with self._lock:
+            cached = self._sheets.get(sheet_name)
+            if cached and cached['version'] == snapshot['version']:
+                return cached['index']
+            
+            if cached and cached['headers'] == snapshot['headers']:
+                changes = self.mirror.get_changes(sheet_name, cached['version'])
+                if changes is not None:
+                    self._apply_changes(cached, changes)
+                    cached['version'] = snapshot['version']
+                    return cached['index']
+            
+            state = self._build_index(snapshot)
+            self._sheets[sheet_name] = state
+        logger.info(f"Indexed {len(state['index'])} tags in {sheet_name} (mirror version {snapshot['version']})")
+        return state['index']
+    
+    def _build_index(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Index every row of a mirrored sheet by its normalized tag."""
+        state = {
+            'version': snapshot['version'],
+            'headers': snapshot['headers'],
+            'columns': self._resolve_columns(snapshot['headers']),
+            'index': {},
+            'tags': {}
+        }
+        for row_number, record in zip(snapshot['row_numbers'], snapshot['records']):
+            self._add_row(state, row_number, record)
+        return state
+    
+    def _apply_changes(self, state: Dict[str, Any], changes: Dict[int, Dict[str, Any]]):
+        """Re-index rows that were appended or updated, leaving the rest of the index as it is."""
+        index = state['index']
+        for row_number, record in changes.items():
+            old_tag = state['tags'].pop(row_number, None)
+            if old_tag is not None:
+                # Entry lists are replaced, not modified, so concurrent lookups see a consistent list
+                entries = [entry for entry in index[old_tag] if entry[0] != row_number]
+                if entries:
+                    index[old_tag] = entries
+                else:
+                    del index[old_tag]
+            self._add_row(state, row_number, record)
+    
+    def _add_row(self, state: Dict[str, Any], row_number: int, record: Dict[str, Any]):
+        """Add one row to an index state if it has a tag."""
+        tag_columns, heat_columns = state['columns']
+        tag = self._first_value(record, tag_columns)
+        if not tag:
+            return
+        heat = self._first_value(record, heat_columns) or ''
+        tag = normalize_tag(tag)
+        state['index'][tag] = state['index'].get(tag, []) + [(row_number, str(heat).strip())]
+        state['tags'][row_number] = tag
+    
+    def _resolve_columns(self, headers: List[str]) -> Tuple[List[str], List[str]]:
+        """Work out which tag and heat alias columns a header row has."""
+        columns = (
+            [name for name in TAG_COLUMNS if name in headers],
+            [name for name in HEAT_COLUMNS if name in headers]
+        )
+        if not columns[0]:
+            logger.warning(f"No tag column found in inventory headers: {headers}")
+        return columns
+    
+    def _first_value(self, record: Dict[str, Any], columns: List[str]) -> Optional[str]:
+        """Get the first non-empty value among the given columns of a row."""
+        for column in columns:
+            value = record.get(column)
+            if value:
+                return str(value)
+        return None
+
+# Global instance for easy access
+tag_index = TagIndex()
@@ -0,0 +1,108 @@
+"""
+Tests for the inventory worksheet mirror.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_inventory_pdf import InventoryReportTemplate
+from utils.inventory_mirror import InventoryMirror, numericise
+
+HEADERS = ['Customer', 'Tag #', 'Heat Number', 'Weight', 'Pieces']
+
+class FakeWorksheet:
+    """Worksheet returning formatted cell strings, as get_all_values does."""
+    
+    def __init__(self, values):
+        self.values = values
+    
+    def get_all_values(self):
+        return [list(row) for row in self.values]
+
+class TestInventoryMirror(unittest.TestCase):
+    """Test that mirrored records are numericised like gspread's get_all_records."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.worksheet = FakeWorksheet([
+            HEADERS,
+            ['Acme Steel', 'T-100', '00123', '12,345', '3'],
+            ['', '', '', '', ''],
+            ['Acme Steel', 'T-101', 'H9', '1,000.5', '2.0'],
+        ])
+        self.clients = Mock()
+        self.clients.get_worksheet.return_value = self.worksheet
+        self.mirror = InventoryMirror(os.path.join(self.tmp.name, 'mirror.db'), clients=self.clients)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_numericise(self):
+        """Test cell conversion rules."""
+        self.assertEqual(numericise('12,345'), 12345)
+        self.assertEqual(numericise('3.0'), 3.0)
+        self.assertEqual(numericise('T-100'), 'T-100')
+        self.assertEqual(numericise(''), '')
+        self.assertEqual(numericise('1_000'), '1_000')
+        self.assertEqual(numericise('NaN'), 'NaN')
+        self.assertEqual(numericise(7), 7)
+    
+    def test_refresh_numericises_records(self):
+        """Test a downloaded sheet skips blank rows and converts numbers."""
+        records = self.mirror.get_records('UNPROCESSED_INVENTORY')
+        
+        self.assertEqual(self.mirror.get_snapshot('UNPROCESSED_INVENTORY')['row_numbers'], [2, 4])
+        self.assertEqual(records[0], {'Customer': 'Acme Steel', 'Tag #': 'T-100', 'Heat Number': 123,
+                                      'Weight': 12345, 'Pieces': 3})
+        self.assertEqual(records[1]['Weight'], 1000.5)
+        self.assertEqual(records[1]['Pieces'], 2.0)
+    
+    def test_records_survive_reload_from_db(self):
+        """Test numbers keep their type when another mirror loads the persisted copy."""
+        self.mirror.refresh('UNPROCESSED_INVENTORY')
+        other = InventoryMirror(self.mirror.db_path, clients=Mock())
+        
+        records = other.get_customer_records('UNPROCESSED_INVENTORY', 'acme')
+        
+        self.assertEqual([record['Weight'] for record in records], [12345, 1000.5])
+        other.clients.get_worksheet.assert_not_called()
+    
+    def test_append_records_numericises(self):
+        """Test written-through appends match what a refresh would return."""
+        self.mirror.refresh('UNPROCESSED_INVENTORY')
+        self.mirror.append_records('UNPROCESSED_INVENTORY', [['Acme Steel', 'T-102', 'H1', '2,500', 4]], [5])
+        
+        records = self.mirror.get_records('UNPROCESSED_INVENTORY')
+        
+        self.assertEqual(records[-1], {'Customer': 'Acme Steel', 'Tag #': 'T-102', 'Heat Number': 'H1',
+                                       'Weight': 2500, 'Pieces': 4})
+        self.assertEqual(self.clients.get_worksheet.call_count, 1)
+    
+    def test_update_records_numericises(self):
+        """Test written-through cell updates are numericised too."""
+        self.mirror.refresh('UNPROCESSED_INVENTORY')
+        self.mirror.update_records('UNPROCESSED_INVENTORY', {2: {'Weight': '11,000'}})
+        
+        self.assertEqual(self.mirror.get_records('UNPROCESSED_INVENTORY')[0]['Weight'], 11000)
+    
+    def test_report_totals_from_mirrored_records(self):
+        """Test an inventory report totals mirrored records."""
+        template = InventoryReportTemplate()
+        story = template.build_story({
+            'customer_name': 'Acme Steel',
+            'status': 'Unprocessed',
+            'inventory': self.mirror.iter_customer_records('UNPROCESSED_INVENTORY', 'Acme Steel')
+        }, template.build_styles())
+        summary = story[-1].getPlainText()
+        
+        self.assertIn('2 items', summary)
+        self.assertIn('13345.50 lbs total weight', summary)
+        self.assertIn('5 total pieces', summary)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Tests for journaled inventory moves and their crash recovery.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gspread.utils import a1_to_rowcol
+
+from utils.inventory_transitions import InventoryTransitionEngine
+from utils.move_journal import MoveJournal
+
+HEADERS = ['COIL_TAG#', 'Customer', 'Customer PO', 'Weight']
+
+class Crash(Exception):
+    """Stands in for the process dying part way through a move."""
+
+class FakeWorksheet:
+    """In-memory worksheet holding cells as the strings Sheets would display."""
+    
+    def __init__(self, title, values):
+        self.title = title
+        self.values = [list(row) for row in values]
+        self.fail_batch_update = False
+    
+    def get_all_values(self):
+        return [list(row) for row in self.values]
+    
+    def append_rows(self, rows):
+        first = len(self.values) + 1
+        self.values.extend([str(value) for value in row] for row in rows)
+        return {'updates': {'updatedRange': f"'{self.title}'!A{first}:D{len(self.values)}"}}
+    
+    def batch_update(self, data, value_input_option=None):
+        if self.fail_batch_update:
+            raise Crash("batch_update interrupted")
+        for update in data:
+            row, column = a1_to_rowcol(update['range'])
+            cells = self.values[row - 1]
+            cells.extend([''] * (column - len(cells)))
+            cells[column - 1] = str(update['values'][0][0])
+    
+    def delete_rows(self, start, end):
+        del self.values[start - 1:end]
+
+class TestMoveRecovery(unittest.TestCase):
+    """Test recover() on moves interrupted after the append and after the source update."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.unprocessed = FakeWorksheet('UNPROCESSED_INVENTORY', [
+            HEADERS,
+            ['T-1', 'Acme', '', '1,000'],
+            ['T-2', 'Acme', '', '2000'],
+        ])
+        self.in_process = FakeWorksheet('IN_PROCESS', [HEADERS])
+        sheets = {'UNPROCESSED_INVENTORY': self.unprocessed, 'IN_PROCESS': self.in_process}
+        clients = Mock()
+        clients.get_worksheet.side_effect = lambda name, **kwargs: sheets[name]
+        self.journal = MoveJournal(os.path.join(self.tmp.name, 'moves.db'))
+        self.engine = InventoryTransitionEngine(clients=clients, mirror=Mock(), journal=self.journal)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def crash_after_append(self):
+        """Assign T-1 to a PO, failing the source update; returns the move id."""
+        self.unprocessed.fail_batch_update = True
+        with self.assertRaises(Crash):
+            self.engine.assign_to_work_order(['T-1'], 'PO-9')
+        self.unprocessed.fail_batch_update = False
+        return self.journal.incomplete_moves()[0]['id']
+    
+    def crash_after_update(self):
+        """Assign T-1 to a PO, failing before the move is marked complete; returns the move id."""
+        with patch.object(self.journal, 'complete', side_effect=Crash("complete interrupted")):
+            with self.assertRaises(Crash):
+                self.engine.assign_to_work_order(['T-1'], 'PO-9')
+        return self.journal.incomplete_moves()[0]['id']
+    
+    def recover(self, rollback=False):
+        outcomes = self.engine.recover(rollback=rollback)
+        self.assertEqual(len(outcomes), 1)
+        return outcomes[0]
+    
+    def test_completed_move_needs_no_recovery(self):
+        """Test an uninterrupted move leaves nothing to recover."""
+        result = self.engine.assign_to_work_order(['t-1', 'T-9'], 'PO-9')
+        
+        self.assertEqual(result['matched_tags'], ['T-1'])
+        self.assertEqual(result['unmatched_tags'], ['T-9'])
+        self.assertEqual(self.unprocessed.values[1][2], 'PO-9')
+        self.assertEqual(self.engine.recover(), [])
+    
+    def test_replay_after_append(self):
+        """Test a move interrupted after the append is replayed by writing the source cells."""
+        move_id = self.crash_after_append()
+        self.assertEqual(self.journal.get_move(move_id)['status'], 'appended')
+        self.assertEqual(self.unprocessed.values[1][2], '')
+        
+        outcome = self.recover()
+        
+        self.assertEqual(outcome['status'], 'completed')
+        self.assertEqual(self.unprocessed.values[1][2], 'PO-9')
+        self.assertEqual(self.in_process.values[1:], [['T-1', 'Acme', 'PO-9', '1000']])
+        self.assertEqual(self.journal.get_move(move_id)['status'], 'completed')
+    
+    def test_rollback_after_append(self):
+        """Test a move interrupted after the append is undone by deleting the appended rows."""
+        move_id = self.crash_after_append()
+        
+        outcome = self.recover(rollback=True)
+        
+        self.assertEqual(outcome['status'], 'rolled_back')
+        self.assertEqual(self.in_process.values, [HEADERS])
+        self.assertEqual(self.unprocessed.values[1][2], '')
+        self.assertEqual(self.journal.get_move(move_id)['status'], 'rolled_back')
+    
+    def test_replay_after_update(self):
+        """Test a move interrupted after the source update is completed without writing again."""
+        move_id = self.crash_after_update()
+        self.assertEqual(self.unprocessed.values[1][2], 'PO-9')
+        
+        with patch.object(self.engine, '_write_cells') as write_cells:
+            outcome = self.recover()
+        
+        write_cells.assert_not_called()
+        self.assertEqual(outcome['status'], 'completed')
+        self.assertEqual(self.journal.get_move(move_id)['status'], 'completed')
+    
+    def test_rollback_after_update(self):
+        """Test rolling back a move whose source update was written restores the source cells."""
+        self.crash_after_update()
+        
+        outcome = self.recover(rollback=True)
+        
+        self.assertEqual(outcome['status'], 'rolled_back')
+        self.assertEqual(self.unprocessed.values[1][2], '')
+        self.assertEqual(self.in_process.values, [HEADERS])
+    
+    def test_unrecorded_append_is_found(self):
+        """Test a move whose append rows were never journaled is matched against the destination."""
+        with patch.object(self.journal, 'record_append', side_effect=[Crash("record interrupted"), None]):
+            with self.assertRaises(Crash):
+                self.engine.assign_to_work_order(['T-2'], 'PO-9')
+        move = self.journal.incomplete_moves()[0]
+        self.assertEqual(move['status'], 'pending')
+        
+        outcome = self.recover()
+        
+        self.assertEqual(outcome['status'], 'completed')
+        self.assertEqual(self.unprocessed.values[2][2], 'PO-9')
+    
+    def test_failed_append_is_rolled_back(self):
+        """Test a move whose append never reached the destination is marked rolled back."""
+        with patch.object(self.in_process, 'append_rows', side_effect=Crash("append interrupted")):
+            with self.assertRaises(Crash):
+                self.engine.assign_to_work_order(['T-1'], 'PO-9')
+        
+        outcome = self.recover()
+        
+        self.assertEqual(outcome['status'], 'rolled_back')
+        self.assertEqual(self.in_process.values, [HEADERS])
+        self.assertEqual(self.unprocessed.values[1][2], '')
+    
+    def test_edited_source_needs_review(self):
+        """Test a move is left alone when its source rows were edited after the crash."""
+        move_id = self.crash_after_append()
+        self.unprocessed.values[1][3] = '1,500'
+        
+        outcome = self.recover()
+        
+        self.assertEqual(outcome['status'], 'needs_review')
+        self.assertEqual(self.unprocessed.values[1][2], '')
+        self.assertEqual(self.journal.get_move(move_id)['status'], 'needs_review')
+        self.assertEqual(self.engine.recover(), [])
+    
+    def test_edited_destination_needs_review_on_rollback(self):
+        """Test a rollback does not delete appended rows that were edited after the crash."""
+        self.crash_after_append()
+        self.in_process.values[1][1] = 'Other Customer'
+        
+        outcome = self.recover(rollback=True)
+        
+        self.assertEqual(outcome['status'], 'needs_review')
+        self.assertEqual(len(self.in_process.values), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+"""
+Tests for the Sheets request scheduler: write coalescing, response splitting and 429 backoff.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gspread.exceptions import APIError
+
+from utils.sheets_scheduler import SheetsRequestScheduler, ThrottledHTTPClient, merge_bodies, split_response
+
+APPEND_URL = "https://sheets.googleapis.com/v4/spreadsheets/ID/values/'INVENTORY'!A1:append"
+BATCH_UPDATE_URL = "https://sheets.googleapis.com/v4/spreadsheets/ID/values:batchUpdate"
+APPEND_PARAMS = {'valueInputOption': 'USER_ENTERED'}
+
+class StubResponse:
+    """Minimal requests.Response stand-in."""
+    
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = headers or {}
+        self._body = body or {}
+        self.text = str(self._body)
+    
+    def json(self):
+        return self._body
+
+class StubSession:
+    """HTTP session that records requests and answers them with a handler."""
+    
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+    
+    def request(self, method, url, json=None, **kwargs):
+        with self._lock:
+            self.requests.append((method, url, json))
+        return self.handler(method, url, json)
+
+def append_handler(first_row=10):
+    """Answer appends with the rows they would occupy after first_row - 1 existing rows."""
+    def handler(method, url, body):
+        count = len(body['values'])
+        return StubResponse(body={'updates': {
+            'updatedRange': f"'INVENTORY'!A{first_row}:C{first_row + count - 1}",
+            'updatedRows': count, 'updatedCells': count * 3
+        }})
+    return handler
+
+class TestSplitResponse(unittest.TestCase):
+    """Test merging request bodies and dividing the merged response."""
+    
+    def test_merge_bodies_keeps_order(self):
+        """Test merged appends and batch updates keep each caller's items in order."""
+        appends = [{'values': [[1], [2]], 'range': 'A1'}, {'values': [[3]], 'range': 'A1'}]
+        updates = [{'data': [{'range': 'A1'}], 'valueInputOption': 'RAW'}, {'data': [{'range': 'B2'}, {'range': 'C3'}]}]
+        
+        self.assertEqual(merge_bodies('append', appends), {'values': [[1], [2], [3]], 'range': 'A1'})
+        self.assertEqual(merge_bodies('batch_update', updates)['data'], [{'range': 'A1'}, {'range': 'B2'}, {'range': 'C3'}])
+    
+    def test_split_append_range(self):
+        """Test each caller gets the next slice of the merged append range."""
+        response = {'spreadsheetId': 'ID', 'updates': {'updatedRange': "'INVENTORY'!A10:N14",
+                                                       'updatedRows': 5, 'updatedCells': 70}}
+        bodies = [{'values': [[1], [2]]}, {'values': [[3], [4], [5]]}]
+        
+        parts = split_response('append', response, bodies)
+        
+        self.assertEqual([part['updates']['updatedRange'] for part in parts],
+                         ["'INVENTORY'!A10:N11", "'INVENTORY'!A12:N14"])
+        self.assertEqual([part['updates']['updatedRows'] for part in parts], [2, 3])
+        self.assertNotIn('updatedCells', parts[0]['updates'])
+        self.assertEqual(parts[1]['spreadsheetId'], 'ID')
+    
+    def test_split_unreadable_append_range(self):
+        """Test every caller gets the whole response when the range cannot be parsed."""
+        response = {'updates': {}}
+        
+        self.assertEqual(split_response('append', response, [{'values': [[1]]}, {'values': [[2]]}]),
+                         [response, response])
+    
+    def test_split_batch_update_responses(self):
+        """Test each caller gets its own value ranges and totals."""
+        response = {'spreadsheetId': 'ID', 'totalUpdatedCells': 6, 'responses': [
+            {'updatedRange': 'S!A1', 'updatedRows': 1, 'updatedCells': 1},
+            {'updatedRange': 'S!B2:B3', 'updatedRows': 2, 'updatedCells': 2},
+            {'updatedRange': 'S!C4:C6', 'updatedRows': 3, 'updatedCells': 3},
+        ]}
+        bodies = [{'data': [{'range': 'A1'}]}, {'data': [{'range': 'B2:B3'}, {'range': 'C4:C6'}]}]
+        
+        first, second = split_response('batch_update', response, bodies)
+        
+        self.assertEqual([part['updatedRange'] for part in first['responses']], ['S!A1'])
+        self.assertEqual((first['totalUpdatedRows'], first['totalUpdatedCells']), (1, 1))
+        self.assertEqual([part['updatedRange'] for part in second['responses']], ['S!B2:B3', 'S!C4:C6'])
+        self.assertEqual((second['totalUpdatedRows'], second['totalUpdatedCells']), (5, 5))
+
+class TestCoalescing(unittest.TestCase):
+    """Test writes that queue behind each other are sent as one request."""
+    
+    def setUp(self):
+        self.scheduler = SheetsRequestScheduler(read_per_minute=0, write_per_minute=0)
+        self.release = threading.Event()
+        acquire = self.scheduler._acquire
+        
+        def held_acquire(kind):
+            # The first write holds its token until the test has queued the others
+            self.release.wait(5)
+            acquire(kind)
+        self.acquire_patch = patch.object(self.scheduler, '_acquire', side_effect=held_acquire)
+        self.acquire_patch.start()
+    
+    def tearDown(self):
+        self.release.set()
+        self.acquire_patch.stop()
+    
+    def send_concurrently(self, session, bodies, url=APPEND_URL, params=APPEND_PARAMS):
+        """Send one request per body from separate threads, merged behind the first."""
+        client = ThrottledHTTPClient(None, session=session, scheduler=self.scheduler)
+        results = [None] * len(bodies)
+        
+        def send(index):
+            try:
+                results[index] = client.request('post', url, params=params, json=bodies[index])
+            except Exception as e:
+                results[index] = e
+        
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(len(bodies))]
+        threads[0].start()
+        while not self.scheduler._batches:
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        while self.scheduler.metrics()['write']['coalesced'] < len(bodies) - 1:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+    
+    def test_merged_append_is_split_between_callers(self):
+        """Test three appends become one request and each caller sees its own rows."""
+        session = StubSession(append_handler(first_row=10))
+        bodies = [{'values': [['a', 1, 2]]}, {'values': [['b', 3, 4], ['c', 5, 6]]}, {'values': [['d', 7, 8]]}]
+        
+        results = self.send_concurrently(session, bodies)
+        
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual(session.requests[0][2]['values'], [['a', 1, 2], ['b', 3, 4], ['c', 5, 6], ['d', 7, 8]])
+        self.assertEqual([result.json()['updates']['updatedRange'] for result in results],
+                         ["'INVENTORY'!A10:C10", "'INVENTORY'!A11:C12", "'INVENTORY'!A13:C13"])
+    
+    def test_merged_batch_update_is_split_between_callers(self):
+        """Test value batch updates to one spreadsheet are merged and their responses divided."""
+        def handler(method, url, body):
+            return StubResponse(body={'responses': [
+                {'updatedRange': item['range'], 'updatedRows': 1, 'updatedCells': 1} for item in body['data']
+            ]})
+        session = StubSession(handler)
+        bodies = [
+            {'valueInputOption': 'USER_ENTERED', 'data': [{'range': 'A1', 'values': [[1]]}]},
+            {'valueInputOption': 'USER_ENTERED', 'data': [{'range': 'B1', 'values': [[2]]}, {'range': 'C1', 'values': [[3]]}]},
+        ]
+        
+        results = self.send_concurrently(session, bodies, url=BATCH_UPDATE_URL, params=None)
+        
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual([[part['updatedRange'] for part in result.json()['responses']] for result in results],
+                         [['A1'], ['B1', 'C1']])
+        self.assertEqual(results[1].json()['totalUpdatedCells'], 2)
+    
+    def test_failed_merge_falls_back_to_separate_requests(self):
+        """Test a rejected merged append is retried per caller so only the bad one fails."""
+        good = append_handler(first_row=20)
+        
+        def handler(method, url, body):
+            if any(row[0] == 'bad' for row in body['values']):
+                return StubResponse(400, {'error': {'code': 400, 'message': 'Invalid value', 'status': 'INVALID_ARGUMENT'}})
+            return good(method, url, body)
+        session = StubSession(handler)
+        bodies = [{'values': [['a', 1, 2]]}, {'values': [['bad', 0, 0]]}, {'values': [['c', 5, 6]]}]
+        
+        results = self.send_concurrently(session, bodies)
+        
+        # One merged attempt, then one request per caller
+        self.assertEqual(len(session.requests), 4)
+        self.assertEqual(results[0].json()['updates']['updatedRange'], "'INVENTORY'!A20:C20")
+        self.assertIsInstance(results[1], APIError)
+        self.assertEqual(results[2].json()['updates']['updatedRange'], "'INVENTORY'!A20:C20")
+
+class TestRateLimitRetry(unittest.TestCase):
+    """Test 429 responses are retried after pausing every caller of the same kind."""
+    
+    def setUp(self):
+        self.scheduler = SheetsRequestScheduler(read_per_minute=0, write_per_minute=0, max_retries=2)
+        self.sleep_patch = patch('utils.sheets_scheduler.time.sleep')
+        self.sleep = self.sleep_patch.start()
+    
+    def tearDown(self):
+        self.sleep_patch.stop()
+    
+    def throttled_session(self, throttled_count, retry_after='2'):
+        """Session answering the first requests with 429 and the rest with 200."""
+        def handler(method, url, body):
+            if len(session.requests) <= throttled_count:
+                return StubResponse(429, {'error': {'code': 429, 'message': 'Quota exceeded', 'status': 'RESOURCE_EXHAUSTED'}},
+                                    headers={'Retry-After': retry_after})
+            return StubResponse(body={'spreadsheetId': 'ID'})
+        session = StubSession(handler)
+        return session
+    
+    def test_retry_after_429(self):
+        """Test a throttled request is retried after the Retry-After delay."""
+        session = self.throttled_session(1)
+        client = ThrottledHTTPClient(None, session=session, scheduler=self.scheduler)
+        
+        response = client.request('post', "https://sheets.googleapis.com/v4/spreadsheets/ID:batchUpdate", json={'requests': []})
+        
+        self.assertEqual(response.json(), {'spreadsheetId': 'ID'})
+        self.assertEqual(len(session.requests), 2)
+        self.assertAlmostEqual(self.sleep.call_args[0][0], 2, delta=0.5)
+        metrics = self.scheduler.metrics()['write']
+        self.assertEqual((metrics['calls'], metrics['requests'], metrics['throttled']), (1, 2, 1))
+    
+    def test_429_pauses_other_callers(self):
+        """Test a 429 holds back the next request of the same kind but not the other kind."""
+        client = ThrottledHTTPClient(None, session=self.throttled_session(1, retry_after='30'),
+                                     scheduler=self.scheduler)
+        client.request('post', "https://sheets.googleapis.com/v4/spreadsheets/ID:batchUpdate", json={'requests': []})
+        
+        self.assertGreater(self.scheduler.buckets['write'].reserve(), 25)
+        self.assertEqual(self.scheduler.buckets['read'].reserve(), 0)
+    
+    def test_gives_up_after_max_retries(self):
+        """Test the 429 is raised once the retries are used up."""
+        session = self.throttled_session(10)
+        client = ThrottledHTTPClient(None, session=session, scheduler=self.scheduler)
+        
+        with self.assertRaises(APIError):
+            client.request('get', "https://sheets.googleapis.com/v4/spreadsheets/ID")
+        
+        self.assertEqual(len(session.requests), 3)
+        self.assertEqual(self.scheduler.metrics()['read']['throttled'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
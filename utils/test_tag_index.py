@@ -0,0 +1,112 @@
+"""
+Tests for the tag-number index over the inventory mirror.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.inventory_mirror import InventoryMirror
+from utils.tag_index import TagIndex
+
+class FakeWorksheet:
+    """Worksheet returning formatted cell strings, as get_all_values does."""
+    
+    def __init__(self, values):
+        self.values = values
+    
+    def get_all_values(self):
+        return [list(row) for row in self.values]
+
+class TestTagIndex(unittest.TestCase):
+    """Test tag lookups and incremental index updates."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.worksheets = {
+            'IN_PROCESS': FakeWorksheet([
+                ['Customer', 'Tag #', 'Heat Number'],
+                ['Acme', 'a-100', 'H1'],
+                ['Acme', 'A-101', 'H2'],
+                ['Acme', 'A-100', 'H3'],
+            ]),
+            'PROCESSED': FakeWorksheet([
+                ['Customer', 'COIL_TAG#', 'HEAT_NUMBER'],
+                ['Acme', 'P-1', 'H9'],
+            ]),
+        }
+        clients = Mock()
+        clients.get_worksheet.side_effect = lambda name: self.worksheets[name]
+        self.mirror = InventoryMirror(os.path.join(self.tmp.name, 'mirror.db'), clients=clients)
+        self.index = TagIndex(self.mirror)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_lookup_normalizes_tags(self):
+        """Test lookups ignore case and spacing and return every matching row."""
+        matches = self.index.lookup([' a-100 '], sheets=('IN_PROCESS',))
+        
+        self.assertEqual(matches, [
+            {'tag': 'A-100', 'sheet': 'IN_PROCESS', 'row_number': 2, 'heat_number': 'H1'},
+            {'tag': 'A-100', 'sheet': 'IN_PROCESS', 'row_number': 4, 'heat_number': 'H3'},
+        ])
+    
+    def test_lookup_uses_column_aliases(self):
+        """Test sheets with alternative tag and heat column names."""
+        matches = self.index.lookup(['p-1'], sheets=('IN_PROCESS', 'PROCESSED'))
+        
+        self.assertEqual(matches, [{'tag': 'P-1', 'sheet': 'PROCESSED', 'row_number': 2, 'heat_number': 'H9'}])
+    
+    def test_heat_numbers(self):
+        """Test distinct heat numbers in row order."""
+        self.assertEqual(self.index.heat_numbers(['A-101', 'A-100']), ['H1', 'H2', 'H3'])
+    
+    def test_appended_rows_are_indexed_incrementally(self):
+        """Test appends are patched into the index without rebuilding it."""
+        self.index.lookup(['A-100'], sheets=('IN_PROCESS',))
+        self.mirror.append_records('IN_PROCESS', [['Acme', 'A-102', 'H4']], [5])
+        
+        with patch.object(self.index, '_build_index') as build_index:
+            matches = self.index.lookup(['A-102'], sheets=('IN_PROCESS',))
+        
+        build_index.assert_not_called()
+        self.assertEqual(matches, [{'tag': 'A-102', 'sheet': 'IN_PROCESS', 'row_number': 5, 'heat_number': 'H4'}])
+    
+    def test_updated_rows_move_between_tags(self):
+        """Test an updated tag is removed from its old entry and added to the new one."""
+        self.index.lookup(['A-100'], sheets=('IN_PROCESS',))
+        self.mirror.update_records('IN_PROCESS', {4: {'Tag #': 'A-101', 'Heat Number': 'H5'}})
+        
+        with patch.object(self.index, '_build_index') as build_index:
+            old = self.index.lookup(['A-100'], sheets=('IN_PROCESS',))
+            new = self.index.lookup(['A-101'], sheets=('IN_PROCESS',))
+        
+        build_index.assert_not_called()
+        self.assertEqual([match['row_number'] for match in old], [2])
+        self.assertEqual([(match['row_number'], match['heat_number']) for match in new], [(3, 'H2'), (4, 'H5')])
+    
+    def test_refresh_rebuilds_index(self):
+        """Test a downloaded sheet replaces the whole index."""
+        self.index.lookup(['A-100'], sheets=('IN_PROCESS',))
+        self.worksheets['IN_PROCESS'].values = [['Customer', 'Tag Number', 'Heat'], ['Acme', 'B-1', 'H7']]
+        self.mirror.refresh('IN_PROCESS')
+        
+        self.assertEqual(self.index.lookup(['A-100'], sheets=('IN_PROCESS',)), [])
+        self.assertEqual(self.index.heat_numbers(['B-1']), ['H7'])
+    
+    def test_invalidated_sheet_is_rebuilt(self):
+        """Test the change log reports a full reload after invalidation."""
+        version = self.mirror.get_snapshot('IN_PROCESS')['version']
+        self.mirror.append_records('IN_PROCESS', [['Acme', 'A-102', 'H4']], [5])
+        
+        self.assertEqual(list(self.mirror.get_changes('IN_PROCESS', version)), [5])
+        self.mirror.invalidate('IN_PROCESS')
+        self.assertIsNone(self.mirror.get_changes('IN_PROCESS', version))
+
+if __name__ == '__main__':
+    unittest.main()
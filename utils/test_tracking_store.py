@@ -0,0 +1,53 @@
+"""
+Tests for the tracking store's work order view.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tracking_store import TrackingStore
+
+class TestWorkOrderView(unittest.TestCase):
+    """Test the per-customer work order list keeps newest-first order."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = TrackingStore(os.path.join(self.tmp.name, 'tracking.db'), base_dir=self.tmp.name)
+        for number, date_created in (('WO-1', '2026-10-01'), ('WO-2', '2026-10-02'), ('WO-3', '2026-10-02')):
+            self.store.work_orders.add({'work_order_number': number, 'customer_name': 'Acme Steel',
+                                        'customer_po': 'PO-1', 'date_created': date_created})
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def numbers(self):
+        return [entry['work_order_number'] for entry in self.store.work_order_view.for_customer('acme steel')]
+    
+    def test_newest_first(self):
+        """Test work orders are listed by date, same-day ones most recently added first."""
+        self.assertEqual(self.numbers(), ['WO-3', 'WO-2', 'WO-1'])
+        self.assertEqual(self.store.work_order_view.get('WO-1')['date_created'], '2026-10-01')
+    
+    def test_order_survives_update(self):
+        """Test adding a finished tag or saving a work order does not move it in the list."""
+        self.store.finished_tags.add({'tag_id': 'FT-1', 'work_order_number': 'WO-1', 'customer_name': 'Acme Steel'})
+        self.store.work_orders.save({'work_order_number': 'WO-2', 'customer_name': 'Acme Steel',
+                                     'customer_po': 'PO-2', 'date_created': '2026-10-02'})
+        
+        self.assertEqual(self.numbers(), ['WO-3', 'WO-2', 'WO-1'])
+        self.assertEqual(len(self.store.work_order_view.get('WO-1')['finished_tags']), 1)
+    
+    def test_undated_rows_are_rebuilt(self):
+        """Test view rows written without date_created are repaired when the store opens."""
+        self.store._connect().execute("UPDATE work_order_view SET date_created = ''")
+        
+        store = TrackingStore(self.store.db_path, base_dir=self.tmp.name)
+        
+        self.assertEqual(store.work_order_view.get('WO-2')['date_created'], '2026-10-02')
+
+if __name__ == '__main__':
+    unittest.main()
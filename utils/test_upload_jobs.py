@@ -0,0 +1,199 @@
+"""
+Tests for the upload job queue: claiming, timeouts, cancellation and orphan recovery.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.upload_jobs import UploadJobStore, UploadJobWorkers
+
+class FakeProcess:
+    """Worker process stand-in that records being stopped."""
+    
+    def __init__(self, pid, alive=True):
+        self.pid = pid
+        self.alive = alive
+        self.terminated = False
+    
+    def is_alive(self):
+        return self.alive
+    
+    def terminate(self):
+        self.terminated = True
+        self.alive = False
+    
+    def join(self, timeout=None):
+        pass
+
+class TestUploadJobs(unittest.TestCase):
+    """Test job claims and the supervisor's handling of running jobs."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = UploadJobStore(os.path.join(self.tmp.name, 'jobs.db'), max_attempts=2)
+        self.workers = UploadJobWorkers(self.store, timeout_seconds=60, heartbeat_timeout_seconds=30)
+        self.other = UploadJobWorkers(self.store, timeout_seconds=60, heartbeat_timeout_seconds=30)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def claim(self, supervisor, pid=100, alive=True):
+        """Queue a job and claim it for a fake worker of a supervisor."""
+        job_id = self.store.create_job('bol.pdf', 'default', '/tmp/bol.pdf')
+        supervisor._processes[pid] = FakeProcess(pid, alive)
+        job = self.store.claim_next_job(pid, supervisor.owner)
+        self.assertEqual(job['id'], job_id)
+        return job
+    
+    def backdate(self, job_id, column, seconds):
+        """Move a job's timestamp column into the past."""
+        when = (datetime.now() - timedelta(seconds=seconds)).isoformat()
+        self.store._connect().execute(f"UPDATE jobs SET {column} = ? WHERE id = ?", (when, job_id))
+    
+    def check(self, supervisor):
+        """Run one supervisor pass over the running jobs."""
+        supervisor.store.heartbeat(supervisor.owner)
+        for job in self.store.running_jobs():
+            supervisor._check_running_job(job)
+    
+    def test_claim_oldest_job(self):
+        """Test jobs are claimed oldest first and record their worker and owner."""
+        first = self.store.create_job('a.pdf', 'default', '/tmp/a.pdf')
+        self.store.create_job('b.pdf', 'default', '/tmp/b.pdf')
+        
+        job = self.store.claim_next_job(100, self.workers.owner)
+        
+        self.assertEqual(job['id'], first)
+        self.assertEqual((job['status'], job['attempts'], job['worker_pid']), ('running', 1, 100))
+        self.assertEqual(job['owner'], self.workers.owner)
+        self.assertIsNotNone(job['heartbeat'])
+    
+    def test_finish_requires_claiming_worker(self):
+        """Test only the worker holding the claim can finish a running job."""
+        job = self.claim(self.workers)
+        
+        self.store.finish_job(job['id'], 'completed', result={}, worker_pid=101, owner=self.workers.owner)
+        self.store.finish_job(job['id'], 'completed', result={}, worker_pid=100, owner=self.other.owner)
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'running')
+        
+        self.store.finish_job(job['id'], 'completed', result={'coils_processed': 2},
+                              worker_pid=100, owner=self.workers.owner)
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'completed')
+        self.assertEqual(self.store.get_job(job['id'])['event_count'], 1)
+    
+    def test_timeout_stops_worker(self):
+        """Test a job running past the timeout is marked timed out and its worker stopped."""
+        job = self.claim(self.workers)
+        self.backdate(job['id'], 'started', 120)
+        
+        self.check(self.workers)
+        
+        finished = self.store.get_job(job['id'])
+        self.assertEqual(finished['status'], 'timed_out')
+        self.assertGreater(finished['stage_timings']['total_seconds'], 60)
+        self.assertNotIn(100, self.workers._processes)
+    
+    def test_cancel_queued_and_running_jobs(self):
+        """Test a queued job is cancelled at once and a running one by its supervisor."""
+        queued = self.store.create_job('a.pdf', 'default', '/tmp/a.pdf')
+        self.assertTrue(self.store.request_cancel(queued))
+        self.assertEqual(self.store.get_job(queued)['status'], 'cancelled')
+        
+        job = self.claim(self.workers)
+        process = self.workers._processes[100]
+        self.assertTrue(self.store.request_cancel(job['id']))
+        self.check(self.other)
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'running')
+        
+        self.check(self.workers)
+        
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'cancelled')
+        self.assertTrue(process.terminated)
+        self.assertFalse(self.store.request_cancel(job['id']))
+    
+    def test_dead_worker_job_is_requeued(self):
+        """Test a job whose worker died is re-queued, then failed once its attempts run out."""
+        job = self.claim(self.workers, alive=False)
+        
+        self.check(self.workers)
+        
+        requeued = self.store.get_job(job['id'])
+        self.assertEqual((requeued['status'], requeued['worker_pid'], requeued['owner']), ('queued', None, None))
+        
+        self.store.claim_next_job(100, self.workers.owner)
+        self.check(self.workers)
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'failed')
+    
+    def test_live_supervisor_jobs_are_left_alone(self):
+        """Test a supervisor does not re-queue jobs of another supervisor that is still heartbeating."""
+        job = self.claim(self.other)
+        self.backdate(job['id'], 'heartbeat', 10)
+        
+        self.check(self.workers)
+        
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'running')
+    
+    def test_silent_supervisor_jobs_are_requeued(self):
+        """Test a job is taken over when its supervisor stops heartbeating, and its worker cannot finish it."""
+        job = self.claim(self.other)
+        self.backdate(job['id'], 'heartbeat', 120)
+        
+        self.check(self.workers)
+        
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'queued')
+        self.store.finish_job(job['id'], 'completed', result={}, worker_pid=100, owner=self.other.owner)
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'queued')
+        self.assertEqual(self.store.get_job(job['id'])['event_count'], 0)
+    
+    def test_job_that_wrote_is_not_rerun(self):
+        """Test a job whose worker died after starting the sheet write is failed, and only retried when forced."""
+        job = self.claim(self.workers, alive=False)
+        self.store.publish(job['id'], 'writing', {'expected': 3})
+        
+        self.check(self.workers)
+        
+        failed = self.store.get_job(job['id'])
+        self.assertEqual(failed['status'], 'failed')
+        self.assertIn('Google Sheets', failed['error'])
+        self.assertFalse(self.store.retry_job(job['id']))
+        
+        self.assertTrue(self.store.retry_job(job['id'], force=True))
+        retried = self.store.get_job(job['id'])
+        self.assertEqual((retried['status'], retried['sheet_written'], retried['event_count']), ('queued', False, 0))
+    
+    def test_timed_out_job_that_wrote_needs_force(self):
+        """Test a timed-out job is retried freely unless it had written to Google Sheets."""
+        job = self.claim(self.workers)
+        self.backdate(job['id'], 'started', 120)
+        self.check(self.workers)
+        self.assertTrue(self.store.retry_job(job['id']))
+        
+        job = self.store.claim_next_job(100, self.workers.owner)
+        self.workers._processes[100] = FakeProcess(100)
+        self.store.publish(job['id'], 'write', {'rows_added': 3, 'expected': 3})
+        self.backdate(job['id'], 'started', 120)
+        self.check(self.workers)
+        
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'timed_out')
+        self.assertFalse(self.store.retry_job(job['id']))
+    
+    def test_activity_stream_is_shared(self):
+        """Test every activity stream client gets each new event, and no earlier ones."""
+        job_id = self.store.create_job('bol.pdf', 'default', '/tmp/bol.pdf')
+        self.store.publish(job_id, 'document', {'page_count': 2})
+        streams = [self.store.stream_activity(heartbeat_seconds=0, poll_seconds=0) for _ in range(2)]
+        for stream in streams:
+            self.assertEqual(next(stream), ": heartbeat\n\n")
+        
+        self.store.publish(job_id, 'page', {'page_number': 1})
+        
+        for stream in streams:
+            self.assertEqual(next(stream), f'data: [{job_id[:8]}] page: {{"page_number": 1}}\n\n')
+
+if __name__ == '__main__':
+    unittest.main()
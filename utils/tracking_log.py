@@ -0,0 +1,248 @@
+"""
+Append-only tracking logs for upload, quote and job history records.
+Each record is one fsynced JSON line in the current segment file, written under a
+cross-process lock, so concurrent writers never rewrite or truncate each other's data.
+Sealed segments are periodically compacted into a single file that also applies the
+log's retention cap.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Segment files are named by sequence number; a compacted file replaces every segment up to its number
+SEGMENT_PATTERN = re.compile(r'^(\d{8})(\.compact)?\.jsonl$')
+
+class TrackingLog:
+    """Segmented JSONL log of tracking records, oldest record first on disk."""
+    
+    def __init__(self, directory: str, legacy_file: Optional[str] = None,
+                 legacy_newest_first: bool = False, max_records: Optional[int] = None,
+                 segment_bytes: int = 256 * 1024, compact_after: int = 8):
+        """
+        Initialize the log.
+        
+        Args:
+            directory: Directory holding the segment files and lock file
+            legacy_file: JSON array file the log replaces, imported on first use
+            legacy_newest_first: Whether the legacy file stores the newest record first
+            max_records: Keep only this many of the most recent records
+            segment_bytes: Start a new segment once the current one reaches this size
+            compact_after: Compact once this many segments have accumulated
+        """
+        self.directory = directory
+        self.legacy_file = legacy_file
+        self.legacy_newest_first = legacy_newest_first
+        self.max_records = max_records
+        self.segment_bytes = segment_bytes
+        self.compact_after = compact_after
+    
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """Hold the log's lock file, shared for reads and exclusive for writes."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _segments(self) -> Tuple[Optional[int], List[int]]:
+        """
+        List the files that make up the log.
+        
+        Returns:
+            Sequence number of the newest compacted file (or None) and the sequence
+            numbers of the plain segments written after it, in order
+        """
+        compacted = None
+        plain = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if not match:
+                continue
+            seq = int(match.group(1))
+            if match.group(2):
+                compacted = seq if compacted is None else max(compacted, seq)
+            else:
+                plain.append(seq)
+        
+        floor = compacted if compacted is not None else -1
+        return compacted, sorted(seq for seq in plain if seq > floor)
+    
+    def _path(self, seq: int, compacted: bool = False) -> str:
+        """Get the file path for a segment sequence number."""
+        suffix = '.compact.jsonl' if compacted else '.jsonl'
+        return os.path.join(self.directory, f"{seq:08d}{suffix}")
+    
+    def _read_file(self, path: str) -> List[Dict[str, Any]]:
+        """Read the records in one segment, skipping a line torn by a crash mid-write."""
+        records = []
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable record in {path}")
+        return records
+    
+    def _read_all(self) -> List[Dict[str, Any]]:
+        """Read every record, oldest first. Caller holds the lock."""
+        compacted, plain = self._segments()
+        records = self._read_file(self._path(compacted, compacted=True)) if compacted is not None else []
+        for seq in plain:
+            records.extend(self._read_file(self._path(seq)))
+        
+        if self.max_records is not None:
+            records = records[-self.max_records:]
+        return records
+    
+    def _write_atomic(self, path: str, records: List[Dict[str, Any]]):
+        """Write records to a temporary file, fsync it and move it into place."""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        
+        # Persist the rename itself
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    
+    def _import_legacy(self):
+        """Import the legacy JSON file into the log if the log has no segments yet. Caller holds the lock."""
+        compacted, plain = self._segments()
+        if compacted is not None or plain:
+            return
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        
+        try:
+            with open(self.legacy_file, 'r') as f:
+                records = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Could not import {self.legacy_file}: {e}")
+            return
+        
+        if not isinstance(records, list) or not records:
+            return
+        if self.legacy_newest_first:
+            records = list(reversed(records))
+        if self.max_records is not None:
+            records = records[-self.max_records:]
+        
+        self._write_atomic(self._path(0, compacted=True), records)
+        logger.info(f"Imported {len(records)} records from {self.legacy_file} into {self.directory}")
+    
+    def append(self, record: Dict[str, Any]):
+        """
+        Append a record and fsync it before returning.
+        
+        Args:
+            record: JSON-serialisable record
+        """
+        line = json.dumps(record, default=str) + '\n'
+        with self._locked(exclusive=True):
+            self._import_legacy()
+            compacted, plain = self._segments()
+            
+            # Continue the current segment until it fills up, then start the next one
+            if plain and os.path.getsize(self._path(plain[-1])) < self.segment_bytes:
+                seq = plain[-1]
+            else:
+                seq = max(plain[-1] if plain else -1, compacted if compacted is not None else -1) + 1
+                plain.append(seq)
+            
+            with open(self._path(seq), 'ab+') as f:
+                # Finish a line torn by a crash so it cannot swallow this record
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        line = '\n' + line
+                f.write(line.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            
+            if len(plain) >= self.compact_after:
+                self._compact()
+    
+    def read(self, newest_first: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Read the merged records from every segment.
+        
+        Args:
+            newest_first: Return the most recent record first
+            limit: Maximum number of records to return, counted from the newest
+            
+        Returns:
+            List of records
+        """
+        if not os.path.isdir(self.directory):
+            # Nothing appended yet; serve the legacy file without creating the log
+            with self._locked(exclusive=True):
+                self._import_legacy()
+        
+        with self._locked(exclusive=False):
+            records = self._read_all()
+        
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        if newest_first:
+            records.reverse()
+        return records
+    
+    def compact(self):
+        """Merge all segments into one compacted file, applying the retention cap."""
+        with self._locked(exclusive=True):
+            self._import_legacy()
+            self._compact()
+    
+    def _compact(self):
+        """Compact under the already-held exclusive lock."""
+        compacted, plain = self._segments()
+        if not plain:
+            return
+        
+        records = self._read_all()
+        last_seq = plain[-1]
+        # Once this file exists readers ignore every older segment, so a crash
+        # before the cleanup below cannot duplicate records
+        self._write_atomic(self._path(last_seq, compacted=True), records)
+        
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match and int(match.group(1)) <= last_seq and name != os.path.basename(self._path(last_seq, compacted=True)):
+                os.remove(os.path.join(self.directory, name))
+        logger.info(f"Compacted {self.directory} to {len(records)} records")
+
+# Directory the tracking logs live in
+TRACKING_LOG_DIR = os.getenv('TRACKING_LOG_DIR', 'tracking_logs')
+
+# Global instances for easy access
+job_history_log = TrackingLog(os.path.join(TRACKING_LOG_DIR, 'job_history'),
+                              legacy_file='job_history.json', legacy_newest_first=True)
+file_upload_log = TrackingLog(os.path.join(TRACKING_LOG_DIR, 'uploads'),
+                              legacy_file='uploads/upload_log.json')
+manual_upload_log = TrackingLog(os.path.join(TRACKING_LOG_DIR, 'manual_uploads'),
+                                legacy_file='manual_uploads_log.json', max_records=100)
+signed_bol_log = TrackingLog(os.path.join(TRACKING_LOG_DIR, 'signed_bols'),
+                             legacy_file='signed_bol_tracking.json', legacy_newest_first=True,
+                             max_records=100)
+quote_log = TrackingLog(os.path.join(TRACKING_LOG_DIR, 'quotes'),
+                        legacy_file='quote_tracking.json', legacy_newest_first=True, max_records=500)
@@ -0,0 +1,560 @@
+"""
+Indexed SQLite store for work orders, finished tags, BOLs, invoices, uploads, quotes
+and report history, which used to live in flat JSON tracking files.
+Records keep their original JSON shape; lookup fields are copied into indexed columns.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Collection name -> JSON files it replaces, record key field and date fields (first non-empty wins)
+COLLECTIONS = {
+    'work_orders': {
+        'files': ['work_orders.json'], 'key': 'work_order_number',
+        'date': ['date_created', 'timestamp'], 'newest_first_files': True
+    },
+    'finished_tags': {
+        'files': ['finished_tags.json', 'finished_tags/finished_tags.json'], 'key': 'tag_id',
+        'date': ['timestamp', 'created_at', 'date']
+    },
+    'bol_tracking': {
+        'files': ['bol_tracking.json'], 'key': 'bol_number',
+        'date': ['date_generated', 'upload_date']
+    },
+    'invoices': {
+        'files': ['invoice_tracking.json'], 'key': 'invoice_number',
+        'date': ['date_generated']
+    },
+    'manual_uploads': {
+        'files': ['manual_uploads.json'], 'key': None,
+        'date': ['upload_date']
+    },
+    'quotes': {
+        'files': ['quotes.json'], 'key': 'quote_number',
+        'date': ['date_created', 'created_at', 'timestamp']
+    },
+    'inventory_report_history': {
+        'files': ['inventory_report_history.json'], 'key': None,
+        'date': ['timestamp']
+    }
+}
+
+# Indexed columns that find() and distinct() accept
+INDEXED_COLUMNS = ('work_order_number', 'customer_name', 'customer_po', 'date')
+
+# Collections whose writes refresh the work order view
+VIEW_SOURCES = ('work_orders', 'finished_tags', 'bol_tracking', 'invoices')
+
+class TrackingCollection:
+    """Repository for one kind of tracking record."""
+    
+    def __init__(self, store: 'TrackingStore', name: str):
+        """
+        Initialize the repository.
+        
+        Args:
+            store: Store holding the collection's table
+            name: Collection name from COLLECTIONS
+        """
+        self.store = store
+        self.name = name
+        self.spec = COLLECTIONS[name]
+    
+    def all(self, newest_first: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get every record in the order it was added.
+        
+        Args:
+            newest_first: Return the most recently added records first
+            limit: Maximum number of records to return
+            
+        Returns:
+            List of records
+        """
+        return self.find(newest_first=newest_first, limit=limit)
+    
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get the most recent record with a key, e.g. a work order by its number.
+        
+        Args:
+            key: Value of the collection's key field
+            
+        Returns:
+            Record or None if there is none
+        """
+        row = self.store._connect().execute(
+            f"SELECT data FROM {self.name} WHERE record_key = ? ORDER BY id DESC LIMIT 1", (str(key),)
+        ).fetchone()
+        return json.loads(row['data']) if row else None
+    
+    def find(self, work_order_number: Optional[str] = None, customer_name: Optional[str] = None,
+             customer_po: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+             newest_first: bool = False, limit: Optional[int] = None, **fields) -> List[Dict[str, Any]]:
+        """
+        Find records by indexed fields, in the order they were added.
+        
+        Args:
+            work_order_number: Exact work order number
+            customer_name: Customer name, ignoring case
+            customer_po: Exact customer PO
+            date_from: Earliest record date (inclusive, compared as text)
+            date_to: Latest record date (inclusive, compared as text)
+            newest_first: Return the most recently added records first
+            limit: Maximum number of records to return
+            **fields: Other top-level record fields to match exactly (not indexed)
+            
+        Returns:
+            List of matching records
+        """
+        clauses = []
+        params = []
+        for column, value in (('work_order_number', work_order_number), ('customer_name', customer_name),
+                              ('customer_po', customer_po)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(date_to)
+        for field, value in fields.items():
+            if not re.match(r'^\w+$', field):
+                raise ValueError(f"Invalid field name: {field}")
+            clauses.append(f"json_extract(data, '$.{field}') = ?")
+            params.append(value)
+        
+        sql = f"SELECT data FROM {self.name}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC" if newest_first else " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self.store._connect().execute(sql, params).fetchall()
+        return [json.loads(row['data']) for row in rows]
+    
+    def distinct(self, column: str) -> List[str]:
+        """
+        Get the distinct non-empty values of an indexed column.
+        
+        Args:
+            column: One of INDEXED_COLUMNS
+            
+        Returns:
+            List of values
+        """
+        if column not in INDEXED_COLUMNS:
+            raise ValueError(f"Not an indexed column: {column}")
+        rows = self.store._connect().execute(
+            f"SELECT DISTINCT {column} FROM {self.name} WHERE {column} IS NOT NULL AND {column} != ''"
+        ).fetchall()
+        return [row[0] for row in rows]
+    
+    def count(self) -> int:
+        """Get the number of records."""
+        return self.store._connect().execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+    
+    def add(self, record: Dict[str, Any]):
+        """
+        Add a record and refresh its work order's view row.
+        
+        Args:
+            record: JSON-serializable record
+        """
+        with self.store._transaction():
+            self._insert(record)
+            self.store.work_order_view.refresh_for(self.name, record)
+    
+    def _insert(self, record: Dict[str, Any]):
+        """Insert a record without touching the work order view."""
+        self.store._connect().execute(
+            f"INSERT INTO {self.name} (record_key, work_order_number, customer_name, customer_po, date, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            self._columns(record)
+        )
+    
+    def save(self, record: Dict[str, Any]):
+        """
+        Replace the most recent record with the same key, or add the record if there is none.
+        
+        Args:
+            record: JSON-serializable record
+        """
+        columns = self._columns(record)
+        conn = self.store._connect()
+        with self.store._transaction():
+            updated = 0
+            if columns[0] is not None:
+                updated = conn.execute(
+                    f"UPDATE {self.name} SET work_order_number = ?, customer_name = ?, customer_po = ?, "
+                    f"date = ?, data = ? WHERE id = (SELECT MAX(id) FROM {self.name} WHERE record_key = ?)",
+                    (*columns[1:], columns[0])
+                ).rowcount
+            if not updated:
+                self._insert(record)
+            self.store.work_order_view.refresh_for(self.name, record)
+    
+    def _columns(self, record: Dict[str, Any]) -> tuple:
+        """Get the key, indexed columns and JSON text stored for a record."""
+        def text(value):
+            return str(value) if value not in (None, '') else None
+        
+        key = text(record.get(self.spec['key'])) if self.spec['key'] else None
+        date = next((record.get(field) for field in self.spec['date'] if record.get(field)), None)
+        return (
+            key,
+            text(record.get('work_order_number')),
+            text(record.get('customer_name')),
+            text(record.get('customer_po')),
+            text(date),
+            json.dumps(record, default=str)
+        )
+
+class WorkOrderView:
+    """
+    Materialized join of each work order with its finished tags, BOL and invoice.
+    
+    One row per work order number, refreshed whenever a record for that work
+    order is written, so invoicing reads a single row instead of joining.
+    """
+    
+    def __init__(self, store: 'TrackingStore'):
+        """
+        Initialize the view.
+        
+        Args:
+            store: Store holding the source collections and the view table
+        """
+        self.store = store
+    
+    def get(self, work_order_number: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a work order joined with its finished tags, BOL and invoice.
+        
+        Args:
+            work_order_number: Work order number
+            
+        Returns:
+            View entry or None if the work order is unknown
+        """
+        row = self.store._connect().execute(
+            "SELECT * FROM work_order_view WHERE work_order_number = ?", (str(work_order_number),)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+    
+    def for_customer(self, customer_name: str) -> List[Dict[str, Any]]:
+        """
+        Get a customer's work orders, newest first.
+        
+        Work orders created on the same day are ordered by when they were first
+        added, not by when their row was last refreshed.
+        
+        Args:
+            customer_name: Customer name, ignoring case
+            
+        Returns:
+            List of view entries
+        """
+        rows = self.store._connect().execute(
+            "SELECT * FROM work_order_view WHERE customer_name = ? ORDER BY date_created DESC, "
+            "(SELECT MIN(id) FROM work_orders WHERE record_key = work_order_view.work_order_number) DESC",
+            (customer_name,)
+        ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+    
+    def refresh_for(self, collection: str, record: Dict[str, Any]):
+        """
+        Refresh the row of the work order a newly written record belongs to.
+        
+        Args:
+            collection: Name of the collection the record was written to
+            record: Record that was written
+        """
+        work_order_number = record.get('work_order_number')
+        if collection in VIEW_SOURCES and work_order_number not in (None, ''):
+            self.refresh(str(work_order_number))
+    
+    def refresh(self, work_order_number: str):
+        """
+        Recompute one work order's row from the source collections.
+        
+        Args:
+            work_order_number: Work order number
+        """
+        conn = self.store._connect()
+        work_order = self.store.work_orders.get(work_order_number)
+        if not work_order:
+            conn.execute("DELETE FROM work_order_view WHERE work_order_number = ?", (work_order_number,))
+            return
+        
+        finished_tags = self.store.finished_tags.find(work_order_number=work_order_number)
+        bols = self.store.bol_tracking.find(work_order_number=work_order_number, limit=1)
+        invoices = self.store.invoices.find(work_order_number=work_order_number, newest_first=True, limit=1)
+        invoice = invoices[0] if invoices else {}
+        conn.execute(
+            "INSERT OR REPLACE INTO work_order_view (work_order_number, customer_name, customer_po, "
+            "date_created, work_order, finished_tags, bol_number, invoice_number, invoice_total, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                work_order_number,
+                work_order.get('customer_name'),
+                work_order.get('customer_po'),
+                work_order.get('date_created') or work_order.get('timestamp', ''),
+                json.dumps(work_order, default=str),
+                json.dumps(finished_tags, default=str),
+                bols[0].get('bol_number') if bols else None,
+                invoice.get('invoice_number'),
+                invoice.get('total'),
+                datetime.now().isoformat()
+            )
+        )
+    
+    def rebuild(self) -> int:
+        """
+        Recompute every row, e.g. after importing the JSON files.
+        
+        Returns:
+            Number of work orders in the view
+        """
+        with self.store._transaction():
+            self.store._connect().execute("DELETE FROM work_order_view")
+            for work_order_number in self.store.work_orders.distinct('work_order_number'):
+                self.refresh(work_order_number)
+        return self.count()
+    
+    def count(self) -> int:
+        """Get the number of work orders in the view."""
+        return self.store._connect().execute("SELECT COUNT(*) FROM work_order_view").fetchone()[0]
+    
+    def has_undated_rows(self) -> bool:
+        """Check for rows missing the date_created their work order carries."""
+        return self.store._connect().execute(
+            "SELECT 1 FROM work_order_view WHERE COALESCE(date_created, '') = '' "
+            "AND COALESCE(json_extract(work_order, '$.date_created'), '') != '' LIMIT 1"
+        ).fetchone() is not None
+    
+    def _row_to_entry(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a view row to a dictionary with decoded JSON fields."""
+        entry = dict(row)
+        entry['work_order'] = json.loads(entry['work_order'])
+        entry['finished_tags'] = json.loads(entry['finished_tags'])
+        entry['invoice_status'] = 'Invoiced' if entry['invoice_number'] else 'Not Invoiced'
+        return entry
+
+class TrackingStore:
+    """SQLite database holding one indexed table per tracking collection."""
+    
+    def __init__(self, db_path: str = "tracking.db", base_dir: str = ".", auto_import: bool = True):
+        """
+        Initialize the store, importing the legacy JSON files on first use.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            base_dir: Directory holding the legacy JSON tracking files
+            auto_import: Import each collection's JSON files if not done before
+        """
+        self.db_path = db_path
+        self.base_dir = base_dir
+        self._local = threading.local()
+        self._collections = {name: TrackingCollection(self, name) for name in COLLECTIONS}
+        self.work_order_view = WorkOrderView(self)
+        self._init_db()
+        if auto_import:
+            self.import_json()
+        
+        # Build the view once for stores created before it existed, and rebuild
+        # rows written before date_created was read from the work order
+        if (not self.work_order_view.count() and self.work_orders.count()) or self.work_order_view.has_undated_rows():
+            self.work_order_view.rebuild()
+    
+    def __getattr__(self, name: str) -> TrackingCollection:
+        """Access collections as attributes, e.g. store.work_orders."""
+        collections = self.__dict__.get('_collections', {})
+        if name in collections:
+            return collections[name]
+        raise AttributeError(name)
+    
+    def collection(self, name: str) -> TrackingCollection:
+        """
+        Get a collection's repository.
+        
+        Args:
+            name: Collection name from COLLECTIONS
+            
+        Returns:
+            TrackingCollection
+        """
+        return self._collections[name]
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, reopening it in a new process."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # Autocommit mode; multi-statement changes use explicit transactions
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Run a block in one write transaction, or in the caller's if one is open."""
+        conn = self._connect()
+        if conn.in_transaction:
+            yield
+            return
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _init_db(self):
+        """Create the collection tables, their indexes, the work order view and the import log."""
+        statements = ["""
+            CREATE TABLE IF NOT EXISTS imports (
+                collection TEXT PRIMARY KEY,
+                files TEXT NOT NULL,
+                records INTEGER NOT NULL,
+                imported TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS work_order_view (
+                work_order_number TEXT PRIMARY KEY,
+                customer_name TEXT COLLATE NOCASE,
+                customer_po TEXT,
+                date_created TEXT,
+                work_order TEXT NOT NULL,
+                finished_tags TEXT NOT NULL,
+                bol_number TEXT,
+                invoice_number TEXT,
+                invoice_total REAL,
+                updated TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_work_order_view_customer ON work_order_view (customer_name, date_created);
+        """]
+        for name in COLLECTIONS:
+            statements.append(f"""
+                CREATE TABLE IF NOT EXISTS {name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    record_key TEXT,
+                    work_order_number TEXT,
+                    customer_name TEXT COLLATE NOCASE,
+                    customer_po TEXT,
+                    date TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_{name}_key ON {name} (record_key);
+            """)
+            for column in INDEXED_COLUMNS:
+                statements.append(f"CREATE INDEX IF NOT EXISTS idx_{name}_{column} ON {name} ({column});")
+        self._connect().executescript("\n".join(statements))
+    
+    def import_json(self, force: bool = False) -> Dict[str, int]:
+        """
+        Copy the legacy JSON tracking files into the store, once per collection.
+        
+        Records with a key already seen in an earlier file are skipped, so tags
+        present in both finished tag files are imported once.
+        
+        Args:
+            force: Replace the collection's records with the files' contents even
+                if it was imported before
+                
+        Returns:
+            Dictionary of collection name to records imported
+        """
+        imported = {}
+        conn = self._connect()
+        for name, spec in COLLECTIONS.items():
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                done = conn.execute("SELECT 1 FROM imports WHERE collection = ?", (name,)).fetchone()
+                files = None if done and not force else self._read_json_files(spec)
+                if files is None:
+                    conn.execute("ROLLBACK")
+                    continue
+                
+                if force:
+                    conn.execute(f"DELETE FROM {name}")
+                collection = self._collections[name]
+                seen = set()
+                for records in files:
+                    keys = set()
+                    for record in records:
+                        key = collection._columns(record)[0]
+                        if key is not None and key in seen:
+                            continue
+                        keys.add(key)
+                        collection._insert(record)
+                        imported[name] = imported.get(name, 0) + 1
+                    seen |= keys
+                
+                conn.execute(
+                    "INSERT OR REPLACE INTO imports (collection, files, records, imported) VALUES (?, ?, ?, ?)",
+                    (name, json.dumps(spec['files']), imported.get(name, 0), datetime.now().isoformat())
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            
+            if imported.get(name):
+                logger.info(f"Imported {imported[name]} {name} records from {', '.join(spec['files'])}")
+        
+        if any(imported.get(name) for name in VIEW_SOURCES) or force:
+            self.work_order_view.rebuild()
+        return imported
+    
+    def _read_json_files(self, spec: Dict[str, Any]) -> Optional[List[List[Dict[str, Any]]]]:
+        """Read each of a collection's JSON files oldest record first, or None if one cannot be parsed."""
+        files = []
+        for filename in spec['files']:
+            path = os.path.join(self.base_dir, filename)
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                # Leave the collection unimported so the file can be fixed and retried
+                logger.error(f"Cannot import {path}: {str(e)}")
+                return None
+            if not isinstance(data, list):
+                logger.error(f"Cannot import {path}: expected a list of records")
+                return None
+            records = list(reversed(data)) if spec.get('newest_first_files') else data
+            files.append([record for record in records if isinstance(record, dict)])
+        return files
+    
+    def backup(self, dest_path: str):
+        """
+        Write a consistent copy of the database, safe while it is in use.
+        
+        Args:
+            dest_path: Path of the copy
+        """
+        dest = sqlite3.connect(dest_path)
+        try:
+            self._connect().backup(dest)
+        finally:
+            dest.close()
+
+# Global instance for easy access
+tracking_store = TrackingStore(os.getenv('TRACKING_DB', 'tracking.db'))
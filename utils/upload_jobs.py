@@ -0,0 +1,618 @@
+"""
+Persistent BOL upload job queue.
+Stores jobs and their progress events in SQLite and runs extraction in worker processes,
+so /upload returns immediately while progress is streamed over SSE.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Events after which a job's stream is closed
+TERMINAL_EVENTS = {'done', 'error'}
+
+# Job statuses that can be put back on the queue
+RETRYABLE_STATUSES = ('failed', 'cancelled', 'timed_out')
+
+# Events published once the extractor starts appending coils to Google Sheets
+SHEET_WRITE_EVENTS = {'writing', 'write'}
+
+class UploadJobStore:
+    """SQLite-backed table of upload jobs and the events they have published."""
+    
+    def __init__(self, db_path: str = "upload_jobs.db", max_attempts: int = 3):
+        """
+        Initialize the job store.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            max_attempts: Attempts allowed before a job whose worker died is marked failed
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, reopening it in a new process."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # Autocommit mode; multi-statement changes use explicit transactions
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _init_db(self):
+        """Create the job and event tables if they do not exist."""
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                filepath TEXT NOT NULL,
+                supplier TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_pid INTEGER,
+                owner TEXT,
+                heartbeat TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                sheet_written INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                result TEXT,
+                stage_timings TEXT,
+                created TEXT NOT NULL,
+                started TEXT,
+                finished TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created);
+            CREATE TABLE IF NOT EXISTS job_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, id);
+        """)
+        
+        # Job tables created before supervisors recorded ownership and sheet writes
+        conn = self._connect()
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in (('owner', 'TEXT'), ('heartbeat', 'TEXT'),
+                                   ('sheet_written', 'INTEGER NOT NULL DEFAULT 0')):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+    
+    def create_job(self, filename: str, supplier: str, filepath: str, job_id: Optional[str] = None) -> str:
+        """
+        Queue a new upload job.
+        
+        Args:
+            filename: Uploaded PDF filename
+            supplier: Supplier identifier used for extraction
+            filepath: Path of the saved PDF
+            job_id: Id chosen by the caller, e.g. to name the saved PDF; generated if omitted
+            
+        Returns:
+            New job id
+        """
+        job_id = job_id or uuid.uuid4().hex
+        self._connect().execute(
+            "INSERT INTO jobs (id, filename, filepath, supplier, status, created) VALUES (?, ?, ?, ?, 'queued', ?)",
+            (job_id, filename, filepath, supplier, datetime.now().isoformat())
+        )
+        logger.info(f"Queued upload job {job_id} for {filename}")
+        return job_id
+    
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]):
+        """
+        Append a progress event to a job.
+        
+        A sheet write event also marks the job as having written to Google Sheets,
+        so it is not run again without being forced.
+        
+        Args:
+            job_id: Job identifier
+            event: Event name ('document', 'page', 'coil', 'writing', 'write', 'done' or 'error')
+            data: JSON-serializable event payload
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if event in SHEET_WRITE_EVENTS:
+                conn.execute("UPDATE jobs SET sheet_written = 1 WHERE id = ?", (job_id,))
+            conn.execute(
+                "INSERT INTO job_events (job_id, event, data, created) VALUES (?, ?, ?, ?)",
+                (job_id, event, json.dumps(data, default=str), datetime.now().isoformat())
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job with its status, attempts and stage timings.
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            Job dictionary or None if the job is unknown
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = self._row_to_job(row)
+        job['event_count'] = conn.execute(
+            "SELECT COUNT(*) FROM job_events WHERE job_id = ?", (job_id,)
+        ).fetchone()[0]
+        return job
+    
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get the most recent jobs, newest first.
+        
+        Args:
+            limit: Maximum number of jobs to return
+            
+        Returns:
+            List of job dictionaries
+        """
+        rows = self._connect().execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+    
+    def running_jobs(self) -> List[Dict[str, Any]]:
+        """Get every job currently marked as running."""
+        rows = self._connect().execute("SELECT * FROM jobs WHERE status = 'running'").fetchall()
+        return [self._row_to_job(row) for row in rows]
+    
+    def heartbeat(self, owner: str):
+        """
+        Mark a supervisor's running jobs as still watched.
+        
+        Args:
+            owner: Identifier of the supervisor whose workers run the jobs
+        """
+        self._connect().execute(
+            "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = 'running'",
+            (datetime.now().isoformat(), owner)
+        )
+    
+    def claim_next_job(self, worker_pid: int, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically move the oldest queued job to running for a worker.
+        
+        Args:
+            worker_pid: Process id of the claiming worker
+            owner: Identifier of the supervisor the worker belongs to
+            
+        Returns:
+            The claimed job, or None if the queue is empty
+        """
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker_pid = ?, owner = ?, "
+                    "heartbeat = ?, started = ? WHERE id = ?",
+                    (worker_pid, owner, now, now, row['id'])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get_job(row['id']) if row else None
+    
+    def finish_job(self, job_id: str, status: str, error: Optional[str] = None,
+                   result: Optional[Dict[str, Any]] = None, stage_timings: Optional[Dict[str, float]] = None,
+                   worker_pid: Optional[int] = None, owner: Optional[str] = None):
+        """
+        Record the outcome of a job and publish its terminal event.
+        
+        A running job is only finished for the worker that claimed it, so a
+        worker whose job was re-queued cannot complete it a second time.
+        Without a worker the job must still be queued.
+        
+        Args:
+            job_id: Job identifier
+            status: Final status ('completed', 'failed', 'cancelled' or 'timed_out')
+            error: Error message for unsuccessful jobs
+            result: Result summary for completed jobs
+            stage_timings: Seconds spent in each processing stage
+            worker_pid: Process id of the worker that claimed the job
+            owner: Identifier of the supervisor the worker belongs to
+        """
+        if worker_pid is None:
+            condition, params = "status = 'queued'", ()
+        else:
+            condition, params = "status = 'running' AND worker_pid = ? AND owner = ?", (worker_pid, owner)
+        
+        # Only the current claim is updated, so a worker and the supervisor
+        # racing to finish the same job publish a single terminal event
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, result = ?, stage_timings = ?, finished = ?, worker_pid = NULL "
+            f"WHERE id = ? AND {condition}",
+            (status, error, json.dumps(result, default=str) if result is not None else None,
+             json.dumps(stage_timings) if stage_timings is not None else None,
+             datetime.now().isoformat(), job_id, *params)
+        )
+        if not cursor.rowcount:
+            return
+        if status == 'completed':
+            self.publish(job_id, 'done', result or {})
+        else:
+            self.publish(job_id, 'error', {'status': status, 'error': error})
+    
+    def request_cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued job now, or flag a running job for the supervisor to stop.
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            True if the job was queued or running, False otherwise
+        """
+        job = self.get_job(job_id)
+        if not job:
+            return False
+        if job['status'] == 'queued':
+            self.finish_job(job_id, 'cancelled', error='Cancelled before processing started')
+            return True
+        if job['status'] == 'running':
+            self._connect().execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            return True
+        return False
+    
+    def retry_job(self, job_id: str, force: bool = False) -> bool:
+        """
+        Put a failed, cancelled or timed-out job back on the queue.
+        
+        The job's previous events are cleared so its stream starts afresh.
+        A job that already wrote to Google Sheets would append its coils again,
+        so it is only re-queued when forced.
+        
+        Args:
+            job_id: Job identifier
+            force: Re-queue the job even if it already wrote to Google Sheets
+            
+        Returns:
+            True if the job was re-queued, False otherwise
+        """
+        conn = self._connect()
+        placeholders = ', '.join('?' for _ in RETRYABLE_STATUSES)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = 'queued', cancel_requested = 0, sheet_written = 0, error = NULL, "
+                f"result = NULL, stage_timings = NULL, started = NULL, finished = NULL "
+                f"WHERE id = ? AND status IN ({placeholders}) AND (sheet_written = 0 OR ?)",
+                (job_id, *RETRYABLE_STATUSES, force)
+            )
+            if cursor.rowcount:
+                conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount > 0
+    
+    def requeue_orphaned_job(self, job: Dict[str, Any], reason: str):
+        """
+        Handle a running job whose worker or supervisor died without finishing it.
+        
+        The job is re-queued while it has attempts left and failed otherwise.
+        A job that already wrote to Google Sheets is failed rather than run again,
+        which would append its coils a second time.
+        Nothing happens if the job was finished or claimed again since it was read.
+        
+        Args:
+            job: Running job as returned by running_jobs
+            reason: Description of what happened to the worker
+        """
+        if job['sheet_written']:
+            self.finish_job(job['id'], 'failed',
+                            error=f"{reason} after writing to Google Sheets; check the sheet before retrying",
+                            worker_pid=job['worker_pid'], owner=job['owner'])
+        elif job['attempts'] < self.max_attempts:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET status = 'queued', worker_pid = NULL, owner = NULL, heartbeat = NULL, started = NULL "
+                "WHERE id = ? AND status = 'running' AND worker_pid = ? AND owner IS ?",
+                (job['id'], job['worker_pid'], job['owner'])
+            )
+            if cursor.rowcount:
+                logger.warning(f"Re-queued upload job {job['id']} ({reason})")
+        else:
+            self.finish_job(job['id'], 'failed', error=f"{reason} after {job['attempts']} attempts",
+                            worker_pid=job['worker_pid'], owner=job['owner'])
+    
+    def stream(self, job_id: str, heartbeat_seconds: float = 30, poll_seconds: float = 0.5) -> Iterator[str]:
+        """
+        Yield a job's events as server-sent event messages.
+        
+        Events already published are replayed first, so a client that connects
+        late still sees the whole job. The stream ends after a terminal event.
+        
+        Args:
+            job_id: Job identifier
+            heartbeat_seconds: Idle time before a heartbeat comment is sent
+            poll_seconds: Interval between checks for new events
+            
+        Yields:
+            SSE-formatted messages
+        """
+        if not self.get_job(job_id):
+            yield self._format_event('error', {'error': 'Unknown job'})
+            return
+        
+        last_id = 0
+        idle_since = time.monotonic()
+        while True:
+            rows = self._connect().execute(
+                "SELECT id, event, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, last_id)
+            ).fetchall()
+            
+            for row in rows:
+                last_id = row['id']
+                yield self._format_event(row['event'], json.loads(row['data']))
+                if row['event'] in TERMINAL_EVENTS:
+                    return
+            
+            if rows:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= heartbeat_seconds:
+                # Comment lines keep proxies from closing an idle connection
+                yield ": heartbeat\n\n"
+                idle_since = time.monotonic()
+            
+            time.sleep(poll_seconds)
+    
+    def stream_activity(self, heartbeat_seconds: float = 30, poll_seconds: float = 0.5) -> Iterator[str]:
+        """
+        Yield events of every job as one-line server-sent log messages.
+        
+        Only events published after the client connects are sent. Each stream
+        reads the event table itself, so concurrent clients all see every event.
+        
+        Args:
+            heartbeat_seconds: Idle time before a heartbeat comment is sent
+            poll_seconds: Interval between checks for new events
+            
+        Yields:
+            SSE-formatted messages
+        """
+        last_id = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM job_events").fetchone()[0]
+        idle_since = time.monotonic()
+        while True:
+            rows = self._connect().execute(
+                "SELECT id, job_id, event, data FROM job_events WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+            
+            for row in rows:
+                last_id = row['id']
+                yield f"data: [{row['job_id'][:8]}] {row['event']}: {row['data']}\n\n"
+            
+            if rows:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= heartbeat_seconds:
+                yield ": heartbeat\n\n"
+                idle_since = time.monotonic()
+            
+            time.sleep(poll_seconds)
+    
+    def _format_event(self, event: str, data: Dict[str, Any]) -> str:
+        """Format one named SSE message."""
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a jobs row into a dictionary with decoded JSON columns."""
+        job = dict(row)
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        job['sheet_written'] = bool(job['sheet_written'])
+        for key in ('result', 'stage_timings'):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+def _run_job(store: UploadJobStore, extractor, job: Dict[str, Any]):
+    """Run extraction for one claimed job, recording per-stage timings."""
+    job_id = job['id']
+    started = time.perf_counter()
+    marks = {}
+    
+    def on_progress(event, data):
+        # Validation ends at 'document', extraction at the last page/coil
+        # event and the sheet write at 'write'
+        now = time.perf_counter()
+        if event == 'document':
+            marks['validated'] = now
+        elif event in ('page', 'coil'):
+            marks['extracted'] = now
+        elif event == 'write':
+            marks['written'] = now
+        store.publish(job_id, event, data)
+    
+    try:
+        result = extractor.process_bol_pdf_with_supplier(job['filepath'], job['supplier'],
+                                                         progress_callback=on_progress)
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    
+    finished = time.perf_counter()
+    validated = marks.get('validated', started)
+    extracted = marks.get('extracted', validated)
+    stage_timings = {
+        'queued_seconds': round((datetime.fromisoformat(job['started']) -
+                                 datetime.fromisoformat(job['created'])).total_seconds(), 3),
+        'validate_seconds': round(validated - started, 3),
+        'extract_seconds': round(extracted - validated, 3),
+        'write_seconds': round(marks['written'] - extracted, 3) if 'written' in marks else 0.0,
+        'total_seconds': round(finished - started, 3)
+    }
+    
+    claim = {'worker_pid': job['worker_pid'], 'owner': job['owner']}
+    if result.get('success'):
+        store.finish_job(job_id, 'completed', result={
+            'coils_processed': result.get('coils_processed', 1),
+            'pages_processed': result.get('pages_processed'),
+            'failed_pages': result.get('failed_pages', []),
+            'cached_pages': result.get('cached_pages', 0)
+        }, stage_timings=stage_timings, **claim)
+    else:
+        store.finish_job(job_id, 'failed', error=result.get('error', 'Unknown processing error'),
+                         stage_timings=stage_timings, **claim)
+
+def _worker_main(db_path: str, owner: str, poll_seconds: float):
+    """Worker process loop: claim queued jobs and run them on one long-lived extractor."""
+    logging.basicConfig(level=logging.INFO)
+    store = UploadJobStore(db_path)
+    extractor = None
+    
+    while True:
+        job = store.claim_next_job(os.getpid(), owner)
+        if not job:
+            time.sleep(poll_seconds)
+            continue
+        
+        logger.info(f"Worker {os.getpid()} processing upload job {job['id']} (attempt {job['attempts']})")
+        try:
+            # The extractor keeps its OCR pool and LLM connections between jobs
+            if extractor is None:
+                from bol_extractor.config import Config
+                from bol_extractor.extractor import BOLExtractor
+                extractor = BOLExtractor(Config())
+            _run_job(store, extractor, job)
+        except Exception as e:
+            logger.error(f"Upload job {job['id']} crashed: {str(e)}")
+            store.finish_job(job['id'], 'failed', error=str(e), worker_pid=job['worker_pid'], owner=owner)
+
+class UploadJobWorkers:
+    """
+    Supervises the worker processes and enforces job timeouts and cancellation.
+    
+    Several supervisors (one per web process) may share a job store. Each one
+    only stops or re-queues the jobs its own workers claimed, and takes over
+    another supervisor's jobs once that supervisor stops sending heartbeats.
+    """
+    
+    def __init__(self, store: UploadJobStore, workers: int = 2, timeout_seconds: float = 300,
+                 poll_seconds: float = 1.0, heartbeat_timeout_seconds: float = 60):
+        """
+        Initialize the worker supervisor.
+        
+        Args:
+            store: Job store shared with the workers
+            workers: Number of worker processes
+            timeout_seconds: Maximum run time of a job before its worker is stopped
+            poll_seconds: Interval between supervisor checks and worker queue polls
+            heartbeat_timeout_seconds: Heartbeat age after which another supervisor's jobs are re-queued
+        """
+        self.store = store
+        self.workers = max(1, workers)
+        self.timeout_seconds = timeout_seconds
+        self.poll_seconds = poll_seconds
+        self.heartbeat_timeout_seconds = heartbeat_timeout_seconds
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        """Give this process its own owner id and an empty worker pool."""
+        # Host, pid and a random suffix, so a restarted server never reuses an id
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pid = os.getpid()
+        self._processes = {}
+        self._thread = None
+    
+    def start(self):
+        """Start the worker processes and the supervisor thread; later calls do nothing."""
+        with self._lock:
+            # A server that forks after loading the app gives each child its own supervisor
+            if self._pid != os.getpid():
+                self._reset()
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._supervise, name='upload-job-supervisor', daemon=True)
+            self._thread.start()
+        logger.info(f"Upload job workers started: {self.workers} processes, {self.timeout_seconds}s timeout")
+    
+    def _spawn_worker(self):
+        """Start one worker process."""
+        process = self._context.Process(
+            target=_worker_main, args=(self.store.db_path, self.owner, self.poll_seconds), daemon=True
+        )
+        process.start()
+        self._processes[process.pid] = process
+    
+    def _supervise(self):
+        """Keep the pool at size, stop overdue or cancelled jobs and recover orphaned ones."""
+        while True:
+            try:
+                for pid, process in list(self._processes.items()):
+                    if not process.is_alive():
+                        del self._processes[pid]
+                while len(self._processes) < self.workers:
+                    self._spawn_worker()
+                
+                self.store.heartbeat(self.owner)
+                for job in self.store.running_jobs():
+                    self._check_running_job(job)
+            except Exception as e:
+                logger.error(f"Upload job supervisor error: {str(e)}")
+            
+            time.sleep(self.poll_seconds)
+    
+    def _check_running_job(self, job: Dict[str, Any]):
+        """Stop a running job's worker if the job was cancelled or ran past the timeout."""
+        if job['owner'] != self.owner:
+            # Another supervisor's job; taken over only once that supervisor has gone quiet,
+            # which also covers jobs left running by a previous server
+            heartbeat = job['heartbeat'] or job['started']
+            if (datetime.now() - datetime.fromisoformat(heartbeat)).total_seconds() > self.heartbeat_timeout_seconds:
+                self.store.requeue_orphaned_job(job, 'supervisor stopped sending heartbeats')
+            return
+        
+        process = self._processes.get(job['worker_pid'])
+        if process is None or not process.is_alive():
+            self.store.requeue_orphaned_job(job, 'worker process exited')
+            return
+        
+        elapsed = (datetime.now() - datetime.fromisoformat(job['started'])).total_seconds()
+        if job['cancel_requested']:
+            status, error = 'cancelled', 'Cancelled while processing'
+        elif elapsed > self.timeout_seconds:
+            status, error = 'timed_out', f"Processing exceeded the {self.timeout_seconds}s timeout"
+        else:
+            return
+        
+        # Extraction cannot be interrupted mid-page, so the worker is replaced
+        logger.warning(f"Stopping worker {process.pid} for upload job {job['id']}: {error}")
+        process.terminate()
+        process.join(timeout=5)
+        self._processes.pop(process.pid, None)
+        self.store.finish_job(job['id'], status, error=error,
+                              stage_timings={'total_seconds': round(elapsed, 3)},
+                              worker_pid=job['worker_pid'], owner=self.owner)
+
+# Global instance for easy access
+upload_jobs = UploadJobStore(os.getenv('UPLOAD_JOBS_DB', 'upload_jobs.db'))
@@ -0,0 +1,213 @@
+"""
+Summary index of the work orders saved under work_orders/<customer>/<po>/.
+Rows are written when a work order is saved, so history pages and the dashboard
+query one table instead of walking and parsing every work-order file.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Columns history queries may sort by
+SORT_COLUMNS = ('date', 'modified', 'work_order_number', 'customer_name', 'po', 'tag_count')
+
+def count_work_order_tags(data: Dict[str, Any]) -> int:
+    """
+    Count the customer tags across a work order's CTL and slitting jobs.
+    
+    Args:
+        data: Work order form data
+        
+    Returns:
+        Number of tags
+    """
+    total_tags = 0
+    for job in data.get('ctl_jobs', []) + data.get('slitting_jobs', []):
+        tags = job.get('customer_tags', '')
+        if tags:
+            total_tags += len([t.strip() for t in tags.split(',') if t.strip()])
+    return total_tags
+
+class WorkOrderIndex:
+    """SQLite-backed history rows for saved work-order files."""
+    
+    def __init__(self, db_path: str = "work_order_index.db", base_path: str = "work_orders"):
+        """
+        Initialize the index, building it from disk if it is empty.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            base_path: Directory holding the customer/PO work-order folders
+        """
+        self.db_path = db_path
+        self.base_path = base_path
+        self._local = threading.local()
+        self._init_db()
+        
+        if not self.count() and os.path.isdir(base_path):
+            self.rebuild()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, reopening it in a new process."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _init_db(self):
+        """Create the history table if it does not exist."""
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS work_order_history (
+                json_file TEXT PRIMARY KEY,
+                work_order_number TEXT NOT NULL,
+                customer_name TEXT NOT NULL,
+                po TEXT NOT NULL,
+                date TEXT NOT NULL,
+                modified TEXT NOT NULL,
+                tag_count INTEGER NOT NULL,
+                all_tags TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_date ON work_order_history (date);
+            CREATE INDEX IF NOT EXISTS idx_history_modified ON work_order_history (modified);
+            CREATE INDEX IF NOT EXISTS idx_history_customer ON work_order_history (customer_name, po);
+        """)
+    
+    def _summarize(self, customer: str, po: str, filename: str, data: Dict[str, Any],
+                   modified: float) -> tuple:
+        """Build the history row for one work-order file."""
+        return (
+            f"{customer}/{po}/{filename}",
+            str(data.get('work_order_number', 'Unknown')),
+            customer,
+            po,
+            str(data.get('date_submitted', '') or ''),
+            datetime.fromtimestamp(modified).strftime('%Y-%m-%d %H:%M:%S'),
+            count_work_order_tags(data),
+            str(data.get('customer_tags', '') or '')
+        )
+    
+    def record(self, json_path: str, data: Dict[str, Any]):
+        """
+        Add or refresh the row for a work order that was just saved.
+        
+        Args:
+            json_path: Path of the saved file, work_orders/<customer>/<po>/<file>.json
+            data: Work order form data that was written to it
+        """
+        po_path, filename = os.path.split(json_path)
+        customer_path, po = os.path.split(po_path)
+        customer = os.path.basename(customer_path)
+        row = self._summarize(customer, po, filename, data, os.path.getmtime(json_path))
+        self._connect().execute(
+            "INSERT OR REPLACE INTO work_order_history VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row
+        )
+    
+    def rebuild(self) -> int:
+        """
+        Regenerate every row from the work-order files on disk.
+        
+        Returns:
+            Number of work orders indexed
+        """
+        rows = []
+        if os.path.isdir(self.base_path):
+            for customer in os.listdir(self.base_path):
+                customer_path = os.path.join(self.base_path, customer)
+                if not os.path.isdir(customer_path):
+                    continue
+                
+                for po in os.listdir(customer_path):
+                    po_path = os.path.join(customer_path, po)
+                    if not os.path.isdir(po_path):
+                        continue
+                    
+                    for file in os.listdir(po_path):
+                        if not file.endswith(".json"):
+                            continue
+                        json_path = os.path.join(po_path, file)
+                        try:
+                            with open(json_path, 'r') as f:
+                                data = json.load(f)
+                            rows.append(self._summarize(customer, po, file, data, os.path.getmtime(json_path)))
+                        except Exception as e:
+                            logger.error(f"Error reading work order JSON {json_path}: {str(e)}")
+        
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM work_order_history")
+            conn.executemany("INSERT INTO work_order_history VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        logger.info(f"Indexed {len(rows)} work orders from {self.base_path}")
+        return len(rows)
+    
+    def count(self, customer_name: Optional[str] = None) -> int:
+        """
+        Count indexed work orders.
+        
+        Args:
+            customer_name: Only count this customer's work orders
+            
+        Returns:
+            Number of work orders
+        """
+        if customer_name:
+            sql, params = "SELECT COUNT(*) FROM work_order_history WHERE customer_name = ?", (customer_name,)
+        else:
+            sql, params = "SELECT COUNT(*) FROM work_order_history", ()
+        return self._connect().execute(sql, params).fetchone()[0]
+    
+    def query(self, page: int = 1, per_page: int = 50, sort: str = 'date', descending: bool = True,
+              customer_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of history rows.
+        
+        Args:
+            page: 1-indexed page number
+            per_page: Rows per page
+            sort: Column to sort by, one of SORT_COLUMNS
+            descending: Sort largest or newest first
+            customer_name: Only return this customer's work orders
+            
+        Returns:
+            List of history entries with download links
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort work order history by {sort}")
+        
+        where, params = "", []
+        if customer_name:
+            where, params = "WHERE customer_name = ?", [customer_name]
+        direction = "DESC" if descending else "ASC"
+        rows = self._connect().execute(
+            f"SELECT * FROM work_order_history {where} "
+            f"ORDER BY {sort} {direction}, json_file {direction} LIMIT ? OFFSET ?",
+            (*params, per_page, (max(page, 1) - 1) * per_page)
+        ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+    
+    def _row_to_entry(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a history row to the entry shape the history pages use."""
+        entry = dict(row)
+        customer, po, filename = entry['customer_name'], entry['po'], entry.pop('json_file').rsplit('/', 1)[-1]
+        entry['filename'] = filename
+        entry['pdf_path'] = f"/download-work-order/{customer}/{po}/{entry['work_order_number']}.pdf"
+        entry['json_path'] = f"/download-work-order/{customer}/{po}/{filename}"
+        return entry
+
+# Global instance for easy access
+work_order_index = WorkOrderIndex(os.getenv('WORK_ORDER_INDEX_DB', 'work_order_index.db'))